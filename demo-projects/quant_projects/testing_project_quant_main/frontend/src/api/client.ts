@@ -5,10 +5,55 @@ const api = axios.create({
   timeout: 300000, // 5 min for long-running operations like backtest
 });
 
+// --- Jobs ---
+export const getJob = (jobId: string) => api.get(`/jobs/${jobId}`).then(r => r.data);
+export const listJobs = (kind?: string) =>
+  api.get('/jobs', { params: kind ? { kind } : {} }).then(r => r.data);
+
+// Poll a background job until it finishes; resolves to its result (or error payload)
+export const waitForJob = async (jobId: string, intervalMs = 1000): Promise<any> => {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (job.error && !job.status) return job;
+    if (job.status === 'done') return job.result;
+    if (job.status === 'failed') return { error: job.error, detail: job.error_type };
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
+
+const jobResult = (job: any) => {
+  if (job.status === 'failed') return { error: job.error, detail: job.error_type };
+  return job.status === 'done' ? job.result : job;
+};
+
+// Follow a background job over SSE, calling onProgress for each event; falls back to polling
+export const followJob = (jobId: string, onProgress: (event: any) => void): Promise<any> =>
+  new Promise(resolve => {
+    if (typeof EventSource === 'undefined') {
+      resolve(waitForJob(jobId));
+      return;
+    }
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    source.addEventListener('progress', (e: MessageEvent) => onProgress(JSON.parse(e.data)));
+    source.addEventListener('end', () => {
+      source.close();
+      resolve(getJob(jobId).then(jobResult));
+    });
+    source.onerror = () => {
+      // EventSource retries with Last-Event-ID on its own; only give up once closed
+      if (source.readyState === EventSource.CLOSED) resolve(waitForJob(jobId));
+    };
+  });
+
+const submitAndWait = (data: any, onProgress?: (event: any) => void) => {
+  if (!(data.job_id && data.status === 'submitted')) return data;
+  return onProgress ? followJob(data.job_id, onProgress) : waitForJob(data.job_id);
+};
+
 // --- Data ---
 export const getDataStatus = () => api.get('/data/status').then(r => r.data);
-export const updateData = (categories: string[], force = false) =>
-  api.post('/data/update', { categories, force }).then(r => r.data);
+export const updateData = (categories: string[], force = false, onProgress?: (event: any) => void) =>
+  api.post('/data/update', { categories, force, background: true }).then(r => submitAndWait(r.data, onProgress));
 
 // --- Universe ---
 export const getUniverse = (subsector?: string) =>
@@ -16,7 +61,8 @@ export const getUniverse = (subsector?: string) =>
 
 // --- Factors ---
 export const getFactors = () => api.get('/factors').then(r => r.data);
-export const computeFactors = () => api.post('/factors/compute').then(r => r.data);
+export const computeFactors = () =>
+  api.post('/factors/compute', null, { params: { background: true } }).then(r => submitAndWait(r.data));
 
 // --- Signals ---
 export const getSignals = () => api.get('/signals').then(r => r.data);
@@ -24,12 +70,40 @@ export const getSignals = () => api.get('/signals').then(r => r.data);
 // --- Risk ---
 export const getRisk = () => api.get('/risk').then(r => r.data);
 
+// Charts cannot show more points than this; the server LTTB-downsamples to it
+const CHART_POINTS = 1500;
+
 // --- Backtest ---
-export const runBacktest = (startDate: string, endDate: string, initialCapital?: number) =>
-  api.post('/backtest/run', { start_date: startDate, end_date: endDate, initial_capital: initialCapital }).then(r => r.data);
-export const getLatestBacktest = () => api.get('/backtest/latest').then(r => r.data);
+export const runBacktest = (
+  startDate: string, endDate: string, initialCapital?: number, onProgress?: (event: any) => void,
+) =>
+  api.post('/backtest/run', {
+    start_date: startDate, end_date: endDate, initial_capital: initialCapital,
+    background: true, max_points: CHART_POINTS,
+  }).then(r => submitAndWait(r.data, onProgress));
+export const getLatestBacktest = () =>
+  api.get('/backtest/latest', { params: { max_points: CHART_POINTS } }).then(r => r.data);
+export const listRuns = (limit = 50, offset = 0) =>
+  api.get('/backtest/runs', { params: { limit, offset } }).then(r => r.data);
+export const getRun = (runId: string) =>
+  api.get(`/backtest/runs/${runId}`, { params: { max_points: CHART_POINTS } }).then(r => r.data);
+export const compareRuns = (runIds: string[]) =>
+  api.get('/backtest/runs/compare', {
+    params: { ids: runIds, max_points: CHART_POINTS },
+    paramsSerializer: { indexes: null },
+  }).then(r => r.data);
+// Continue a stored run to a later end date (recorded as a new run)
+export const extendRun = (runId: string, endDate: string, onProgress?: (event: any) => void) =>
+  api.post(`/backtest/runs/${runId}/extend`, {
+    end_date: endDate, background: true, max_points: CHART_POINTS,
+  }).then(r => submitAndWait(r.data, onProgress));
+// Page through a run's trade log: pass the previous response's next_cursor
+export const getTrades = (cursor?: string, limit = 500) =>
+  api.get('/backtest/trades', { params: cursor ? { cursor, limit } : { limit } }).then(r => r.data);
 
 // --- Report ---
-export const getReport = () => api.get('/report').then(r => r.data);
+export const getReport = (runId?: string) =>
+  api.get('/report', { params: { max_points: CHART_POINTS, ...(runId ? { run_id: runId } : {}) } })
+    .then(r => r.data);
 
 export default api;
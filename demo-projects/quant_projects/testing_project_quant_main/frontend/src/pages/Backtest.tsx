@@ -31,6 +31,8 @@ const Backtest: React.FC = () => {
   const [capital, setCapital] = useState('1000000');
   const [result, setResult] = useState<any>(null);
   const [loading, setLoading] = useState(false);
+  const [liveNav, setLiveNav] = useState<{ date: string; nav: number }[]>([]);
+  const [percent, setPercent] = useState(0);
   const [initialLoad, setInitialLoad] = useState(true);
 
   useEffect(() => {
@@ -41,8 +43,14 @@ const Backtest: React.FC = () => {
 
   const handleRun = async () => {
     setLoading(true);
+    setLiveNav([]);
+    setPercent(0);
     try {
-      const data = await runBacktest(startDate, endDate, parseFloat(capital));
+      const data = await runBacktest(startDate, endDate, parseFloat(capital), (event) => {
+        if (event.type !== 'backtest') return;
+        setLiveNav(prev => [...prev, { date: event.date, nav: event.nav }]);
+        setPercent(event.percent);
+      });
       if (!data.error) setResult(data);
     } finally {
       setLoading(false);
@@ -54,7 +62,7 @@ const Backtest: React.FC = () => {
   }
 
   const metrics = result?.metrics;
-  const navData = result?.nav_series || [];
+  const navData = loading && liveNav.length > 0 ? liveNav : result?.nav_series || [];
   const tradeLog = result?.trade_log || [];
 
   return (
@@ -74,21 +82,23 @@ const Backtest: React.FC = () => {
               size="small" sx={{ width: 150 }} />
             <Button variant="contained" onClick={handleRun} disabled={loading}
               startIcon={loading ? <CircularProgress size={18} color="inherit" /> : null}>
-              {loading ? '运行中...' : '运行回测'}
+              {loading ? `运行中... ${percent.toFixed(0)}%` : '运行回测'}
             </Button>
           </Box>
         </CardContent>
       </Card>
 
       {/* Results */}
-      {metrics && (
+      {(metrics || navData.length > 0) && (
         <>
-          <Grid container spacing={2} sx={{ mb: 3 }}>
-            <Grid size={{ xs: 6, md: 3 }}><MetricCard label="年化收益" value={`${(metrics.annual_return * 100).toFixed(1)}%`} /></Grid>
-            <Grid size={{ xs: 6, md: 3 }}><MetricCard label="夏普比率" value={metrics.sharpe_ratio?.toFixed(2)} /></Grid>
-            <Grid size={{ xs: 6, md: 3 }}><MetricCard label="最大回撤" value={`${(metrics.max_drawdown * 100).toFixed(1)}%`} /></Grid>
-            <Grid size={{ xs: 6, md: 3 }}><MetricCard label="胜率" value={`${(metrics.win_rate * 100).toFixed(1)}%`} /></Grid>
-          </Grid>
+          {metrics && (
+            <Grid container spacing={2} sx={{ mb: 3 }}>
+              <Grid size={{ xs: 6, md: 3 }}><MetricCard label="年化收益" value={`${(metrics.annual_return * 100).toFixed(1)}%`} /></Grid>
+              <Grid size={{ xs: 6, md: 3 }}><MetricCard label="夏普比率" value={metrics.sharpe_ratio?.toFixed(2)} /></Grid>
+              <Grid size={{ xs: 6, md: 3 }}><MetricCard label="最大回撤" value={`${(metrics.max_drawdown * 100).toFixed(1)}%`} /></Grid>
+              <Grid size={{ xs: 6, md: 3 }}><MetricCard label="胜率" value={`${(metrics.win_rate * 100).toFixed(1)}%`} /></Grid>
+            </Grid>
+          )}
 
           {/* NAV chart */}
           {navData.length > 0 && (
@@ -155,7 +165,7 @@ const Backtest: React.FC = () => {
         </>
       )}
 
-      {!metrics && (
+      {!metrics && navData.length === 0 && (
         <Card>
           <CardContent sx={{ textAlign: 'center', py: 5 }}>
             <Typography color="text.secondary">设置参数并点击"运行回测"开始</Typography>
@@ -4,17 +4,27 @@ CLI entry point
 """
 import argparse
 import sys
-from pathlib import Path
 
-import yaml
+# Commands that never go through the daemon
+_LOCAL_COMMANDS = {"serve", "serve-daemon"}
 
 
 def load_config(config_path: str = "config/settings.yaml") -> dict:
     """Load configuration from YAML file."""
+    import yaml
+
     with open(config_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
+def _open_store(config):
+    """The command's DataStore: the daemon's warm store when running inside it."""
+    from src.data.storage import DataStore
+    from src.ops.daemon import warm_store
+
+    return warm_store(config) or DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+
+
 def cmd_update(args, config):
     """Update market data from data sources."""
     from src.data.pipeline import DataPipeline
@@ -77,7 +87,7 @@ def cmd_universe(args, config):
     from src.universe.classifier import get_universe
 
     date = args.date
-    universe = get_universe(config, date=date)
+    universe = get_universe(config, date=date, store=_open_store(config))
     print(f"\n有色金属股票池 ({date or '最新'}):")
     print(f"  总计: {len(universe)} 只股票")
     for subsector, stocks in universe.groupby("subsector"):
@@ -91,25 +101,25 @@ def cmd_factors(args, config):
     from src.factors.base import compute_all_factors
 
     date = args.date
-    factor_matrix = compute_all_factors(config, date=date)
+    factor_matrix = compute_all_factors(config, date=date, store=_open_store(config))
     print(f"\n因子矩阵: {factor_matrix.shape[0]} 只股票 x {factor_matrix.shape[1]} 个因子")
     if args.detail:
         print(factor_matrix.round(3).to_string())
 
 
 def cmd_signal(args, config):
-    """Generate trading signals."""
-    from src.strategy.signal import generate_signals, get_sentiment_labels
-
-    signals = generate_signals(config, date=args.date)
-
-    # Get sentiment labels for all signal symbols
-    symbols = [s["symbol"] for s in signals]
-    sentiment_labels = get_sentiment_labels(symbols, config) if symbols else {}
-
-    print("\n交易信号:")
-    for sig in signals:
-        label = sentiment_labels.get(sig["symbol"], "")
+    """Show the latest persisted signal set (build one with --refresh)."""
+    from src.strategy.signal_sets import build_signal_set, load_signal_set
+
+    store = _open_store(config)
+    signal_set = None if args.refresh else load_signal_set(store, as_of=args.date)
+    if signal_set is None:
+        signal_set = build_signal_set(config, date=args.date, store=store)
+
+    stale = " (数据已更新, 可用 --refresh 重新生成)" if signal_set["stale"] else ""
+    print(f"\n交易信号 ({signal_set['as_of']}, 生成于 {signal_set['built_at'][:19]}){stale}:")
+    for sig in signal_set["signals"]:
+        label = sig.get("sentiment_label") or ""
         label_str = f" | {label}" if label else ""
         print(f"  {sig['action']:6s} {sig['symbol']} ({sig['name']}) "
               f"目标权重: {sig['target_weight']:.1%}{label_str}")
@@ -119,7 +129,7 @@ def cmd_risk_check(args, config):
     """Run daily risk check."""
     from src.risk.alerts import run_daily_risk_check
 
-    report = run_daily_risk_check(config)
+    report = run_daily_risk_check(config, store=_open_store(config))
     print("\n风控检查报告:")
     print(f"  组合回撤: {report['drawdown']:.2%}")
     print(f"  止损预警: {len(report['stop_loss_alerts'])} 只")
@@ -128,64 +138,173 @@ def cmd_risk_check(args, config):
 
 def cmd_backtest(args, config):
     """Run strategy backtest."""
-    import json
     from src.backtest.engine import BacktestEngine
-
-    engine = BacktestEngine(config)
-    result = engine.run(
-        start_date=args.start,
-        end_date=args.end,
-    )
+    from src.backtest.run_store import RunStore
+
+    if getattr(args, "fast", False):
+        config = {**config, "backtest": {**config.get("backtest", {}), "mode": "fast"}}
+
+    # Identical runs (same config, dates and data version) are reused from the run store
+    runs = RunStore.from_config(config)
+    engine = BacktestEngine(config, run_store=runs)
+    label = getattr(args, "label", None)
+    if getattr(args, "variants", None) is not None:
+        _backtest_variants(args, config, runs)
+        return
+    if getattr(args, "extend", None):
+        try:
+            result = engine.extend(args.extend, end_date=args.end, label=label)
+        except (KeyError, ValueError) as e:
+            print(f"\n无法续跑回测记录: {e}")
+            return
+    else:
+        if not args.start:
+            print("\n请指定 --start, 或使用 --extend RUN_ID 续跑已有回测")
+            return
+        result = engine.run(
+            start_date=args.start,
+            end_date=args.end,
+            use_cache=not getattr(args, "no_cache", False),
+            label=label,
+        )
     metrics = result.metrics
     print("\n回测结果:")
     print(f"  年化收益: {metrics['annual_return']:.2%}")
     print(f"  夏普比率: {metrics['sharpe_ratio']:.2f}")
     print(f"  最大回撤: {metrics['max_drawdown']:.2%}")
     print(f"  胜率:     {metrics['win_rate']:.2%}")
+    print(f"  交易回合: {metrics.get('round_trips', 0)} (平均持仓 {metrics.get('avg_holding_days', 0):.1f} 天)")
     print(f"  总交易成本: {metrics['total_costs']:.0f} 元")
 
-    # Save results for report command
-    output_dir = Path(config.get("report", {}).get("output_dir", "reports"))
-    output_dir.mkdir(parents=True, exist_ok=True)
-    result.nav_series.to_csv(output_dir / "last_nav.csv")
-    if not result.trade_log.empty:
-        result.trade_log.to_csv(output_dir / "last_trades.csv", index=False)
-    with open(output_dir / "last_metrics.json", "w") as f:
-        json.dump(metrics, f, indent=2)
-    print(f"\n结果已保存至 {output_dir}/")
+    if result.cached:
+        print(f"\n命中缓存, 复用回测记录: {result.run_id}  (使用 --no-cache 重新计算)")
+    else:
+        print(f"\n回测记录: {result.run_id}  (保存于 {runs.root}/)")
+
+
+def _backtest_variants(args, config, runs):
+    """Run the base config and the configured strategy variants in one pass."""
+    from src.backtest.multi import MultiStrategyRunner
+
+    defined = config.get("variants") or {}
+    names = args.variants or list(defined)
+    unknown = [n for n in names if n not in defined]
+    if unknown:
+        print(f"\n未定义的策略变体: {', '.join(unknown)} (在配置 variants 中定义)")
+        return
+    if not args.start:
+        print("\n请指定 --start")
+        return
+    variants = {"base": {}, **{n: defined[n] for n in names}}
+
+    runner = MultiStrategyRunner(config, variants, run_store=runs)
+    results = runner.run(args.start, args.end, use_cache=not getattr(args, "no_cache", False))
+
+    print(f"\n多策略回测 ({len(results)} 个变体):")
+    print(f"  {'变体':<16} {'年化收益':>8} {'夏普':>6} {'最大回撤':>8} {'胜率':>6}  记录")
+    for name, result in results.items():
+        m = result.metrics
+        cached = " (缓存)" if result.cached else ""
+        print(
+            f"  {name:<16} {m.get('annual_return', float('nan')):>8.2%} {m.get('sharpe_ratio', float('nan')):>6.2f} "
+            f"{m.get('max_drawdown', float('nan')):>8.2%} {m.get('win_rate', float('nan')):>6.2%}  {result.run_id}{cached}"
+        )
 
 
 def cmd_report(args, config):
     """Generate performance report."""
-    import json
-    import pandas as pd
+    from src.backtest.resampling import resample_metrics
+    from src.backtest.run_store import RunStore
     from src.report.exporter import export_report
 
-    report_dir = Path(config.get("report", {}).get("output_dir", "reports"))
-
-    # Load saved backtest results
-    nav_series = None
-    trade_log = None
-    metrics = None
+    runs = RunStore.from_config(config)
+    run_id = getattr(args, "run_id", None) or runs.latest_id()
+    if run_id is None:
+        print("\n尚无回测记录, 请先运行 backtest 命令")
+        return
+    try:
+        result = runs.load(run_id)
+    except KeyError:
+        print(f"\n回测记录不存在: {run_id}")
+        return
 
-    nav_path = report_dir / "last_nav.csv"
-    if nav_path.exists():
-        df = pd.read_csv(nav_path, index_col=0)
-        nav_series = df.iloc[:, 0]
+    output_path = export_report(
+        config,
+        nav_series=result.nav_series if not result.nav_series.empty else None,
+        trade_log=result.trade_log if not result.trade_log.empty else None,
+        metrics=result.metrics,
+        resampling=resample_metrics(result.nav_series, result.trade_log, config),
+    )
+    print(f"\n报告已生成 ({run_id}): {output_path}")
 
-    trades_path = report_dir / "last_trades.csv"
-    if trades_path.exists():
-        trade_log = pd.read_csv(trades_path)
 
-    metrics_path = report_dir / "last_metrics.json"
-    if metrics_path.exists():
-        with open(metrics_path) as f:
-            metrics = json.load(f)
+def cmd_runs(args, config):
+    """List or compare stored backtest runs."""
+    from src.backtest.run_store import RunStore
 
-    output_path = export_report(
-        config, nav_series=nav_series, trade_log=trade_log, metrics=metrics
-    )
-    print(f"\n报告已生成: {output_path}")
+    runs = RunStore.from_config(config)
+    if args.compare:
+        try:
+            comparison = runs.compare(args.compare)
+        except KeyError as e:
+            print(f"\n{e}")
+            return
+        print("\n回测对比:")
+        print(f"  {'记录':<24} {'区间':<23} {'年化收益':>8} {'夏普':>6} {'最大回撤':>8} {'期末净值':>8}")
+        for meta in comparison["runs"]:
+            m = meta["metrics"]
+            nav = comparison["nav"].get(meta["run_id"])
+            final = nav.dropna().iloc[-1] if nav is not None and not nav.dropna().empty else float("nan")
+            print(
+                f"  {meta['run_id']:<24} {meta['start_date']} ~ {meta['end_date']} "
+                f"{m.get('annual_return', float('nan')):>8.2%} {m.get('sharpe_ratio', float('nan')):>6.2f} "
+                f"{m.get('max_drawdown', float('nan')):>8.2%} {final:>8.3f}"
+            )
+        return
+
+    listed = runs.list(limit=args.limit)
+    if not listed:
+        print("\n尚无回测记录")
+        return
+    print(f"\n回测记录 (共 {runs.count()} 条, 显示最近 {len(listed)} 条):")
+    for meta in listed:
+        m = meta["metrics"]
+        label = f"  [{meta['label']}]" if meta["label"] else ""
+        print(
+            f"  {meta['run_id']}  {meta['start_date']} ~ {meta['end_date']}  "
+            f"年化 {m.get('annual_return', float('nan')):.2%}  夏普 {m.get('sharpe_ratio', float('nan')):.2f}  "
+            f"配置 {meta['config_hash']}  数据版本 {meta['data_version']}{label}"
+        )
+
+
+def cmd_daily(args, config):
+    """Run the daily update → factors → signals → risk → report graph."""
+    from src.ops.daily import run_daily
+
+    # --force alone reruns everything, --force NODE... only those nodes
+    force = True if args.force == [] else (args.force or False)
+    results = run_daily(config, date=args.date, force=force, fetch_news=False if args.no_news else None)
+
+    status_text = {"ran": "已运行", "skipped": "未变化, 跳过", "failed": "失败", "blocked": "上游失败, 未运行"}
+    print("\n每日任务:")
+    for name, res in results.items():
+        line = f"  {name:<16} {status_text.get(res.status, res.status):<12}"
+        if res.status == "ran":
+            line += f" {res.seconds:.1f}s"
+        if res.error:
+            line += f" {res.error}"
+        print(line)
+
+    risk = results.get("risk")
+    if risk is not None and risk.output:
+        print(f"\n止损预警: {len(risk.output['stop_loss_alerts'])} 只, "
+              f"金属急跌: {len(risk.output['metal_crash_alerts'])} 个品种")
+    signals = results.get("signals")
+    if signals is not None and signals.output:
+        print(f"交易信号: {signals.output['n_signals']} 条 ({signals.output['as_of']})")
+    report = results.get("report")
+    if report is not None and report.output:
+        print(f"报告: {report.output}")
 
 
 def cmd_serve(args, config):
@@ -201,7 +320,26 @@ def cmd_serve(args, config):
     uvicorn.run("src.web.app:app", host=host, port=port, reload=False)
 
 
-def main():
+def cmd_serve_daemon(args, config):
+    """Serve CLI commands from one warm process over a Unix socket."""
+    import signal
+
+    from src.ops.daemon import CommandDaemon
+
+    daemon = CommandDaemon(_execute, args.config, load_config, path=args.socket)
+    daemon.warm_up(daemon.config(args.config))
+    print(f"\n命令守护进程: {daemon.path}")
+    print("其他终端中的 main.py 命令将由本进程执行 (--no-daemon 可强制本地执行)")
+    print("Press Ctrl+C to stop\n")
+    # Clean shutdown (socket file removed) on kill as well
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="A股有色金属多因子量化系统",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -209,6 +347,12 @@ def main():
     parser.add_argument(
         "--config", default="config/settings.yaml", help="配置文件路径"
     )
+    parser.add_argument("--no-daemon", action="store_true", help="不使用 serve-daemon, 在本进程中执行")
+    parser.add_argument("--trace-sql", action="store_true",
+                        help="跟踪数据库查询: 结束时打印汇总 (次数/行数/耗时/疑似N+1)")
+    parser.add_argument("--trace-json", default=None, metavar="PATH", help="将查询跟踪导出为JSON (隐含 --trace-sql)")
+    parser.add_argument("--profile", choices=["cprofile", "sampling", "memory"], default=None,
+                        help="性能剖析: 导出 pstats / 火焰图采样 / 内存分配报告, 结束时打印各阶段耗时")
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
 
     # update
@@ -229,42 +373,136 @@ def main():
     # signal
     p_signal = subparsers.add_parser("signal", help="生成交易信号")
     p_signal.add_argument("--date", default=None, help="信号日期")
+    p_signal.add_argument("--refresh", action="store_true", help="重新采集新闻并生成信号 (默认显示最近一次保存的信号)")
 
     # risk-check
     p_risk = subparsers.add_parser("risk-check", help="风控检查")
 
+    # daily
+    p_daily = subparsers.add_parser("daily", help="每日任务: 更新数据 → 因子 → 择时 → 信号 → 风控 → 报告")
+    p_daily.add_argument("--date", default=None, help="信号/风控日期 (默认今天)")
+    p_daily.add_argument("--force", nargs="*", default=None, metavar="NODE",
+                         help="忽略缓存重新运行指定节点 (不带参数则全部重跑)")
+    p_daily.add_argument("--no-news", action="store_true", help="跳过新闻采集与情绪分析")
+
     # backtest
     p_bt = subparsers.add_parser("backtest", help="运行回测")
-    p_bt.add_argument("--start", required=True, help="开始日期 (YYYY-MM-DD)")
+    p_bt.add_argument("--start", default=None, help="开始日期 (YYYY-MM-DD)")
     p_bt.add_argument("--end", required=True, help="结束日期 (YYYY-MM-DD)")
+    p_bt.add_argument("--label", default=None, help="回测记录标签")
+    p_bt.add_argument("--no-cache", action="store_true", help="忽略相同配置/数据的已有回测记录与检查点, 强制重新计算")
+    p_bt.add_argument("--extend", default=None, metavar="RUN_ID", help="从已有回测记录的最后一天续跑到 --end")
+    p_bt.add_argument("--fast", action="store_true", help="向量化快速模式: 仅调仓日计算, 近似成本与整手 (用于探索/参数扫描)")
+    p_bt.add_argument("--variants", nargs="*", default=None, metavar="NAME",
+                      help="同时回测基准配置与配置 variants 中的策略变体 (默认全部)")
 
     # report
     p_report = subparsers.add_parser("report", help="生成报告")
     p_report.add_argument("--source", default="backtest", choices=["backtest", "live"], help="数据来源")
+    p_report.add_argument("--run-id", default=None, help="回测记录ID (默认最近一次)")
+
+    # runs
+    p_runs = subparsers.add_parser("runs", help="查看/对比回测记录")
+    p_runs.add_argument("--limit", type=int, default=20, help="显示条数")
+    p_runs.add_argument("--compare", nargs="+", metavar="RUN_ID", help="对比多个回测记录")
 
     # serve
     p_serve = subparsers.add_parser("serve", help="启动Web仪表盘")
     p_serve.add_argument("--host", default=None, help="主机地址 (默认 localhost)")
     p_serve.add_argument("--port", type=int, default=None, help="端口号 (默认 8000)")
 
+    # serve-daemon
+    p_daemon = subparsers.add_parser("serve-daemon", help="启动命令守护进程 (常驻内存, 加速CLI命令)")
+    p_daemon.add_argument("--socket", default=None, help="Unix socket 路径 (默认 $QUANT_DAEMON_SOCKET 或 data/quant.sock)")
+
+    return parser
+
+
+COMMANDS = {
+    "update": cmd_update,
+    "universe": cmd_universe,
+    "factors": cmd_factors,
+    "signal": cmd_signal,
+    "risk-check": cmd_risk_check,
+    "daily": cmd_daily,
+    "backtest": cmd_backtest,
+    "report": cmd_report,
+    "runs": cmd_runs,
+    "serve": cmd_serve,
+    "serve-daemon": cmd_serve_daemon,
+}
+
+
+def _run_command(args, config: dict) -> int | None:
+    """Dispatch to the command, profiling it with --profile."""
+    if not args.profile:
+        return _run_traced(args, config)
+
+    if args.command == "serve" and args.profile == "cprofile":
+        print("cprofile 只剖析事件循环线程, 不含路由处理线程; Web 服务请使用 --profile sampling")
+        return 2
+    if args.command == "daily" and args.profile == "cprofile":
+        # The graph's nodes run on the "dag" thread pool, out of cProfile's sight
+        print("cprofile 只剖析主线程, 不含 DAG 工作线程; daily 请使用 --profile sampling")
+        return 2
+
+    from src.ops.profiling import profile_run, profile_settings
+
+    session = None
+    try:
+        with profile_run(args.profile, args.command, **profile_settings(config)) as session:
+            return _run_traced(args, config)
+    finally:
+        if session is not None:
+            print("\n" + session.summary())
+
+
+def _run_traced(args, config: dict) -> int | None:
+    """Dispatch to the command, tracing its queries with --trace-sql / --trace-json."""
+    if not (args.trace_sql or args.trace_json):
+        return COMMANDS[args.command](args, config)
+
+    from src.data.tracing import trace_queries
+
+    with trace_queries() as trace:
+        try:
+            return COMMANDS[args.command](args, config)
+        finally:
+            print("\n" + trace.summary())
+            if args.trace_json:
+                print(f"查询跟踪已导出: {trace.export_json(args.trace_json)}")
+
+
+def _execute(argv: list[str], config: dict) -> int | None:
+    """Run one command line against an already loaded config (used by the daemon)."""
+    args = build_parser().parse_args(argv)
+    if not args.command or args.command in _LOCAL_COMMANDS:
+        print(f"命令不能在守护进程中执行: {args.command}")
+        return 2
+    if args.profile:
+        # Profilers cover the whole process: other clients' commands would be mixed in
+        print("--profile 不能在守护进程中执行 (剖析覆盖整个进程, 会混入其他命令), 请加 --no-daemon")
+        return 2
+    return _run_command(args, config)
+
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
-    config = load_config(args.config)
+    # Profiled commands run in this process (see _execute)
+    if args.command not in _LOCAL_COMMANDS and not args.no_daemon and not args.profile:
+        from src.ops.daemon import run_via_daemon
+
+        code = run_via_daemon(sys.argv[1:], args.config)
+        if code is not None:
+            sys.exit(code)
 
-    commands = {
-        "update": cmd_update,
-        "universe": cmd_universe,
-        "factors": cmd_factors,
-        "signal": cmd_signal,
-        "risk-check": cmd_risk_check,
-        "backtest": cmd_backtest,
-        "report": cmd_report,
-        "serve": cmd_serve,
-    }
-    commands[args.command](args, config)
+    config = load_config(args.config)
+    sys.exit(_run_command(args, config) or 0)
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ import numpy as np
 
 from src.backtest.portfolio import Portfolio
 from src.data.storage import DataStore
+from src.ops.profiling import timed
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,7 @@ class SimulatedBroker:
         self.min_commission = bt_cfg.get("min_commission", 5)
         self.slippage_rate = bt_cfg.get("slippage", 0.0015)
 
+    @timed("broker")
     def execute_buy(
         self, portfolio: Portfolio, symbol: str, target_value: float,
         date: str, subsector: str = "other",
@@ -97,6 +99,7 @@ class SimulatedBroker:
             total_cost=total_cost,
         )
 
+    @timed("broker")
     def execute_sell(
         self, portfolio: Portfolio, symbol: str, shares: int, date: str,
     ) -> OrderResult:
@@ -2,12 +2,17 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass, field
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
 
 import numpy as np
 import pandas as pd
 
 from src.data.storage import DataStore
+from src.data.tracing import trace_source
+from src.ops.profiling import timed
 from src.backtest.portfolio import Portfolio
 from src.backtest.broker import SimulatedBroker
 from src.backtest.metrics import compute_metrics
@@ -16,10 +21,34 @@ from src.strategy.scorer import score_stocks, select_top_stocks
 from src.strategy.allocator import allocate_weights
 from src.strategy.timing import compute_timing_signal
 from src.risk.stop_loss import check_hard_stop, check_trailing_stop
+from src.risk.covariance import RollingCovariance
 from src.risk.drawdown import check_drawdown
+from src.universe.metadata import symbol_metadata
+
+if TYPE_CHECKING:
+    from src.backtest.multi import SharedInputs
+    from src.backtest.run_store import RunStore
 
 logger = logging.getLogger(__name__)
 
+# Process-wide memoization counters, see memo_stats()
+_memo_stats = {"hits": 0, "misses": 0, "bypassed": 0}
+_memo_lock = threading.Lock()
+
+
+def _count_memo(outcome: str):
+    with _memo_lock:
+        _memo_stats[outcome] += 1
+
+
+def memo_stats() -> dict:
+    """Backtest memoization counters for this process, with the hit rate."""
+    with _memo_lock:
+        stats = dict(_memo_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+    return stats
+
 
 @dataclass
 class TradeRecord:
@@ -32,25 +61,188 @@ class TradeRecord:
     pnl: float = 0.0  # Filled on close
 
 
+@dataclass
+class Book:
+    """Mutable per-strategy state carried through the daily loop."""
+
+    portfolio: Portfolio
+    pending_orders: list[dict] = field(default_factory=list)
+    trade_log: list[TradeRecord] = field(default_factory=list)
+
+
 @dataclass
 class BacktestResult:
     nav_series: pd.Series
     trade_log: pd.DataFrame
     metrics: dict
     daily_snapshots: list[dict] = field(default_factory=list)
+    run_id: str | None = None  # Set when recorded in / loaded from a RunStore
+    cached: bool = False  # True when served from a stored run instead of simulated
+    state: dict | None = None  # Engine state after the last day, used to extend the run
 
 
 class BacktestEngine:
-    """Event-driven daily backtest engine."""
-
-    def __init__(self, config: dict):
+    """Event-driven daily backtest engine.
+
+    With a ``run_store``, results are memoized: a run whose normalized
+    config, date range and store data version match a stored run returns
+    that run instead of simulating again, and every simulated run is
+    recorded. Long runs also checkpoint their state every
+    ``report.checkpoint_every`` trading days, so a crashed run resumes from
+    its latest checkpoint and a finished run can be :meth:`extend`-ed.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        run_store: RunStore | None = None,
+        store: DataStore | None = None,
+        shared: SharedInputs | None = None,
+    ):
         self.config = config
-        data_cfg = config.get("data", {})
-        self.store = DataStore(data_cfg.get("db_path", "data/quant.db"))
+        if store is None:
+            data_cfg = config.get("data", {})
+            store = DataStore(data_cfg.get("db_path", "data/quant.db"))
+        self.store = store
         self.broker = SimulatedBroker(config, self.store)
-
-    def run(self, start_date: str, end_date: str) -> BacktestResult:
-        """Run backtest over the specified date range.
+        self.run_store = run_store
+        # Per-date factor / timing results shared with other engines (MultiStrategyRunner)
+        self.shared = shared
+        # Covariance estimate for risk-model allocation, advanced rebalance to rebalance.
+        # Not part of the engine state: a resumed or extended run rebuilds the window at
+        # its first rebalance, which gives the same estimate as the advanced one
+        self._covariance: RollingCovariance | None = None
+
+    def run(
+        self,
+        start_date: str,
+        end_date: str,
+        progress: Callable[[dict], None] | None = None,
+        use_cache: bool = True,
+        label: str | None = None,
+        state: dict | None = None,
+    ) -> BacktestResult:
+        """Run (or reuse) a backtest over the specified date range.
+
+        Without a run store this simply simulates. With one, the data
+        version is captured first so a record never claims newer data than
+        it was computed from; ``use_cache=False`` (or
+        ``report.reuse_runs: false``) skips the stored-run lookup and any
+        checkpoint, but still records the new run under ``label``.
+
+        Args:
+            start_date: First date (inclusive).
+            end_date: Last date (inclusive).
+            progress: See :meth:`simulate`. A reused run reports a single
+                100% event with ``cached`` set.
+            use_cache: Look up a matching stored run / checkpoint first.
+            label: Free-text tag for a newly recorded run.
+            state: Continue from this engine state instead of a checkpoint
+                (see :meth:`extend`).
+        """
+        if self.run_store is None:
+            return self.simulate(start_date, end_date, progress, state=state)
+
+        data_version = self.store.data_version()
+        reuse = use_cache and self.config.get("report", {}).get("reuse_runs", True)
+        if reuse:
+            run_id = self.run_store.find(self.config, start_date, end_date, data_version)
+            if run_id is not None:
+                _count_memo("hits")
+                logger.info("Backtest %s to %s reused stored run %s", start_date, end_date, run_id)
+                result = self.run_store.load(run_id)
+                result.run_id, result.cached = run_id, True
+                if progress is not None:
+                    n = len(result.nav_series)
+                    progress({
+                        "type": "backtest",
+                        "date": str(result.nav_series.index[-1]) if n else end_date,
+                        "day": n,
+                        "total_days": n,
+                        "percent": 100.0,
+                        "nav": float(result.nav_series.iloc[-1]) if n else None,
+                        "rebalance": False,
+                        "cached": True,
+                        "run_id": run_id,
+                    })
+                return result
+            _count_memo("misses")
+        else:
+            _count_memo("bypassed")
+
+        data_digest = self.store.data_digest(end_date)
+        checkpoint_key = (self.config, start_date, end_date, data_version)
+        if state is None and reuse:
+            state = self.run_store.load_checkpoint(*checkpoint_key)
+            if state is not None:
+                logger.info("Resuming backtest %s to %s from checkpoint at %s",
+                            start_date, end_date, state["last_date"])
+
+        result = self.simulate(
+            start_date, end_date, progress, state=state,
+            checkpoint=lambda st: self.run_store.save_checkpoint(*checkpoint_key, st),
+            checkpoint_every=self.config.get("report", {}).get("checkpoint_every", 20),
+        )
+        result.run_id = self.run_store.save(
+            result, self.config, start_date, end_date,
+            data_version=data_version, label=label, data_digest=data_digest,
+        )
+        self.run_store.clear_checkpoint(*checkpoint_key)
+        return result
+
+    def extend(
+        self,
+        run_id: str,
+        end_date: str,
+        progress: Callable[[dict], None] | None = None,
+        label: str | None = None,
+    ) -> BacktestResult:
+        """Continue a stored run from its last date to ``end_date``.
+
+        Only the new trading days are simulated; the result (recorded as a
+        new run over the original start date to ``end_date``) is identical
+        to a full rerun. Runs whose earlier data changed since (backfills,
+        price corrections: the run's data digest no longer matches) are
+        refused, so an extension never stands in for a rerun on different
+        data. Raises KeyError for unknown runs and ValueError when the run
+        cannot be extended with this engine's config or data.
+        """
+        from src.backtest.run_store import config_hash
+
+        if self.run_store is None:
+            raise ValueError("Extending a run requires a run store")
+        meta = self.run_store.get(run_id)
+        if meta is None:
+            raise KeyError(f"Unknown backtest run: {run_id}")
+        if meta["config_hash"] != config_hash(self.config):
+            raise ValueError(f"Run {run_id} was produced with a different config")
+        if end_date <= meta["end_date"]:
+            raise ValueError(f"Run {run_id} already covers up to {meta['end_date']}")
+        digest = meta.get("data_digest")
+        if digest is None:
+            # Recorded before digests: only safe while nothing was written since
+            unchanged = meta["data_version"] == self.store.data_version()
+        else:
+            unchanged = digest == self.store.data_digest(meta["end_date"])
+        if not unchanged:
+            raise ValueError(f"Data up to {meta['end_date']} changed since run {run_id}; run a full backtest instead")
+        state = self.run_store.load_state(run_id)
+        if state is None:
+            raise ValueError(f"Run {run_id} has no saved engine state to extend from")
+
+        logger.info("Extending run %s from %s to %s", run_id, meta["end_date"], end_date)
+        return self.run(meta["start_date"], end_date, progress, label=label, state=state)
+
+    def simulate(
+        self,
+        start_date: str,
+        end_date: str,
+        progress: Callable[[dict], None] | None = None,
+        state: dict | None = None,
+        checkpoint: Callable[[dict], None] | None = None,
+        checkpoint_every: int = 0,
+    ) -> BacktestResult:
+        """Simulate the strategy over the specified date range.
 
         Daily loop:
         1. Update prices in portfolio
@@ -58,14 +250,34 @@ class BacktestEngine:
         3. Execute pending orders (from previous day due to T+1)
         4. On rebalance days: compute factors → score → generate signals
         5. Record NAV
+
+        Args:
+            start_date: First date (inclusive).
+            end_date: Last date (inclusive).
+            progress: Optional callback receiving one event dict per trading
+                day: date, day, total_days, percent, nav, rebalance,
+                elapsed_s and days_per_s.
+            state: Engine state (``BacktestResult.state`` or a checkpoint) to
+                continue from; days up to its ``last_date`` are skipped.
+                Rebalance dates are still derived from ``start_date`` so the
+                schedule matches an uninterrupted run.
+            checkpoint: Called with the engine state every
+                ``checkpoint_every`` simulated days (0 disables).
+
+        With ``backtest.mode: fast`` the vectorized rebalance-only
+        simulation in :mod:`src.backtest.fast` is used instead (no state,
+        checkpoints or intra-period risk checks).
         """
-        bt_cfg = self.config.get("backtest", {})
-        initial_capital = bt_cfg.get("initial_capital", 1_000_000)
-        rebalance_freq = self.config.get("strategy", {}).get("rebalance_freq", "monthly")
+        if self.config.get("backtest", {}).get("mode", "event") == "fast":
+            from src.backtest.fast import simulate_fast
 
-        portfolio = Portfolio(initial_capital=initial_capital)
-        trade_log: list[TradeRecord] = []
-        pending_orders: list[dict] = []
+            if state is not None:
+                raise ValueError("Fast-mode backtests cannot resume from engine state")
+            return simulate_fast(self, start_date, end_date, progress)
+
+        rebalance_freq = self.config.get("strategy", {}).get("rebalance_freq", "monthly")
+        book = self.new_book(state)
+        resume_after = state["last_date"] if state is not None else None
 
         # Get trading dates
         trading_dates = self._get_trading_dates(start_date, end_date)
@@ -78,83 +290,126 @@ class BacktestEngine:
             )
 
         rebalance_dates = self._get_rebalance_dates(trading_dates, rebalance_freq)
-        last_rebalance_month = None
 
         logger.info(
             "Starting backtest: %s to %s (%d trading days, %d rebalance dates)",
             start_date, end_date, len(trading_dates), len(rebalance_dates),
         )
 
-        for date in trading_dates:
+        started = time.perf_counter()
+        simulated = 0
+        for day, date in enumerate(trading_dates, start=1):
             date_str = date if isinstance(date, str) else date.strftime("%Y-%m-%d")
+            if resume_after is not None and date_str <= resume_after:
+                continue
+            simulated += 1
+
+            self.step(book, date_str, rebalance=date_str in rebalance_dates)
+
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress({
+                    "type": "backtest",
+                    "date": date_str,
+                    "day": day,
+                    "total_days": len(trading_dates),
+                    "percent": round(100.0 * day / len(trading_dates), 2),
+                    "nav": float(book.portfolio.nav),
+                    "rebalance": date_str in rebalance_dates,
+                    "elapsed_s": round(elapsed, 3),
+                    "days_per_s": round(simulated / elapsed, 2) if elapsed > 0 else None,
+                })
+
+            if checkpoint is not None and checkpoint_every and simulated % checkpoint_every == 0 \
+                    and day < len(trading_dates):
+                checkpoint(self._state(book))
+
+        return self.finish(book)
+
+    def new_book(self, state: dict | None = None) -> Book:
+        """A fresh book at the configured initial capital, or one restored from ``state``."""
+        if state is not None:
+            return Book(
+                portfolio=Portfolio.from_state(state["portfolio"]),
+                pending_orders=[dict(o) for o in state["pending_orders"]],
+                trade_log=[TradeRecord(**t) for t in state["trade_log"]],
+            )
+        initial_capital = self.config.get("backtest", {}).get("initial_capital", 1_000_000)
+        return Book(portfolio=Portfolio(initial_capital=initial_capital))
 
-            # 1. Update prices
-            prices = self._get_current_prices(portfolio.holdings.keys(), date_str)
-            portfolio.update_prices(prices)
+    def step(self, book: Book, date_str: str, rebalance: bool = False):
+        """Advance ``book`` by one trading day (steps 1-5 of :meth:`simulate`)."""
+        portfolio, trade_log = book.portfolio, book.trade_log
 
-            # 2. Risk checks — generate emergency sell orders
+        # 1. Update prices
+        prices = self._get_current_prices(portfolio.holdings.keys(), date_str)
+        portfolio.update_prices(prices)
+
+        # 2. Risk checks — generate emergency sell orders
+        with trace_source("backtest.risk"):
             emergency_sells = self._check_risk(portfolio, date_str)
-            for sym in emergency_sells:
+        for sym in emergency_sells:
+            if sym in portfolio.holdings:
+                h = portfolio.holdings[sym]
+                result = self.broker.execute_sell(portfolio, sym, h.shares, date_str)
+                if not result.rejected:
+                    trade_log.append(TradeRecord(
+                        date=date_str, symbol=sym, action="SELL_STOP",
+                        shares=result.executed_shares, price=result.price,
+                        cost=result.total_cost,
+                    ))
+
+        # 3. Execute pending orders from previous rebalance
+        for order in book.pending_orders:
+            sym = order["symbol"]
+            if order["action"] == "BUY":
+                result = self.broker.execute_buy(
+                    portfolio, sym, order["target_value"], date_str,
+                    subsector=order.get("subsector", "other"),
+                )
+                if not result.rejected:
+                    trade_log.append(TradeRecord(
+                        date=date_str, symbol=sym, action="BUY",
+                        shares=result.executed_shares, price=result.price,
+                        cost=result.total_cost,
+                    ))
+            elif order["action"] == "SELL":
                 if sym in portfolio.holdings:
-                    h = portfolio.holdings[sym]
-                    result = self.broker.execute_sell(portfolio, sym, h.shares, date_str)
-                    if not result.rejected:
-                        trade_log.append(TradeRecord(
-                            date=date_str, symbol=sym, action="SELL_STOP",
-                            shares=result.executed_shares, price=result.price,
-                            cost=result.total_cost,
-                        ))
-
-            # 3. Execute pending orders from previous rebalance
-            for order in pending_orders:
-                sym = order["symbol"]
-                if order["action"] == "BUY":
-                    result = self.broker.execute_buy(
-                        portfolio, sym, order["target_value"], date_str,
-                        subsector=order.get("subsector", "other"),
-                    )
+                    shares = order.get("shares", portfolio.holdings[sym].shares)
+                    result = self.broker.execute_sell(portfolio, sym, shares, date_str)
                     if not result.rejected:
                         trade_log.append(TradeRecord(
-                            date=date_str, symbol=sym, action="BUY",
+                            date=date_str, symbol=sym, action="SELL",
                             shares=result.executed_shares, price=result.price,
                             cost=result.total_cost,
                         ))
-                elif order["action"] == "SELL":
-                    if sym in portfolio.holdings:
-                        shares = order.get("shares", portfolio.holdings[sym].shares)
-                        result = self.broker.execute_sell(portfolio, sym, shares, date_str)
-                        if not result.rejected:
-                            trade_log.append(TradeRecord(
-                                date=date_str, symbol=sym, action="SELL",
-                                shares=result.executed_shares, price=result.price,
-                                cost=result.total_cost,
-                            ))
-            pending_orders = []
-
-            # 4. Rebalance check
-            if date_str in rebalance_dates:
-                pending_orders = self._generate_rebalance_orders(
-                    portfolio, date_str
-                )
-
-            # 5. Record NAV
-            # Update prices again after trades
-            prices = self._get_current_prices(portfolio.holdings.keys(), date_str)
-            portfolio.update_prices(prices)
-            portfolio.record_nav(date_str)
-
-        # Compute metrics
+        book.pending_orders = []
+
+        # 4. Rebalance check
+        if rebalance:
+            with trace_source("backtest.rebalance"):
+                book.pending_orders = self._generate_rebalance_orders(portfolio, date_str)
+
+        # 5. Record NAV
+        # Update prices again after trades
+        prices = self._get_current_prices(portfolio.holdings.keys(), date_str)
+        portfolio.update_prices(prices)
+        portfolio.record_nav(date_str)
+
+    def finish(self, book: Book) -> BacktestResult:
+        """Result (NAV series, trade log, metrics and final state) of a book."""
+        portfolio = book.portfolio
         nav_series = pd.Series(portfolio.nav_history, index=portfolio.date_history)
         trade_df = pd.DataFrame([
             {"date": t.date, "symbol": t.symbol, "action": t.action,
              "shares": t.shares, "price": t.price, "cost": t.cost}
-            for t in trade_log
-        ]) if trade_log else pd.DataFrame()
+            for t in book.trade_log
+        ]) if book.trade_log else pd.DataFrame()
 
         metrics = compute_metrics(
             nav_series,
             trade_df,
-            initial_capital,
+            portfolio.initial_capital,
             self.config,
         )
 
@@ -162,8 +417,25 @@ class BacktestEngine:
             nav_series=nav_series,
             trade_log=trade_df,
             metrics=metrics,
+            state=self._state(book),
         )
 
+    @staticmethod
+    def _state(book: Book) -> dict:
+        """Everything the daily loop carries over to the next day, JSON-serializable."""
+        portfolio = book.portfolio
+        return {
+            "last_date": portfolio.date_history[-1] if portfolio.date_history else None,
+            "portfolio": portfolio.to_state(),
+            "pending_orders": [dict(o) for o in book.pending_orders],
+            "trade_log": [asdict(t) for t in book.trade_log],
+        }
+
+    def _shared_input(self, kind: str, date: str, compute: Callable[[], Any]):
+        if self.shared is None:
+            return compute()
+        return self.shared.get(kind, self.config, date, compute)
+
     def _get_trading_dates(self, start: str, end: str) -> list[str]:
         """Get list of trading dates from stock_daily data."""
         with self.store._get_conn() as conn:
@@ -201,15 +473,18 @@ class BacktestEngine:
 
         return rebalance
 
+    @timed("data_load")
     def _get_current_prices(self, symbols, date: str) -> dict[str, float]:
         """Get closing prices for given symbols on a date."""
         prices = {}
-        for sym in symbols:
-            df = self.store.read_stock_daily(sym, end_date=date)
-            if not df.empty:
-                prices[sym] = df["close"].iloc[-1]
+        with trace_source("backtest.prices"):
+            for sym in symbols:
+                df = self.store.read_stock_daily(sym, end_date=date)
+                if not df.empty:
+                    prices[sym] = df["close"].iloc[-1]
         return prices
 
+    @timed("risk")
     def _check_risk(self, portfolio: Portfolio, date: str) -> list[str]:
         """Run risk checks and return symbols that need emergency selling."""
         sell_symbols = []
@@ -239,21 +514,26 @@ class BacktestEngine:
 
         return list(set(sell_symbols))
 
-    def _generate_rebalance_orders(
-        self, portfolio: Portfolio, date: str
-    ) -> list[dict]:
-        """Generate rebalance orders: compute factors, score, allocate."""
+    def target_weights(self, date: str) -> tuple[pd.Series, dict[str, str]] | None:
+        """Target weights and sub-sector map on a rebalance date: factors → score → allocate.
+
+        Returns None when no factor panel is available for the date.
+        """
         try:
-            factor_matrix = compute_all_factors(self.config, date=date, store=self.store)
+            factor_matrix = self._shared_input(
+                "factors", date, lambda: compute_all_factors(self.config, date=date, store=self.store)
+            )
         except Exception as e:
             logger.error("Factor computation failed on %s: %s", date, e)
-            return []
+            return None
 
         if factor_matrix.empty:
-            return []
+            return None
 
         # Timing signal
-        timing = compute_timing_signal(self.config, date=date, store=self.store)
+        timing = self._shared_input(
+            "timing", date, lambda: compute_timing_signal(self.config, date=date, store=self.store)
+        )
         position_ratio = timing["position_ratio"]
 
         # Score and select
@@ -261,20 +541,31 @@ class BacktestEngine:
         selected = select_top_stocks(scores, self.config, len(factor_matrix))
 
         # Build subsector map
-        subsector_map = {}
-        for sym in factor_matrix.index:
-            df = self.store.read_table("universe_cache", where="symbol = ?", params=(sym,))
-            if not df.empty and "subsector" in df.columns:
-                subsector_map[sym] = df.iloc[0]["subsector"]
-            else:
-                subsector_map[sym] = "other"
+        subsector_map = symbol_metadata(self.store, factor_matrix.index.tolist())["subsector"].to_dict()
+
+        covariance = None
+        if self.config.get("strategy", {}).get("allocation", "score") != "score":
+            if self._covariance is None:
+                self._covariance = RollingCovariance.from_config(self.config)
+            covariance = self._covariance.update(self.store, date).covariance(selected)
 
         # Allocate
         target_weights = allocate_weights(
             selected, scores, self.config,
             subsector_map=subsector_map,
             position_ratio=position_ratio,
+            covariance=covariance if covariance is not None and not covariance.empty else None,
         )
+        return target_weights, subsector_map
+
+    def _generate_rebalance_orders(
+        self, portfolio: Portfolio, date: str
+    ) -> list[dict]:
+        """Generate rebalance orders from the date's target weights."""
+        targets = self.target_weights(date)
+        if targets is None:
+            return []
+        target_weights, subsector_map = targets
 
         # Generate orders by comparing current vs target
         current_weights = portfolio.get_weights()
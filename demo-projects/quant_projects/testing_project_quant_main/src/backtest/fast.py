@@ -0,0 +1,195 @@
+"""Vectorized rebalance-only backtest ("fast" mode, ``backtest.mode: fast``).
+
+Target weights are computed only on rebalance dates (same factor → score →
+allocate path as the event engine). Orders fill at the next trading day's
+close with the ``backtest`` slippage, commission (with minimum), stamp tax
+and 100-share lots; between fills the holdings are constant, so daily NAV
+for a whole holding period is one matrix-vector product of the close
+matrix with the share vector.
+
+Approximations versus the event engine: holdings are marked at the close
+(the event engine marks at the running peak price), and the daily stop-loss
+and drawdown checks are skipped. Use it to explore ideas and sweep
+variants; confirm candidates with the event engine.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.metrics import compute_metrics
+from src.data.storage import DataStore
+from src.ops.profiling import timed
+
+if TYPE_CHECKING:
+    from src.backtest.engine import BacktestEngine, BacktestResult
+
+logger = logging.getLogger(__name__)
+
+_BUY_THRESHOLD = 0.005  # Same minimum weight increase as the event engine
+_LIMIT_PCT = 0.095  # Near the ±10% daily limit
+
+
+@timed("data_load")
+def load_price_matrices(store: DataStore, end_date: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Close and volume matrices (dates × symbols) up to ``end_date``, forward-filled.
+
+    Forward filling reproduces the event engine's "last available row" reads
+    for days a symbol did not trade.
+    """
+    with store._get_conn() as conn:
+        df = pd.read_sql(
+            "SELECT symbol, date, close, volume FROM stock_daily WHERE date <= ?",
+            conn, params=(end_date,),
+        )
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    close = df.pivot(index="date", columns="symbol", values="close").sort_index().astype(float).ffill()
+    volume = df.pivot(index="date", columns="symbol", values="volume").sort_index().astype(float).ffill()
+    return close, volume
+
+
+def simulate_fast(
+    engine: BacktestEngine,
+    start_date: str,
+    end_date: str,
+    progress: Callable[[dict], None] | None = None,
+    prices: tuple[pd.DataFrame, pd.DataFrame] | None = None,
+) -> BacktestResult:
+    """Rebalance-only simulation for ``engine``'s config and store.
+
+    Args:
+        engine: Supplies config, store and :meth:`BacktestEngine.target_weights`.
+        start_date: First date (inclusive).
+        end_date: Last date (inclusive).
+        progress: Optional callback, called on rebalance and fill days and
+            on the last day, with the same fields as the event engine's
+            daily events.
+        prices: Preloaded :func:`load_price_matrices` output (for sweeps).
+    """
+    from src.backtest.engine import BacktestResult
+
+    config = engine.config
+    bt_cfg = config.get("backtest", {})
+    initial_capital = bt_cfg.get("initial_capital", 1_000_000)
+    slippage = bt_cfg.get("slippage", 0.0015)
+    commission_rate = bt_cfg.get("commission", 0.0003)
+    min_commission = bt_cfg.get("min_commission", 5)
+    stamp_tax_rate = bt_cfg.get("stamp_tax", 0.0005)
+    rebalance_freq = config.get("strategy", {}).get("rebalance_freq", "monthly")
+
+    close_all, volume_all = prices if prices is not None else load_price_matrices(engine.store, end_date)
+    in_range = (close_all.index >= start_date) & (close_all.index <= end_date) if not close_all.empty else []
+    dates = close_all.index[in_range].tolist() if not close_all.empty else []
+    if not dates:
+        logger.error("No trading dates found between %s and %s", start_date, end_date)
+        return BacktestResult(nav_series=pd.Series(dtype=float), trade_log=pd.DataFrame(), metrics={})
+
+    offset = int(np.argmax(in_range))
+    symbols = close_all.columns.tolist()
+    col = {sym: j for j, sym in enumerate(symbols)}
+    close_full = close_all.to_numpy()
+    px = np.nan_to_num(close_full[offset:offset + len(dates)])  # 0 before listing; never held
+    prev = np.vstack([
+        close_full[offset - 1:offset] if offset > 0 else np.full((1, len(symbols)), np.nan),
+        close_full[offset:offset + len(dates) - 1],
+    ])
+    vol = volume_all.to_numpy()[offset:offset + len(dates)]
+
+    rebalance_dates = engine._get_rebalance_dates(dates, rebalance_freq)
+    rebalance_idx = [i for i, d in enumerate(dates) if d in rebalance_dates]
+    fills = {i + 1 for i in rebalance_idx if i + 1 < len(dates)}
+    events = sorted(set(rebalance_idx) | fills | {len(dates) - 1})
+    rebalance_set = set(rebalance_idx)
+
+    shares = np.zeros(len(symbols))
+    cash = float(initial_capital)
+    nav = np.empty(len(dates))
+    trades: list[dict] = []
+    pending: tuple[pd.Series, float, np.ndarray] | None = None
+
+    def tradable(j: int, i: int, buy: bool) -> bool:
+        p, p0 = px[i, j], prev[i, j]
+        if p <= 0 or np.isnan(vol[i, j]) or vol[i, j] == 0:
+            return False
+        if not np.isnan(p0) and p0 > 0:
+            change = p / p0 - 1
+            if (buy and change >= _LIMIT_PCT) or (not buy and change <= -_LIMIT_PCT):
+                return False
+        return True
+
+    started = time.perf_counter()
+    seg_start = 0
+    for i in events:
+        nav[seg_start:i] = cash + px[seg_start:i] @ shares
+        seg_start = i
+        date = dates[i]
+
+        if pending is not None:
+            weights, nav_r, weights_r = pending
+            pending = None
+            # Sell dropped names first to free cash
+            for j in np.flatnonzero(shares):
+                sym = symbols[j]
+                if weights.get(sym, 0) != 0 or not tradable(j, i, buy=False):
+                    continue
+                exec_price = px[i, j] * (1 - slippage)
+                proceeds = shares[j] * exec_price
+                commission = max(proceeds * commission_rate, min_commission)
+                stamp_tax = proceeds * stamp_tax_rate
+                cash += proceeds - commission - stamp_tax
+                trades.append({"date": date, "symbol": sym, "action": "SELL", "shares": int(shares[j]),
+                               "price": exec_price, "cost": commission + stamp_tax})
+                shares[j] = 0
+            for sym, w in weights.items():
+                j = col.get(sym)
+                if j is None or w - weights_r[j] <= _BUY_THRESHOLD or not tradable(j, i, buy=True):
+                    continue
+                exec_price = px[i, j] * (1 + slippage)
+                n = int((w - weights_r[j]) * nav_r / exec_price // 100) * 100
+                if n > 0 and n * exec_price + max(n * exec_price * commission_rate, min_commission) > cash:
+                    n = int(cash / (exec_price * 1.001) // 100) * 100
+                if n <= 0:
+                    continue
+                value = n * exec_price
+                commission = max(value * commission_rate, min_commission)
+                cash -= value + commission
+                shares[j] += n
+                trades.append({"date": date, "symbol": sym, "action": "BUY", "shares": n,
+                               "price": exec_price, "cost": value + commission})
+
+        if i in rebalance_set:
+            targets = engine.target_weights(date)
+            if targets is not None:
+                nav_i = cash + px[i] @ shares
+                weights_i = px[i] * shares / nav_i if nav_i > 0 else np.zeros(len(symbols))
+                pending = (targets[0], nav_i, weights_i)
+
+        if progress is not None:
+            day = i + 1
+            elapsed = time.perf_counter() - started
+            progress({
+                "type": "backtest",
+                "date": date,
+                "day": day,
+                "total_days": len(dates),
+                "percent": round(100.0 * day / len(dates), 2),
+                "nav": float(cash + px[i] @ shares),
+                "rebalance": i in rebalance_set,
+                "elapsed_s": round(elapsed, 3),
+                "days_per_s": round(day / elapsed, 2) if elapsed > 0 else None,
+            })
+    nav[seg_start:] = cash + px[seg_start:] @ shares
+
+    nav_series = pd.Series(nav, index=dates)
+    trade_df = pd.DataFrame(trades) if trades else pd.DataFrame()
+    metrics = compute_metrics(nav_series, trade_df, initial_capital, config)
+    logger.info(
+        "Fast backtest %s to %s: %d days, %d rebalances, %d trades in %.2fs",
+        start_date, end_date, len(dates), len(rebalance_idx), len(trades), time.perf_counter() - started,
+    )
+    return BacktestResult(nav_series=nav_series, trade_log=trade_df, metrics=metrics)
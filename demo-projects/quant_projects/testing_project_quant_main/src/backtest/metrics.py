@@ -4,6 +4,7 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from src.backtest.round_trips import match_round_trips
 from src.risk.drawdown import compute_max_drawdown
 
 
@@ -18,7 +19,9 @@ def compute_metrics(
     Returns dict with:
         annual_return, annual_volatility, sharpe_ratio,
         max_drawdown, max_drawdown_duration,
-        win_rate, profit_loss_ratio,
+        win_rate, profit_loss_ratio (average win / average loss),
+        profit_factor (gross profit / gross loss),
+        round_trips, avg_holding_days,
         total_trades, total_costs, annual_turnover,
         calmar_ratio, sortino_ratio
     """
@@ -62,41 +65,22 @@ def compute_metrics(
     # Trade statistics
     total_trades = 0
     total_costs = 0.0
-    wins = 0
-    losses = 0
-    win_pnl = 0.0
-    loss_pnl = 0.0
-
     if not trade_log.empty and "cost" in trade_log.columns:
         total_trades = len(trade_log)
         total_costs = trade_log["cost"].sum()
 
-        # Win/loss calculation from paired trades
-        if "action" in trade_log.columns:
-            buy_trades = trade_log[trade_log["action"].isin(["BUY"])]
-            sell_trades = trade_log[trade_log["action"].isin(["SELL", "SELL_STOP"])]
-
-            # Simple approximation: compare sell proceeds vs buy cost per symbol
-            for sym in sell_trades["symbol"].unique():
-                sym_buys = buy_trades[buy_trades["symbol"] == sym]
-                sym_sells = sell_trades[sell_trades["symbol"] == sym]
-
-                if sym_buys.empty:
-                    continue
-
-                avg_buy = (sym_buys["price"] * sym_buys["shares"]).sum() / sym_buys["shares"].sum()
-                avg_sell = (sym_sells["price"] * sym_sells["shares"]).sum() / sym_sells["shares"].sum() if not sym_sells.empty else 0
-
-                if avg_sell > avg_buy:
-                    wins += 1
-                    win_pnl += (avg_sell - avg_buy) * sym_sells["shares"].sum()
-                elif avg_sell > 0:
-                    losses += 1
-                    loss_pnl += (avg_buy - avg_sell) * sym_sells["shares"].sum()
+    # Round-trip statistics (FIFO-matched, net of costs)
+    trips = match_round_trips(trade_log)
+    pnls = trips["pnl"].to_numpy(dtype=float)
+    wins = int((pnls > 0).sum())
+    losses = len(pnls) - wins
+    win_pnl = float(pnls[pnls > 0].sum())
+    loss_pnl = float(-pnls[pnls <= 0].sum())
 
-    total_round_trips = wins + losses
-    win_rate = wins / total_round_trips if total_round_trips > 0 else 0.0
-    profit_loss_ratio = (win_pnl / loss_pnl) if loss_pnl > 0 else 0.0
+    win_rate = wins / len(pnls) if len(pnls) > 0 else 0.0
+    profit_factor = win_pnl / loss_pnl if loss_pnl > 0 else 0.0
+    profit_loss_ratio = (win_pnl / wins) / (loss_pnl / losses) if wins and loss_pnl > 0 else 0.0
+    avg_holding_days = float(trips["holding_days"].mean()) if len(trips) else 0.0
 
     # Turnover
     if not trade_log.empty and "price" in trade_log.columns and "shares" in trade_log.columns:
@@ -116,6 +100,9 @@ def compute_metrics(
         "total_return": total_return,
         "win_rate": win_rate,
         "profit_loss_ratio": profit_loss_ratio,
+        "profit_factor": profit_factor,
+        "round_trips": len(trips),
+        "avg_holding_days": avg_holding_days,
         "total_trades": total_trades,
         "total_costs": total_costs,
         "annual_turnover": annual_turnover,
@@ -135,6 +122,9 @@ def _empty_metrics() -> dict:
         "total_return": 0.0,
         "win_rate": 0.0,
         "profit_loss_ratio": 0.0,
+        "profit_factor": 0.0,
+        "round_trips": 0,
+        "avg_holding_days": 0.0,
         "total_trades": 0,
         "total_costs": 0.0,
         "annual_turnover": 0.0,
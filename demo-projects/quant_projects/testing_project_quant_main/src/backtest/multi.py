@@ -0,0 +1,265 @@
+"""Multi-strategy backtest runner: N config variants in one pass over the calendar.
+
+Variants share one in-memory price cube, and factor panels / timing signals
+are computed once per date for every group of variants whose relevant
+config sections agree (e.g. variants differing only in factor weights or
+``top_ratio`` share the factor panel). Each variant keeps its own
+portfolio, broker and pending orders, so results are identical to
+separate engine runs.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestEngine, BacktestResult, _count_memo
+from src.data.storage import DataStore
+from src.ops.profiling import timed
+
+logger = logging.getLogger(__name__)
+
+# Config sections each shared input depends on. Factor weights and the
+# scoring mode only affect scoring, which runs per variant.
+_INPUT_SECTIONS = {
+    "factors": ("data", "universe", "factors", "sentiment"),
+    "timing": ("data", "timing"),
+}
+_SCORING_KEYS = ("weights", "scoring_mode", "ic_lookback_months")
+
+
+def merge_config(base: dict, overrides: dict) -> dict:
+    """Deep-merge ``overrides`` into a copy of ``base`` (nested dicts merge, other values replace)."""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _is_fast(config: dict) -> bool:
+    return config.get("backtest", {}).get("mode", "event") == "fast"
+
+
+def _input_key(kind: str, config: dict) -> str:
+    sections = {s: config.get(s) for s in _INPUT_SECTIONS[kind]}
+    if kind == "factors" and isinstance(sections["factors"], dict):
+        sections["factors"] = {
+            k: v for k, v in sections["factors"].items() if k not in _SCORING_KEYS
+        }
+    return json.dumps(sections, sort_keys=True, default=str)
+
+
+class SharedInputs:
+    """Per-date memo of factor panels and timing signals across engines.
+
+    Event-mode variants advance in lockstep, so by default only the current
+    date's entries are kept. With ``retain`` every date is kept, for
+    variants simulated one after another (fast mode).
+    """
+
+    def __init__(self, retain: bool = False):
+        self.retain = retain
+        self._date: str | None = None
+        self._values: dict[tuple[str, str, str], Any] = {}
+        self.stats = {"computed": 0, "shared": 0}
+
+    def get(self, kind: str, config: dict, date: str, compute: Callable[[], Any]):
+        if date != self._date and not self.retain:
+            self._values.clear()
+        self._date = date
+        key = (kind, _input_key(kind, config), date)
+        if key in self._values:
+            self.stats["shared"] += 1
+        else:
+            self._values[key] = compute()
+            self.stats["computed"] += 1
+        return self._values[key]
+
+
+class PriceCube:
+    """DataStore wrapper that serves ``read_stock_daily`` from memory.
+
+    The whole ``stock_daily`` table is loaded in one query on first use and
+    split per symbol; date-range reads become binary searches. Empty results
+    (unknown symbol, range without rows) fall through to the store so their
+    shape matches exactly. All other attributes are delegated to the
+    wrapped store.
+    """
+
+    def __init__(self, store: DataStore):
+        self._store = store
+        self._frames: dict[str, pd.DataFrame] | None = None
+        self._dates: dict[str, np.ndarray] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    @timed("data_load")
+    def _load(self):
+        df = self._store.read_table("stock_daily")
+        self._frames = {}
+        if df.empty:
+            return
+        df["date"] = pd.to_datetime(df["date"])
+        df = df.sort_values(["symbol", "date"], kind="stable")
+        for symbol, frame in df.groupby("symbol", sort=False):
+            frame = frame.reset_index(drop=True)
+            self._frames[symbol] = frame
+            self._dates[symbol] = frame["date"].to_numpy()
+        logger.debug("Price cube loaded: %d rows, %d symbols", len(df), len(self._frames))
+
+    def read_stock_daily(
+        self, symbol: str, start_date: str | None = None, end_date: str | None = None
+    ) -> pd.DataFrame:
+        if self._frames is None:
+            self._load()
+        frame = self._frames.get(symbol)
+        if frame is None:
+            return self._store.read_stock_daily(symbol, start_date, end_date)
+        dates = self._dates[symbol]
+        lo = np.searchsorted(dates, np.datetime64(start_date), side="left") if start_date else 0
+        hi = np.searchsorted(dates, np.datetime64(end_date), side="right") if end_date else len(dates)
+        if lo >= hi:
+            return self._store.read_stock_daily(symbol, start_date, end_date)
+        return frame.iloc[lo:hi].reset_index(drop=True)
+
+
+class MultiStrategyRunner:
+    """Advance several strategy variants through the trading calendar together.
+
+    Variants in fast mode (``backtest.mode: fast``) are simulated one after
+    another with :func:`~src.backtest.fast.simulate_fast` on one shared set
+    of price matrices, and factor panels are kept across all dates, so a
+    sweep computes each panel once.
+
+    Args:
+        config: Base settings dict.
+        variants: ``{name: overrides}``; each variant runs with
+            ``merge_config(config, overrides)``.
+        run_store: Optional RunStore. Variants with an identical stored run
+            (same config, dates and data version) are reused, and newly
+            simulated variants are recorded with their name as label.
+    """
+
+    def __init__(self, config: dict, variants: dict[str, dict], run_store=None):
+        if not variants:
+            raise ValueError("At least one strategy variant is required")
+        self.run_store = run_store
+        self.store = PriceCube(DataStore(config.get("data", {}).get("db_path", "data/quant.db")))
+        configs = {name: merge_config(config, overrides) for name, overrides in variants.items()}
+        self.shared = SharedInputs(retain=any(_is_fast(c) for c in configs.values()))
+        self.engines = {
+            name: BacktestEngine(cfg, run_store=run_store, store=self.store, shared=self.shared)
+            for name, cfg in configs.items()
+        }
+
+    def run(
+        self,
+        start_date: str,
+        end_date: str,
+        progress: Callable[[dict], None] | None = None,
+        use_cache: bool = True,
+    ) -> dict[str, BacktestResult]:
+        """Run all variants; returns ``{name: BacktestResult}`` in variant order.
+
+        ``progress`` receives one event per trading day with the NAV of
+        every simulated variant (``navs``).
+        """
+        results: dict[str, BacktestResult] = {}
+        data_version = self.store.data_version() if self.run_store is not None else None
+        pending = {}
+        for name, engine in self.engines.items():
+            run_id = None
+            if self.run_store is not None:
+                if use_cache and engine.config.get("report", {}).get("reuse_runs", True):
+                    run_id = self.run_store.find(engine.config, start_date, end_date, data_version)
+                    _count_memo("hits" if run_id is not None else "misses")
+                else:
+                    _count_memo("bypassed")
+            if run_id is not None:
+                result = self.run_store.load(run_id)
+                result.run_id, result.cached = run_id, True
+                results[name] = result
+            else:
+                pending[name] = engine
+        if not pending:
+            return results
+        # Taken before simulating, like BacktestEngine.run, so recorded runs can be extended
+        data_digest = self.store.data_digest(end_date) if self.run_store is not None else None
+
+        started = time.perf_counter()
+        fast = {name: engine for name, engine in pending.items() if _is_fast(engine.config)}
+        if fast:
+            from src.backtest.fast import load_price_matrices, simulate_fast
+
+            prices = load_price_matrices(self.store, end_date)
+            for name, engine in fast.items():
+                results[name] = self._record(
+                    name, engine, simulate_fast(engine, start_date, end_date, prices=prices),
+                    start_date, end_date, data_version, data_digest,
+                )
+            pending = {name: engine for name, engine in pending.items() if name not in fast}
+        if pending:
+            self._run_lockstep(pending, results, start_date, end_date, progress, data_version, data_digest)
+        logger.info(
+            "Multi-strategy backtest done in %.1fs (factor/timing inputs: %d computed, %d shared)",
+            time.perf_counter() - started, self.shared.stats["computed"], self.shared.stats["shared"],
+        )
+        return {name: results[name] for name in self.engines}
+
+    def _record(self, name, engine, result, start_date, end_date, data_version, data_digest) -> BacktestResult:
+        if self.run_store is not None:
+            result.run_id = self.run_store.save(
+                result, engine.config, start_date, end_date,
+                data_version=data_version, label=name, data_digest=data_digest,
+            )
+        return result
+
+    def _run_lockstep(self, pending, results, start_date, end_date, progress, data_version, data_digest):
+        first = next(iter(pending.values()))
+        trading_dates = first._get_trading_dates(start_date, end_date)
+        if not trading_dates:
+            logger.error("No trading dates found between %s and %s", start_date, end_date)
+        books = {name: engine.new_book() for name, engine in pending.items()}
+        rebalance = {
+            name: engine._get_rebalance_dates(
+                trading_dates, engine.config.get("strategy", {}).get("rebalance_freq", "monthly")
+            )
+            for name, engine in pending.items()
+        }
+
+        logger.info(
+            "Starting %d-variant event backtest: %s to %s (%d trading days)",
+            len(pending), start_date, end_date, len(trading_dates),
+        )
+        started = time.perf_counter()
+        for day, date_str in enumerate(trading_dates, start=1):
+            for name, engine in pending.items():
+                engine.step(books[name], date_str, rebalance=date_str in rebalance[name])
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress({
+                    "type": "backtest",
+                    "date": date_str,
+                    "day": day,
+                    "total_days": len(trading_dates),
+                    "percent": round(100.0 * day / len(trading_dates), 2),
+                    "navs": {name: float(book.portfolio.nav) for name, book in books.items()},
+                    "elapsed_s": round(elapsed, 3),
+                    "days_per_s": round(day / elapsed, 2) if elapsed > 0 else None,
+                })
+
+        for name, engine in pending.items():
+            if trading_dates:
+                result = engine.finish(books[name])
+            else:
+                result = BacktestResult(nav_series=pd.Series(dtype=float), trade_log=pd.DataFrame(), metrics={})
+            results[name] = self._record(name, engine, result, start_date, end_date, data_version, data_digest)
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from copy import deepcopy
 
 logger = logging.getLogger(__name__)
@@ -154,3 +154,25 @@ class Portfolio:
             "num_holdings": len(self.holdings),
             "holdings": deepcopy(self.get_holdings_dict()),
         }
+
+    def to_state(self) -> dict:
+        """Full JSON-serializable state, for checkpoints (see :meth:`from_state`)."""
+        return {
+            "initial_capital": self.initial_capital,
+            "cash": self.cash,
+            "holdings": {sym: asdict(h) for sym, h in self.holdings.items()},
+            "nav_history": list(self.nav_history),
+            "date_history": list(self.date_history),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Portfolio":
+        """Rebuild a portfolio saved with :meth:`to_state`."""
+        portfolio = cls(
+            initial_capital=state["initial_capital"],
+            holdings={sym: Holding(**h) for sym, h in state["holdings"].items()},
+            nav_history=list(state["nav_history"]),
+            date_history=list(state["date_history"]),
+        )
+        portfolio.cash = state["cash"]  # set after __post_init__, which treats 0 as "unset"
+        return portfolio
@@ -0,0 +1,175 @@
+"""Resampled confidence intervals for backtest metrics.
+
+Two resampling schemes, both vectorized over resamples (one row per
+resample):
+
+- Stationary block bootstrap (Politis & Romano) of daily returns: blocks of
+  geometric length with mean ``block_size`` keep short-range
+  autocorrelation and volatility clustering. Gives intervals for annual
+  return, volatility, Sharpe and max drawdown, and P(Sharpe > 0).
+- Trade Monte Carlo over FIFO round-trip PnL: shuffling the trade order
+  shows how much of the max drawdown is sequencing luck, and resampling
+  round trips with replacement gives intervals for win rate, profit/loss
+  ratio and profit factor.
+
+Resamples are drawn in fixed-size chunks, each with its own child seed, so
+results depend only on the seed — not on ``n_jobs``.
+"""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.round_trips import match_round_trips
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 500  # Resamples per chunk (bounds memory at CHUNK × n_days)
+
+
+def stationary_bootstrap_indices(
+    n: int, n_resamples: int, block_size: float, rng: np.random.Generator
+) -> np.ndarray:
+    """``(n_resamples, n)`` index matrix of a stationary block bootstrap.
+
+    Each position starts a new block with probability ``1 / block_size``
+    (always at position 0); otherwise it continues the previous block,
+    wrapping around the end of the sample.
+    """
+    p = 1.0 / max(block_size, 1.0)
+    restart = rng.random((n_resamples, n)) < p
+    restart[:, 0] = True
+    starts = rng.integers(0, n, size=(n_resamples, n))
+    positions = np.arange(n)
+    # Position of the most recent block start at or before each position
+    last = np.maximum.accumulate(np.where(restart, positions, 0), axis=1)
+    block_start = np.take_along_axis(starts, last, axis=1)
+    return (block_start + positions - last) % n
+
+
+def _return_stats(returns: np.ndarray, risk_free: float) -> dict[str, np.ndarray]:
+    """Per-row metrics of a returns matrix, with the same formulas as ``compute_metrics``."""
+    n = returns.shape[1]
+    growth = np.cumprod(1 + returns, axis=1)
+    n_years = (n + 1) / 252
+    annual_return = growth[:, -1] ** (1 / n_years) - 1
+
+    excess = returns - risk_free / 252
+    std = excess.std(axis=1)
+    safe_std = np.where(std > 0, std, 1.0)
+    sharpe = np.where(std > 0, excess.mean(axis=1) / safe_std * np.sqrt(252), 0.0)
+
+    nav = np.hstack([np.ones((len(returns), 1)), growth])
+    peak = np.maximum.accumulate(nav, axis=1)
+    max_drawdown = (1 - nav / peak).max(axis=1)
+    return {
+        "annual_return": annual_return,
+        "annual_volatility": returns.std(axis=1) * np.sqrt(252),
+        "sharpe_ratio": sharpe,
+        "max_drawdown": max_drawdown,
+    }
+
+
+def _trade_stats(pnls: np.ndarray, shuffled: np.ndarray, capital: float) -> dict[str, np.ndarray]:
+    """Win rate / PL ratios of bootstrapped trades, drawdown of shuffled trade sequences."""
+    won = pnls > 0
+    n_won = won.sum(axis=1)
+    n_lost = pnls.shape[1] - n_won
+    wins = np.where(won, pnls, 0.0).sum(axis=1)
+    losses = np.where(won, 0.0, -pnls).sum(axis=1)
+    has_both = (n_won > 0) & (losses > 0)
+    avg_win = wins / np.maximum(n_won, 1)
+    avg_loss = losses / np.maximum(n_lost, 1)
+    equity = capital + np.hstack([np.zeros((len(shuffled), 1)), np.cumsum(shuffled, axis=1)])
+    peak = np.maximum.accumulate(equity, axis=1)
+    return {
+        "win_rate": won.mean(axis=1),
+        "profit_loss_ratio": np.where(has_both, avg_win / np.where(has_both, avg_loss, 1.0), 0.0),
+        "profit_factor": np.where(losses > 0, wins / np.where(losses > 0, losses, 1.0), 0.0),
+        "trade_max_drawdown": ((peak - equity) / peak).max(axis=1),
+    }
+
+
+def _resample_chunk(
+    returns: np.ndarray,
+    pnls: np.ndarray,
+    n_resamples: int,
+    block_size: float,
+    risk_free: float,
+    capital: float,
+    seed: np.random.SeedSequence,
+) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    idx = stationary_bootstrap_indices(len(returns), n_resamples, block_size, rng)
+    stats = _return_stats(returns[idx], risk_free)
+    if len(pnls):
+        drawn = pnls[rng.integers(0, len(pnls), size=(n_resamples, len(pnls)))]
+        order = np.argsort(rng.random((n_resamples, len(pnls))), axis=1)
+        stats.update(_trade_stats(drawn, pnls[order], capital))
+    return stats
+
+
+def resample_metrics(
+    nav_series: pd.Series,
+    trade_log: pd.DataFrame | None,
+    config: dict,
+    n_resamples: int | None = None,
+    seed: int | None = None,
+    n_jobs: int | None = None,
+) -> dict | None:
+    """Confidence intervals for backtest metrics from ``report.resampling`` settings.
+
+    Args:
+        nav_series: Daily NAV of the run.
+        trade_log: Trade log of the run (trade statistics are skipped
+            without round trips).
+        config: Settings dict; arguments override ``report.resampling`` keys.
+        n_resamples: Number of resamples (0 disables).
+        seed: Seed of the random generator.
+        n_jobs: Worker processes; 1 runs in-process.
+
+    Returns:
+        ``{"n_resamples", "block_size", "confidence", "prob_sharpe_positive",
+        "intervals": {metric: {"low", "median", "high"}}}``, or None when
+        disabled or the NAV has fewer than 3 points.
+    """
+    res_cfg = config.get("report", {}).get("resampling", {})
+    n_resamples = res_cfg.get("n_resamples", 2000) if n_resamples is None else n_resamples
+    seed = res_cfg.get("seed", 42) if seed is None else seed
+    n_jobs = res_cfg.get("n_jobs", 1) if n_jobs is None else n_jobs
+    block_size = res_cfg.get("block_size", 20)
+    confidence = res_cfg.get("confidence", 0.95)
+    risk_free = config.get("backtest", {}).get("risk_free_rate", 0.02)
+
+    if not n_resamples or nav_series is None or len(nav_series) < 3:
+        return None
+    nav = nav_series.to_numpy(dtype=float)
+    returns = np.diff(nav) / nav[:-1]
+    pnls = match_round_trips(trade_log)["pnl"].to_numpy(dtype=float)
+
+    sizes = [_CHUNK] * (n_resamples // _CHUNK) + ([n_resamples % _CHUNK] if n_resamples % _CHUNK else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(returns, pnls, size, block_size, risk_free, float(nav[0]), s) for size, s in zip(sizes, seeds)]
+    if n_jobs > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes))) as pool:
+            chunks = list(pool.map(_resample_chunk, *zip(*args)))
+    else:
+        chunks = [_resample_chunk(*a) for a in args]
+    stats = {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+
+    q = [(1 - confidence) / 2, 0.5, (1 + confidence) / 2]
+    intervals = {}
+    for name, values in stats.items():
+        low, median, high = np.quantile(values, q)
+        intervals[name] = {"low": float(low), "median": float(median), "high": float(high)}
+    logger.debug("Resampled %d paths of %d days, %d trades", n_resamples, len(returns), len(pnls))
+    return {
+        "n_resamples": n_resamples,
+        "block_size": block_size,
+        "confidence": confidence,
+        "prob_sharpe_positive": float((stats["sharpe_ratio"] > 0).mean()),
+        "intervals": intervals,
+    }
@@ -0,0 +1,133 @@
+"""FIFO matching of buy and sell fills into round trips.
+
+Every fill is laid out as an interval on a per-symbol "share axis": the
+k-th buy of a symbol covers the shares between the cumulative buy volume
+before and after it, and likewise for sells. Under FIFO the sold shares
+are exactly the bought shares at the same positions, so the round trips
+are the non-empty intersections of buy and sell intervals. Symbols get
+disjoint offsets on one global axis, and the intersections are found with
+one sort and two binary searches — no per-symbol or per-lot Python loop.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+_SELL_ACTIONS = ("SELL", "SELL_STOP")
+
+ROUND_TRIP_COLUMNS = [
+    "symbol", "entry_date", "exit_date", "shares", "entry_price", "exit_price",
+    "holding_days", "costs", "pnl", "return_pct", "exit_action",
+]
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=float) for c in ROUND_TRIP_COLUMNS})
+
+
+def match_round_trips(trade_log: pd.DataFrame | None) -> pd.DataFrame:
+    """Pair buys and sells FIFO per symbol into a round-trip table.
+
+    One row per (buy fill, sell fill) pair that shares matched, in exit
+    order. ``costs`` are the pair's pro-rata share of the buy commission
+    and the sell commission and stamp tax (a BUY row's ``cost`` is value
+    plus commission, a SELL row's is commission plus stamp tax); ``pnl`` is
+    net of them and ``return_pct`` is relative to the entry value.
+    ``holding_days`` counts calendar days. Shares still held at the end and
+    sells without a matching buy are left out.
+    """
+    if (
+        trade_log is None or trade_log.empty
+        or not {"date", "symbol", "action", "shares", "price"}.issubset(trade_log.columns)
+    ):
+        return _empty()
+
+    log = trade_log.reset_index(drop=True)
+    is_buy = (log["action"] == "BUY").to_numpy()
+    is_sell = log["action"].isin(_SELL_ACTIONS).to_numpy()
+    log = log[is_buy | is_sell]
+    is_buy, is_sell = is_buy[log.index], is_sell[log.index]
+    if not is_buy.any() or not is_sell.any():
+        return _empty()
+
+    # Stable order: symbol, then date, then log order
+    dates = pd.to_datetime(log["date"]).to_numpy()
+    sym_codes, sym_names = pd.factorize(log["symbol"].astype(str))
+    order = np.lexsort((np.arange(len(log)), dates, sym_codes))
+    sym_codes, dates, is_buy, is_sell = sym_codes[order], dates[order], is_buy[order], is_sell[order]
+    shares = log["shares"].to_numpy(dtype=float)[order]
+    prices = log["price"].to_numpy(dtype=float)[order]
+    if "cost" in log.columns:
+        cost = log["cost"].fillna(0).to_numpy(dtype=float)[order]
+        fees = np.where(is_buy, cost - shares * prices, cost)
+    else:
+        fees = np.zeros(len(log))
+    actions = log["action"].to_numpy()[order]
+
+    # Clip sells to the position held at the time (reflect the running
+    # position at zero), so sells without bought shares match nothing
+    running = pd.Series(np.where(is_buy, shares, -shares)).groupby(sym_codes).cumsum()
+    floor = np.minimum(running.groupby(sym_codes).cummin().to_numpy(), 0.0)
+    position = running.to_numpy() - floor
+    before = np.r_[0.0, position[:-1]]
+    first_row = np.r_[True, sym_codes[1:] != sym_codes[:-1]]
+    before[first_row] = 0.0
+    filled = shares
+    shares = np.where(is_sell, before - position, shares)
+
+    # Disjoint per-symbol blocks on one global share axis
+    n_sym = len(sym_names)
+    buy_total = np.bincount(sym_codes, weights=np.where(is_buy, shares, 0), minlength=n_sym)
+    sell_total = np.bincount(sym_codes, weights=np.where(is_sell, shares, 0), minlength=n_sym)
+    offsets = np.concatenate([[0.0], np.cumsum(np.maximum(buy_total, sell_total))[:-1]])
+
+    def intervals(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        idx = np.flatnonzero(mask)
+        sizes = shares[idx]
+        cum = np.cumsum(sizes)
+        # Cumulative volume restarts at each symbol's offset
+        first = np.r_[True, sym_codes[idx][1:] != sym_codes[idx][:-1]]
+        base = np.maximum.accumulate(np.where(first, cum - sizes, 0.0))
+        ends = offsets[sym_codes[idx]] + cum - base
+        return idx, ends - sizes, ends
+
+    buy_idx, buy_start, buy_end = intervals(is_buy)
+    sell_idx, sell_start, sell_end = intervals(is_sell)
+
+    edges = np.unique(np.concatenate([buy_start, buy_end, sell_start, sell_end]))
+    lo, hi = edges[:-1], edges[1:]
+    mid = (lo + hi) / 2
+    b = np.searchsorted(buy_end, mid, side="right")
+    s = np.searchsorted(sell_end, mid, side="right")
+    b_ok = b < len(buy_end)
+    s_ok = s < len(sell_end)
+    matched = b_ok & s_ok
+    matched[matched] &= (buy_start[b[matched]] <= mid[matched]) & (sell_start[s[matched]] <= mid[matched])
+    if not matched.any():
+        return _empty()
+
+    qty = (hi - lo)[matched]
+    bi, si = buy_idx[b[matched]], sell_idx[s[matched]]
+    entry_price, exit_price = prices[bi], prices[si]
+    costs = fees[bi] * qty / filled[bi] + fees[si] * qty / filled[si]
+    pnl = (exit_price - entry_price) * qty - costs
+
+    trips = pd.DataFrame({
+        "symbol": sym_names[sym_codes[bi]],
+        "entry_date": pd.DatetimeIndex(dates[bi]).strftime("%Y-%m-%d"),
+        "exit_date": pd.DatetimeIndex(dates[si]).strftime("%Y-%m-%d"),
+        "shares": qty,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "holding_days": ((dates[si] - dates[bi]) // np.timedelta64(1, "D")).astype(int),
+        "costs": costs,
+        "pnl": pnl,
+        "return_pct": pnl / (entry_price * qty),
+        "exit_action": actions[si],
+        "_exit": order[si],  # Log position of the exit fill
+    })
+    return (
+        trips.sort_values("_exit", kind="stable")
+        .drop(columns="_exit")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,318 @@
+"""Versioned backtest run store: one directory per run plus a SQLite metadata index.
+
+Each run gets a unique, time-sortable id and records the config hash and
+store data version it was produced from. NAV, trades and daily snapshots
+are kept as compressed columnar ``.npz`` files (one array per column), so
+runs load without CSV parsing and concurrent writers never share files.
+The engine's final state is kept as ``state.json`` so a run can be
+extended, and in-progress runs write checkpoints under ``checkpoints/``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestResult
+
+logger = logging.getLogger(__name__)
+
+# Config sections and keys that cannot change backtest results
+_IGNORED_CONFIG_SECTIONS = ("web", "report", "variants", "daemon", "daily", "profiling", "signals")
+_IGNORED_CONFIG_KEYS = {"universe": ("cache_ttl_s",), "factors": ("cache_size",)}
+
+_INDEX_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        start_date TEXT,
+        end_date TEXT,
+        config_hash TEXT,
+        data_version INTEGER,
+        data_digest TEXT,
+        label TEXT,
+        n_days INTEGER,
+        n_trades INTEGER,
+        final_nav REAL,
+        metrics TEXT,
+        config TEXT
+    )
+"""
+
+
+def normalize_config(config: dict) -> dict:
+    """Config with result-irrelevant sections and keys removed, for hashing."""
+    normalized = {}
+    for section, value in config.items():
+        if section in _IGNORED_CONFIG_SECTIONS:
+            continue
+        ignored = _IGNORED_CONFIG_KEYS.get(section)
+        if ignored and isinstance(value, dict):
+            value = {k: v for k, v in value.items() if k not in ignored}
+        normalized[section] = value
+    return normalized
+
+
+def config_hash(config: dict) -> str:
+    """Stable short hash of the normalized config."""
+    canonical = json.dumps(normalize_config(config), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, data: dict):
+    """Write JSON atomically (temp file + rename)."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, default=_json_default))
+    os.replace(tmp, path)
+
+
+def _new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _save_columns(path: Path, df: pd.DataFrame):
+    arrays = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            values = df[col].astype(str).to_numpy(dtype=str)
+        arrays[str(col)] = values
+    np.savez_compressed(path, **arrays)
+
+
+def _load_columns(path: Path) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+
+class RunStore:
+    """Persist, list, load and compare backtest runs under ``root``."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.db"
+        with self._get_conn() as conn:
+            conn.execute(_INDEX_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "data_digest" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN data_digest TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_config ON runs (config_hash, data_version)")
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RunStore":
+        """Store at ``report.runs_dir`` (default ``<report.output_dir>/runs``).
+
+        Backtest outputs left by older versions (``last_*.csv``) in the
+        report directory are imported once as a run.
+        """
+        report_cfg = config.get("report", {})
+        output_dir = Path(report_cfg.get("output_dir", "reports"))
+        store = cls(report_cfg.get("runs_dir", output_dir / "runs"))
+        store.import_legacy(output_dir)
+        return store
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def save(
+        self,
+        result: BacktestResult,
+        config: dict,
+        start_date: str,
+        end_date: str,
+        data_version: int | None = None,
+        label: str | None = None,
+        data_digest: str | None = None,
+    ) -> str:
+        """Write a run's files, then index it. Returns the new run id.
+
+        ``data_digest`` is the store's :meth:`~src.data.storage.DataStore.data_digest`
+        up to ``end_date``, checked before the run is extended.
+        """
+        run_id = _new_run_id()
+        tmp_dir = self.root / f".tmp-{run_id}"
+        tmp_dir.mkdir(parents=True)
+
+        nav = result.nav_series if result.nav_series is not None else pd.Series(dtype=float)
+        nav_df = pd.DataFrame({
+            "date": nav.index.astype(str).to_numpy(dtype=str),
+            "nav": nav.to_numpy(dtype=float),
+        })
+        _save_columns(tmp_dir / "nav.npz", nav_df)
+        trades = result.trade_log if result.trade_log is not None else pd.DataFrame()
+        if not trades.empty:
+            _save_columns(tmp_dir / "trades.npz", trades)
+        if result.daily_snapshots:
+            _save_columns(tmp_dir / "snapshots.npz", pd.DataFrame(result.daily_snapshots))
+        if result.state is not None:
+            _write_json(tmp_dir / "state.json", result.state)
+        tmp_dir.rename(self.root / run_id)
+
+        with self._get_conn() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, created_at, start_date, end_date, config_hash, data_version, "
+                "data_digest, label, n_days, n_trades, final_nav, metrics, config) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, datetime.now().isoformat(), start_date, end_date,
+                    config_hash(config), data_version, data_digest, label,
+                    len(nav_df), len(trades),
+                    float(nav_df["nav"].iloc[-1]) if len(nav_df) else None,
+                    json.dumps(result.metrics or {}, default=str),
+                    json.dumps(normalize_config(config), default=str, ensure_ascii=False),
+                ),
+            )
+        logger.info("Saved backtest run %s (%s to %s)", run_id, start_date, end_date)
+        return run_id
+
+    def list(self, limit: int = 50, offset: int = 0) -> list[dict]:
+        """Run metadata, newest first (no file reads)."""
+        with self._get_conn() as conn:
+            rows = conn.execute(
+                "SELECT run_id, created_at, start_date, end_date, config_hash, data_version, "
+                "label, n_days, n_trades, final_nav, metrics FROM runs "
+                "ORDER BY created_at DESC, run_id DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [self._meta(r) for r in rows]
+
+    def find(self, config: dict, start_date: str, end_date: str, data_version: int) -> str | None:
+        """Newest run with the same config hash, date range and data version, if any."""
+        with self._get_conn() as conn:
+            rows = conn.execute(
+                "SELECT run_id FROM runs WHERE config_hash = ? AND data_version = ? "
+                "AND start_date = ? AND end_date = ? ORDER BY created_at DESC, run_id DESC",
+                (config_hash(config), data_version, start_date, end_date),
+            ).fetchall()
+        for row in rows:
+            # Skip index rows whose files were removed by hand
+            if (self.root / row["run_id"]).is_dir():
+                return row["run_id"]
+        return None
+
+    def count(self) -> int:
+        with self._get_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def latest_id(self) -> str | None:
+        runs = self.list(limit=1)
+        return runs[0]["run_id"] if runs else None
+
+    def get(self, run_id: str) -> dict | None:
+        with self._get_conn() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        meta = self._meta(row)
+        meta["config"] = json.loads(row["config"] or "{}")
+        return meta
+
+    def load(self, run_id: str) -> BacktestResult:
+        """Load a stored run. Raises KeyError for unknown ids."""
+        meta = self.get(run_id)
+        if meta is None:
+            raise KeyError(f"Unknown backtest run: {run_id}")
+        run_dir = self.root / run_id
+        nav_df = _load_columns(run_dir / "nav.npz")
+        nav = pd.Series(
+            nav_df["nav"].to_numpy(dtype=float) if not nav_df.empty else [],
+            index=nav_df["date"].to_numpy() if not nav_df.empty else [],
+            dtype=float,
+        )
+        snapshots = _load_columns(run_dir / "snapshots.npz")
+        return BacktestResult(
+            nav_series=nav,
+            trade_log=_load_columns(run_dir / "trades.npz"),
+            metrics=meta["metrics"],
+            daily_snapshots=snapshots.to_dict(orient="records"),
+        )
+
+    def load_state(self, run_id: str) -> dict | None:
+        """Final engine state of a run, or None if it was not kept."""
+        path = self.root / run_id / "state.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    # ── Checkpoints of in-progress runs ─────────────────────────────────────
+
+    def _checkpoint_path(self, config: dict, start_date: str, end_date: str, data_version: int) -> Path:
+        key = f"{config_hash(config)}|{start_date}|{end_date}|{data_version}"
+        return self.root / "checkpoints" / f"{hashlib.sha256(key.encode()).hexdigest()[:24]}.json"
+
+    def save_checkpoint(self, config: dict, start_date: str, end_date: str, data_version: int, state: dict):
+        """Record the latest engine state of a run that is still in progress."""
+        path = self._checkpoint_path(config, start_date, end_date, data_version)
+        path.parent.mkdir(exist_ok=True)
+        _write_json(path, state)
+        logger.debug("Checkpointed backtest %s to %s at %s", start_date, end_date, state["last_date"])
+
+    def load_checkpoint(self, config: dict, start_date: str, end_date: str, data_version: int) -> dict | None:
+        """Latest checkpoint of an identical (config, dates, data version) run, if any."""
+        path = self._checkpoint_path(config, start_date, end_date, data_version)
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def clear_checkpoint(self, config: dict, start_date: str, end_date: str, data_version: int):
+        self._checkpoint_path(config, start_date, end_date, data_version).unlink(missing_ok=True)
+
+    def compare(self, run_ids: list[str]) -> dict:
+        """Side-by-side view: metadata per run and NAVs normalized to 1.0 on a shared date axis."""
+        metas, navs = [], {}
+        for run_id in run_ids:
+            result = self.load(run_id)
+            metas.append(self.get(run_id))
+            if not result.nav_series.empty:
+                navs[run_id] = result.nav_series / result.nav_series.iloc[0]
+        nav = pd.DataFrame(navs).sort_index() if navs else pd.DataFrame()
+        return {"runs": metas, "nav": nav}
+
+    def delete(self, run_id: str):
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        shutil.rmtree(self.root / run_id, ignore_errors=True)
+
+    def import_legacy(self, report_dir: Path) -> str | None:
+        """Import ``last_*`` files from older versions as a run, once."""
+        report_dir = Path(report_dir)
+        if not (report_dir / "last_metrics.json").exists() or self.count() > 0:
+            return None
+        metrics = json.loads((report_dir / "last_metrics.json").read_text())
+        nav = pd.Series(dtype=float)
+        if (report_dir / "last_nav.csv").exists():
+            df = pd.read_csv(report_dir / "last_nav.csv", index_col=0)
+            if not df.empty:
+                nav = df.iloc[:, 0].astype(float)
+        trades = pd.DataFrame()
+        if (report_dir / "last_trades.csv").exists():
+            trades = pd.read_csv(report_dir / "last_trades.csv")
+        result = BacktestResult(nav_series=nav, trade_log=trades, metrics=metrics)
+        start = str(nav.index[0]) if not nav.empty else None
+        end = str(nav.index[-1]) if not nav.empty else None
+        run_id = self.save(result, {}, start, end, label="imported")
+        logger.info("Imported legacy backtest output from %s as run %s", report_dir, run_id)
+        return run_id
+
+    @staticmethod
+    def _meta(row: sqlite3.Row) -> dict:
+        meta = {k: row[k] for k in row.keys() if k not in ("metrics", "config")}
+        meta["metrics"] = json.loads(row["metrics"] or "{}")
+        return meta
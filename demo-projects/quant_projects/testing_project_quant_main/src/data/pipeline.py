@@ -2,7 +2,9 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Callable
 
 import pandas as pd
 from dotenv import load_dotenv
@@ -10,6 +12,7 @@ from dotenv import load_dotenv
 from src.data.storage import DataStore
 from src.data.sources.tushare_source import TushareSource
 from src.data.validators import validate_stock_daily, validate_futures_daily, validate_dataframe
+from src.ops.profiling import timed
 
 logger = logging.getLogger(__name__)
 
@@ -20,22 +23,27 @@ load_dotenv()
 class DataPipeline:
     """Orchestrates incremental data fetching from multiple sources."""
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, store: DataStore | None = None):
         self.config = config
         data_cfg = config.get("data", {})
-        self.store = DataStore(data_cfg.get("db_path", "data/quant.db"))
+        self.store = store if store is not None else DataStore(data_cfg.get("db_path", "data/quant.db"))
         self.primary = TushareSource(
             token_env=data_cfg.get("tushare_token_env", "TUSHARE_TOKEN"),
             delay=data_cfg.get("api_delay_seconds", 0.5),
             max_retries=data_cfg.get("max_retries", 2),
         )
         self._metals = ["cu", "al", "zn", "ni", "sn", "pb", "au", "ag"]
+        self._progress: Callable[[dict], None] | None = None
+        self._rows: dict[str, int] = {}
+        self._started = 0.0
 
+    @timed("ingest")
     def run(
         self,
         symbols: list[str] | None = None,
         categories: list[str] | None = None,
         force_refresh: bool = False,
+        progress: Callable[[dict], None] | None = None,
     ):
         """Run the data update pipeline.
 
@@ -44,10 +52,17 @@ class DataPipeline:
             categories: Data categories to update ('stock', 'futures', 'macro', 'flow').
                        If None, update all.
             force_refresh: If True, clear existing data and re-download everything.
+            progress: Optional callback receiving an event dict after each
+                fetched item: category, item, done, total, percent, rows
+                (ingested per category so far), elapsed_s and rows_per_s.
         """
         all_categories = ["stock", "futures", "macro", "flow"]
         cats = categories or all_categories
 
+        self._progress = progress
+        self._rows = {}
+        self._started = time.perf_counter()
+
         today = datetime.now().strftime("%Y-%m-%d")
         default_start = "2020-01-01"
 
@@ -76,6 +91,25 @@ class DataPipeline:
         for cat, info in summary.items():
             print(f"  {cat}: {info}")
 
+    def _report(self, category: str, item: str, done: int, total: int, rows: int):
+        """Emit a progress event for one fetched item (no-op without a callback)."""
+        self._rows[category] = self._rows.get(category, 0) + rows
+        if self._progress is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        total_rows = sum(self._rows.values())
+        self._progress({
+            "type": "data",
+            "category": category,
+            "item": item,
+            "done": done,
+            "total": total,
+            "percent": round(100.0 * done / total, 2) if total else 100.0,
+            "rows": dict(self._rows),
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(total_rows / elapsed, 1) if elapsed > 0 else None,
+        })
+
     def _get_start_date(self, category: str, default: str, force: bool) -> str:
         """Determine start date for incremental update."""
         if force:
@@ -98,13 +132,14 @@ class DataPipeline:
 
         total_rows = 0
         errors = 0
-        for symbol in symbols:
+        for i, symbol in enumerate(symbols, start=1):
             start = self._get_start_date(f"stock_{symbol}", default_start, force)
             try:
                 df = self.primary.fetch_stock_daily(symbol, start, end)
             except Exception as e:
                 logger.error("Failed to fetch %s: %s", symbol, e)
                 errors += 1
+                self._report("stock", symbol, i, len(symbols), 0)
                 continue
 
             result = validate_stock_daily(df)
@@ -116,6 +151,7 @@ class DataPipeline:
                 self.store.save_dataframe("stock_daily", result.clean_df)
                 total_rows += len(result.clean_df)
                 self.store.set_last_updated(f"stock_{symbol}", end)
+            self._report("stock", symbol, i, len(symbols), len(result.clean_df))
 
         self.store.set_last_updated("stock", end)
         return f"{total_rows} rows updated, {errors} errors"
@@ -125,12 +161,14 @@ class DataPipeline:
             self.store.clear_table("futures_daily")
 
         total_rows = 0
-        for metal in self._metals:
+        starts = []
+        for i, metal in enumerate(self._metals, start=1):
             start = self._get_start_date(f"futures_{metal}", default_start, force)
             try:
                 df = self.primary.fetch_futures_daily(metal, start, end)
             except Exception as e:
                 logger.error("Failed to fetch futures %s: %s", metal, e)
+                self._report("futures", metal, i, len(self._metals), 0)
                 continue
 
             result = validate_futures_daily(df)
@@ -139,7 +177,13 @@ class DataPipeline:
                 self.store.save_dataframe("futures_daily", result.clean_df)
                 total_rows += len(result.clean_df)
                 self.store.set_last_updated(f"futures_{metal}", end)
+                starts.append(start)
+            self._report("futures", metal, i, len(self._metals), len(result.clean_df))
+
+        if starts or force:
+            from src.strategy.timing import update_timing_series
 
+            update_timing_series(self.store, since=None if force else min(starts))
         self.store.set_last_updated("futures", end)
         return f"{total_rows} rows updated"
 
@@ -149,16 +193,18 @@ class DataPipeline:
 
         indicators = ["pmi", "m1"]
         total = 0
-        for ind in indicators:
+        for i, ind in enumerate(indicators, start=1):
             try:
                 df = self.primary.fetch_macro(ind)
             except Exception as e:
                 logger.error("Failed to fetch macro %s: %s", ind, e)
+                self._report("macro", ind, i, len(indicators), 0)
                 continue
 
             result = validate_dataframe(df, name=f"macro_{ind}")
             if not result.clean_df.empty:
                 total += len(result.clean_df)
+            self._report("macro", ind, i, len(indicators), len(result.clean_df))
 
         self.store.set_last_updated("macro")
         return f"{total} records"
@@ -170,14 +216,16 @@ class DataPipeline:
             self.store.clear_table("fund_flow")
 
         total = 0
-        for symbol in symbols:
+        for i, symbol in enumerate(symbols, start=1):
             try:
                 df = self.primary.fetch_fund_flow(symbol, default_start, end)
             except Exception as e:
                 logger.error("Failed to fetch fund flow %s: %s", symbol, e)
+                self._report("flow", symbol, i, len(symbols), 0)
                 continue
             if not df.empty:
                 total += len(df)
+            self._report("flow", symbol, i, len(symbols), len(df))
 
         self.store.set_last_updated("flow")
         return f"{total} records"
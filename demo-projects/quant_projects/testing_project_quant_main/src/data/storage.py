@@ -1,13 +1,17 @@
 """Local data storage layer — SQLite backend with incremental update tracking."""
 from __future__ import annotations
 
+import hashlib
 import sqlite3
 import logging
+import uuid
 from pathlib import Path
 from datetime import datetime
 
 import pandas as pd
 
+from src.data import tracing
+
 logger = logging.getLogger(__name__)
 
 # Table schemas for SQLite initialization
@@ -91,12 +95,150 @@ _TABLE_SCHEMAS = {
             FOREIGN KEY (news_id) REFERENCES news(id)
         )
     """,
+    "news_symbols": """
+        CREATE TABLE IF NOT EXISTS news_symbols (
+            news_id INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            PRIMARY KEY (news_id, symbol),
+            FOREIGN KEY (news_id) REFERENCES news(id)
+        )
+    """,
+    "timing_series": """
+        CREATE TABLE IF NOT EXISTS timing_series (
+            date TEXT PRIMARY KEY,
+            cu_mom_20d REAL, cu_mom_60d REAL,
+            al_mom_20d REAL, al_mom_60d REAL,
+            au_mom_20d REAL,
+            avg_mom_20d REAL, avg_mom_60d REAL,
+            position_ratio REAL
+        )
+    """,
+    "signal_sets": """
+        CREATE TABLE IF NOT EXISTS signal_sets (
+            set_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            as_of TEXT NOT NULL,
+            built_at TEXT NOT NULL,
+            data_version INTEGER,
+            position_ratio REAL,
+            gold_hedge INTEGER,
+            n_signals INTEGER
+        )
+    """,
+    "signal_set_items": """
+        CREATE TABLE IF NOT EXISTS signal_set_items (
+            set_id INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            name TEXT,
+            action TEXT,
+            current_weight REAL,
+            target_weight REAL,
+            weight_change REAL,
+            estimated_cost_pct REAL,
+            score REAL,
+            sentiment_label TEXT,
+            factor_contributions TEXT,
+            PRIMARY KEY (set_id, symbol),
+            FOREIGN KEY (set_id) REFERENCES signal_sets(set_id)
+        )
+    """,
     "meta": """
         CREATE TABLE IF NOT EXISTS meta (
             category TEXT PRIMARY KEY,
             last_updated TEXT
         )
     """,
+    "table_stats": """
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """,
+}
+
+# Secondary indexes for news lookups by time window and by symbol
+_INDEX_SCHEMAS = [
+    "CREATE INDEX IF NOT EXISTS idx_news_published_at ON news (published_at)",
+    "CREATE INDEX IF NOT EXISTS idx_news_symbols_symbol ON news_symbols (symbol, news_id)",
+    "CREATE INDEX IF NOT EXISTS idx_signal_sets_as_of ON signal_sets (as_of, set_id)",
+]
+
+# Triggers keeping news_symbols in sync with news.related_symbols (a JSON array),
+# so every insert path — fetcher, tests, manual SQL — maintains the index.
+_NEWS_SYMBOLS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS news_symbols_ai AFTER INSERT ON news BEGIN
+        INSERT OR IGNORE INTO news_symbols (news_id, symbol)
+        SELECT NEW.id, value FROM json_each(
+            CASE WHEN json_valid(NEW.related_symbols) THEN NEW.related_symbols ELSE '[]' END
+        ) WHERE type = 'text';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_symbols_ad AFTER DELETE ON news BEGIN
+        DELETE FROM news_symbols WHERE news_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_symbols_au AFTER UPDATE OF related_symbols ON news BEGIN
+        DELETE FROM news_symbols WHERE news_id = OLD.id;
+        INSERT OR IGNORE INTO news_symbols (news_id, symbol)
+        SELECT NEW.id, value FROM json_each(
+            CASE WHEN json_valid(NEW.related_symbols) THEN NEW.related_symbols ELSE '[]' END
+        ) WHERE type = 'text';
+    END
+    """,
+]
+
+# External-content FTS5 index over news title/summary. The trigram tokenizer
+# handles unsegmented Chinese text (substring match for keywords >= 3 chars).
+_NEWS_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+        title, summary, content='news', content_rowid='id', tokenize='trigram'
+    )
+"""
+
+_NEWS_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_ai AFTER INSERT ON news BEGIN
+        INSERT INTO news_fts (rowid, title, summary) VALUES (NEW.id, NEW.title, NEW.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_ad AFTER DELETE ON news BEGIN
+        INSERT INTO news_fts (news_fts, rowid, title, summary)
+        VALUES ('delete', OLD.id, OLD.title, OLD.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_au AFTER UPDATE OF title, summary ON news BEGIN
+        INSERT INTO news_fts (news_fts, rowid, title, summary)
+        VALUES ('delete', OLD.id, OLD.title, OLD.summary);
+        INSERT INTO news_fts (rowid, title, summary) VALUES (NEW.id, NEW.title, NEW.summary);
+    END
+    """,
+]
+
+# Trigram FTS needs at least 3 characters; shorter keywords fall back to LIKE
+_FTS_MIN_KEYWORD_LEN = 3
+
+# Tables rebuilt from other tables as a side effect of computations (factor
+# runs refresh universe_cache, futures ingests refresh timing_series, signal
+# builds append signal sets) and update bookkeeping (meta is stamped after
+# every fetch, even one that brings no rows); writes to them do not change
+# the data version.
+_DERIVED_TABLES = ("universe_cache", "timing_series", "signal_sets", "signal_set_items", "meta")
+
+# Source tables and the column dating their rows (see DataStore.data_digest)
+_DATED_TABLES = {
+    "stock_daily": "date",
+    "financials": "report_date",
+    "futures_daily": "date",
+    "inventory": "date",
+    "macro": "date",
+    "fund_flow": "date",
+    "news": "published_at",
 }
 
 
@@ -105,16 +247,145 @@ class DataStore:
 
     def __init__(self, db_path: str = "data/quant.db"):
         self.db_path = db_path
+        self.fts_enabled = False
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self._init_tables()
 
     def _get_conn(self) -> sqlite3.Connection:
+        if tracing.active_trace() is not None:
+            return sqlite3.connect(self.db_path, factory=tracing.TracingConnection)
         return sqlite3.connect(self.db_path)
 
     def _init_tables(self):
         with self._get_conn() as conn:
+            existing = {
+                r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
             for schema in _TABLE_SCHEMAS.values():
                 conn.execute(schema)
+            for schema in _INDEX_SCHEMAS:
+                conn.execute(schema)
+            for trigger in _NEWS_SYMBOLS_TRIGGERS:
+                conn.execute(trigger)
+            if "news_symbols" not in existing:
+                self._backfill_news_symbols(conn)
+            self._init_news_fts(conn, rebuild="news_fts" not in existing)
+            self._backfill_table_stats(conn)
+
+    def _backfill_table_stats(self, conn: sqlite3.Connection):
+        """Seed row counts for tables that have no table_stats entry yet."""
+        tracked = {r[0] for r in conn.execute("SELECT table_name FROM table_stats")}
+        for table in _TABLE_SCHEMAS:
+            if table != "table_stats" and table not in tracked:
+                count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                conn.execute(
+                    "INSERT OR IGNORE INTO table_stats (table_name, row_count, version, updated_at) "
+                    "VALUES (?, ?, 0, ?)",
+                    (table, count, datetime.now().isoformat()),
+                )
+
+    def _record_write(self, conn: sqlite3.Connection, table: str):
+        """Refresh a table's row count and bump its version after a write.
+
+        Must be called inside the writing transaction by every write path
+        (including raw SQL writers) so that data_version() changes whenever
+        the stored data does.
+        """
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.execute(
+            "INSERT INTO table_stats (table_name, row_count, version, updated_at) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (table_name) DO UPDATE SET row_count = excluded.row_count, "
+            "version = version + 1, updated_at = excluded.updated_at",
+            (table, count, datetime.now().isoformat()),
+        )
+
+    def data_version(self) -> int:
+        """Monotonic counter that changes on every recorded write to a source table.
+
+        Derived cache tables are excluded, so computing factors (or running a
+        backtest) does not invalidate results keyed by the version.
+        """
+        with self._get_conn() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(version), 0) FROM table_stats "
+                f"WHERE table_name NOT IN ({','.join('?' for _ in _DERIVED_TABLES)})",
+                _DERIVED_TABLES,
+            ).fetchone()
+        return int(row[0])
+
+    def table_row_counts(self, tables: list[str] | None = None) -> dict[str, int]:
+        """Row counts from maintained table statistics (no table scans)."""
+        query = "SELECT table_name, row_count FROM table_stats"
+        params: tuple = ()
+        if tables:
+            query += f" WHERE table_name IN ({','.join('?' for _ in tables)})"
+            params = tuple(tables)
+        with self._get_conn() as conn:
+            counts = dict(conn.execute(query, params).fetchall())
+        return {t: counts.get(t, 0) for t in tables} if tables else counts
+
+    def table_versions(self, tables: list[str]) -> dict[str, int]:
+        """Write versions of individual tables (0 for tables never written)."""
+        with self._get_conn() as conn:
+            versions = dict(conn.execute(
+                "SELECT table_name, version FROM table_stats "
+                f"WHERE table_name IN ({','.join('?' for _ in tables)})",
+                tuple(tables),
+            ).fetchall())
+        return {t: versions.get(t, 0) for t in tables}
+
+    def data_digest(self, end_date: str) -> str:
+        """Fingerprint of the source rows dated up to ``end_date``.
+
+        Per table the row count and the sum of every column (text columns by
+        length); sentiment scores count with the date of their news item.
+        Unlike :meth:`data_version`, rows appended after ``end_date`` leave it
+        unchanged, while backfills or corrections of earlier rows change it.
+        """
+        # Dates compared as YYYYMMDD: financial report dates are stored without dashes
+        day = end_date.replace("-", "")
+        parts = []
+        with self._get_conn() as conn:
+            for table, date_col in _DATED_TABLES.items():
+                columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+                aggregates = ["COUNT(*)"] + [
+                    f"TOTAL(LENGTH({name}))" if (col_type or "").upper() == "TEXT" else f"TOTAL({name})"
+                    for _, name, col_type, *_ in columns if name != date_col
+                ]
+                row = conn.execute(
+                    f"SELECT {', '.join(aggregates)} FROM {table} "
+                    f"WHERE replace(substr({date_col}, 1, 10), '-', '') <= ?",
+                    (day,),
+                ).fetchone()
+                parts.append(f"{table}:{','.join(repr(v) for v in row)}")
+            row = conn.execute(
+                "SELECT COUNT(*), TOTAL(s.sentiment_score), TOTAL(s.confidence) FROM sentiment_cache s "
+                "JOIN news n ON n.id = s.news_id WHERE replace(substr(n.published_at, 1, 10), '-', '') <= ?",
+                (day,),
+            ).fetchone()
+            parts.append(f"sentiment_cache:{','.join(repr(v) for v in row)}")
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+    def _backfill_news_symbols(self, conn: sqlite3.Connection):
+        """Populate news_symbols from news rows stored before the index existed."""
+        conn.execute(
+            "INSERT OR IGNORE INTO news_symbols (news_id, symbol) "
+            "SELECT n.id, j.value FROM news n, json_each("
+            "CASE WHEN json_valid(n.related_symbols) THEN n.related_symbols ELSE '[]' END"
+            ") j WHERE j.type = 'text'"
+        )
+
+    def _init_news_fts(self, conn: sqlite3.Connection, rebuild: bool):
+        """Create the news FTS5 index; keyword search degrades to LIKE without it."""
+        try:
+            conn.execute(_NEWS_FTS_SCHEMA)
+            for trigger in _NEWS_FTS_TRIGGERS:
+                conn.execute(trigger)
+            if rebuild:
+                conn.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild')")
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning("SQLite FTS5 unavailable, news keyword search uses LIKE: %s", e)
 
     def get_last_updated(self, category: str) -> str | None:
         """Get the last update timestamp for a data category."""
@@ -132,17 +403,21 @@ class DataStore:
                 "INSERT OR REPLACE INTO meta (category, last_updated) VALUES (?, ?)",
                 (category, ts),
             )
+            self._record_write(conn, "meta")
 
     def save_dataframe(self, table: str, df: pd.DataFrame, if_exists: str = "append"):
         """Write a DataFrame to a table, deduplicating by primary key."""
         if df.empty:
             return
+        # One staging table per call: concurrent writers (parallel ingest) must not share it
+        staging = f"_{table}_staging_{uuid.uuid4().hex[:12]}"
         with self._get_conn() as conn:
-            df.to_sql(f"_{table}_staging", conn, if_exists="replace", index=False)
+            df.to_sql(staging, conn, if_exists="replace", index=False)
             # Upsert from staging into main table
             cols = ", ".join(df.columns)
-            conn.execute(f"INSERT OR REPLACE INTO {table} ({cols}) SELECT {cols} FROM _{table}_staging")
-            conn.execute(f"DROP TABLE IF EXISTS _{table}_staging")
+            conn.execute(f"INSERT OR REPLACE INTO {table} ({cols}) SELECT {cols} FROM {staging}")
+            conn.execute(f"DROP TABLE IF EXISTS {staging}")
+            self._record_write(conn, table)
 
     def read_table(
         self, table: str, where: str | None = None, params: tuple = ()
@@ -196,30 +471,100 @@ class DataStore:
         self,
         since: str | None = None,
         symbol: str | None = None,
+        until: str | None = None,
+        keyword: str | None = None,
+        limit: int | None = None,
     ) -> pd.DataFrame:
-        """Read news, optionally filtered by time or related symbol."""
+        """Read news, optionally filtered by time window, related symbol or keyword.
+
+        Symbol filtering uses the news_symbols index and keyword filtering
+        uses the news_fts full-text index, so neither scans the news table.
+        """
+        query = "SELECT n.* FROM news n"
         conditions = []
         params: list = []
+        if symbol:
+            query += " JOIN news_symbols ns ON ns.news_id = n.id"
+            conditions.append("ns.symbol = ?")
+            params.append(symbol)
         if since:
-            conditions.append("published_at >= ?")
+            conditions.append("n.published_at >= ?")
             params.append(since)
-        query = "SELECT * FROM news"
+        if until:
+            conditions.append("n.published_at <= ?")
+            params.append(until)
+        if keyword:
+            clause, kw_params = self._keyword_condition(keyword)
+            conditions.append(clause)
+            params.extend(kw_params)
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY published_at DESC"
+        query += " ORDER BY n.published_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
         with self._get_conn() as conn:
-            df = pd.read_sql(query, conn, params=params)
-        if symbol and not df.empty:
-            df = df[df["related_symbols"].str.contains(symbol, na=False)]
-        return df
+            return pd.read_sql(query, conn, params=params)
+
+    def _keyword_condition(self, keyword: str) -> tuple[str, list]:
+        """Build a WHERE clause matching keyword in news title or summary."""
+        if self.fts_enabled and len(keyword) >= _FTS_MIN_KEYWORD_LEN:
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            return "n.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?)", [phrase]
+        pattern = f"%{keyword}%"
+        return "(n.title LIKE ? OR n.summary LIKE ?)", [pattern, pattern]
+
+    def read_latest_symbol_news(self, symbols: list[str]) -> pd.DataFrame:
+        """Read the most recent news item per symbol with its cached sentiment.
 
-    def read_unanalyzed_news(self) -> pd.DataFrame:
-        """Read news that have no sentiment_cache entry."""
+        One indexed query for all symbols. Returns columns: symbol, news_id,
+        title, published_at, classification (NULL when not yet analyzed).
+        Symbols without any related news are absent from the result.
+        """
+        if not symbols:
+            return pd.DataFrame(
+                columns=["symbol", "news_id", "title", "published_at", "classification"]
+            )
+        placeholders = ",".join("?" for _ in symbols)
+        query = (
+            "SELECT symbol, news_id, title, published_at, classification FROM ("
+            "  SELECT ns.symbol, n.id AS news_id, n.title, n.published_at, sc.classification,"
+            "         ROW_NUMBER() OVER ("
+            "             PARTITION BY ns.symbol ORDER BY n.published_at DESC, n.id DESC"
+            "         ) AS rn"
+            "  FROM news_symbols ns"
+            "  JOIN news n ON n.id = ns.news_id"
+            "  LEFT JOIN sentiment_cache sc ON sc.news_id = n.id"
+            f"  WHERE ns.symbol IN ({placeholders})"
+            ") WHERE rn = 1"
+        )
+        with self._get_conn() as conn:
+            return pd.read_sql(query, conn, params=tuple(symbols))
+
+    def read_unanalyzed_news(self, escalate_below: float | None = None) -> pd.DataFrame:
+        """Read news that have no sentiment_cache entry.
+
+        With ``escalate_below``, also include news whose cached result came
+        from the local model tier with confidence below that threshold.
+        """
         query = (
             "SELECT n.* FROM news n "
             "LEFT JOIN sentiment_cache sc ON n.id = sc.news_id "
             "WHERE sc.news_id IS NULL "
-            "ORDER BY n.published_at DESC"
+        )
+        params: tuple = ()
+        if escalate_below is not None:
+            query += "OR (sc.model_name LIKE 'local/%' AND sc.confidence < ?) "
+            params = (escalate_below,)
+        query += "ORDER BY n.published_at DESC"
+        with self._get_conn() as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def read_labeled_news(self) -> pd.DataFrame:
+        """Read news joined with their cached sentiment labels."""
+        query = (
+            "SELECT n.id, n.title, n.summary, sc.classification, sc.confidence, sc.model_name "
+            "FROM news n JOIN sentiment_cache sc ON n.id = sc.news_id"
         )
         with self._get_conn() as conn:
             return pd.read_sql(query, conn)
@@ -241,4 +586,5 @@ class DataStore:
         """Delete all rows from a table (for force-refresh)."""
         with self._get_conn() as conn:
             conn.execute(f"DELETE FROM {table}")
+            self._record_write(conn, table)
         logger.info("Cleared table: %s", table)
@@ -0,0 +1,275 @@
+"""Optional SQL tracing for DataStore: per-statement rows, duration and caller.
+
+While a :func:`trace_queries` block is active, every connection opened by
+:meth:`DataStore._get_conn` records each statement it executes: the SQL,
+its normalized shape (literals and ``IN`` lists collapsed), rows returned
+or written, wall time including fetching, and who issued it. The caller is
+the innermost :func:`trace_source` label (``compute_all_factors`` labels
+each factor, ``BacktestEngine`` its daily phases, the web app each route),
+falling back to the first calling function outside the data layer.
+
+Repeated identical-shape statements issued back to back from the same
+source — a loop doing one query per symbol or per day — are reported as
+N+1 candidates. :meth:`QueryTrace.summary` formats a per-run table and
+:meth:`QueryTrace.to_dict` / :meth:`QueryTrace.export_json` give the same
+aggregates for regression tracking.
+
+A trace belongs to the context that opened it: worker threads see it when
+started through ``contextvars.copy_context()`` (as ``JobManager`` and
+``DagRunner`` do), and commands running side by side in the daemon each
+record only their own statements.
+
+With no trace active connections are plain ``sqlite3`` connections.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+_source: ContextVar[tuple[str, ...]] = ContextVar("query_source", default=())
+
+# The trace recording in the current context, if any
+_active: ContextVar["QueryTrace | None"] = ContextVar("query_trace", default=None)
+
+# Frames skipped when attributing a query to its calling module
+_INTERNAL_MODULES = ("src.data.storage", "src.data.tracing", "pandas", "sqlite3", "contextlib", "sqlalchemy")
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def query_shape(sql: str) -> str:
+    """Statement with literals replaced by ``?`` and ``IN`` / ``VALUES`` lists collapsed."""
+    shape = _WS.sub(" ", sql.strip())
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _VALUES_LIST.sub("VALUES (...)", shape)
+
+
+@contextmanager
+def trace_source(name: str):
+    """Label queries issued inside the block (nested labels form a path)."""
+    token = _source.set(_source.get() + (name,))
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def active_trace() -> "QueryTrace | None":
+    return _active.get()
+
+
+@dataclass
+class QueryRecord:
+    shape: str
+    source: str
+    path: str
+    rows: int
+    ms: float
+    thread: int
+
+
+class QueryTrace:
+    """Statements recorded during one :func:`trace_queries` block.
+
+    Args:
+        n_plus_one_threshold: Back-to-back repetitions of one statement
+            shape from one source (and thread) reported as N+1.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.records: list[QueryRecord] = []
+        self.started_at = datetime.now().isoformat()
+        self._t0 = time.perf_counter()
+        self._t1: float | None = None
+        self._lock = threading.Lock()
+        # thread -> (source, shape, run length); (source, shape) -> longest run
+        self._runs: dict[int, tuple[str, str, int]] = {}
+        self._max_run: dict[tuple[str, str], int] = {}
+
+    @property
+    def duration_s(self) -> float:
+        """Seconds from start to the end of the block (so far, while active)."""
+        return (self._t1 or time.perf_counter()) - self._t0
+
+    def add(self, sql: str, rows: int, seconds: float) -> QueryRecord:
+        path = _source.get()
+        source = path[-1] if path else _caller()
+        record = QueryRecord(
+            shape=query_shape(sql), source=source, path=" > ".join(path) or source,
+            rows=max(rows, 0), ms=seconds * 1000.0, thread=threading.get_ident(),
+        )
+        with self._lock:
+            self.records.append(record)
+            prev = self._runs.get(record.thread)
+            run = prev[2] + 1 if prev and prev[:2] == (source, record.shape) else 1
+            self._runs[record.thread] = (source, record.shape, run)
+            key = (source, record.shape)
+            if run > self._max_run.get(key, 0):
+                self._max_run[key] = run
+        return record
+
+    def groups(self) -> list[dict]:
+        """Aggregates per (source, shape), slowest total first."""
+        with self._lock:
+            records = list(self.records)
+            max_run = dict(self._max_run)
+        groups: dict[tuple[str, str], dict] = {}
+        for rec in records:
+            g = groups.setdefault((rec.source, rec.shape), {
+                "source": rec.source, "shape": rec.shape, "count": 0, "rows": 0, "total_ms": 0.0,
+            })
+            g["count"] += 1
+            g["rows"] += rec.rows
+            g["total_ms"] += rec.ms
+        out = []
+        for key, g in groups.items():
+            g["total_ms"] = round(g["total_ms"], 3)
+            g["mean_ms"] = round(g["total_ms"] / g["count"], 3)
+            g["max_run"] = max_run.get(key, 1)
+            g["n_plus_one"] = g["max_run"] >= self.n_plus_one_threshold
+            out.append(g)
+        return sorted(out, key=lambda g: g["total_ms"], reverse=True)
+
+    def to_dict(self, include_records: bool = False) -> dict:
+        groups = self.groups()
+        data = {
+            "started_at": self.started_at,
+            "duration_s": round(self.duration_s, 3),
+            "n_queries": sum(g["count"] for g in groups),
+            "total_ms": round(sum(g["total_ms"] for g in groups), 3),
+            "n_plus_one": [g for g in groups if g["n_plus_one"]],
+            "groups": groups,
+        }
+        if include_records:
+            with self._lock:
+                data["records"] = [vars(r) for r in self.records]
+        return data
+
+    def export_json(self, path: str | Path, include_records: bool = False) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(include_records), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def summary(self, top: int = 15) -> str:
+        """Per-run table: totals, the ``top`` slowest query groups and N+1 candidates."""
+        data = self.to_dict()
+        lines = [
+            f"SQL 查询: {data['n_queries']} 次, 共 {data['total_ms']:.1f} ms "
+            f"(运行 {data['duration_s']:.1f} s)",
+            f"  {'来源':<36} {'次数':>7} {'行数':>9} {'总耗时ms':>10} {'均值ms':>8} {'连续':>6}  语句",
+        ]
+        for g in data["groups"][:top]:
+            flag = " [N+1]" if g["n_plus_one"] else ""
+            lines.append(
+                f"  {g['source'][:36]:<36} {g['count']:>7} {g['rows']:>9} {g['total_ms']:>10.1f} "
+                f"{g['mean_ms']:>8.2f} {g['max_run']:>6}  {g['shape'][:80]}{flag}"
+            )
+        if data["n_plus_one"]:
+            lines.append(f"疑似 N+1 查询 (同一来源连续 ≥ {self.n_plus_one_threshold} 次相同语句):")
+            for g in data["n_plus_one"]:
+                lines.append(f"  {g['source']}: {g['count']} 次, 最长连续 {g['max_run']} 次 — {g['shape'][:100]}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def trace_queries(n_plus_one_threshold: int = 10):
+    """Record every DataStore statement issued inside the block.
+
+    Statements from worker threads are included when the threads run in a
+    copy of this context. Yields the :class:`QueryTrace`; traces don't nest.
+    """
+    if _active.get() is not None:
+        raise RuntimeError("A query trace is already active")
+    trace = QueryTrace(n_plus_one_threshold)
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        trace._t1 = time.perf_counter()
+        _active.reset(token)
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_INTERNAL_MODULES):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor recording each statement in the active trace; fetch time and rows are added."""
+
+    _record: QueryRecord | None = None
+
+    def _traced(self, method, sql, params):
+        started = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            trace = _active.get()
+            if trace is not None:
+                rows = self.rowcount if self.rowcount > 0 else 0
+                self._record = trace.add(sql, rows, time.perf_counter() - started)
+
+    def execute(self, sql, params=()):
+        return self._traced(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._traced(super().executemany, sql, seq_of_params)
+
+    def _fetched(self, started: float, rows: int):
+        record = self._record
+        if record is not None:
+            record.rows += rows
+            record.ms += (time.perf_counter() - started) * 1000.0
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``conn.execute``) are :class:`TracingCursor`."""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracingCursor)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
@@ -1,20 +1,39 @@
 """Factor base class and registry — decorator-based factor registration."""
 from __future__ import annotations
 
+import json
 import logging
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 import pandas as pd
 import numpy as np
 
 from src.data.storage import DataStore
+from src.data.tracing import trace_source
 from src.factors.standardizer import cross_sectional_standardize
+from src.ops.profiling import timed
 
 logger = logging.getLogger(__name__)
 
 # Global factor registry
 _FACTOR_REGISTRY: dict[str, type["BaseFactor"]] = {}
 
+# Standardized factor matrices by (db, date, data version, config, universe);
+# used when factors.cache_size > 0
+_matrix_cache: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+_matrix_lock = threading.Lock()
+# Process default for factors.cache_size (the command daemon sets it while serving)
+_default_cache_size = 0
+
+
+def set_factor_cache_size(size: int) -> int:
+    """Set the process default for ``factors.cache_size``; returns the previous one."""
+    global _default_cache_size
+    previous, _default_cache_size = _default_cache_size, size
+    return previous
+
 
 def register_factor(cls: type["BaseFactor"]) -> type["BaseFactor"]:
     """Decorator to register a factor class."""
@@ -44,11 +63,20 @@ class BaseFactor(ABC):
         ...
 
 
+@timed("factors")
 def compute_all_factors(
-    config: dict, date: str | None = None, store: DataStore | None = None
+    config: dict,
+    date: str | None = None,
+    store: DataStore | None = None,
+    universe_df: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
     """Compute all registered factors for the current universe.
 
+    ``universe_df`` (symbol, name, subsector) skips fetching the universe
+    when the caller already has it. With ``factors.cache_size`` > 0 the
+    last that many matrices are kept in the process and reused while the
+    data version, config and universe are unchanged.
+
     Returns a DataFrame: rows=stocks, columns=factor names.
     All values are cross-sectionally standardized (MAD + Z-Score).
     """
@@ -71,7 +99,8 @@ def compute_all_factors(
         date = datetime.now().strftime("%Y-%m-%d")
 
     # Get universe
-    universe_df = get_universe(config, date=date, store=store)
+    if universe_df is None:
+        universe_df = get_universe(config, date=date, store=store)
     if universe_df.empty:
         logger.warning("Empty universe, cannot compute factors")
         return pd.DataFrame()
@@ -91,6 +120,19 @@ def compute_all_factors(
         store.save_dataframe("universe_cache", universe_df)
 
     factor_cfg = config.get("factors", {})
+    cache_size = factor_cfg.get("cache_size", _default_cache_size)
+    if cache_size:
+        key = (
+            store.db_path, date, store.data_version(),
+            json.dumps(config, sort_keys=True, default=str),
+            universe_df[["symbol", "subsector"]].to_json(),
+        )
+        with _matrix_lock:
+            cached = _matrix_cache.get(key)
+            if cached is not None:
+                _matrix_cache.move_to_end(key)
+                return cached.copy()
+
     small_warning = factor_cfg.get("small_universe_warning", 10)
     if len(symbols) < small_warning:
         logger.warning(
@@ -103,7 +145,8 @@ def compute_all_factors(
     for name, factor_cls in _FACTOR_REGISTRY.items():
         try:
             factor = factor_cls()
-            values = factor.compute(symbols, date, store, config)
+            with trace_source(f"factor:{name}"):
+                values = factor.compute(symbols, date, store, config)
             results[name] = values
         except Exception as e:
             logger.error("Failed to compute factor %s: %s", name, e)
@@ -115,4 +158,9 @@ def compute_all_factors(
     mad_multiple = factor_cfg.get("winsorize_mad_multiple", 3.0)
     factor_matrix = cross_sectional_standardize(factor_matrix, mad_multiple)
 
+    if cache_size:
+        with _matrix_lock:
+            _matrix_cache[key] = factor_matrix.copy()
+            while len(_matrix_cache) > cache_size:
+                _matrix_cache.popitem(last=False)
     return factor_matrix
@@ -8,21 +8,18 @@ import pandas as pd
 
 from src.data.storage import DataStore
 from src.universe.classifier import SUBSECTOR_METAL_MAP
+from src.universe.metadata import symbol_metadata
 from src.factors.base import BaseFactor, register_factor
 
 logger = logging.getLogger(__name__)
 
 
-def _get_stock_metal(symbol: str, config: dict, store: DataStore) -> str | None:
-    """Look up the metal futures symbol for a stock based on its sub-sector."""
-    # Try to find sub-sector from universe cache or default to copper
-    universe_df = store.read_table(
-        "universe_cache", where="symbol = ?", params=(symbol,)
-    )
-    if not universe_df.empty and "subsector" in universe_df.columns:
-        subsector = universe_df.iloc[0]["subsector"]
-        return SUBSECTOR_METAL_MAP.get(subsector, "cu")
-    return "cu"  # Default to copper
+def _get_stock_metals(symbols: list[str], store: DataStore) -> dict[str, str | None]:
+    """Look up the metal futures symbol for each stock based on its sub-sector.
+
+    Stocks without a cached sub-sector default to copper.
+    """
+    return symbol_metadata(store, list(symbols))["metal"].to_dict()
 
 
 @register_factor
@@ -45,8 +42,9 @@ class MetalPriceMomentum60dFactor(BaseFactor):
                 metal_momentum[metal_code] = close[-1] / close[-61] - 1
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = metal_momentum.get(metal, np.nan) if metal else np.nan
 
         return pd.Series(results)
@@ -73,8 +71,9 @@ class FuturesBasisFactor(BaseFactor):
                 metal_basis[metal_code] = (close[-1] - ma20) / ma20 if ma20 > 0 else np.nan
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = metal_basis.get(metal, np.nan) if metal else np.nan
 
         return pd.Series(results)
@@ -106,8 +105,9 @@ class InventoryWeeklyChangeFactor(BaseFactor):
                 metal_inv_change[metal_code] = -change  # Negate: destocking is positive
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = metal_inv_change.get(metal, np.nan) if metal else np.nan
 
         return pd.Series(results)
@@ -150,8 +150,9 @@ class GoldSilverRatioFactor(BaseFactor):
             )
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = value if metal == "au" else np.nan
 
         return pd.Series(results)
@@ -186,8 +187,9 @@ class GoldCopperRatioFactor(BaseFactor):
             )
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = value if metal == "au" else np.nan
 
         return pd.Series(results)
@@ -230,8 +232,9 @@ class SilverGoldRatioFactor(BaseFactor):
             )
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = value if metal == "ag" else np.nan
 
         return pd.Series(results)
@@ -266,8 +269,9 @@ class SilverCopperRatioFactor(BaseFactor):
             )
 
         results = {}
+        metals = _get_stock_metals(universe, store)
         for symbol in universe:
-            metal = _get_stock_metal(symbol, config, store)
+            metal = metals[symbol]
             results[symbol] = value if metal == "ag" else np.nan
 
         return pd.Series(results)
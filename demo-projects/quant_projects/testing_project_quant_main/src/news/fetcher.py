@@ -154,3 +154,4 @@ class NewsFetcher:
                         item["fetched_at"],
                     ),
                 )
+            self.store._record_write(conn, "news")
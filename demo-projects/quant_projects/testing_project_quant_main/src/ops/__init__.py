@@ -0,0 +1 @@
+"""Operations module — scheduled daily runs."""
@@ -0,0 +1,287 @@
+"""Command daemon: run CLI commands in one long-lived process with warm state.
+
+``python main.py serve-daemon`` listens on a Unix socket. While it runs,
+``main.py`` commands send their arguments to it instead of starting
+pandas, numpy and the factor library from scratch; the command executes in
+the daemon and its output is streamed back line by line. Without a
+daemon (or with ``--no-daemon``) commands run in-process as before.
+
+The daemon keeps warm:
+
+- imported modules and the parsed config (reloaded when the file changes);
+- one :class:`~src.backtest.multi.PriceCube` per database, so factor
+  computations read prices from memory; rebuilt when the data version
+  changes;
+- the stock universe (for ``daemon.universe_ttl_s``) and recent factor
+  matrices (``daemon.factor_cache_size``). These are process defaults set
+  while serving, not written into the config commands receive, so config
+  hashes (and memoized backtest runs) match in-process runs.
+
+Protocol: one JSON request line ``{"argv", "config", "cwd"}``; the daemon
+answers with ``{"out": text}`` lines and a final ``{"exit": code}``, or a
+single ``{"fallback": reason}`` when the client should run the command
+itself (e.g. different working directory, so relative paths would differ).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "data/quant.sock"
+SOCKET_ENV = "QUANT_DAEMON_SOCKET"
+
+# The daemon serving in this process, if any (see warm_store)
+_active: "CommandDaemon | None" = None
+
+
+def socket_path(path: str | None = None) -> str:
+    """``path``, else ``$QUANT_DAEMON_SOCKET``, else ``data/quant.sock``."""
+    return path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET
+
+
+class _ThreadStdout:
+    """``sys.stdout`` replacement that routes writes of request threads to their client."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def redirect(self, write: Callable[[str], None] | None):
+        self._local.write = write
+
+    def write(self, text: str) -> int:
+        write = getattr(self._local, "write", None)
+        if write is None:
+            return self._default.write(text)
+        write(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, "write", None) is None:
+            self._default.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class CommandDaemon:
+    """Execute CLI commands for socket clients against warm state.
+
+    Args:
+        execute: ``execute(argv, config) -> exit code`` runs one command
+            (the CLI's dispatcher).
+        config_path: Config file loaded at startup.
+        load_config: Reads a config file.
+        path: Socket path (see :func:`socket_path`).
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[list[str], dict], int | None],
+        config_path: str,
+        load_config: Callable[[str], dict],
+        path: str | None = None,
+    ):
+        self.execute = execute
+        self.path = socket_path(path)
+        self.cwd = os.getcwd()
+        self._load_config = load_config
+        self._configs: dict[str, tuple[float, dict]] = {}
+        self._stores: dict[str, tuple[int, object]] = {}
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+        daemon_cfg = self.config(config_path).get("daemon", {})
+        self.universe_ttl_s = daemon_cfg.get("universe_ttl_s", 3600)
+        self.factor_cache_size = daemon_cfg.get("factor_cache_size", 8)
+
+    def config(self, path: str) -> dict:
+        """The config at ``path``, reloaded when the file changes."""
+        path = str(Path(path).resolve())
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._configs.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        config = self._load_config(path)
+        with self._lock:
+            self._configs[path] = (mtime, config)
+        logger.info("Daemon config loaded: %s", path)
+        return config
+
+    def store(self, config: dict):
+        """Warm store for the config's database, rebuilt when its data version changes."""
+        from src.backtest.multi import PriceCube
+        from src.data.storage import DataStore
+
+        db_path = config.get("data", {}).get("db_path", "data/quant.db")
+        store = DataStore(db_path)
+        version = store.data_version()
+        with self._lock:
+            cached = self._stores.get(db_path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            cube = PriceCube(store)
+            self._stores[db_path] = (version, cube)
+        logger.info("Daemon price cube for %s at data version %d", db_path, version)
+        return cube
+
+    def warm_up(self, config: dict):
+        """Import the factor library and strategy modules and open the startup database."""
+        import src.factors.base  # noqa: F401
+        import src.factors.commodity  # noqa: F401
+        import src.factors.flow  # noqa: F401
+        import src.factors.fundamental  # noqa: F401
+        import src.factors.macro  # noqa: F401
+        import src.factors.sentiment  # noqa: F401
+        import src.factors.technical  # noqa: F401
+        import src.risk.alerts  # noqa: F401
+        import src.strategy.signal_sets  # noqa: F401
+
+        self.store(config)
+
+    def handle(self, request: dict, send: Callable[[dict], None]):
+        """Run one client request, streaming its output through ``send``."""
+        if request.get("cwd") != self.cwd:
+            send({"fallback": f"daemon runs in {self.cwd}"})
+            return
+        started = time.perf_counter()
+        with self._lock:
+            # (Re)installed here: something else may have replaced sys.stdout since startup
+            stdout = sys.stdout
+            if not isinstance(stdout, _ThreadStdout):
+                stdout = sys.stdout = _ThreadStdout(stdout)
+        stdout.redirect(lambda text: send({"out": text}))
+        code = 0
+        try:
+            config = self.config(request["config"])
+            code = self.execute(list(request["argv"]), config) or 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            send({"out": traceback.format_exc()})
+            code = 1
+        finally:
+            stdout.redirect(None)
+        logger.info("Daemon ran %s in %.2fs (exit %d)", " ".join(request["argv"]),
+                    time.perf_counter() - started, code)
+        send({"exit": code})
+
+    def serve_forever(self):
+        """Listen until interrupted; removes the socket file on exit."""
+        global _active
+        from src.factors.base import set_factor_cache_size
+        from src.universe.classifier import set_universe_cache_ttl
+
+        if os.path.exists(self.path):
+            if _ping(self.path):
+                raise RuntimeError(f"A daemon is already listening on {self.path}")
+            os.unlink(self.path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                request = json.loads(line)
+                if request.get("ping"):
+                    self.wfile.write(b'{"pong": true}\n')
+                    return
+
+                def send(message: dict):
+                    self.wfile.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+                try:
+                    daemon.handle(request, send)
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.info("Daemon client disconnected")
+
+        _active = self
+        previous_ttl = set_universe_cache_ttl(self.universe_ttl_s)
+        previous_size = set_factor_cache_size(self.factor_cache_size)
+        try:
+            self._server = _Server(self.path, Handler)
+            # Commands run with the daemon user's rights: owner-only socket
+            os.chmod(self.path, 0o600)
+            self._server.serve_forever()
+        finally:
+            _active = None
+            set_universe_cache_ttl(previous_ttl)
+            set_factor_cache_size(previous_size)
+            if isinstance(sys.stdout, _ThreadStdout):
+                sys.stdout = sys.stdout._default
+            if self._server is not None:
+                self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def warm_store(config: dict):
+    """The daemon's warm store when called from a command running in the daemon, else None."""
+    daemon = _active
+    return daemon.store(config) if daemon is not None else None
+
+
+def _ping(path: str) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(path)
+            sock.sendall(b'{"ping": true}\n')
+            return b"pong" in sock.recv(64)
+    except OSError:
+        return False
+
+
+def run_via_daemon(argv: list[str], config_path: str, path: str | None = None, out=None) -> int | None:
+    """Run a CLI command in the daemon, printing its output.
+
+    Returns the command's exit code, or None when no daemon is listening
+    (or it asks for a local run) so the caller should execute in-process.
+    """
+    path = socket_path(path)
+    if not os.path.exists(path):
+        return None
+    out = out or sys.stdout
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+    except OSError:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        request = {"argv": argv, "config": str(Path(config_path).resolve()), "cwd": os.getcwd()}
+        stream.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "out" in message:
+                out.write(message["out"])
+                out.flush()
+            elif "exit" in message:
+                return message["exit"]
+            elif "fallback" in message:
+                return None
+    # Daemon went away mid-command
+    return 1
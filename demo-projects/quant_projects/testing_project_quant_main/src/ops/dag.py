@@ -0,0 +1,211 @@
+"""Dependency-graph runner with fingerprinted, incrementally cached nodes.
+
+Each node is a function of its dependencies' outputs. Before a node runs
+its fingerprint is computed from the node's declared inputs (dates,
+config sections, table versions, ...) and the digests of its
+dependencies' outputs. A node whose fingerprint matches the last
+successful run is skipped and its stored output is reused, so a node
+downstream of an unchanged result is skipped as well. Nodes whose
+dependencies are satisfied run concurrently on a thread pool.
+
+State lives in ``state_dir``: ``state.json`` (fingerprint, output digest
+and timing per node) and one pickled output per node.
+"""
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import logging
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Node:
+    """One step of the graph.
+
+    Attributes:
+        name: Unique node name.
+        fn: Called with ``{dependency name: output}``; returns the node's
+            output (must be picklable).
+        deps: Names of nodes that must finish first.
+        inputs: Returns the JSON-serializable fingerprint material besides
+            the dependency outputs; evaluated once the dependencies finished.
+    """
+
+    name: str
+    fn: Callable[[dict], Any]
+    deps: tuple[str, ...] = ()
+    inputs: Callable[[], Any] | None = None
+
+
+@dataclass
+class NodeResult:
+    name: str
+    status: str  # ran, skipped, failed, blocked
+    fingerprint: str | None = None
+    seconds: float = 0.0
+    error: str | None = None
+    output: Any = field(default=None, repr=False)
+
+
+class DagRunner:
+    """Run a set of :class:`Node` in dependency order with fingerprint caching."""
+
+    def __init__(self, nodes: list[Node], state_dir: str | Path, max_workers: int = 4):
+        self.nodes = {n.name: n for n in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Duplicate node names")
+        for node in nodes:
+            unknown = [d for d in node.deps if d not in self.nodes]
+            if unknown:
+                raise ValueError(f"Node {node.name} depends on unknown nodes: {unknown}")
+        self.order = self._topological_order()
+        self.state_dir = Path(state_dir)
+        self.max_workers = max_workers
+
+    def _topological_order(self) -> list[str]:
+        order: list[str] = []
+        visiting: set[str] = set()
+
+        def visit(name: str):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through node {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def _load_state(self) -> dict:
+        path = self.state_dir / "state.json"
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable DAG state %s: %s", path, e)
+            return {}
+
+    def _save_state(self, state: dict):
+        path = self.state_dir / "state.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    def _fingerprint(self, node: Node, digests: dict[str, str]) -> str:
+        material = {
+            "node": node.name,
+            "inputs": node.inputs() if node.inputs else None,
+            "deps": {d: digests[d] for d in node.deps},
+        }
+        payload = json.dumps(material, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _load_output(self, name: str, digest: str) -> tuple[bool, Any]:
+        path = self.state_dir / f"{name}.pkl"
+        try:
+            blob = path.read_bytes()
+        except OSError:
+            return False, None
+        if hashlib.sha256(blob).hexdigest()[:16] != digest:
+            return False, None
+        return True, pickle.loads(blob)
+
+    def _store_output(self, name: str, output: Any) -> str:
+        blob = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+        (self.state_dir / f"{name}.pkl").write_bytes(blob)
+        return hashlib.sha256(blob).hexdigest()[:16]
+
+    def run(self, force: bool | list[str] = False) -> dict[str, NodeResult]:
+        """Run the graph.
+
+        Args:
+            force: True to rerun every node, or node names to rerun
+                regardless of their fingerprint.
+
+        Returns:
+            ``{node name: NodeResult}`` in topological order. A failed
+            node's descendants are reported as ``blocked``.
+        """
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        state = self._load_state()
+        forced = set(self.nodes) if force is True else set(force or ())
+
+        results: dict[str, NodeResult] = {}
+        outputs: dict[str, Any] = {}
+        digests: dict[str, str] = {}
+        running: dict[Future, tuple[str, str, float]] = {}
+        pending = list(self.order)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag") as pool:
+            while pending or running:
+                for name in list(pending):
+                    node = self.nodes[name]
+                    if any(results.get(d) and results[d].status in ("failed", "blocked") for d in node.deps):
+                        pending.remove(name)
+                        results[name] = NodeResult(name, "blocked")
+                        continue
+                    if not all(d in digests for d in node.deps):
+                        continue
+                    pending.remove(name)
+                    try:
+                        fingerprint = self._fingerprint(node, digests)
+                    except Exception as e:
+                        logger.error("Fingerprint of node %s failed: %s", name, e)
+                        results[name] = NodeResult(name, "failed", error=str(e))
+                        continue
+
+                    prev = state.get(name, {})
+                    if name not in forced and prev.get("fingerprint") == fingerprint:
+                        found, output = self._load_output(name, prev.get("digest", ""))
+                        if found:
+                            outputs[name], digests[name] = output, prev["digest"]
+                            results[name] = NodeResult(name, "skipped", fingerprint, output=output)
+                            logger.info("Node %s unchanged (%s), skipped", name, fingerprint)
+                            continue
+
+                    dep_outputs = {d: outputs[d] for d in node.deps}
+                    # In the caller's context so an active query trace covers the node
+                    future = pool.submit(contextvars.copy_context().run, node.fn, dep_outputs)
+                    running[future] = (name, fingerprint, time.perf_counter())
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint, started = running.pop(future)
+                    seconds = time.perf_counter() - started
+                    try:
+                        output = future.result()
+                        digest = self._store_output(name, output)
+                    except Exception as e:
+                        logger.error("Node %s failed after %.1fs: %s", name, seconds, e)
+                        results[name] = NodeResult(name, "failed", fingerprint, seconds, error=str(e))
+                        continue
+                    outputs[name], digests[name] = output, digest
+                    results[name] = NodeResult(name, "ran", fingerprint, seconds, output=output)
+                    state[name] = {
+                        "fingerprint": fingerprint,
+                        "digest": digest,
+                        "finished_at": datetime.now().isoformat(),
+                        "seconds": round(seconds, 3),
+                    }
+                    self._save_state(state)
+                    logger.info("Node %s done in %.1fs", name, seconds)
+
+        return {name: results[name] for name in self.order}
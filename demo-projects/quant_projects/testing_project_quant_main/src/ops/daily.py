@@ -0,0 +1,201 @@
+"""Daily operations run: ingest → universe → factors → timing → signals → risk → report.
+
+One process, one config load and one DataStore for what used to be the
+``update``, ``factors``, ``signal``, ``risk-check`` and ``report``
+commands. The steps form a :class:`src.ops.dag.DagRunner` graph:
+
+    universe ──┬─ ingest_stock ─┐
+               ├─ ingest_flow ──┤
+               └─ news ─────────┼─ factors ─┬─ signals ─ risk ─ report
+    ingest_futures ──┬──────────┤           │
+    ingest_macro ────┼──────────┘           │
+                     └─ timing ─────────────┘
+
+Ingest nodes are fingerprinted on the calendar day, so each category is
+fetched once per day (``--force`` refetches). Ingest outputs are the
+versions of the tables they write; when a fetch brings no new rows the
+downstream fingerprints do not change and factors, signals, ... are
+reused from the last run. Computing nodes also fingerprint their config
+section and the versions of the tables they read, so data written outside
+the daily run is picked up too.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from src.data.storage import DataStore
+from src.ops.dag import DagRunner, Node, NodeResult
+
+logger = logging.getLogger(__name__)
+
+INGEST_TABLES = {
+    "stock": ["stock_daily"],
+    "futures": ["futures_daily", "timing_series"],
+    "macro": ["macro"],
+    "flow": ["fund_flow"],
+}
+NEWS_TABLES = ["news", "sentiment_cache"]
+# Source tables read by the factor library
+FACTOR_TABLES = ["stock_daily", "financials", "futures_daily", "inventory", "macro", "fund_flow", *NEWS_TABLES]
+
+
+def _ingest(config: dict, category: str, store: DataStore, symbols_from: str | None = None):
+    def run(deps: dict) -> dict:
+        from src.data.pipeline import DataPipeline
+
+        symbols = None
+        if symbols_from is not None:
+            universe = deps[symbols_from]
+            symbols = universe["symbol"].tolist() if not universe.empty else None
+        # One pipeline per category (progress state is per instance), all on the
+        # graph's store; parallel writers wait on SQLite's busy timeout
+        DataPipeline(config, store=store).run(symbols=symbols, categories=[category])
+        return store.table_versions(INGEST_TABLES[category])
+
+    return run
+
+
+def build_daily_nodes(
+    config: dict,
+    date: str | None = None,
+    store: DataStore | None = None,
+    fetch_news: bool = True,
+) -> list[Node]:
+    """The daily run graph for ``date`` (default today)."""
+    if store is None:
+        store = DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+    today = datetime.now().strftime("%Y-%m-%d")
+    as_of = date or today
+
+    def universe(deps):
+        from src.universe.classifier import get_universe
+
+        return get_universe(config, date=as_of, store=store)
+
+    def news(deps):
+        from src.strategy.signal_sets import run_news_pipeline
+
+        run_news_pipeline(config, store, universe_df=deps["universe"])
+        return store.table_versions(NEWS_TABLES)
+
+    def factors(deps):
+        from src.factors.base import compute_all_factors
+
+        return compute_all_factors(config, date=as_of, store=store, universe_df=deps["universe"])
+
+    def timing(deps):
+        from src.strategy.timing import compute_timing_signal
+
+        return compute_timing_signal(config, date=as_of, store=store)
+
+    def signals(deps):
+        from src.strategy.signal_sets import build_signal_set
+
+        signal_set = build_signal_set(
+            config, date=as_of, store=store, fetch_news=False,
+            factor_matrix=deps["factors"], timing=deps["timing"],
+        )
+        return {k: v for k, v in signal_set.items() if k != "stale"}
+
+    def risk(deps):
+        from src.risk.alerts import run_daily_risk_check
+
+        return run_daily_risk_check(config, store=store, date=as_of)
+
+    def report(deps):
+        from src.backtest.resampling import resample_metrics
+        from src.backtest.run_store import RunStore
+        from src.report.exporter import export_report
+
+        runs = RunStore.from_config(config)
+        run_id = runs.latest_id()
+        if run_id is None:
+            logger.info("No stored backtest run, report skipped")
+            return None
+        result = runs.load(run_id)
+        factor_matrix = deps["factors"]
+        return export_report(
+            config,
+            nav_series=result.nav_series if not result.nav_series.empty else None,
+            trade_log=result.trade_log if not result.trade_log.empty else None,
+            metrics=result.metrics,
+            factor_matrix=factor_matrix if not factor_matrix.empty else None,
+            resampling=resample_metrics(result.nav_series, result.trade_log, config),
+        )
+
+    def section(name):
+        return config.get(name, {})
+
+    def latest_run():
+        from src.backtest.run_store import RunStore
+
+        return RunStore.from_config(config).latest_id()
+
+    ingest = ["ingest_stock", "ingest_flow", "ingest_futures", "ingest_macro"]
+    nodes = [
+        Node("universe", universe, inputs=lambda: {"date": as_of, "universe": section("universe")}),
+        Node("ingest_stock", _ingest(config, "stock", store, "universe"), ("universe",),
+             inputs=lambda: {"day": today}),
+        Node("ingest_flow", _ingest(config, "flow", store, "universe"), ("universe",),
+             inputs=lambda: {"day": today}),
+        Node("ingest_futures", _ingest(config, "futures", store), inputs=lambda: {"day": today}),
+        Node("ingest_macro", _ingest(config, "macro", store), inputs=lambda: {"day": today}),
+    ]
+    if fetch_news:
+        nodes.append(Node("news", news, ("universe",), inputs=lambda: {
+            "day": today,
+            "news": section("news"),
+            "sentiment_weight": section("factors").get("weights", {}).get("sentiment", 0),
+        }))
+    nodes += [
+        Node("factors", factors, ("universe", *ingest, *(["news"] if fetch_news else [])),
+             inputs=lambda: {"date": as_of, "factors": section("factors"),
+                             "tables": store.table_versions(FACTOR_TABLES)}),
+        Node("timing", timing, ("ingest_futures",),
+             inputs=lambda: {"date": as_of, "timing": section("timing"),
+                             "tables": store.table_versions(["futures_daily"])}),
+        Node("signals", signals, ("factors", "timing"),
+             inputs=lambda: {"date": as_of, "strategy": section("strategy"),
+                             "tables": store.table_versions(["stock_daily", *NEWS_TABLES])}),
+        Node("risk", risk, ("signals",),
+             inputs=lambda: {"date": as_of, "risk": section("risk"),
+                             "tables": store.table_versions(["stock_daily", "futures_daily"])}),
+        Node("report", report, ("factors", "risk"),
+             inputs=lambda: {"run_id": latest_run(), "report": section("report")}),
+    ]
+    return nodes
+
+
+def run_daily(
+    config: dict,
+    date: str | None = None,
+    force: bool | list[str] = False,
+    fetch_news: bool | None = None,
+    store: DataStore | None = None,
+) -> dict[str, NodeResult]:
+    """Run the daily graph; settings from the ``daily`` config section.
+
+    Args:
+        config: Full settings dict.
+        date: Signal / risk date (default today).
+        force: True to rerun every node, or the node names to rerun.
+        fetch_news: Fetch news and run sentiment analysis (default
+            ``daily.fetch_news``).
+        store: DataStore instance.
+
+    Returns:
+        ``{node name: NodeResult}`` in dependency order.
+    """
+    daily_cfg = config.get("daily", {})
+    if fetch_news is None:
+        fetch_news = daily_cfg.get("fetch_news", True)
+    if store is None:
+        store = DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+    nodes = build_daily_nodes(config, date=date, store=store, fetch_news=fetch_news)
+    runner = DagRunner(
+        nodes,
+        state_dir=daily_cfg.get("state_dir", "data/daily"),
+        max_workers=daily_cfg.get("max_workers", 4),
+    )
+    return runner.run(force=force)
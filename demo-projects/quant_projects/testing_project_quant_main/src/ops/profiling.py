@@ -0,0 +1,329 @@
+"""Run profiling: cProfile, a sampling profiler or tracemalloc, plus phase timers.
+
+``python main.py --profile MODE <command>`` (or ``QUANT_PROFILE=MODE`` for
+the web app) wraps the run in a :func:`profile_run` block. Modes:
+
+- ``cprofile``: deterministic profile of the calling thread, written as a
+  ``.pstats`` file (``python -m pstats``, snakeviz, ...). Not available for
+  the web app or ``daily``, whose work runs on worker threads;
+- ``sampling``: a background thread samples the stacks of every thread
+  every ``interval_ms`` and writes them in collapsed format (``.collapsed``,
+  one ``frame;frame;... count`` line per stack) for flamegraph.pl or
+  speedscope. Low overhead, covers worker threads;
+- ``memory``: tracemalloc; the report (``.memory.txt``) lists the top
+  allocation sites of the run and, per phase, the allocations made during
+  its first occurrence. Much slower than the other modes: every allocation
+  is traced and each first occurrence takes two snapshots (included in the
+  times of enclosing phases).
+
+In every mode the hot paths report to :func:`phase` timers (``data_load``,
+``ingest``, ``factors``, ``scoring``, ``allocation``, ``broker``, ``risk``);
+their count, total and mean time (inclusive of nested phases) are printed
+on exit and written to ``.phases.json`` for regression tracking.
+
+A profile covers the whole process (the sampler and tracemalloc see every
+thread), so only one can be active at a time; the CLI runs profiled
+commands outside the command daemon.
+
+With no profile active :func:`phase` and :func:`timed` cost one global
+lookup.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cprofile", "sampling", "memory")
+PROFILE_ENV = "QUANT_PROFILE"
+
+# The profile recording in this process, if any (process-wide so worker threads report phases)
+_active: "ProfileSession | None" = None
+_active_lock = threading.Lock()
+
+
+def active_profile() -> "ProfileSession | None":
+    return _active
+
+
+def phase(name: str):
+    """Time the block as phase ``name`` in the active profile (no-op otherwise)."""
+    session = _active
+    return session.phase(name) if session is not None else nullcontext()
+
+
+def timed(name: str):
+    """Decorator form of :func:`phase`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            session = _active
+            if session is None:
+                return fn(*args, **kwargs)
+            with session.phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Sampler(threading.Thread):
+    """Samples the stacks of all other threads into collapsed-stack counts."""
+
+    def __init__(self, interval_s: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval_s = interval_s
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = frame.f_globals.get("__name__", "?")
+                    frames.append(f"{module}:{code.co_name}:{code.co_firstlineno}")
+                    frame = frame.f_back
+                frames.append(f"thread:{names.get(ident, ident)}")
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """One profiled run.
+
+    Args:
+        mode: ``cprofile``, ``sampling`` or ``memory``.
+        label: Name used in artefact file names (e.g. the CLI command).
+        output_dir: Directory receiving the artefacts.
+        interval_ms: Sampling interval (``sampling`` mode).
+        memory_top: Allocation sites listed in the memory report.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        label: str = "run",
+        output_dir: str | Path = "reports/profiles",
+        interval_ms: float = 5.0,
+        memory_top: int = 25,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.label = label
+        self.output_dir = Path(output_dir)
+        self.interval_ms = interval_ms
+        self.memory_top = memory_top
+        self.started_at = datetime.now()
+        self.artefacts: list[Path] = []
+        self._t0 = time.perf_counter()
+        self._t1: float | None = None
+        self._lock = threading.Lock()
+        # phase -> [count, total_s, max_s, net_bytes]
+        self._phases: dict[str, list] = {}
+        # phase -> snapshots around its first occurrence (memory mode), compared when reporting
+        self._phase_snapshots: dict[str, tuple | None] = {}
+        self._profiler: cProfile.Profile | None = None
+        self._sampler: _Sampler | None = None
+        self._started_tracemalloc = False
+
+    @property
+    def duration_s(self) -> float:
+        return (self._t1 or time.perf_counter()) - self._t0
+
+    @property
+    def stem(self) -> str:
+        return f"{self.started_at:%Y%m%d-%H%M%S}-{self.label}-{self.mode}"
+
+    def start(self):
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "sampling":
+            self._sampler = _Sampler(self.interval_ms / 1000.0)
+            self._sampler.start()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        memory = self.mode == "memory" and tracemalloc.is_tracing()
+        snapshot = None
+        if memory:
+            with self._lock:
+                first = name not in self._phase_snapshots
+                if first:
+                    self._phase_snapshots[name] = None
+            if first:
+                snapshot = tracemalloc.take_snapshot()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            net = tracemalloc.get_traced_memory()[0] - before if memory else 0
+            after = tracemalloc.take_snapshot() if snapshot is not None else None
+            with self._lock:
+                stats = self._phases.setdefault(name, [0, 0.0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+                stats[3] += net
+                if after is not None:
+                    self._phase_snapshots[name] = (snapshot, after)
+
+    def phases(self) -> list[dict]:
+        """Per-phase aggregates, slowest total first."""
+        with self._lock:
+            items = [(name, list(stats)) for name, stats in self._phases.items()]
+        out = []
+        for name, (count, total, longest, net) in items:
+            row = {
+                "phase": name, "count": count, "total_s": round(total, 4),
+                "mean_ms": round(total / count * 1000.0, 3), "max_ms": round(longest * 1000.0, 3),
+            }
+            if self.mode == "memory":
+                row["net_bytes"] = net
+            out.append(row)
+        return sorted(out, key=lambda r: r["total_s"], reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(),
+            "duration_s": round(self.duration_s, 3),
+            "phases": self.phases(),
+        }
+
+    def stop(self) -> list[Path]:
+        """Stop profiling and write the artefacts; returns their paths."""
+        self._t1 = time.perf_counter()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        base = self.output_dir / self.stem
+        if self._profiler is not None:
+            self._profiler.disable()
+            path = base.with_name(base.name + ".pstats")
+            self._profiler.dump_stats(str(path))
+            self.artefacts.append(path)
+        if self._sampler is not None:
+            self._sampler.stop()
+            path = base.with_name(base.name + ".collapsed")
+            lines = [f"{stack} {count}" for stack, count in sorted(self._sampler.stacks.items())]
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            self.artefacts.append(path)
+        if self.mode == "memory" and tracemalloc.is_tracing():
+            path = base.with_name(base.name + ".memory.txt")
+            path.write_text(self._memory_report(), encoding="utf-8")
+            self.artefacts.append(path)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        path = base.with_name(base.name + ".phases.json")
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        self.artefacts.append(path)
+        return self.artefacts
+
+    def _memory_report(self) -> str:
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB", ""]
+        lines.append(f"Top {self.memory_top} allocation sites (live at exit):")
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:self.memory_top]:
+            lines.append(f"  {stat}")
+        with self._lock:
+            snapshots = {name: pair for name, pair in self._phase_snapshots.items() if pair is not None}
+        for name, (before, after) in sorted(snapshots.items()):
+            lines.append("")
+            lines.append(f"Phase {name} (first occurrence):")
+            lines.extend(f"  {stat}" for stat in after.compare_to(before, "lineno")[:10])
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Phase timer table and written artefacts."""
+        memory = self.mode == "memory"
+        header = f"  {'阶段':<14} {'次数':>7} {'总耗时s':>9} {'均值ms':>9} {'最大ms':>9}"
+        lines = [
+            f"性能剖析 ({self.mode}): 运行 {self.duration_s:.2f} s",
+            header + (f" {'净分配MB':>9}" if memory else ""),
+        ]
+        for row in self.phases():
+            line = (f"  {row['phase']:<14} {row['count']:>7} {row['total_s']:>9.3f} "
+                    f"{row['mean_ms']:>9.2f} {row['max_ms']:>9.2f}")
+            if memory:
+                line += f" {row['net_bytes'] / 1e6:>9.2f}"
+            lines.append(line)
+        if self._sampler is not None:
+            lines.append(f"采样: {self._sampler.samples} 次, 间隔 {self.interval_ms:g} ms")
+        for path in self.artefacts:
+            lines.append(f"已导出: {path}")
+        return "\n".join(lines)
+
+
+def start_profile(mode: str, label: str = "run", **kwargs) -> ProfileSession:
+    """Start a :class:`ProfileSession` as the process's active profile."""
+    global _active
+    session = ProfileSession(mode, label, **kwargs)
+    with _active_lock:
+        if _active is not None:
+            raise RuntimeError("A profile is already active")
+        _active = session
+    session.start()
+    return session
+
+
+def stop_profile(session: ProfileSession) -> list[Path]:
+    """Stop ``session`` and write its artefacts."""
+    global _active
+    try:
+        return session.stop()
+    finally:
+        with _active_lock:
+            if _active is session:
+                _active = None
+
+
+@contextmanager
+def profile_run(mode: str, label: str = "run", **kwargs):
+    """Profile the block; yields the :class:`ProfileSession`.
+
+    Artefacts are written when the block exits (also on error). Only one
+    profile can be active at a time.
+    """
+    session = start_profile(mode, label, **kwargs)
+    try:
+        yield session
+    finally:
+        stop_profile(session)
+
+
+def profile_settings(config: dict) -> dict:
+    """Keyword arguments for :class:`ProfileSession` from the ``profiling`` config section."""
+    cfg = config.get("profiling", {})
+    return {
+        "output_dir": cfg.get("output_dir", "reports/profiles"),
+        "interval_ms": cfg.get("sample_interval_ms", 5.0),
+        "memory_top": cfg.get("memory_top", 25),
+    }
@@ -7,6 +7,7 @@ from datetime import datetime
 
 import pandas as pd
 
+from src.backtest.round_trips import match_round_trips
 from src.report.charts import (
     create_nav_chart,
     create_drawdown_chart,
@@ -23,6 +24,7 @@ def export_report(
     metrics: dict | None = None,
     factor_matrix: pd.DataFrame | None = None,
     source: str = "backtest",
+    resampling: dict | None = None,
 ) -> str:
     """Generate and export performance report.
 
@@ -33,6 +35,8 @@ def export_report(
         metrics: Performance metrics dict.
         factor_matrix: Current factor matrix for heatmap.
         source: "backtest" or "live".
+        resampling: Confidence intervals from
+            :func:`src.backtest.resampling.resample_metrics`.
 
     Returns:
         Output file path.
@@ -45,10 +49,10 @@ def export_report(
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     if fmt == "dict":
-        return _export_dict(nav_series, trade_log, metrics, factor_matrix)
+        return _export_dict(nav_series, trade_log, metrics, factor_matrix, resampling)
     elif fmt == "html":
         return _export_html(
-            output_dir, timestamp, nav_series, trade_log, metrics, factor_matrix
+            output_dir, timestamp, nav_series, trade_log, metrics, factor_matrix, resampling
         )
     else:
         return _export_png(
@@ -61,11 +65,12 @@ def _export_dict(
     trade_log: pd.DataFrame | None,
     metrics: dict | None,
     factor_matrix: pd.DataFrame | None,
+    resampling: dict | None = None,
 ) -> dict:
     """Return report data as a Python dict for API consumption."""
     import numpy as np
 
-    result = {"metrics": metrics or {}}
+    result = {"metrics": metrics or {}, "resampling": resampling}
 
     if nav_series is not None and not nav_series.empty:
         result["nav_series"] = [
@@ -92,8 +97,10 @@ def _export_dict(
 
     if trade_log is not None and not trade_log.empty:
         result["trade_log"] = trade_log.to_dict(orient="records")
+        result["round_trips"] = match_round_trips(trade_log).to_dict(orient="records")
     else:
         result["trade_log"] = []
+        result["round_trips"] = []
 
     result["holdings"] = []
     return result
@@ -106,6 +113,7 @@ def _export_html(
     trade_log: pd.DataFrame | None,
     metrics: dict | None,
     factor_matrix: pd.DataFrame | None,
+    resampling: dict | None = None,
 ) -> str:
     """Export interactive HTML report with embedded Plotly charts."""
     output_path = output_dir / f"report_{timestamp}.html"
@@ -149,6 +157,10 @@ def _export_html(
             ("胜率", f"{metrics.get('win_rate', 0):.1%}", metrics.get('win_rate', 0)),
             ("盈亏比", f"{metrics.get('profit_loss_ratio', 0):.2f}", metrics.get('profit_loss_ratio', 0)),
             ("总交易成本", f"¥{metrics.get('total_costs', 0):,.0f}", -1),
+            ("盈利因子", f"{metrics.get('profit_factor', 0):.2f}", metrics.get('profit_factor', 0) - 1),
+            ("交易回合", f"{metrics.get('round_trips', 0)}", 0),
+            ("平均持仓天数", f"{metrics.get('avg_holding_days', 0):.1f}", 0),
+            ("年化换手率", f"{metrics.get('annual_turnover', 0):.1f}", 0),
         ]
         for label, value, indicator in metric_items:
             css_class = "positive" if indicator > 0 else "negative" if indicator < 0 else ""
@@ -158,6 +170,10 @@ def _export_html(
             )
         html_parts.append("</div></div>")
 
+    # Resampled confidence intervals
+    if resampling:
+        html_parts.extend(_resampling_html(resampling))
+
     # NAV chart
     if nav_series is not None and not nav_series.empty:
         nav_fig = create_nav_chart(nav_series)
@@ -178,8 +194,13 @@ def _export_html(
         html_parts.append(heatmap_fig.to_html(full_html=False, include_plotlyjs=False))
         html_parts.append("</div>")
 
-    # Trade log
+    # Round trips and trade log
     if trade_log is not None and not trade_log.empty:
+        round_trips = match_round_trips(trade_log)
+        if not round_trips.empty:
+            html_parts.append('<div class="card"><h2>交易回合 (FIFO)</h2>')
+            html_parts.append(round_trips.to_html(index=False, classes="round-trips", float_format="{:.4g}".format))
+            html_parts.append("</div>")
         html_parts.append('<div class="card"><h2>交易记录</h2>')
         html_parts.append(trade_log.to_html(index=False, classes="trade-log"))
         html_parts.append("</div>")
@@ -191,6 +212,39 @@ def _export_html(
     return str(output_path)
 
 
+_INTERVAL_ROWS = [
+    ("sharpe_ratio", "夏普比率", "{:.2f}"),
+    ("annual_return", "年化收益", "{:.2%}"),
+    ("annual_volatility", "年化波动率", "{:.2%}"),
+    ("max_drawdown", "最大回撤", "{:.2%}"),
+    ("trade_max_drawdown", "最大回撤 (交易顺序打乱)", "{:.2%}"),
+    ("win_rate", "胜率", "{:.1%}"),
+    ("profit_loss_ratio", "盈亏比", "{:.2f}"),
+    ("profit_factor", "盈利因子", "{:.2f}"),
+]
+
+
+def _resampling_html(resampling: dict) -> list[str]:
+    """Confidence interval table card."""
+    intervals = resampling["intervals"]
+    parts = [
+        '<div class="card"><h2>置信区间</h2>',
+        f"<p>{resampling['confidence']:.0%} 置信区间, {resampling['n_resamples']} 次重抽样 "
+        f"(平稳块自助法, 平均块长 {resampling['block_size']} 日; 交易蒙特卡洛)。"
+        f"夏普比率 &gt; 0 的概率: <b>{resampling['prob_sharpe_positive']:.1%}</b></p>",
+        "<table><tr><th>指标</th><th>下限</th><th>中位数</th><th>上限</th></tr>",
+    ]
+    for key, label, fmt in _INTERVAL_ROWS:
+        if key in intervals:
+            ci = intervals[key]
+            parts.append(
+                f"<tr><td>{label}</td><td>{fmt.format(ci['low'])}</td>"
+                f"<td>{fmt.format(ci['median'])}</td><td>{fmt.format(ci['high'])}</td></tr>"
+            )
+    parts.append("</table></div>")
+    return parts
+
+
 def _export_png(
     output_dir: Path,
     timestamp: str,
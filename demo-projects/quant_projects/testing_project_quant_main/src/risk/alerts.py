@@ -8,6 +8,7 @@ import numpy as np
 import pandas as pd
 
 from src.data.storage import DataStore
+from src.ops.profiling import timed
 from src.universe.classifier import SUBSECTOR_METAL_MAP
 
 logger = logging.getLogger(__name__)
@@ -74,6 +75,7 @@ def check_metal_crash(
     return alerts
 
 
+@timed("risk")
 def run_daily_risk_check(
     config: dict,
     holdings: dict | None = None,
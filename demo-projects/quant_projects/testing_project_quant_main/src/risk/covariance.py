@@ -0,0 +1,192 @@
+"""Rolling Ledoit-Wolf shrinkage covariance of daily stock returns.
+
+The estimator keeps sufficient statistics of a trailing window of daily
+returns — the cross-product matrix ``sum(x x')``, the scalar
+``sum(||x||^4)`` and the day count — so moving the window forward between
+rebalance dates only adds the new days and subtracts the days that left,
+instead of re-reading and re-multiplying the whole window.
+
+Returns are treated as zero-mean (usual for daily returns), which is what
+makes the Ledoit-Wolf shrinkage intensity computable from these
+statistics alone. Days a stock did not trade (suspended, not yet listed)
+count as zero return. A stock without rows in the window (delisted, long
+suspended) is left out of the estimate, as it would be in a fresh one.
+"""
+from __future__ import annotations
+
+import logging
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import DataStore
+
+logger = logging.getLogger(__name__)
+
+
+def ledoit_wolf(cross: np.ndarray, fourth: float, n_obs: int) -> tuple[np.ndarray, float]:
+    """Shrink the sample covariance towards a scaled identity (Ledoit & Wolf, 2004).
+
+    Args:
+        cross: ``sum_t x_t x_t'`` over the window.
+        fourth: ``sum_t ||x_t||^4`` over the window.
+        n_obs: Number of observations ``T``.
+
+    Returns:
+        (covariance, shrinkage intensity in [0, 1]).
+    """
+    n = len(cross)
+    sample = cross / n_obs
+    mu = np.trace(sample) / n
+    target = mu * np.eye(n)
+    d2 = float(((sample - target) ** 2).sum())
+    # Mean squared distance of the single-day estimates x x' from the sample covariance
+    b2_bar = (fourth / n_obs - float((sample ** 2).sum())) / n_obs
+    b2 = min(max(b2_bar, 0.0), d2)
+    shrinkage = b2 / d2 if d2 > 0 else 1.0
+    return shrinkage * target + (1 - shrinkage) * sample, shrinkage
+
+
+class RollingCovariance:
+    """Ledoit-Wolf covariance over the trailing ``window`` trading days, updated incrementally.
+
+    Call :meth:`update` with each rebalance date; only ``stock_daily``
+    rows after the previous update are read. Going back in time rebuilds
+    the window. New symbols extend the statistics with zero history;
+    symbols whose last row left the window no longer count (their
+    columns are all zero, but would still lower the shrinkage target).
+    """
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RollingCovariance":
+        """Estimator over ``strategy.covariance_window`` trading days (default 120)."""
+        return cls(window=config.get("strategy", {}).get("covariance_window", 120))
+
+    def __init__(self, window: int = 120):
+        self.window = window
+        self.symbols: list[str] = []
+        self._col: dict[str, int] = {}
+        self._cross = np.zeros((0, 0))
+        self._fourth = 0.0
+        self._rows: deque[tuple[str, np.ndarray]] = deque()
+        self._last_close = pd.Series(dtype=float)
+        # Last date with a close per symbol; the window's base date (the close its first return is against)
+        self._last_seen: dict[str, str] = {}
+        self._base_date = ""
+        self.last_date: str | None = None
+
+    @property
+    def n_obs(self) -> int:
+        return len(self._rows)
+
+    def update(self, store: DataStore, date: str) -> "RollingCovariance":
+        """Advance the window to end at ``date``."""
+        if self.last_date is not None and date < self.last_date:
+            self.__init__(self.window)
+        if self.last_date is not None and date == self.last_date:
+            return self
+        if self.last_date is None:
+            # First update: only the rows needed for the initial window
+            with store._get_conn() as conn:
+                dates = pd.read_sql(
+                    "SELECT DISTINCT date FROM stock_daily WHERE date <= ? ORDER BY date DESC LIMIT ?",
+                    conn, params=(date, self.window + 1),
+                )["date"]
+            if dates.empty:
+                return self
+            self._base_date = str(dates.iloc[-1])
+            where, params = "date >= ? AND date <= ?", (self._base_date, date)
+        else:
+            where, params = "date > ? AND date <= ?", (self.last_date, date)
+        df = store.read_table("stock_daily", where=where, params=params)
+        self.last_date = date
+        if df.empty:
+            return self
+
+        close = df.pivot_table(index="date", columns="symbol", values="close", aggfunc="last").sort_index()
+        close.index = close.index.astype(str)
+        self._last_seen.update(close.apply(lambda c: c.last_valid_index()).dropna().to_dict())
+        if self._last_close.empty:
+            # Symbols not trading on the base date: their last earlier close, as an
+            # incremental window carries it (so a fresh estimate matches one)
+            base = close.iloc[0]
+            close.iloc[0] = base.fillna(self._closes_before(store, base.index[base.isna()].tolist(), close.index[0]))
+        else:
+            close = pd.concat([self._last_close.to_frame("").T, close])
+        filled = close.ffill()
+        # Days without a close (not traded) give NaN, counted as zero return
+        returns = (close / filled.shift(1) - 1).iloc[1:].replace([np.inf, -np.inf], np.nan)
+        self._last_close = filled.iloc[-1].dropna()
+
+        self._add_symbols([s for s in returns.columns if s not in self._col])
+        idx = np.array([self._col[s] for s in returns.columns], dtype=int)
+        added = np.zeros((len(returns), len(self.symbols)))
+        added[:, idx] = returns.fillna(0.0).to_numpy(dtype=float)
+        self._cross += added.T @ added
+        self._fourth += float(((added ** 2).sum(axis=1) ** 2).sum())
+        self._rows.extend(zip(returns.index, added))
+
+        excess = len(self._rows) - self.window
+        if excess > 0:
+            dropped = [self._rows.popleft() for _ in range(excess)]
+            self._base_date = str(dropped[-1][0])
+            dropped = np.vstack([np.pad(r, (0, len(self.symbols) - len(r))) for _, r in dropped])
+            self._cross -= dropped.T @ dropped
+            self._fourth -= float(((dropped ** 2).sum(axis=1) ** 2).sum())
+        logger.debug(
+            "Covariance window at %s: %d days, %d symbols (+%d, -%d days)",
+            date, self.n_obs, len(self.symbols), len(returns), max(excess, 0),
+        )
+        return self
+
+    @staticmethod
+    def _closes_before(store: DataStore, symbols: list[str], date: str) -> pd.Series:
+        """Last close before ``date`` per symbol."""
+        if not symbols:
+            return pd.Series(dtype=float)
+        marks = ", ".join("?" * len(symbols))
+        with store._get_conn() as conn:
+            rows = conn.execute(
+                f"SELECT d.symbol, d.close FROM stock_daily d JOIN ("
+                f"SELECT symbol, MAX(date) AS date FROM stock_daily "
+                f"WHERE symbol IN ({marks}) AND date < ? AND close IS NOT NULL GROUP BY symbol"
+                f") p ON d.symbol = p.symbol AND d.date = p.date",
+                (*symbols, date),
+            ).fetchall()
+        return pd.Series(dict(rows), dtype=float)
+
+    def _add_symbols(self, new: list[str]):
+        if not new:
+            return
+        for sym in new:
+            self._col[sym] = len(self.symbols)
+            self.symbols.append(sym)
+        n = len(self.symbols)
+        cross = np.zeros((n, n))
+        k = len(self._cross)
+        cross[:k, :k] = self._cross
+        self._cross = cross
+
+    def covariance(self, symbols: list[str] | None = None) -> pd.DataFrame:
+        """Shrunk daily covariance for ``symbols`` (all symbols in the window by default).
+
+        Unknown symbols get the shrinkage target's variance and no
+        covariance. Empty when no returns have been seen yet.
+        """
+        if self.n_obs < 2:
+            return pd.DataFrame()
+        active = [s for s in self.symbols if self._last_seen.get(s, "") >= self._base_date]
+        pos = np.array([self._col[s] for s in active], dtype=int)
+        # Columns of symbols that left the window are zero: sum(||x||^4) is unaffected
+        cross = self._cross[np.ix_(pos, pos)]
+        cov, _ = ledoit_wolf(cross, self._fourth, self.n_obs)
+        if symbols is None:
+            return pd.DataFrame(cov, index=active, columns=active)
+        col = {s: i for i, s in enumerate(active)}
+        idx = np.array([col.get(s, -1) for s in symbols], dtype=int)
+        known = idx >= 0
+        out = np.zeros((len(symbols), len(symbols)))
+        out[np.ix_(known, known)] = cov[np.ix_(idx[known], idx[known])]
+        out[~known, ~known] = np.trace(cross) / self.n_obs / len(active)
+        return pd.DataFrame(out, index=symbols, columns=symbols)
@@ -10,6 +10,7 @@ from datetime import datetime
 import pandas as pd
 
 from src.data.storage import DataStore
+from src.sentiment.local_model import LocalSentimentModel
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,22 @@ _SYSTEM_PROMPT = (
     "只返回 JSON，不要其他文字。"
 )
 
+# Rough per-item size of the JSON the model returns for one news item
+_RESPONSE_TOKENS_PER_ITEM = 30
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate LLM token count locally without a tokenizer.
+
+    CJK characters cost roughly one token each; other text roughly one
+    token per four characters. Errs on the high side for mixed text.
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff" or "\u3000" <= ch <= "\u303f")
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
 
 class SentimentAnalyzer:
     """Analyze news sentiment using LLM API with caching."""
@@ -37,14 +54,32 @@ class SentimentAnalyzer:
         self.model = llm_cfg.get("model", "gpt-4o-mini")
         self.api_key_env = llm_cfg.get("api_key_env", "OPENAI_API_KEY")
         self.batch_size = llm_cfg.get("batch_size", 10)
+        self.max_prompt_tokens = llm_cfg.get("max_prompt_tokens", 3000)
+        self.max_output_tokens = llm_cfg.get("max_output_tokens", 2048)
+        self.summary_max_chars = llm_cfg.get("summary_max_chars", 200)
         self.max_retries = llm_cfg.get("max_retries", 2)
         self.temperature = llm_cfg.get("temperature", 0.1)
+        # Optional endpoint override (e.g. the local stub server) and SDK-level retries
+        self.base_url = llm_cfg.get("base_url")
+        self.client_max_retries = llm_cfg.get("client_max_retries")
 
         self._api_key = os.environ.get(self.api_key_env)
+        self.batch_stats: list[dict] = []
+
+        local_cfg = llm_cfg.get("local_model", {})
+        self.local_enabled = local_cfg.get("enabled", False)
+        self.escalate_below = local_cfg.get("escalate_below", 0.6)
+        self._local_model: LocalSentimentModel | None = None
 
     def analyze_pending(self) -> int:
-        """Analyze all unanalyzed news. Returns count of newly analyzed items."""
-        if not self._api_key:
+        """Analyze all unanalyzed news. Returns count of newly analyzed items.
+
+        With the local tier enabled, every item is scored locally first.
+        Confident local results are stored directly and only the rest are
+        escalated to the LLM; without an API key all local results are
+        stored (and escalated on a later run once a key is available).
+        """
+        if not self._api_key and not self.local_enabled:
             logger.warning(
                 "LLM API key not configured (env: %s), sentiment analysis disabled",
                 self.api_key_env,
@@ -52,40 +87,145 @@ class SentimentAnalyzer:
             return 0
 
         pending = self.store.read_unanalyzed_news()
+        local_results: dict[int, dict] = {}
+        if self.local_enabled and not pending.empty:
+            local_results = {r["news_id"]: r for r in self._get_local_model().analyze(pending)}
+
+        if not self._api_key:
+            logger.warning(
+                "LLM API key not configured (env: %s), using local sentiment tier only",
+                self.api_key_env,
+            )
+            self._save_results(list(local_results.values()))
+            logger.info("Analyzed %d news articles locally", len(local_results))
+            return len(local_results)
+
+        local_saved = 0
+        if self.local_enabled:
+            confident = [r for r in local_results.values() if r["confidence"] >= self.escalate_below]
+            self._save_results(confident)
+            local_saved = len(confident)
+            # Remaining new items plus earlier low-confidence local results
+            pending = self.store.read_unanalyzed_news(escalate_below=self.escalate_below)
+
         if pending.empty:
             logger.info("No pending news to analyze")
-            return 0
+            return local_saved
 
-        total_analyzed = 0
-        for batch_start in range(0, len(pending), self.batch_size):
-            batch = pending.iloc[batch_start : batch_start + self.batch_size]
+        self.batch_stats = []
+        total_analyzed = local_saved
+        for batch in self.plan_batches(pending):
             results = self._analyze_batch(batch)
+            if local_results:
+                # LLM unavailable for (part of) the batch: keep the local result
+                done = {r["news_id"] for r in results}
+                results += [
+                    local_results[i] for i in batch["id"] if i in local_results and i not in done
+                ]
             if results:
                 self._save_results(results)
                 total_analyzed += len(results)
 
+        if self.batch_stats:
+            calls = len(self.batch_stats)
+            logger.info(
+                "Sentiment batches: %d LLM calls, %d est. prompt tokens, %.1fs total latency",
+                calls,
+                sum(s["prompt_tokens"] for s in self.batch_stats),
+                sum(s["latency_s"] for s in self.batch_stats),
+            )
         logger.info("Analyzed %d news articles", total_analyzed)
         return total_analyzed
 
+    def _get_local_model(self) -> LocalSentimentModel:
+        """Build the local tier, training it from LLM labels on first use."""
+        if self._local_model is None:
+            self._local_model = LocalSentimentModel(self.config)
+            self._local_model.train_from_store(self.store)
+        return self._local_model
+
+    def plan_batches(self, pending: pd.DataFrame) -> list[pd.DataFrame]:
+        """Pack news items into batches bounded by the token budget.
+
+        A batch is closed when adding the next item would exceed
+        ``max_prompt_tokens`` (system + user prompt) or the expected
+        response would exceed ``max_output_tokens``. ``batch_size`` caps
+        the item count. An oversized single item still gets its own batch.
+        """
+        max_items = max(1, min(
+            self.batch_size, self.max_output_tokens // _RESPONSE_TOKENS_PER_ITEM
+        ))
+        base_tokens = estimate_tokens(_SYSTEM_PROMPT)
+
+        batches = []
+        start = 0
+        used = base_tokens
+        for pos, (_, row) in enumerate(pending.iterrows()):
+            item_tokens = estimate_tokens("\n".join(self._format_item(pos - start, row)))
+            n_items = pos - start
+            if n_items > 0 and (used + item_tokens > self.max_prompt_tokens or n_items >= max_items):
+                batches.append(pending.iloc[start:pos])
+                start = pos
+                used = base_tokens
+                item_tokens = estimate_tokens("\n".join(self._format_item(0, row)))
+            used += item_tokens
+        if start < len(pending):
+            batches.append(pending.iloc[start:])
+        return batches
+
     def _analyze_batch(self, batch: pd.DataFrame) -> list[dict]:
-        """Send a batch of news to LLM and parse results."""
+        """Send a batch of news to LLM and parse results.
+
+        If the response cannot be parsed, the batch is split in half and
+        each half retried, so one bad item only costs its own sub-batch.
+        A single item that still fails to parse is marked neutral.
+        """
         news_text = self._build_prompt(batch)
+        prompt_tokens = estimate_tokens(_SYSTEM_PROMPT) + estimate_tokens(news_text)
+
+        t0 = time.perf_counter()
         raw_response = self._call_llm(news_text)
+        latency = time.perf_counter() - t0
+
+        results = None if raw_response is None else self._try_parse(raw_response, batch)
+        self.batch_stats.append({
+            "items": len(batch),
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": estimate_tokens(raw_response or ""),
+            "latency_s": latency,
+            "ok": results is not None,
+        })
+
         if raw_response is None:
             return []
-        return self._parse_response(raw_response, batch)
+        if results is not None:
+            return results
+        if len(batch) > 1:
+            mid = len(batch) // 2
+            logger.warning(
+                "Unparseable LLM response for %d items, retrying as %d + %d",
+                len(batch), mid, len(batch) - mid,
+            )
+            return self._analyze_batch(batch.iloc[:mid]) + self._analyze_batch(batch.iloc[mid:])
+        logger.warning("LLM returned unparseable result for single item, marking neutral")
+        return self._neutral_results(batch)
 
     def _build_prompt(self, batch: pd.DataFrame) -> str:
         """Build the user prompt with numbered news items."""
         lines = []
         for i, (_, row) in enumerate(batch.iterrows()):
-            title = row.get("title", "")
-            summary = row.get("summary", "")
-            lines.append(f"[{i}] 标题: {title}")
-            if summary:
-                lines.append(f"    摘要: {summary[:200]}")
+            lines.extend(self._format_item(i, row))
         return "\n".join(lines)
 
+    def _format_item(self, index: int, row: pd.Series) -> list[str]:
+        """Format one news item as prompt lines."""
+        title = row.get("title", "")
+        summary = row.get("summary", "")
+        lines = [f"[{index}] 标题: {title}"]
+        if summary:
+            lines.append(f"    摘要: {summary[:self.summary_max_chars]}")
+        return lines
+
     def _call_llm(self, user_message: str) -> str | None:
         """Call LLM API with retry logic."""
         for attempt in range(1 + self.max_retries):
@@ -109,11 +249,20 @@ class SentimentAnalyzer:
                     )
         return None
 
+    def _client_kwargs(self) -> dict:
+        """Extra SDK client arguments from config."""
+        kwargs = {}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.client_max_retries is not None:
+            kwargs["max_retries"] = self.client_max_retries
+        return kwargs
+
     def _call_openai(self, user_message: str) -> str:
         """Call OpenAI API."""
         from openai import OpenAI
 
-        client = OpenAI(api_key=self._api_key)
+        client = OpenAI(api_key=self._api_key, **self._client_kwargs())
         response = client.chat.completions.create(
             model=self.model,
             messages=[
@@ -129,25 +278,24 @@ class SentimentAnalyzer:
         """Call Anthropic API."""
         from anthropic import Anthropic
 
-        client = Anthropic(api_key=self._api_key)
+        client = Anthropic(api_key=self._api_key, **self._client_kwargs())
         response = client.messages.create(
             model=self.model,
-            max_tokens=2048,
+            max_tokens=self.max_output_tokens,
             system=_SYSTEM_PROMPT,
             messages=[{"role": "user", "content": user_message}],
             temperature=self.temperature,
         )
         return response.content[0].text
 
-    def _parse_response(
+    def _try_parse(
         self, raw: str, batch: pd.DataFrame
-    ) -> list[dict]:
-        """Parse LLM JSON response into sentiment results."""
+    ) -> list[dict] | None:
+        """Parse LLM JSON response; None if the response is not usable JSON."""
         try:
             parsed = json.loads(raw)
         except json.JSONDecodeError:
-            logger.warning("LLM returned invalid JSON, marking batch as neutral")
-            return self._neutral_results(batch)
+            return None
 
         # Handle both {"results": [...]} and direct [...] formats
         if isinstance(parsed, dict):
@@ -159,8 +307,7 @@ class SentimentAnalyzer:
         elif isinstance(parsed, list):
             items = parsed
         else:
-            logger.warning("LLM returned unexpected format, marking batch as neutral")
-            return self._neutral_results(batch)
+            return None
 
         results = []
         news_ids = batch["id"].tolist()
@@ -230,3 +377,4 @@ class SentimentAnalyzer:
                         r["analyzed_at"],
                     ),
                 )
+            self.store._record_write(conn, "sentiment_cache")
@@ -0,0 +1,156 @@
+"""Local CPU-only sentiment tier: domain lexicon and character n-gram Naive Bayes."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import DataStore
+
+logger = logging.getLogger(__name__)
+
+CLASSES = ("bullish", "bearish", "neutral")
+
+# Price / fundamentals vocabulary for Chinese non-ferrous metals news
+_BULLISH_TERMS = (
+    "上涨", "大涨", "涨价", "涨停", "利好", "增长", "突破", "新高", "走强", "回升",
+    "反弹", "扩产", "投产", "发现", "增持", "回购", "盈利", "预增", "超预期",
+    "短缺", "去库", "库存下降", "需求旺盛", "提价", "中标", "获批",
+)
+_BEARISH_TERMS = (
+    "下跌", "大跌", "暴跌", "跌停", "利空", "下滑", "亏损", "预亏", "新低", "走弱",
+    "回落", "跌破", "减持", "处罚", "立案", "违规", "停产", "累库", "库存累积",
+    "过剩", "需求疲软", "下调", "降价", "爆雷", "退市",
+)
+
+
+class LexiconModel:
+    """Keyword-count classifier; needs no training data."""
+
+    name = "local/lexicon"
+
+    def predict(self, text: str) -> tuple[str, float]:
+        pos = sum(text.count(t) for t in _BULLISH_TERMS)
+        neg = sum(text.count(t) for t in _BEARISH_TERMS)
+        if pos == neg:
+            # No signal or conflicting signal: low confidence so it escalates
+            return "neutral", 0.3 if pos == 0 else 0.2
+        net = pos - neg
+        confidence = min(0.9, 0.5 + 0.1 * abs(net) + 0.1 * abs(net) / (pos + neg))
+        return ("bullish" if net > 0 else "bearish"), confidence
+
+
+class NgramNBModel:
+    """Multinomial Naive Bayes over character n-grams.
+
+    Log-likelihoods are length-normalized (divided by sqrt of the n-gram
+    count) before the softmax, which tempers NB's overconfidence on long
+    texts so the escalation threshold stays meaningful.
+    """
+
+    name = "local/char-ngram-nb"
+
+    def __init__(self, ngram_range: tuple[int, int] = (1, 2), alpha: float = 1.0):
+        self.ngram_range = ngram_range
+        self.alpha = alpha
+        self.vocab: dict[str, int] = {}
+        self.log_prior = np.zeros(len(CLASSES))
+        self.log_lik = np.zeros((len(CLASSES), 0))
+
+    def _ngrams(self, text: str) -> list[str]:
+        lo, hi = self.ngram_range
+        return [text[i:i + n] for n in range(lo, hi + 1) for i in range(len(text) - n + 1)]
+
+    def fit(self, texts: list[str], labels: list[str]) -> "NgramNBModel":
+        self.vocab = {}
+        docs = []
+        for text in texts:
+            ids = [self.vocab.setdefault(g, len(self.vocab)) for g in self._ngrams(text)]
+            docs.append(ids)
+
+        counts = np.zeros((len(CLASSES), len(self.vocab)))
+        class_docs = np.zeros(len(CLASSES))
+        for ids, label in zip(docs, labels):
+            c = CLASSES.index(label)
+            class_docs[c] += 1
+            np.add.at(counts[c], ids, 1)
+
+        self.log_prior = np.log((class_docs + 1) / (class_docs.sum() + len(CLASSES)))
+        smoothed = counts + self.alpha
+        self.log_lik = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        return self
+
+    def predict(self, text: str) -> tuple[str, float]:
+        ids = [self.vocab[g] for g in self._ngrams(text) if g in self.vocab]
+        if not ids:
+            return "neutral", 0.0
+        logits = self.log_prior + self.log_lik[:, ids].sum(axis=1) / np.sqrt(len(ids))
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        best = int(np.argmax(probs))
+        return CLASSES[best], float(probs[best])
+
+
+class LocalSentimentModel:
+    """Local sentiment tier used ahead of (or instead of) the LLM.
+
+    Trains the n-gram model from LLM-labeled ``sentiment_cache`` rows when
+    enough exist; otherwise falls back to the domain lexicon.
+    """
+
+    def __init__(self, config: dict):
+        local_cfg = config.get("llm", {}).get("local_model", {})
+        self.min_train_samples = local_cfg.get("min_train_samples", 200)
+        self.summary_max_chars = config.get("llm", {}).get("summary_max_chars", 200)
+        ngram_range = local_cfg.get("ngram_range", [1, 2])
+        self._nb = NgramNBModel(ngram_range=(int(ngram_range[0]), int(ngram_range[1])))
+        self._lexicon = LexiconModel()
+        self.model = self._lexicon
+
+    def train_from_store(self, store: DataStore) -> bool:
+        """Train the n-gram model from LLM labels. Returns True if trained."""
+        labeled = store.read_labeled_news()
+        if not labeled.empty:
+            labeled = labeled[~labeled["model_name"].fillna("").str.startswith("local/")]
+        if len(labeled) < self.min_train_samples or labeled["classification"].nunique() < 2:
+            logger.info(
+                "Local sentiment: %d LLM labels (< %d), using lexicon tier",
+                len(labeled), self.min_train_samples,
+            )
+            self.model = self._lexicon
+            return False
+
+        texts = [self._text(r) for _, r in labeled.iterrows()]
+        self._nb.fit(texts, labeled["classification"].tolist())
+        self.model = self._nb
+        logger.info("Local sentiment: trained n-gram model on %d LLM labels", len(labeled))
+        return True
+
+    def analyze(self, news: pd.DataFrame) -> list[dict]:
+        """Score news rows; result dicts match the sentiment_cache schema."""
+        now = datetime.now().isoformat()
+        results = []
+        for _, row in news.iterrows():
+            classification, confidence = self.model.predict(self._text(row))
+            if classification == "bullish":
+                score = confidence
+            elif classification == "bearish":
+                score = -confidence
+            else:
+                score = 0.0
+            results.append({
+                "news_id": row["id"],
+                "classification": classification,
+                "confidence": confidence,
+                "sentiment_score": score,
+                "model_name": self.model.name,
+                "analyzed_at": now,
+            })
+        return results
+
+    def _text(self, row: pd.Series) -> str:
+        title = row.get("title", "") or ""
+        summary = row.get("summary", "") or ""
+        return f"{title} {summary[:self.summary_max_chars]}"
@@ -0,0 +1,291 @@
+"""Local stub LLM server speaking the OpenAI chat-completions and Anthropic messages formats.
+
+Used to benchmark and regression-test SentimentAnalyzer offline: latency
+distribution, error rate, rate limiting and concurrency caps are
+configurable, and the JSON sentiment output is a deterministic function
+of each news title.
+
+Run standalone:
+    python -m src.sentiment.stub_server --port 8089 --latency-ms 200 --error-rate 0.05
+then point the analyzer at it with ``llm.base_url: http://127.0.0.1:8089/v1``
+(OpenAI) or ``http://127.0.0.1:8089`` (Anthropic).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_ITEM_RE = re.compile(r"^\[(\d+)\] 标题: (.*)$", re.MULTILINE)
+_CLASSES = ("bullish", "bearish", "neutral")
+
+
+@dataclass
+class StubConfig:
+    latency_dist: str = "fixed"  # fixed, uniform or lognormal
+    latency_ms: float = 0.0  # fixed value, uniform lower bound, or lognormal median
+    latency_max_ms: float = 0.0  # uniform upper bound
+    latency_sigma: float = 0.5  # lognormal shape
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after_s: float = 1.0  # Retry-After header on 429 responses
+    max_concurrency: int = 0  # requests in flight beyond this get 429; 0 = unlimited
+    malformed_rate: float = 0.0  # fraction of 200 responses with non-JSON content
+    seed: int = 0
+
+
+def deterministic_sentiment(title: str) -> tuple[str, float]:
+    """Map a news title to a fixed (classification, confidence) pair."""
+    digest = hashlib.sha256(title.encode("utf-8")).digest()
+    return _CLASSES[digest[0] % 3], round(0.5 + digest[1] / 510, 2)
+
+
+def build_sentiment_json(prompt: str) -> str:
+    """Answer a SentimentAnalyzer prompt with a JSON array, one entry per item."""
+    items = [
+        {"index": int(idx), "classification": cls, "confidence": conf}
+        for idx, title in _ITEM_RE.findall(prompt)
+        for cls, conf in [deterministic_sentiment(title.strip())]
+    ]
+    return json.dumps(items, ensure_ascii=False)
+
+
+class StubLLMServer:
+    """Threaded HTTP stand-in for OpenAI / Anthropic endpoints.
+
+    Usable as a context manager; ``url`` is the bare server address and
+    ``stats`` counts outcomes for assertions and benchmarks.
+    """
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {
+            "requests": 0, "ok": 0, "error": 0, "rate_limited": 0,
+            "malformed": 0, "max_in_flight": 0,
+        }
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread (standalone mode)."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self) -> tuple[str, float]:
+        """Pick the outcome and latency for one request (thread-safe, seeded)."""
+        cfg = self.config
+        with self._lock:
+            r = self._rng.random()
+            if cfg.latency_dist == "uniform":
+                latency = self._rng.uniform(cfg.latency_ms, max(cfg.latency_ms, cfg.latency_max_ms))
+            elif cfg.latency_dist == "lognormal":
+                latency = self._rng.lognormvariate(0.0, cfg.latency_sigma) * cfg.latency_ms
+            else:
+                latency = cfg.latency_ms
+        if r < cfg.error_rate:
+            outcome = "error"
+        elif r < cfg.error_rate + cfg.rate_limit_rate:
+            outcome = "rate_limited"
+        elif r < cfg.error_rate + cfg.rate_limit_rate + cfg.malformed_rate:
+            outcome = "malformed"
+        else:
+            outcome = "ok"
+        return outcome, latency / 1000.0
+
+    def _enter(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.config.max_concurrency and self._in_flight >= self.config.max_concurrency:
+                self.stats["rate_limited"] += 1
+                return False
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+            return True
+
+    def _leave(self, outcome: str):
+        with self._lock:
+            self._in_flight -= 1
+            self.stats[outcome] += 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                logger.debug("stub llm: " + fmt, *args)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, {"error": {"message": "invalid JSON body"}})
+                    return
+
+                if self.path.endswith("/chat/completions"):
+                    fmt = "openai"
+                elif self.path.endswith("/messages"):
+                    fmt = "anthropic"
+                else:
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+
+                if not server._enter():
+                    self._rate_limited()
+                    return
+                outcome, latency = server._draw()
+                try:
+                    time.sleep(latency)
+                    if outcome == "error":
+                        self._send(500, {"error": {"message": "stub internal error"}})
+                    elif outcome == "rate_limited":
+                        self._rate_limited()
+                    else:
+                        prompt = _user_prompt(body)
+                        text = "not json" if outcome == "malformed" else build_sentiment_json(prompt)
+                        self._send(200, _wrap(fmt, body.get("model", "stub"), text, prompt))
+                finally:
+                    server._leave(outcome)
+
+            def _rate_limited(self):
+                self._send(
+                    429,
+                    {"error": {"type": "rate_limit_error", "message": "stub rate limit"}},
+                    {"Retry-After": str(server.config.retry_after_s)},
+                )
+
+            def _send(self, status: int, payload: dict, headers: dict | None = None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _user_prompt(body: dict) -> str:
+    """Extract the last user message text from either wire format."""
+    for msg in reversed(body.get("messages", [])):
+        if msg.get("role") != "user":
+            continue
+        content = msg.get("content", "")
+        if isinstance(content, list):
+            return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return content
+    return ""
+
+
+def _wrap(fmt: str, model: str, text: str, prompt: str) -> dict:
+    """Wrap response text in the provider's response envelope."""
+    usage_in = len(prompt)
+    usage_out = len(text)
+    if fmt == "anthropic":
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": usage_in, "output_tokens": usage_out},
+        }
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": usage_in,
+            "completion_tokens": usage_out,
+            "total_tokens": usage_in + usage_out,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 LLM 服务 (OpenAI / Anthropic 协议)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-max-ms", type=float, default=0.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_max_ms=args.latency_max_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_s=args.retry_after,
+        max_concurrency=args.max_concurrency,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    server = StubLLMServer(config, host=args.host, port=args.port)
+    print(f"Stub LLM server: {server.url}  (OpenAI base_url {server.url}/v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
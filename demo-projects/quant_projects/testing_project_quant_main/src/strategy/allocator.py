@@ -1,23 +1,39 @@
-"""Position allocation: score-proportional weights with constraints."""
+"""Position allocation: score-proportional or risk-model weights with constraints.
+
+``strategy.allocation`` selects the mode:
+
+- ``score`` (default): weights proportional to scores.
+- ``risk_parity``: equal risk contribution under the covariance estimate.
+- ``min_variance_tilt``: minimum variance with a score tilt of strength
+  ``strategy.score_tilt``.
+
+All modes respect ``max_single_weight`` and ``max_subsector_weight``.
+"""
 from __future__ import annotations
 
 import logging
 
+import numpy as np
 import pandas as pd
 
+from src.ops.profiling import timed
+
 logger = logging.getLogger(__name__)
 
 
+@timed("allocation")
 def allocate_weights(
     selected_symbols: list[str],
     scores: pd.Series,
     config: dict,
     subsector_map: dict[str, str] | None = None,
     position_ratio: float = 1.0,
+    covariance: pd.DataFrame | None = None,
 ) -> pd.Series:
     """Allocate portfolio weights to selected stocks.
 
-    Score-proportional allocation with single-stock and sub-sector caps.
+    Score-proportional allocation with single-stock and sub-sector caps,
+    see :func:`capped_proportional_weights`.
 
     Args:
         selected_symbols: Symbols selected for the portfolio.
@@ -25,6 +41,10 @@ def allocate_weights(
         config: Settings dict.
         subsector_map: {symbol: subsector} mapping for sub-sector cap enforcement.
         position_ratio: Timing-adjusted position ratio (0.0 to 1.0).
+        covariance: Return covariance covering the selected symbols, for
+            the risk-model modes (e.g. from
+            :class:`~src.risk.covariance.RollingCovariance`). Without it
+            they fall back to score weighting.
 
     Returns:
         pd.Series of target weights indexed by symbol.
@@ -35,95 +55,207 @@ def allocate_weights(
     strategy_cfg = config.get("strategy", {})
     max_single = strategy_cfg.get("max_single_weight", 0.10)
     max_subsector = strategy_cfg.get("max_subsector_weight", 0.25)
+    mode = strategy_cfg.get("allocation", "score")
 
-    # Get scores for selected stocks
-    sel_scores = scores.loc[selected_symbols].copy()
-    sel_scores = sel_scores.clip(lower=0)  # Ensure non-negative
+    # Score-proportional base, equal weight when no score is positive
+    sel_scores = scores.loc[selected_symbols].to_numpy(dtype=float)
+    base = np.clip(sel_scores, 0, None)
+    if base.sum() <= 0:
+        base = np.ones(len(selected_symbols))
 
-    # Score-proportional weights
-    total_score = sel_scores.sum()
-    if total_score <= 0:
-        # Equal weight fallback
-        weights = pd.Series(1.0 / len(selected_symbols), index=selected_symbols)
+    groups = None
+    group_cap = None
+    if subsector_map:
+        groups, _ = pd.factorize(pd.Index([subsector_map.get(s, "other") for s in selected_symbols]))
+        group_cap = max_subsector
+
+    if mode != "score" and covariance is None:
+        logger.warning("Allocation mode %s needs a covariance estimate; using score weights", mode)
+        mode = "score"
+    if mode == "risk_parity":
+        cov = covariance.loc[selected_symbols, selected_symbols].to_numpy(dtype=float)
+        weights = capped_proportional_weights(risk_parity_weights(cov), max_single, groups, group_cap)
+    elif mode == "min_variance_tilt":
+        cov = covariance.loc[selected_symbols, selected_symbols].to_numpy(dtype=float)
+        weights = min_variance_tilt_weights(
+            cov, sel_scores, strategy_cfg.get("score_tilt", 1.0), max_single, groups, group_cap,
+        )
+    elif mode == "score":
+        weights = capped_proportional_weights(base, max_single, groups, group_cap)
     else:
-        weights = sel_scores / total_score
+        raise ValueError(f"Unknown allocation mode: {mode}")
 
-    # Apply single-stock cap iteratively
-    weights = _apply_single_cap(weights, max_single)
+    # Apply position ratio from timing
+    return pd.Series(weights * position_ratio, index=selected_symbols)
 
-    # Apply sub-sector cap
-    if subsector_map:
-        weights = _apply_subsector_cap(weights, subsector_map, max_subsector)
 
-    # Apply position ratio from timing
-    weights = weights * position_ratio
+def capped_proportional_weights(
+    base: np.ndarray,
+    cap: float | np.ndarray,
+    groups: np.ndarray | None = None,
+    group_cap: float | np.ndarray | None = None,
+) -> np.ndarray:
+    """Fully invested weights proportional to ``base`` under single and group caps.
 
-    return weights
+    Every weight has the form ``w_i = base_i * min(t, c_i)``: it grows with a
+    common water level ``t`` until it reaches its own cap or its group fills
+    up. ``c_i = min(cap_i / base_i, tau_g)``, where ``tau_g`` is the level
+    at which group ``g`` reaches ``group_cap``. Both levels are solved
+    exactly, so the constraints always hold on return (unlike iterative
+    clip-and-redistribute). This is what repeatedly clipping and
+    redistributing the excess proportionally converges to. Cost is
+    O(n log n), from sorting the breakpoints.
 
+    When the caps cannot hold a fully invested portfolio (too few names),
+    all caps are relaxed by the smallest common factor that makes it
+    feasible, and a warning is logged.
 
-def _apply_single_cap(weights: pd.Series, cap: float, max_iter: int = 10) -> pd.Series:
-    """Iteratively clip weights at cap and redistribute excess."""
-    for _ in range(max_iter):
-        excess_mask = weights > cap
-        if not excess_mask.any():
-            break
+    Args:
+        base: Non-negative base weights (e.g. scores); names with 0 get 0.
+        cap: Single-name cap, scalar or per name.
+        groups: Integer group id per name (e.g. factorized sub-sectors).
+        group_cap: Group cap, scalar or per group id.
 
-        excess = (weights[excess_mask] - cap).sum()
-        weights[excess_mask] = cap
+    Returns:
+        Weights summing to 1 (all zeros if ``base`` has no positive entry).
+    """
+    base = np.clip(np.asarray(base, dtype=float), 0, None)
+    weights = np.zeros(len(base))
+    live = base > 0
+    if not live.any():
+        return weights
+    p = base[live] / base[live].sum()
+    c = np.broadcast_to(np.asarray(cap, dtype=float), base.shape)[live] / p
 
-        # Redistribute excess proportionally to uncapped stocks
-        uncapped = weights[~excess_mask]
-        if uncapped.sum() > 0:
-            weights[~excess_mask] = uncapped + excess * (uncapped / uncapped.sum())
-        else:
-            break
+    if groups is not None and group_cap is not None:
+        gid = np.asarray(groups)[live]
+        n_groups = int(gid.max()) + 1
+        targets = np.broadcast_to(np.asarray(group_cap, dtype=float), (n_groups,))
+        c = np.minimum(c, _water_levels(p, c, gid, targets)[gid])
 
-    # Final normalization
-    total = weights.sum()
-    if total > 0:
-        weights = weights / total
+    level = _water_levels(p, c, np.zeros(len(p), dtype=int), np.ones(1))[0]
+    if np.isinf(level):
+        capacity = float((p * c).sum())
+        logger.warning(
+            "Weight caps allow only %.1f%% invested across %d names; relaxing caps by %.2fx",
+            100 * capacity, len(p), 1 / capacity,
+        )
+        weights[live] = p * c / capacity
+    else:
+        weights[live] = p * np.minimum(level, c)
     return weights
 
 
-def _apply_subsector_cap(
-    weights: pd.Series,
-    subsector_map: dict[str, str],
-    cap: float,
-    max_iter: int = 10,
-) -> pd.Series:
-    """Iteratively enforce sub-sector weight cap."""
+def _water_levels(p: np.ndarray, c: np.ndarray, gid: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Per group, the level ``t`` with ``sum(p_i * min(t, c_i)) == target``.
+
+    ``inf`` for groups whose capacity ``sum(p_i * c_i)`` is at most the
+    target (including groups with no names).
+    """
+    levels = np.full(len(targets), np.inf)
+    if len(p) == 0:
+        return levels
+    order = np.lexsort((c, gid))
+    p, c, gid = p[order], c[order], gid[order]
+    starts = np.flatnonzero(np.r_[True, gid[1:] != gid[:-1]])
+    sizes = np.diff(np.r_[starts, len(gid)])
+
+    pc = np.where(np.isinf(c), 0.0, p * c)
+    # Within each group: sum of p*c strictly below position k, and of p from k on
+    pc_before = np.cumsum(pc) - pc
+    pc_before -= np.repeat(pc_before[starts], sizes)
+    p_from = np.cumsum(p[::-1])[::-1]
+    p_from -= np.repeat(np.r_[p_from[starts[1:]], 0.0], sizes)
+    with np.errstate(invalid="ignore"):
+        filled = pc_before + c * p_from  # sum(p * min(c_k, c)) at level c_k
+
+    reached = filled >= targets[gid]
+    hit = np.flatnonzero(reached & ~np.r_[False, reached[:-1] & (gid[1:] == gid[:-1])])
+    g = gid[hit]
+    levels[g] = (targets[g] - pc_before[hit]) / p_from[hit]
+    return levels
+
+
+def risk_parity_weights(cov: np.ndarray, tol: float = 1e-10, max_iter: int = 50) -> np.ndarray:
+    """Long-only equal-risk-contribution weights.
+
+    Newton's method on the convex problem
+    ``min 0.5 y'Σy - (1/n) sum(log y)`` (Spinu, 2013), whose solution
+    normalized to sum 1 has equal risk contributions ``w_i (Σw)_i``.
+    """
+    n = len(cov)
+    if n == 0:
+        return np.zeros(0)
+    b = np.full(n, 1.0 / n)
+    y = 1.0 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(1.0 / (y @ cov @ y))
     for _ in range(max_iter):
-        # Calculate sub-sector weights
-        subsector_weights: dict[str, float] = {}
-        for sym, w in weights.items():
-            ss = subsector_map.get(sym, "other")
-            subsector_weights[ss] = subsector_weights.get(ss, 0.0) + w
-
-        # Find sub-sectors over cap
-        over = {ss: sw for ss, sw in subsector_weights.items() if sw > cap}
-        if not over:
+        grad = cov @ y - b / y
+        hess = cov + np.diag(b / y ** 2)
+        step = np.linalg.solve(hess, grad)
+        # Damped step keeps y positive
+        ratio = np.where(step > 0, y / np.where(step > 0, step, 1.0), np.inf)
+        y = y - min(1.0, 0.95 * ratio.min()) * step
+        if np.abs(grad).max() < tol:
             break
+    return y / y.sum()
 
-        for ss, ss_weight in over.items():
-            # Stocks in this sub-sector
-            ss_stocks = [s for s in weights.index if subsector_map.get(s, "other") == ss]
-            scale = cap / ss_weight
-            excess = 0.0
-            for s in ss_stocks:
-                old_w = weights[s]
-                new_w = old_w * scale
-                excess += old_w - new_w
-                weights[s] = new_w
-
-            # Redistribute excess to other sub-sectors
-            other_stocks = [s for s in weights.index if subsector_map.get(s, "other") != ss]
-            other_total = weights[other_stocks].sum()
-            if other_total > 0:
-                for s in other_stocks:
-                    weights[s] += excess * (weights[s] / other_total)
-
-    # Final normalization
-    total = weights.sum()
-    if total > 0:
-        weights = weights / total
-    return weights
+
+def min_variance_tilt_weights(
+    cov: np.ndarray,
+    scores: np.ndarray,
+    tilt: float,
+    cap: float,
+    groups: np.ndarray | None = None,
+    group_cap: float | None = None,
+) -> np.ndarray:
+    """Minimum-variance weights tilted towards high scores, under the caps.
+
+    Solves ``min 0.5 w'Σw - tilt * v * z'w`` with ``sum(w) = 1``,
+    ``0 <= w <= cap`` and sub-sector sums ``<= group_cap`` (SLSQP). ``z``
+    are the standardized scores and ``v`` the average variance, so
+    ``tilt`` is scale-free: 0 is pure minimum variance. Infeasible caps are
+    relaxed by the smallest common factor, as in score weighting.
+    """
+    from scipy.optimize import minimize
+
+    n = len(cov)
+    if n == 0:
+        return np.zeros(0)
+    scores = np.nan_to_num(np.asarray(scores, dtype=float))
+    z = (scores - scores.mean()) / scores.std() if scores.std() > 0 else np.zeros(n)
+    linear = tilt * np.trace(cov) / n * z
+
+    group_sums = []
+    if groups is not None and group_cap is not None:
+        groups = np.asarray(groups)
+        group_sums = [groups == g for g in np.unique(groups)]
+    capacity = (
+        sum(min(group_cap, cap * m.sum()) for m in group_sums) if group_sums else cap * n
+    )
+    scale = max(1.0, 1.0 / capacity) if capacity > 0 else 1.0
+    if scale > 1.0:
+        logger.warning("Weight caps allow only %.1f%% invested across %d names; relaxing caps by %.2fx",
+                       100 * capacity, n, scale)
+    cap, group_cap = cap * scale, (group_cap * scale if group_cap is not None else None)
+
+    constraints = [{"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: np.ones(n)}]
+    for m in group_sums:
+        constraints.append({
+            "type": "ineq", "fun": lambda w, m=m: group_cap - w[m].sum(), "jac": lambda w, m=m: -m.astype(float),
+        })
+    start = capped_proportional_weights(np.ones(n), cap, groups, group_cap)
+    result = minimize(
+        lambda w: 0.5 * w @ cov @ w - linear @ w,
+        start,
+        jac=lambda w: cov @ w - linear,
+        bounds=[(0.0, cap)] * n,
+        constraints=constraints,
+        method="SLSQP",
+        options={"ftol": 1e-12, "maxiter": 200},
+    )
+    if not result.success:
+        logger.warning("Min-variance solver did not converge (%s); using equal weights", result.message)
+        return start
+    weights = np.clip(result.x, 0.0, cap)
+    return weights / weights.sum()
@@ -6,14 +6,18 @@ import logging
 import numpy as np
 import pandas as pd
 
+from src.ops.profiling import timed
+
 logger = logging.getLogger(__name__)
 
 
+@timed("scoring")
 def score_stocks(
     factor_matrix: pd.DataFrame,
     config: dict,
     ic_history: pd.DataFrame | None = None,
-) -> pd.Series:
+    with_contributions: bool = False,
+) -> pd.Series | tuple[pd.Series, pd.DataFrame]:
     """Score stocks based on standardized factor values.
 
     Args:
@@ -21,11 +25,17 @@ def score_stocks(
         config: Full settings dict.
         ic_history: Optional DataFrame of historical IC values (dates x factors).
             Required for ic_weight mode.
+        with_contributions: Also return the contribution matrix.
 
     Returns:
-        pd.Series of composite scores indexed by symbol.
+        pd.Series of composite scores indexed by symbol. With
+        ``with_contributions``, ``(scores, contributions)`` where
+        contributions (stocks x factors) is factor value × factor weight;
+        each score is the sum of its row (missing values count as 0).
     """
     if factor_matrix.empty:
+        if with_contributions:
+            return pd.Series(dtype=float), pd.DataFrame(index=factor_matrix.index, columns=factor_matrix.columns)
         return pd.Series(dtype=float)
 
     factor_cfg = config.get("factors", {})
@@ -39,8 +49,15 @@ def score_stocks(
             logger.warning("IC history not available, falling back to equal_weight")
         weights = _equal_weighted(factor_matrix, category_weights)
 
-    # Compute composite score
-    scores = (factor_matrix * weights).sum(axis=1)
+    # Contribution matrix in one broadcast multiply; composite score is its row sum
+    contributions = pd.DataFrame(
+        factor_matrix.to_numpy(dtype=float) * weights.reindex(factor_matrix.columns).to_numpy(dtype=float),
+        index=factor_matrix.index,
+        columns=factor_matrix.columns,
+    )
+    scores = contributions.sum(axis=1)
+    if with_contributions:
+        return scores, contributions
     return scores
 
 
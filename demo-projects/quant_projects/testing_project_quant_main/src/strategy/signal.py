@@ -2,13 +2,17 @@
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
 from src.factors.base import compute_all_factors
 from src.strategy.scorer import score_stocks, select_top_stocks
 from src.strategy.allocator import allocate_weights
 from src.data.storage import DataStore
+from src.risk.covariance import RollingCovariance
+from src.universe.metadata import symbol_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -19,44 +23,58 @@ def generate_signals(
     current_holdings: dict[str, float] | None = None,
     position_ratio: float = 1.0,
     store: DataStore | None = None,
+    factor_matrix: pd.DataFrame | None = None,
 ) -> list[dict]:
     """Generate trading signals by comparing target vs current portfolio.
 
+    Uses the news sentiment already in the store; fetching news is part of
+    :func:`src.strategy.signal_sets.build_signal_set`.
+
     Args:
         config: Full settings dict.
         date: Target date for factor calculation.
         current_holdings: {symbol: weight} of current portfolio. None = empty.
         position_ratio: Timing-adjusted position ratio (0 to 1).
         store: DataStore instance.
+        factor_matrix: Precomputed factors for ``date``; computed when None.
 
     Returns:
         List of signal dicts with keys:
-            symbol, name, action (BUY/ADD/REDUCE/SELL), current_weight, target_weight
+            symbol, name, action (BUY/ADD/REDUCE/SELL), current_weight, target_weight,
+            score, factor_contributions ({factor: value × weight})
     """
     if current_holdings is None:
         current_holdings = {}
 
-    # Fetch news and run sentiment analysis before factor computation
-    _run_news_pipeline(config, store)
-
     # Compute factors
-    factor_matrix = compute_all_factors(config, date=date, store=store)
+    if factor_matrix is None:
+        factor_matrix = compute_all_factors(config, date=date, store=store)
     if factor_matrix.empty:
         logger.warning("Empty factor matrix, no signals generated")
         return []
 
     # Score and select
-    scores = score_stocks(factor_matrix, config)
+    scores, contributions = score_stocks(factor_matrix, config, with_contributions=True)
     selected = select_top_stocks(scores, config, universe_size=len(factor_matrix))
 
+    if store is None:
+        store = DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+
     # Get subsector map for allocation
     subsector_map = _get_subsector_map(factor_matrix.index.tolist(), config, store)
 
+    # Covariance for risk-model allocation modes
+    covariance = None
+    if config.get("strategy", {}).get("allocation", "score") != "score":
+        as_of = date or datetime.now().strftime("%Y-%m-%d")
+        covariance = RollingCovariance.from_config(config).update(store, as_of).covariance(selected)
+
     # Allocate weights
     target_weights = allocate_weights(
         selected, scores, config,
         subsector_map=subsector_map,
         position_ratio=position_ratio,
+        covariance=covariance if covariance is not None and not covariance.empty else None,
     )
 
     # Check if rebalance should be skipped
@@ -71,39 +89,29 @@ def generate_signals(
 
     # Generate signals
     signals = _compare_holdings(current_holdings, target_weights, config)
+    if signals:
+        names = symbol_metadata(store, [s["symbol"] for s in signals])["name"]
+        for sig in signals:
+            sig["name"] = names[sig["symbol"]]
+        _attach_attribution(signals, scores, contributions)
     return signals
 
 
-def _run_news_pipeline(config: dict, store: DataStore | None = None):
-    """Fetch latest news and run LLM sentiment analysis."""
-    sentiment_weight = config.get("factors", {}).get("weights", {}).get("sentiment", 0)
-    if sentiment_weight == 0:
-        return
-
-    if store is None:
-        data_cfg = config.get("data", {})
-        store = DataStore(data_cfg.get("db_path", "data/quant.db"))
-
-    try:
-        from src.universe.classifier import get_universe
-        universe_df = get_universe(config)
-        stock_names = dict(zip(universe_df["symbol"], universe_df["name"])) if not universe_df.empty else None
-    except Exception:
-        stock_names = None
-
-    try:
-        from src.news.fetcher import NewsFetcher
-        fetcher = NewsFetcher(config, store=store)
-        fetcher.fetch_and_store(stock_names=stock_names)
-    except Exception as e:
-        logger.warning("News fetch failed, continuing without: %s", e)
+def _attach_attribution(signals: list[dict], scores: pd.Series, contributions: pd.DataFrame):
+    """Set each signal's composite score and per-factor contributions (factor value × weight).
 
-    try:
-        from src.sentiment.analyzer import SentimentAnalyzer
-        analyzer = SentimentAnalyzer(config, store=store)
-        analyzer.analyze_pending()
-    except Exception as e:
-        logger.warning("Sentiment analysis failed, continuing without: %s", e)
+    Symbols outside the factor panel (e.g. holdings being sold) get no score
+    and no contributions; factors without a value for a stock are omitted.
+    """
+    symbols = [s["symbol"] for s in signals]
+    panel = contributions.reindex(symbols)
+    values = panel.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    columns = panel.columns.to_numpy()
+    for i, sig in enumerate(signals):
+        score = scores.get(sig["symbol"])
+        sig["score"] = None if score is None or pd.isna(score) else float(score)
+        sig["factor_contributions"] = dict(zip(columns[present[i]].tolist(), values[i, present[i]].tolist()))
 
 
 def get_sentiment_labels(
@@ -114,26 +122,7 @@ def get_sentiment_labels(
         data_cfg = config.get("data", {})
         store = DataStore(data_cfg.get("db_path", "data/quant.db"))
 
-    labels = {}
-    for symbol in symbols:
-        news_df = store.read_news(symbol=symbol)
-        if news_df.empty:
-            labels[symbol] = "中性: 无相关新闻"
-            continue
-        latest = news_df.iloc[0]
-        cache_df = store.read_sentiment_cache(news_ids=[int(latest["id"])])
-        if cache_df.empty:
-            labels[symbol] = "中性: 无相关新闻"
-            continue
-        cls = cache_df.iloc[0]["classification"]
-        title = latest["title"][:30]
-        if cls == "bullish":
-            labels[symbol] = f"利多: {title}"
-        elif cls == "bearish":
-            labels[symbol] = f"利空: {title}"
-        else:
-            labels[symbol] = f"中性: {title}"
-    return labels
+    return symbol_metadata(store, symbols)["sentiment_label"].to_dict()
 
 
 def _get_subsector_map(
@@ -144,14 +133,7 @@ def _get_subsector_map(
         data_cfg = config.get("data", {})
         store = DataStore(data_cfg.get("db_path", "data/quant.db"))
 
-    subsector_map = {}
-    for symbol in symbols:
-        df = store.read_table("universe_cache", where="symbol = ?", params=(symbol,))
-        if not df.empty and "subsector" in df.columns:
-            subsector_map[symbol] = df.iloc[0]["subsector"]
-        else:
-            subsector_map[symbol] = "other"
-    return subsector_map
+    return symbol_metadata(store, symbols)["subsector"].to_dict()
 
 
 def _should_skip_rebalance(
@@ -207,7 +189,7 @@ def _compare_holdings(
 
         signals.append({
             "symbol": sym,
-            "name": sym,  # Will be enriched with actual name if available
+            "name": sym,  # Enriched with the stock name by generate_signals
             "action": action,
             "current_weight": curr_w,
             "target_weight": tgt_w,
@@ -0,0 +1,198 @@
+"""Persisted signal sets: build trading signals once per data refresh, serve them instantly.
+
+A build runs the whole chain — news fetch → sentiment analysis → timing →
+factors → scores → allocation — and stores the resulting signal list as a
+dated set in the ``signal_sets`` / ``signal_set_items`` tables, together
+with the data version it was built from. The CLI ``signal`` command and
+``GET /api/signals`` read the latest set; building is an explicit refresh
+(``signal --refresh``, ``POST /api/signals/refresh``) or follows a web
+data update.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from src.data.storage import DataStore
+from src.strategy.signal import generate_signals, get_sentiment_labels
+from src.strategy.timing import compute_timing_signal
+
+logger = logging.getLogger(__name__)
+
+_ITEM_COLUMNS = [
+    "symbol", "name", "action", "current_weight", "target_weight", "weight_change",
+    "estimated_cost_pct", "score", "sentiment_label", "factor_contributions",
+]
+
+
+def run_news_pipeline(
+    config: dict, store: DataStore | None = None, universe_df: pd.DataFrame | None = None
+):
+    """Fetch latest news and run LLM sentiment analysis.
+
+    ``universe_df`` supplies the stock names used to tag news; the universe
+    is fetched when it is not given.
+    """
+    sentiment_weight = config.get("factors", {}).get("weights", {}).get("sentiment", 0)
+    if sentiment_weight == 0:
+        return
+
+    if store is None:
+        data_cfg = config.get("data", {})
+        store = DataStore(data_cfg.get("db_path", "data/quant.db"))
+
+    try:
+        if universe_df is None:
+            from src.universe.classifier import get_universe
+            universe_df = get_universe(config)
+        stock_names = dict(zip(universe_df["symbol"], universe_df["name"])) if not universe_df.empty else None
+    except Exception:
+        stock_names = None
+
+    try:
+        from src.news.fetcher import NewsFetcher
+        fetcher = NewsFetcher(config, store=store)
+        fetcher.fetch_and_store(stock_names=stock_names)
+    except Exception as e:
+        logger.warning("News fetch failed, continuing without: %s", e)
+
+    try:
+        from src.sentiment.analyzer import SentimentAnalyzer
+        analyzer = SentimentAnalyzer(config, store=store)
+        analyzer.analyze_pending()
+    except Exception as e:
+        logger.warning("Sentiment analysis failed, continuing without: %s", e)
+
+
+def build_signal_set(
+    config: dict,
+    date: str | None = None,
+    store: DataStore | None = None,
+    fetch_news: bool = True,
+    factor_matrix: pd.DataFrame | None = None,
+    timing: dict | None = None,
+) -> dict:
+    """Run the signal chain for ``date`` (default today) and persist the result.
+
+    Args:
+        config: Full settings dict.
+        date: Signal date.
+        store: DataStore instance.
+        fetch_news: Run news fetch and sentiment analysis first.
+        factor_matrix: Precomputed factors for ``date``.
+        timing: Precomputed :func:`compute_timing_signal` result for ``date``.
+
+    Returns:
+        The stored set, as returned by :func:`load_signal_set`.
+    """
+    if store is None:
+        store = DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+    as_of = date or datetime.now().strftime("%Y-%m-%d")
+    started = time.perf_counter()
+
+    if fetch_news:
+        run_news_pipeline(config, store)
+    if timing is None:
+        timing = compute_timing_signal(config, date=date, store=store)
+    signals = generate_signals(
+        config, date=date, position_ratio=timing["position_ratio"], store=store,
+        factor_matrix=factor_matrix,
+    )
+    if signals:
+        try:
+            labels = get_sentiment_labels([s["symbol"] for s in signals], config, store=store)
+        except Exception as e:
+            logger.warning("Sentiment labels unavailable: %s", e)
+            labels = {}
+        for sig in signals:
+            sig.setdefault("sentiment_label", labels.get(sig["symbol"], ""))
+
+    set_id = save_signal_set(store, as_of, signals, timing)
+    logger.info(
+        "Built signal set %d for %s: %d signals in %.1fs",
+        set_id, as_of, len(signals), time.perf_counter() - started,
+    )
+    return load_signal_set(store, set_id=set_id)
+
+
+def save_signal_set(store: DataStore, as_of: str, signals: list[dict], timing: dict | None = None) -> int:
+    """Store a signal list as a new set for ``as_of``. Returns the set id."""
+    timing = timing or {}
+    data_version = store.data_version()
+    items = pd.DataFrame([{
+        "symbol": sig["symbol"],
+        "name": sig.get("name", sig["symbol"]),
+        "action": sig.get("action"),
+        "current_weight": sig.get("current_weight", 0.0),
+        "target_weight": sig.get("target_weight", 0.0),
+        "weight_change": sig.get("weight_change", 0.0),
+        "estimated_cost_pct": sig.get("estimated_cost_pct", 0.0),
+        "score": sig.get("score"),
+        "sentiment_label": sig.get("sentiment_label", ""),
+        "factor_contributions": json.dumps(sig.get("factor_contributions") or {}, ensure_ascii=False),
+    } for sig in signals], columns=_ITEM_COLUMNS)
+
+    with store._get_conn() as conn:
+        cursor = conn.execute(
+            "INSERT INTO signal_sets (as_of, built_at, data_version, position_ratio, gold_hedge, n_signals) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                as_of, datetime.now().isoformat(), data_version,
+                timing.get("position_ratio"), int(bool(timing.get("gold_hedge", False))), len(items),
+            ),
+        )
+        set_id = cursor.lastrowid
+        if not items.empty:
+            items.insert(0, "set_id", set_id)
+            items.to_sql("signal_set_items", conn, if_exists="append", index=False)
+        store._record_write(conn, "signal_sets")
+        store._record_write(conn, "signal_set_items")
+    return set_id
+
+
+def load_signal_set(
+    store: DataStore, set_id: int | None = None, as_of: str | None = None
+) -> dict | None:
+    """A stored signal set: the given id, else the latest one (for ``as_of`` if given).
+
+    Returns ``{"set_id", "as_of", "built_at", "data_version", "stale",
+    "position_ratio", "gold_hedge", "n_signals", "signals": [...]}`` or None when no
+    set matches. ``stale`` is true when data changed since the build.
+    """
+    query = "SELECT * FROM signal_sets"
+    params: tuple = ()
+    if set_id is not None:
+        query += " WHERE set_id = ?"
+        params = (set_id,)
+    elif as_of is not None:
+        query += " WHERE as_of = ?"
+        params = (as_of,)
+    with store._get_conn() as conn:
+        meta = pd.read_sql(query + " ORDER BY set_id DESC LIMIT 1", conn, params=params)
+        if meta.empty:
+            return None
+        row = meta.iloc[0]
+        items = pd.read_sql(
+            "SELECT * FROM signal_set_items WHERE set_id = ? ORDER BY symbol",
+            conn, params=(int(row["set_id"]),),
+        )
+
+    items = items.drop(columns="set_id")
+    signals = items.astype(object).where(items.notna(), None).to_dict(orient="records")
+    for sig in signals:
+        sig["factor_contributions"] = json.loads(sig["factor_contributions"] or "{}")
+    return {
+        "set_id": int(row["set_id"]),
+        "as_of": row["as_of"],
+        "built_at": row["built_at"],
+        "data_version": int(row["data_version"]),
+        "stale": int(row["data_version"]) != store.data_version(),
+        "position_ratio": None if pd.isna(row["position_ratio"]) else float(row["position_ratio"]),
+        "gold_hedge": bool(row["gold_hedge"]),
+        "n_signals": len(signals),
+        "signals": signals,
+    }
@@ -1,4 +1,13 @@
-"""Commodity momentum market timing: adjust position ratio based on metal trends."""
+"""Commodity momentum market timing: adjust position ratio based on metal trends.
+
+The momentum inputs for every futures trading date are precomputed in one
+vectorized pass over the futures panel and stored in the ``timing_series``
+table (updated incrementally after each futures ingest), so a timing
+signal is one indexed row lookup instead of re-reading full futures
+histories. Any other write to ``futures_daily`` (an ingest that bypassed
+the pipeline, a backfill or price correction) makes the next signal
+rebuild the series.
+"""
 from __future__ import annotations
 
 import logging
@@ -10,6 +19,13 @@ from src.data.storage import DataStore
 
 logger = logging.getLogger(__name__)
 
+# Momentum windows (trading days) per metal stored in timing_series
+_MOMENTUM_WINDOWS = {"cu": (20, 60), "al": (20, 60), "au": (20,)}
+_LOOKBACK = max(max(w) for w in _MOMENTUM_WINDOWS.values())
+
+# futures_daily version the stored series was last rebuilt from, per database
+_checked_versions: dict[str, int] = {}
+
 
 def compute_timing_signal(
     config: dict,
@@ -41,33 +57,17 @@ def compute_timing_signal(
         data_cfg = config.get("data", {})
         store = DataStore(data_cfg.get("db_path", "data/quant.db"))
 
-    # Compute copper and aluminum momentum
-    cu_mom_20 = _metal_momentum(store, "cu", 20, date)
-    cu_mom_60 = _metal_momentum(store, "cu", 60, date)
-    al_mom_20 = _metal_momentum(store, "al", 20, date)
-    al_mom_60 = _metal_momentum(store, "al", 60, date)
-
-    # Average momentum across copper and aluminum
-    mom_20_vals = [m for m in [cu_mom_20, al_mom_20] if not np.isnan(m)]
-    mom_60_vals = [m for m in [cu_mom_60, al_mom_60] if not np.isnan(m)]
-
-    avg_mom_20 = np.mean(mom_20_vals) if mom_20_vals else np.nan
-    avg_mom_60 = np.mean(mom_60_vals) if mom_60_vals else np.nan
-
-    # Determine position ratio based on momentum signals
+    row = _stored_timing(store, date)
+    details = {k: row.get(k, np.nan) for k in (
+        "cu_mom_20d", "cu_mom_60d", "al_mom_20d", "al_mom_60d", "avg_mom_20d", "avg_mom_60d",
+    )}
+    avg_mom_20 = details["avg_mom_20d"]
+    avg_mom_60 = details["avg_mom_60d"]
     position_ratio = _determine_position_ratio(avg_mom_20, avg_mom_60)
 
     # Check gold hedge signal
-    gold_hedge = _check_gold_hedge(store, config, avg_mom_20, date)
-
-    details = {
-        "cu_mom_20d": cu_mom_20,
-        "cu_mom_60d": cu_mom_60,
-        "al_mom_20d": al_mom_20,
-        "al_mom_60d": al_mom_60,
-        "avg_mom_20d": avg_mom_20,
-        "avg_mom_60d": avg_mom_60,
-    }
+    threshold = timing_cfg.get("gold_hedge_threshold", 0.05)
+    gold_hedge = bool(_gold_hedge(avg_mom_20, row.get("au_mom_20d", np.nan), threshold))
 
     logger.info(
         "Timing signal: position_ratio=%.1f, gold_hedge=%s, mom_20=%.3f, mom_60=%.3f",
@@ -84,13 +84,114 @@ def compute_timing_signal(
     }
 
 
-def _metal_momentum(store: DataStore, metal: str, days: int, date: str | None) -> float:
-    """Calculate metal price momentum over N days."""
-    df = store.read_futures_daily(metal, end_date=date)
-    if len(df) < days + 1:
-        return np.nan
-    close = df["close"].values
-    return close[-1] / close[-(days + 1)] - 1
+def compute_timing_series(futures: pd.DataFrame) -> pd.DataFrame:
+    """Timing inputs for every date of a futures panel, in one vectorized pass.
+
+    Args:
+        futures: ``futures_daily`` rows (metal, date, close) of at least the
+            metals in ``_MOMENTUM_WINDOWS``.
+
+    Returns:
+        One row per date on which any of those metals traded, indexed by
+        date: ``{metal}_mom_{N}d`` (momentum over the metal's last ``N``
+        rows up to that date), ``avg_mom_20d`` / ``avg_mom_60d`` (mean of
+        the available copper and aluminum values) and ``position_ratio``.
+        Values match a per-date computation over the rows at or before
+        each date.
+    """
+    columns = {}
+    for metal, windows in _MOMENTUM_WINDOWS.items():
+        close = (
+            futures.loc[futures["metal"] == metal, ["date", "close"]]
+            .set_index("date")["close"].astype(float).sort_index()
+        )
+        for days in windows:
+            columns[f"{metal}_mom_{days}d"] = close / close.shift(days) - 1
+    dates = pd.Index(sorted(set().union(*(c.index for c in columns.values()))), name="date")
+    # Dates a metal did not trade take its latest row before them
+    series = pd.DataFrame({
+        name: mom.reindex(dates, method="ffill") if not mom.empty else pd.Series(np.nan, index=dates)
+        for name, mom in columns.items()
+    }, index=dates)
+    series["avg_mom_20d"] = series[["cu_mom_20d", "al_mom_20d"]].mean(axis=1)
+    series["avg_mom_60d"] = series[["cu_mom_60d", "al_mom_60d"]].mean(axis=1)
+    series["position_ratio"] = _position_ratios(series["avg_mom_20d"], series["avg_mom_60d"])
+    return series
+
+
+def update_timing_series(store: DataStore, since: str | None = None) -> int:
+    """Recompute stored timing rows from ``since`` onward.
+
+    Only the futures rows from ``since`` plus the lookback before it are
+    read; without ``since`` the whole series is rebuilt. Returns the number
+    of rows written.
+    """
+    with store._get_conn() as conn:
+        # Read before the rows: a write racing the rebuild triggers another one
+        version = _futures_version(conn)
+        frames = []
+        for metal in _MOMENTUM_WINDOWS:
+            if since is None:
+                query, params = "SELECT metal, date, close FROM futures_daily WHERE metal = ?", (metal,)
+            else:
+                query = (
+                    "SELECT metal, date, close FROM futures_daily WHERE metal = ? AND date >= ? "
+                    "UNION ALL SELECT * FROM ("
+                    "SELECT metal, date, close FROM futures_daily WHERE metal = ? AND date < ? "
+                    "ORDER BY date DESC LIMIT ?)"
+                )
+                params = (metal, since, metal, since, _LOOKBACK + 1)
+            frames.append(pd.read_sql(query, conn, params=params))
+        futures = pd.concat(frames, ignore_index=True)
+        series = compute_timing_series(futures)
+        if since is not None:
+            series = series[series.index >= since]
+
+        if since is None:
+            conn.execute("DELETE FROM timing_series")
+        else:
+            conn.execute("DELETE FROM timing_series WHERE date >= ?", (since,))
+        if not series.empty:
+            series.reset_index().to_sql("timing_series", conn, if_exists="append", index=False)
+        store._record_write(conn, "timing_series")
+    if since is None:
+        _checked_versions[store.db_path] = version
+    logger.info("Timing series updated from %s: %d rows", since or "start", len(series))
+    return len(series)
+
+
+def _stored_timing(store: DataStore, date: str | None) -> dict:
+    """Stored timing row in effect at ``date`` (latest row at or before it)."""
+    _ensure_fresh(store)
+    with store._get_conn() as conn:
+        query = "SELECT * FROM timing_series"
+        params: tuple = ()
+        if date:
+            query += " WHERE date <= ?"
+            params = (date,)
+        cursor = conn.execute(query + " ORDER BY date DESC LIMIT 1", params)
+        row = cursor.fetchone()
+        names = [d[0] for d in cursor.description]
+    if row is None:
+        return {}
+    return {k: np.nan if v is None else v for k, v in zip(names, row) if k != "date"}
+
+
+def _futures_version(conn) -> int:
+    row = conn.execute("SELECT version FROM table_stats WHERE table_name = 'futures_daily'").fetchone()
+    return row[0] if row else 0
+
+
+def _ensure_fresh(store: DataStore):
+    """Rebuild the stored series if ``futures_daily`` was written since the last rebuild.
+
+    The write may have changed past rows (same latest date), so the whole
+    series is recomputed rather than only the days after its last row.
+    """
+    with store._get_conn() as conn:
+        version = _futures_version(conn)
+    if _checked_versions.get(store.db_path) != version:
+        update_timing_series(store)
 
 
 def _determine_position_ratio(mom_20: float, mom_60: float) -> float:
@@ -116,21 +217,19 @@ def _determine_position_ratio(mom_20: float, mom_60: float) -> float:
         return 0.2
 
 
-def _check_gold_hedge(
-    store: DataStore, config: dict, industrial_mom: float, date: str | None
-) -> bool:
-    """Check if gold hedging should be activated.
-
-    Trigger: industrial metals momentum negative AND gold momentum > threshold.
-    """
-    threshold = config.get("timing", {}).get("gold_hedge_threshold", 0.05)
+def _position_ratios(mom_20: pd.Series, mom_60: pd.Series) -> np.ndarray:
+    """Vectorized :func:`_determine_position_ratio`."""
+    return np.select(
+        [mom_20.isna() | mom_60.isna(), (mom_20 > 0) & (mom_60 > 0), mom_20 > 0, mom_60 > 0],
+        [0.6, 1.0, 0.6, 0.3],
+        default=0.2,
+    )
 
-    if np.isnan(industrial_mom) or industrial_mom >= 0:
-        return False
 
-    # Check gold momentum
-    gold_mom = _metal_momentum(store, "au", 20, date)
-    if np.isnan(gold_mom):
-        return False
+def _gold_hedge(industrial_mom, gold_mom, threshold: float):
+    """Whether gold hedging should be activated (scalars or arrays).
 
-    return gold_mom > threshold
+    Trigger: industrial metals momentum negative AND gold momentum > threshold.
+    Missing momentum never triggers.
+    """
+    return (industrial_mom < 0) & (gold_mom > threshold)
@@ -1,7 +1,10 @@
 """Shenwan industry classification and sub-sector mapping."""
 from __future__ import annotations
 
+import json
 import logging
+import threading
+import time
 from datetime import datetime
 
 import pandas as pd
@@ -35,6 +38,19 @@ SUBSECTOR_METAL_MAP = {
     "silver": "ag",
 }
 
+# (universe config, date) -> (fetched at, universe); used when universe.cache_ttl_s > 0
+_universe_cache: dict[tuple[str, str | None], tuple[float, pd.DataFrame]] = {}
+_universe_lock = threading.Lock()
+# Process default for universe.cache_ttl_s (the command daemon sets it while serving)
+_default_ttl_s = 0
+
+
+def set_universe_cache_ttl(seconds: float) -> float:
+    """Set the process default for ``universe.cache_ttl_s``; returns the previous one."""
+    global _default_ttl_s
+    previous, _default_ttl_s = _default_ttl_s, seconds
+    return previous
+
 
 def classify_subsector(name: str, industry_name: str = "") -> str:
     """Classify a stock into a sub-sector based on name and industry."""
@@ -53,8 +69,30 @@ def get_universe(
 ) -> pd.DataFrame:
     """Get filtered non-ferrous metals stock universe.
 
+    With ``universe.cache_ttl_s`` > 0 (default: the process default, see
+    :func:`set_universe_cache_ttl`) a fetched universe is reused for that
+    many seconds per (universe config, date) within the process.
+
     Returns DataFrame with columns: symbol, name, subsector, industry_name
     """
+    universe_cfg = config.get("universe", {})
+    ttl = universe_cfg.get("cache_ttl_s", _default_ttl_s)
+    if not ttl:
+        return _fetch_universe(config, date, store)
+
+    key = (json.dumps(universe_cfg, sort_keys=True, default=str), date)
+    with _universe_lock:
+        cached = _universe_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1].copy()
+    universe = _fetch_universe(config, date, store)
+    if not universe.empty:
+        with _universe_lock:
+            _universe_cache[key] = (time.monotonic(), universe.copy())
+    return universe
+
+
+def _fetch_universe(config: dict, date: str | None, store: DataStore | None) -> pd.DataFrame:
     universe_cfg = config.get("universe", {})
     industry_code = universe_cfg.get("industry_code", "801050")
 
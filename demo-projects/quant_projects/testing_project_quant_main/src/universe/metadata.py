@@ -0,0 +1,96 @@
+"""Symbol metadata service: name, sub-sector, metal and latest sentiment label.
+
+Metadata for the whole cached universe is loaded with two set-based
+queries (``universe_cache`` and the latest news per symbol) and kept per
+database until the data version or the universe cache changes, so callers
+building signal lists, sub-sector maps or per-stock metal lookups issue a
+constant number of queries regardless of universe size.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+import pandas as pd
+
+from src.data.storage import DataStore
+from src.universe.classifier import SUBSECTOR_METAL_MAP
+
+logger = logging.getLogger(__name__)
+
+METADATA_COLUMNS = ["name", "subsector", "metal", "sentiment_label"]
+
+_NO_NEWS_LABEL = "中性: 无相关新闻"
+_LABEL_PREFIX = {"bullish": "利多", "bearish": "利空"}
+
+# db_path -> (version key, metadata frame indexed by symbol)
+_cache: dict[str, tuple[tuple, pd.DataFrame]] = {}
+_lock = threading.Lock()
+
+
+def sentiment_labels(latest_news: pd.DataFrame) -> pd.Series:
+    """Display labels from :meth:`DataStore.read_latest_symbol_news` rows, indexed by symbol."""
+    if latest_news.empty:
+        return pd.Series(dtype=object)
+    news = latest_news.set_index("symbol")
+    prefix = news["classification"].map(_LABEL_PREFIX).fillna("中性")
+    labels = prefix + ": " + news["title"].fillna("").str[:30]
+    return labels.where(news["classification"].notna(), _NO_NEWS_LABEL)
+
+
+def _version_key(store: DataStore) -> tuple:
+    return (store.data_version(), store.table_versions(["universe_cache"])["universe_cache"])
+
+
+def _load(store: DataStore) -> pd.DataFrame:
+    try:
+        with store._get_conn() as conn:
+            universe = pd.read_sql("SELECT symbol, name, subsector FROM universe_cache", conn)
+    except Exception:
+        # universe_cache is created by the first factor run
+        universe = pd.DataFrame(columns=["symbol", "name", "subsector"])
+    return _frame(store, universe.drop_duplicates("symbol", keep="last"))
+
+
+def _frame(store: DataStore, universe: pd.DataFrame) -> pd.DataFrame:
+    """Metadata rows for ``universe`` (symbol, name, subsector) plus one news query."""
+    meta = universe.set_index("symbol")
+    meta["name"] = meta["name"].where(meta["name"].notna(), meta.index.to_series())
+    meta["subsector"] = meta["subsector"].fillna("other")
+    meta["metal"] = meta["subsector"].map(lambda s: SUBSECTOR_METAL_MAP.get(s, "cu"))
+    labels = sentiment_labels(store.read_latest_symbol_news(meta.index.tolist()))
+    meta["sentiment_label"] = labels.reindex(meta.index).fillna(_NO_NEWS_LABEL)
+    return meta[METADATA_COLUMNS]
+
+
+def symbol_metadata(store: DataStore, symbols: list[str] | None = None) -> pd.DataFrame:
+    """Metadata per symbol, indexed by symbol with :data:`METADATA_COLUMNS`.
+
+    Args:
+        store: Data store (a ``PriceCube`` wrapper works too).
+        symbols: Symbols to return, in order; all cached universe symbols
+            by default. Symbols missing from the universe cache get their
+            symbol as name, sub-sector ``"other"``, metal ``"cu"`` and
+            their sentiment label from one extra news query.
+    """
+    key = _version_key(store)
+    with _lock:
+        cached = _cache.get(store.db_path)
+    if cached is not None and cached[0] == key:
+        meta = cached[1]
+    else:
+        meta = _load(store)
+        with _lock:
+            _cache[store.db_path] = (key, meta)
+        logger.debug("Symbol metadata loaded: %d symbols", len(meta))
+    if symbols is None:
+        meta = meta.copy()
+    else:
+        missing = [s for s in dict.fromkeys(symbols) if s not in meta.index]
+        if missing:
+            extra = _frame(store, pd.DataFrame({"symbol": missing, "name": missing, "subsector": None}))
+            meta = pd.concat([meta, extra])
+        meta = meta.loc[list(symbols)].copy()
+    # Sub-sectors without a futures contract map to None, not NaN
+    meta["metal"] = meta["metal"].astype(object).where(meta["metal"].notna(), None)
+    return meta
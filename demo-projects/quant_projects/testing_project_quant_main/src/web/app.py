@@ -1,7 +1,9 @@
 """FastAPI application for the quant dashboard."""
 from __future__ import annotations
 
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import yaml
@@ -10,7 +12,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from src.web.routes import data, universe, factors, signals, risk, backtest, report
+from src.data.tracing import trace_source
+from src.ops.profiling import PROFILE_ENV, active_profile, profile_settings, start_profile, stop_profile
+from src.web.jobs import get_job_manager
+from src.web.routes import data, universe, factors, signals, risk, backtest, report, jobs
 
 
 def _load_config() -> dict:
@@ -21,8 +26,30 @@ def _load_config() -> dict:
 
 config = _load_config()
 web_cfg = config.get("web", {})
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="有色金属量化系统", version="1.0.0")
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # QUANT_PROFILE=sampling|memory profiles the whole server run
+    # (unless `main.py --profile serve` already does)
+    mode = os.environ.get(PROFILE_ENV)
+    session = None
+    if mode == "cprofile":
+        # cProfile sees only the event-loop thread, not the threadpool running the routes
+        logger.warning("%s=cprofile does not cover route handlers; use %s=sampling", PROFILE_ENV, PROFILE_ENV)
+    elif mode and active_profile() is None:
+        session = start_profile(mode, "web", **profile_settings(config))
+    try:
+        yield
+    finally:
+        get_job_manager(app).shutdown()
+        if session is not None:
+            stop_profile(session)
+            logger.info("Server profile:\n%s", session.summary())
+
+
+app = FastAPI(title="有色金属量化系统", version="1.0.0", lifespan=_lifespan)
 
 # CORS
 cors_origins = web_cfg.get("cors_origins", ["http://localhost:3000"])
@@ -34,6 +61,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class _RouteTraceSource:
+    """Label DataStore queries made while serving a request with its route (see src.data.tracing)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with trace_source(f"route:{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+
+app.add_middleware(_RouteTraceSource)
+
 # Store config in app state for route access
 app.state.config = config
 
@@ -45,6 +88,7 @@ app.include_router(signals.router, prefix="/api/signals", tags=["signals"])
 app.include_router(risk.router, prefix="/api/risk", tags=["risk"])
 app.include_router(backtest.router, prefix="/api/backtest", tags=["backtest"])
 app.include_router(report.router, prefix="/api/report", tags=["report"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 # Serve frontend static files (production build)
 _frontend_build = Path(__file__).resolve().parent.parent.parent / "frontend" / "build"
@@ -0,0 +1,159 @@
+"""In-process response cache with ETag support for read-heavy dashboard endpoints.
+
+Entries are keyed by route, query parameters and the store's data version,
+so any recorded write (pipeline, news fetcher, sentiment analyzer) makes
+older entries unreachable. A TTL bounds staleness for inputs the data
+version cannot see, such as the online universe list.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from src.web.payload import NumpyJSONResponse, dumps
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """LRU cache of serialized JSON responses."""
+
+    def __init__(self, db_path: str, max_entries: int = 128, ttl_s: float = 300.0, enabled: bool = True):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple, tuple[float, str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = None
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _get_store(self):
+        if self._store is None:
+            from src.data.storage import DataStore
+
+            self._store = DataStore(self.db_path)
+        return self._store
+
+    def data_version(self) -> int:
+        return self._get_store().data_version()
+
+    def table_versions(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        if not tables:
+            return ()
+        versions = self._get_store().table_versions(list(tables))
+        return tuple(versions[t] for t in tables)
+
+    def get(self, key: tuple) -> tuple[str, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, etag, body = entry
+            if time.monotonic() - created > self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return etag, body
+
+    def put(self, key: tuple, etag: str, body: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, route: str | None = None):
+        """Drop all entries, or only those of one route."""
+        with self._lock:
+            if route is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == route]:
+                    del self._entries[key]
+
+
+def get_response_cache(app) -> ResponseCache:
+    """Return the app's ResponseCache, creating it from config on first use."""
+    cache = getattr(app.state, "response_cache", None)
+    if cache is None:
+        config = getattr(app.state, "config", {})
+        cache_cfg = config.get("web", {}).get("response_cache", {})
+        cache = ResponseCache(
+            db_path=config.get("data", {}).get("db_path", "data/quant.db"),
+            max_entries=cache_cfg.get("max_entries", 128),
+            ttl_s=cache_cfg.get("ttl_s", 300),
+            enabled=cache_cfg.get("enabled", True),
+        )
+        app.state.response_cache = cache
+    return cache
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
+
+def cached_json(
+    request: Request,
+    route: str,
+    compute: Callable[[], Any],
+    key_extra: tuple = (),
+    tables: tuple[str, ...] = (),
+) -> Response:
+    """Serve ``compute()`` as JSON through the response cache.
+
+    The key combines route, query parameters, today's date, the store data
+    version, the write versions of ``tables`` (for tables the data version
+    leaves out, such as ``meta``) and ``key_extra`` (e.g. file mtimes).
+    Error payloads are never cached. A matching ``If-None-Match`` yields an
+    empty 304.
+    """
+    cache = get_response_cache(request.app)
+    version = None
+    if cache.enabled:
+        try:
+            version = (cache.data_version(), cache.table_versions(tables))
+        except Exception as e:
+            logger.warning("Response cache bypassed, data version unavailable: %s", e)
+    if version is None:
+        return NumpyJSONResponse(compute())
+
+    key = (
+        route,
+        tuple(sorted(request.query_params.items())),
+        date.today().isoformat(),
+        version,
+        key_extra,
+    )
+    hit = cache.get(key)
+    if hit is not None:
+        etag, body = hit
+        cache.stats["hits"] += 1
+    else:
+        cache.stats["misses"] += 1
+        content = compute()
+        body = dumps(content)
+        etag = _etag(body)
+        if not (isinstance(content, dict) and "error" in content):
+            cache.put(key, etag, body)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        cache.stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
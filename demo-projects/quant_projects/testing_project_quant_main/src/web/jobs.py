@@ -0,0 +1,174 @@
+"""Background job execution for long-running web operations.
+
+Backtests, data updates and factor computation run on a worker thread
+pool so the event loop stays responsive. Each submission returns a Job
+that clients can poll via /api/jobs/{job_id} or follow live via the
+/api/jobs/{job_id}/events (SSE) and /api/jobs/{job_id}/ws streams.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable
+
+from src.data.tracing import trace_source
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict = field(default_factory=dict)
+    status: str = "pending"  # pending, running, done, failed
+    progress: dict = field(default_factory=dict)
+    events: list[dict] = field(default_factory=list, repr=False)
+    result: Any = None
+    error: str | None = None
+    error_type: str | None = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: str | None = None
+    finished_at: str | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def update(self, **progress):
+        """Merge progress fields reported by the running job."""
+        with self._lock:
+            self.progress.update(progress)
+
+    def emit(self, event: dict):
+        """Record a structured progress event; also becomes the latest progress."""
+        with self._lock:
+            event = {"seq": len(self.events), **event}
+            self.events.append(event)
+            self.progress.update({k: v for k, v in event.items() if k != "seq"})
+
+    def events_since(self, seq: int) -> list[dict]:
+        """Events with sequence number >= seq."""
+        with self._lock:
+            return self.events[seq:]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "error_type": self.error_type,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """Run callables on a thread pool and track their state.
+
+    Job functions are called as ``fn(job, *args, **kwargs)`` so they can
+    report progress through ``job.update``, or record streamable progress
+    events through ``job.emit``. Finished jobs beyond
+    ``max_history`` are evicted oldest-first.
+    """
+
+    def __init__(self, max_workers: int = 2, max_history: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(
+        self, kind: str, fn: Callable[..., Any], *args, params: dict | None = None, **kwargs
+    ) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=params or {})
+        # Run in the submitter's context so query tracing attributes the job to its route
+        ctx = contextvars.copy_context()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+            # Registered with its job: a concurrent submit can't evict one without the other
+            self._futures[job.id] = self._executor.submit(ctx.run, self._run, job, fn, args, kwargs)
+        logger.info("Submitted %s job %s", kind, job.id)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        try:
+            with trace_source(f"job:{job.kind}"):
+                job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            logger.error("%s job %s failed: %s", job.kind, job.id, e)
+            job.error = str(e)
+            job.error_type = type(e).__name__
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now().isoformat()
+        return job
+
+    def _evict(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        excess = len(self._jobs) - self.max_history
+        for job in finished[:max(excess, 0)]:
+            del self._jobs[job.id]
+            self._futures.pop(job.id, None)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: str | None = None) -> list[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if kind:
+            jobs = [j for j in jobs if j.kind == kind]
+        return jobs
+
+    async def wait(self, job: Job) -> Job:
+        """Await job completion without blocking the event loop."""
+        with self._lock:
+            future = self._futures.get(job.id)
+        if future is not None:
+            await asyncio.wrap_future(future)
+        return job
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+
+def get_job_manager(app) -> JobManager:
+    """Return the app's JobManager, creating it from config on first use."""
+    manager = getattr(app.state, "jobs", None)
+    if manager is None:
+        web_cfg = getattr(app.state, "config", {}).get("web", {})
+        manager = JobManager(
+            max_workers=web_cfg.get("job_workers", 2),
+            max_history=web_cfg.get("job_history", 100),
+        )
+        app.state.jobs = manager
+    return manager
+
+
+def job_response(job: Job) -> dict:
+    """Route response for a job awaited in the foreground."""
+    if job.status == "failed":
+        return {"error": job.error, "detail": job.error_type}
+    return job.result
@@ -0,0 +1,285 @@
+"""Compact delivery of backtest series and trade logs.
+
+LTTB downsampling for chart series, cursor pagination for trade logs,
+NDJSON / Arrow IPC streaming, and a NumPy-aware JSON encoder (orjson when
+installed) so arrays are serialized without per-row dict construction.
+Row-oriented payloads (trade pages, record-style series) are encoded
+column by column into :class:`RawJSON` that :func:`dumps` embeds as-is.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+from src.backtest.round_trips import match_round_trips
+from src.backtest.run_store import RunStore
+
+logger = logging.getLogger(__name__)
+
+try:  # optional, much faster and serializes ndarrays natively
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+# ── JSON encoding ────────────────────────────────────────────────────────────
+
+
+class RawJSON:
+    """Already serialized JSON, embedded verbatim by :func:`dumps`."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+# Stand-in string for a RawJSON value while the surrounding content is encoded
+_RAW_MARK = "\x1fraw:"
+_RAW_PLACEHOLDER = re.compile(rb'"\\u001fraw:(\d+)"')
+
+
+def _default(obj: Any):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes; NumPy arrays and scalars are encoded directly.
+
+    NaN / inf become null in both code paths.
+    """
+    raw: list[bytes] = []
+
+    def default(obj: Any):
+        if isinstance(obj, RawJSON):
+            raw.append(obj.data)
+            return f"{_RAW_MARK}{len(raw) - 1}"
+        return _default(obj)
+
+    if orjson is not None:
+        body = orjson.dumps(
+            content,
+            default=default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    else:
+        body = json.dumps(
+            _nan_to_none(content), default=default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    if raw:
+        body = _RAW_PLACEHOLDER.sub(lambda m: raw[int(m.group(1))], body)
+    return body
+
+
+def _encode_values(values: np.ndarray) -> list[bytes]:
+    """JSON encoding of each element; numeric arrays in a single encoder call."""
+    if orjson is not None and values.dtype.kind in "biuf" and len(values):
+        encoded = orjson.dumps(np.ascontiguousarray(values), option=orjson.OPT_SERIALIZE_NUMPY)
+        return encoded[1:-1].split(b",")
+    return [dumps(v) for v in values.tolist()]
+
+
+def records_json(columns: dict[str, np.ndarray]) -> RawJSON:
+    """``[{name: value, ...}, ...]`` from equal-length column arrays, encoded column-wise."""
+    cells = [
+        [key + value for value in _encode_values(values)]
+        for key, values in ((dumps(str(name)) + b":", values) for name, values in columns.items())
+    ]
+    rows = [b"{" + b",".join(row) + b"}" for row in zip(*cells)]
+    return RawJSON(b"[" + b",".join(rows) + b"]")
+
+
+def _nan_to_none(obj: Any):
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if isinstance(obj, np.ndarray) and obj.dtype.kind == "f":
+        return [None if not math.isfinite(v) else v for v in obj.tolist()]
+    if isinstance(obj, dict):
+        return {k: _nan_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_nan_to_none(v) for v in obj]
+    return obj
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSONResponse rendered with :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ── Downsampling ─────────────────────────────────────────────────────────────
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` representative points.
+
+    Keeps the first and last point; each interior bucket contributes the
+    point forming the largest triangle with the previously selected point
+    and the next bucket's mean, which preserves peaks and troughs (and so
+    drawdowns) far better than striding.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # interior buckets span [1, n-1)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _x_axis(index: pd.Index) -> np.ndarray:
+    """Numeric x positions for LTTB: timestamps when parseable, else ordinal."""
+    try:
+        return pd.to_datetime(index).asi8.astype(float)
+    except (ValueError, TypeError):
+        return np.arange(len(index), dtype=float)
+
+
+def series_payload(
+    series: pd.Series, key: str, max_points: int | None = None, columnar: bool = False
+):
+    """Chart series as ``[{"date", key}]`` records or ``{"date": [...], key: [...]}``.
+
+    With ``max_points`` the series is LTTB-downsampled first.
+    """
+    if series is None or series.empty:
+        return {"date": [], key: []} if columnar else []
+    values = series.to_numpy(dtype=float)
+    dates = series.index.astype(str).to_numpy()
+    if max_points and len(values) > max_points:
+        idx = lttb_indices(_x_axis(series.index), values, max_points)
+        values, dates = values[idx], dates[idx]
+    if columnar:
+        return {"date": dates, key: values}
+    return records_json({"date": dates, key: values})
+
+
+def drawdown(nav: pd.Series) -> pd.Series:
+    values = nav.to_numpy(dtype=float)
+    peak = np.maximum.accumulate(values)
+    return pd.Series((values - peak) / peak, index=nav.index)
+
+
+# ── Trade pagination ─────────────────────────────────────────────────────────
+
+
+class CursorError(ValueError):
+    """Raised for malformed cursors or cursors from a different result set."""
+
+
+def paginate(df: pd.DataFrame, version: str, cursor: str | None, limit: int | None) -> dict:
+    """One page of ``df`` rows with an opaque ``next_cursor`` (None on the last page).
+
+    ``items`` is the page as :class:`RawJSON` records. Cursors embed the result-set version (the run id), so a cursor can
+    never silently page into a different run.
+    """
+    offset = 0
+    if cursor:
+        ver, _, off = cursor.rpartition(".")
+        if ver != version or not off.isdigit():
+            raise CursorError("Cursor is malformed or refers to an older result set")
+        offset = int(off)
+    total = len(df)
+    end = total if limit is None else min(offset + limit, total)
+    page = df.iloc[offset:end]
+    return {
+        "items": records_json({name: page[name].to_numpy() for name in page.columns}),
+        "next_cursor": f"{version}.{end}" if end < total else None,
+        "total": total,
+    }
+
+
+# ── Streaming ────────────────────────────────────────────────────────────────
+
+
+def iter_ndjson(df: pd.DataFrame, chunk_rows: int = 5000) -> Iterator[bytes]:
+    """Yield newline-delimited JSON, one row per line, in chunks."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield b"".join(dumps(rec) + b"\n" for rec in chunk.to_dict(orient="records"))
+
+
+def to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Serialize to the Arrow IPC stream format (requires pyarrow)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ── Stored runs ──────────────────────────────────────────────────────────────
+
+
+_RUN_CACHE_SIZE = 8
+_run_cache: OrderedDict[tuple[str, str], dict] = OrderedDict()
+_run_lock = threading.Lock()
+
+
+def resolve_run(config: dict, run_id: str | None = None) -> tuple[RunStore, str | None]:
+    """The config's run store and the requested run id (latest when omitted)."""
+    store = RunStore.from_config(config)
+    return store, run_id or store.latest_id()
+
+
+def load_run_payload(store: RunStore, run_id: str) -> dict:
+    """Metrics, NAV series, trade log and FIFO round trips of a stored run.
+
+    Runs are immutable, so loaded runs are kept in a small LRU and repeated
+    dashboard requests skip the file reads. Raises KeyError for unknown ids.
+    """
+    key = (str(store.root.resolve()), run_id)
+    with _run_lock:
+        if key in _run_cache:
+            _run_cache.move_to_end(key)
+            return _run_cache[key]
+
+    result = store.load(run_id)
+    payload = {
+        "run_id": run_id,
+        "metrics": result.metrics,
+        "nav": result.nav_series,
+        "trades": result.trade_log,
+        "round_trips": match_round_trips(result.trade_log),
+    }
+    with _run_lock:
+        _run_cache[key] = payload
+        while len(_run_cache) > _RUN_CACHE_SIZE:
+            _run_cache.popitem(last=False)
+    return payload
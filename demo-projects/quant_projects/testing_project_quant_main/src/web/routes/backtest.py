@@ -1,11 +1,16 @@
 """Backtest API routes."""
 from __future__ import annotations
 
-import json
-from pathlib import Path
+import pandas as pd
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 
-from fastapi import APIRouter, Request
-from pydantic import BaseModel
+from src.web.jobs import get_job_manager, job_response
+from src.web.payload import (
+    CursorError, NumpyJSONResponse, iter_ndjson, load_run_payload,
+    paginate, resolve_run, series_payload, to_arrow_ipc,
+)
 
 router = APIRouter()
 
@@ -14,85 +19,241 @@ class BacktestRequest(BaseModel):
     start_date: str
     end_date: str
     initial_capital: float | None = None
+    background: bool = False
+    max_points: int | None = Field(None, ge=3)  # LTTB-downsample the returned NAV series
+    trades_limit: int = Field(500, ge=1, le=10_000)  # First trade-log page; more via /trades
+    label: str | None = None  # Free-text tag stored with the run
+    no_cache: bool = False  # Simulate even if an identical stored run exists
+    fast: bool = False  # Vectorized rebalance-only approximation (backtest.mode: fast)
 
 
 @router.post("/run")
 async def run_backtest(body: BacktestRequest, request: Request):
-    """Run backtest and return results."""
+    """Run backtest on the job pool.
+
+    With ``background`` set, returns a job id immediately; otherwise waits
+    (without blocking the event loop) and returns the results.
+    """
     config = request.app.state.config
-    try:
-        from src.backtest.engine import BacktestEngine
-
-        if body.initial_capital:
-            config = {**config, "backtest": {**config.get("backtest", {}), "initial_capital": body.initial_capital}}
-
-        engine = BacktestEngine(config)
-        result = engine.run(start_date=body.start_date, end_date=body.end_date)
-
-        metrics = result.metrics
-
-        nav_series = []
-        if result.nav_series is not None and not result.nav_series.empty:
-            nav_series = [
-                {"date": str(idx), "nav": float(val)}
-                for idx, val in result.nav_series.items()
-            ]
-
-        trade_log = []
-        if result.trade_log is not None and not result.trade_log.empty:
-            trade_log = result.trade_log.to_dict(orient="records")
-
-        # Save for later retrieval
-        report_dir = Path(config.get("report", {}).get("output_dir", "reports"))
-        report_dir.mkdir(parents=True, exist_ok=True)
-        result.nav_series.to_csv(report_dir / "last_nav.csv")
-        if not result.trade_log.empty:
-            result.trade_log.to_csv(report_dir / "last_trades.csv", index=False)
-        with open(report_dir / "last_metrics.json", "w") as f:
-            json.dump(metrics, f, indent=2)
-
-        return {
-            "status": "ok",
-            "metrics": metrics,
-            "nav_series": nav_series,
-            "trade_log": trade_log,
-        }
-    except Exception as e:
-        return {"error": str(e), "detail": type(e).__name__}
+    if body.initial_capital:
+        config = {**config, "backtest": {**config.get("backtest", {}), "initial_capital": body.initial_capital}}
+    if body.fast:
+        config = {**config, "backtest": {**config.get("backtest", {}), "mode": "fast"}}
 
+    jobs = get_job_manager(request.app)
+    job = jobs.submit("backtest", _run_backtest_job, config, body, params=body.model_dump())
+    if body.background:
+        return {"status": "submitted", "job_id": job.id}
+    return NumpyJSONResponse(job_response(await jobs.wait(job)))
 
-@router.get("/latest")
-async def get_latest_backtest(request: Request):
-    """Return the most recent backtest result."""
-    config = request.app.state.config
-    report_dir = Path(config.get("report", {}).get("output_dir", "reports"))
 
-    metrics_path = report_dir / "last_metrics.json"
-    if not metrics_path.exists():
-        return {"error": "No backtest results found", "detail": "Run a backtest first"}
+def _run_backtest_job(job, config: dict, body: BacktestRequest) -> dict:
+    from src.backtest.engine import BacktestEngine
+    from src.backtest.run_store import RunStore
+
+    engine = BacktestEngine(config, run_store=RunStore.from_config(config))
+    result = engine.run(
+        start_date=body.start_date, end_date=body.end_date, progress=job.emit,
+        use_cache=not body.no_cache, label=body.label,
+    )
+
+    return _result_payload(job, result, body.max_points, body.trades_limit)
+
+
+class ExtendRequest(BaseModel):
+    end_date: str
+    background: bool = False
+    max_points: int | None = Field(None, ge=3)
+    trades_limit: int = Field(500, ge=1, le=10_000)
+    label: str | None = None
+
 
-    import pandas as pd
+@router.post("/runs/{run_id}/extend")
+async def extend_run(run_id: str, body: ExtendRequest, request: Request):
+    """Continue a stored run to a later end date, simulating only the new days.
 
-    with open(metrics_path) as f:
-        metrics = json.load(f)
+    Recorded as a new run; the original is kept unchanged.
+    """
+    jobs = get_job_manager(request.app)
+    job = jobs.submit(
+        "backtest", _extend_backtest_job, request.app.state.config, run_id, body,
+        params={"run_id": run_id, **body.model_dump()},
+    )
+    if body.background:
+        return {"status": "submitted", "job_id": job.id}
+    return NumpyJSONResponse(job_response(await jobs.wait(job)))
 
-    nav_series = []
-    nav_path = report_dir / "last_nav.csv"
-    if nav_path.exists():
-        df = pd.read_csv(nav_path, index_col=0)
-        series = df.iloc[:, 0]
-        nav_series = [
-            {"date": str(idx), "nav": float(val)}
-            for idx, val in series.items()
-        ]
 
-    trade_log = []
-    trades_path = report_dir / "last_trades.csv"
-    if trades_path.exists():
-        trade_log = pd.read_csv(trades_path).to_dict(orient="records")
+def _extend_backtest_job(job, config: dict, run_id: str, body: ExtendRequest) -> dict:
+    from src.backtest.engine import BacktestEngine
+    from src.backtest.run_store import RunStore
 
+    engine = BacktestEngine(config, run_store=RunStore.from_config(config))
+    result = engine.extend(run_id, body.end_date, progress=job.emit, label=body.label)
+    return {**_result_payload(job, result, body.max_points, body.trades_limit), "extended_from": run_id}
+
+
+def _result_payload(job, result, max_points: int | None, trades_limit: int) -> dict:
+    """Job result: metrics, NAV series and the first trade-log page (page on via /trades)."""
+    trade_log = result.trade_log if result.trade_log is not None else pd.DataFrame()
+    trades = paginate(trade_log, result.run_id or "", None, trades_limit)
     return {
-        "metrics": metrics,
-        "nav_series": nav_series,
-        "trade_log": trade_log,
+        "status": "ok",
+        "job_id": job.id,
+        "run_id": result.run_id,
+        "cached": result.cached,
+        "metrics": result.metrics,
+        "nav_series": series_payload(result.nav_series, "nav", max_points),
+        "trade_log": trades["items"],
+        "trades_next_cursor": trades["next_cursor"],
+        "trades_total": trades["total"],
     }
+
+
+def _run_response(
+    config: dict, run_id: str | None, max_points: int | None, columnar: bool, trades_limit: int | None
+):
+    store, run_id = resolve_run(config, run_id)
+    if run_id is None:
+        return {"error": "No backtest results found", "detail": "Run a backtest first"}
+    try:
+        run = load_run_payload(store, run_id)
+    except KeyError as e:
+        return {"error": str(e), "detail": "Unknown backtest run id"}
+
+    trades = paginate(run["trades"], run_id, None, trades_limit)
+    return NumpyJSONResponse({
+        "run_id": run_id,
+        "metrics": run["metrics"],
+        "nav_series": series_payload(run["nav"], "nav", max_points, columnar),
+        "trade_log": trades["items"],
+        "trades_next_cursor": trades["next_cursor"],
+        "trades_total": trades["total"],
+    })
+
+
+@router.get("/latest")
+def get_latest_backtest(
+    request: Request,
+    run_id: str | None = Query(None, description="Stored run to return; latest when omitted"),
+    max_points: int | None = Query(None, ge=3, description="LTTB-downsample the NAV series"),
+    columnar: bool = Query(False, description="Series as {date: [...], nav: [...]}"),
+    trades_limit: int | None = Query(None, ge=1, description="First page size of the trade log"),
+):
+    """Return the most recent (or the given) backtest run."""
+    return _run_response(request.app.state.config, run_id, max_points, columnar, trades_limit)
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Backtest memoization hit / miss counters for this server process."""
+    from src.backtest.engine import memo_stats
+
+    return memo_stats()
+
+
+@router.get("/runs")
+def list_runs(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """List stored runs, newest first, from the metadata index."""
+    store, _ = resolve_run(request.app.state.config)
+    return NumpyJSONResponse({"runs": store.list(limit=limit, offset=offset), "total": store.count()})
+
+
+@router.get("/runs/compare")
+def compare_runs(
+    request: Request,
+    ids: list[str] = Query(..., min_length=2),
+    max_points: int | None = Query(None, ge=3),
+):
+    """Side-by-side metrics and normalized NAV curves for several runs."""
+    store, _ = resolve_run(request.app.state.config)
+    try:
+        comparison = store.compare(ids)
+    except KeyError as e:
+        return {"error": str(e), "detail": "Unknown backtest run id"}
+    nav = comparison["nav"]
+    return NumpyJSONResponse({
+        "runs": [{k: v for k, v in meta.items() if k != "config"} for meta in comparison["runs"]],
+        "nav_series": {
+            run_id: series_payload(nav[run_id].dropna(), "nav", max_points) for run_id in nav.columns
+        },
+    })
+
+
+@router.get("/runs/{run_id}")
+def get_run(
+    run_id: str,
+    request: Request,
+    max_points: int | None = Query(None, ge=3),
+    columnar: bool = Query(False),
+    trades_limit: int | None = Query(None, ge=1),
+):
+    """Return one stored run."""
+    return _run_response(request.app.state.config, run_id, max_points, columnar, trades_limit)
+
+
+@router.get("/trades")
+def get_trades(
+    request: Request,
+    run_id: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(500, ge=1, le=10_000),
+    table: str = Query("trades", pattern="^(trades|round_trips)$"),
+):
+    """Page through a run's trade log or FIFO round trips; pass ``next_cursor`` back as ``cursor``.
+
+    A cursor pins the run it came from, so paging continues on that run
+    even after newer backtests finish.
+    """
+    if cursor and run_id is None:
+        run_id = cursor.rpartition(".")[0] or None
+    store, run_id = resolve_run(request.app.state.config, run_id)
+    if run_id is None:
+        return {"error": "No backtest results found", "detail": "Run a backtest first"}
+    try:
+        run = load_run_payload(store, run_id)
+        page = paginate(run[table], run_id, cursor, limit)
+    except KeyError as e:
+        return {"error": str(e), "detail": "Unknown backtest run id"}
+    except CursorError as e:
+        return {"error": str(e), "detail": "Restart paging without a cursor"}
+    return NumpyJSONResponse({
+        "run_id": run_id,
+        table: page["items"],
+        "next_cursor": page["next_cursor"],
+        "total": page["total"],
+    })
+
+
+@router.get("/latest/stream")
+def stream_latest_backtest(
+    request: Request,
+    run_id: str | None = Query(None),
+    table: str = Query("trades", pattern="^(nav|trades|round_trips)$"),
+    format: str = Query("ndjson", pattern="^(ndjson|arrow)$"),
+):
+    """Stream a run's full NAV series, trade log or round trips as NDJSON or Arrow IPC."""
+    store, run_id = resolve_run(request.app.state.config, run_id)
+    if run_id is None:
+        return {"error": "No backtest results found", "detail": "Run a backtest first"}
+    try:
+        run = load_run_payload(store, run_id)
+    except KeyError as e:
+        return {"error": str(e), "detail": "Unknown backtest run id"}
+
+    if table == "nav":
+        df = run["nav"].rename("nav").rename_axis("date").reset_index()
+    else:
+        df = run[table]
+
+    if format == "arrow":
+        try:
+            body = to_arrow_ipc(df)
+        except ImportError:
+            return {"error": "Arrow output requires pyarrow", "detail": "pip install pyarrow"}
+        return Response(content=body, media_type="application/vnd.apache.arrow.stream")
+    return StreamingResponse(iter_ndjson(df), media_type="application/x-ndjson")
@@ -1,95 +1,101 @@
 """Data management API routes."""
 from __future__ import annotations
 
+import logging
+
 from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from src.web.cache import cached_json
+from src.web.jobs import get_job_manager, job_response
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+_TABLE_MAP = {
+    "stock": "stock_daily",
+    "futures": "futures_daily",
+    "macro": "macro",
+    "flow": "fund_flow",
+}
+
 
 class UpdateRequest(BaseModel):
     categories: list[str] = ["all"]
     force: bool = False
+    background: bool = False
 
 
 @router.get("/status")
-async def data_status(request: Request):
+def data_status(request: Request):
     """Return last-updated timestamps and row counts per data category."""
     config = request.app.state.config
+    # Update timestamps live in meta, which the data version leaves out
+    return cached_json(request, "data_status", lambda: _status_payload(config), tables=("meta",))
 
+
+def _status_payload(config: dict, categories: list[str] | None = None) -> dict:
+    """Category status from the meta table and maintained table statistics."""
     try:
         from src.data.storage import DataStore
 
         data_cfg = config.get("data", {})
         store = DataStore(data_cfg.get("db_path", "data/quant.db"))
 
-        categories = ["stock", "futures", "macro", "flow"]
-        table_map = {
-            "stock": "stock_daily",
-            "futures": "futures_daily",
-            "macro": "macro",
-            "flow": "fund_flow",
+        cats = categories or list(_TABLE_MAP)
+        counts = store.table_row_counts([_TABLE_MAP.get(c, c) for c in cats])
+        return {
+            cat: {"last_updated": store.get_last_updated(cat), "rows": counts.get(_TABLE_MAP.get(cat, cat), 0)}
+            for cat in cats
         }
-
-        result = {}
-        for cat in categories:
-            last_updated = store.get_last_updated(cat)
-            try:
-                df = store.read_table(table_map[cat])
-                row_count = len(df)
-            except Exception:
-                row_count = 0
-            result[cat] = {"last_updated": last_updated, "rows": row_count}
-
-        return result
     except Exception as e:
         return {"error": str(e), "detail": type(e).__name__}
 
 
 @router.post("/update")
 async def data_update(body: UpdateRequest, request: Request):
-    """Trigger data pipeline for selected categories."""
+    """Trigger data pipeline for selected categories on the job pool."""
     config = request.app.state.config
-
-    try:
-        from src.data.pipeline import DataPipeline
-
-        pipeline = DataPipeline(config)
-
-        cats = body.categories if "all" not in body.categories else None
-
-        # Resolve symbols for stock/flow
-        symbols = None
-        need_symbols = cats is None or "stock" in cats or "flow" in cats
-        if need_symbols:
-            try:
-                from src.universe.classifier import get_universe
-                universe = get_universe(config)
-                symbols = universe["symbol"].tolist() if not universe.empty else None
-            except Exception:
-                symbols = None
-
-        pipeline.run(
-            symbols=symbols,
-            categories=cats,
-            force_refresh=body.force,
-        )
-        # Re-read status after update
-        from src.data.storage import DataStore
-        data_cfg = config.get("data", {})
-        store = DataStore(data_cfg.get("db_path", "data/quant.db"))
-
-        results = {}
-        table_map = {"stock": "stock_daily", "futures": "futures_daily", "macro": "macro", "flow": "fund_flow"}
-        for cat in (cats or ["stock", "futures", "macro", "flow"]):
-            last_updated = store.get_last_updated(cat)
-            try:
-                df = store.read_table(table_map.get(cat, cat))
-                row_count = len(df)
-            except Exception:
-                row_count = 0
-            results[cat] = {"last_updated": last_updated, "rows": row_count}
-
-        return {"status": "ok", "results": results}
-    except Exception as e:
-        return {"error": str(e), "detail": type(e).__name__}
+    jobs = get_job_manager(request.app)
+    job = jobs.submit("data_update", _run_update_job, config, body, params=body.model_dump())
+    if body.background:
+        return {"status": "submitted", "job_id": job.id}
+    return job_response(await jobs.wait(job))
+
+
+def _run_update_job(job, config: dict, body: UpdateRequest) -> dict:
+    from src.data.pipeline import DataPipeline
+
+    pipeline = DataPipeline(config)
+
+    cats = body.categories if "all" not in body.categories else None
+
+    # Resolve symbols for stock/flow
+    symbols = None
+    need_symbols = cats is None or "stock" in cats or "flow" in cats
+    if need_symbols:
+        try:
+            from src.universe.classifier import get_universe
+            universe = get_universe(config)
+            symbols = universe["symbol"].tolist() if not universe.empty else None
+        except Exception:
+            symbols = None
+
+    pipeline.run(
+        symbols=symbols,
+        categories=cats,
+        force_refresh=body.force,
+        progress=job.emit,
+    )
+    results = _status_payload(config, cats)
+    signal_set_id = None
+    if config.get("signals", {}).get("build_after_update", True):
+        try:
+            from src.strategy.signal_sets import build_signal_set
+
+            job.emit({"type": "signals", "status": "building"})
+            signal_set_id = build_signal_set(config)["set_id"]
+        except Exception as e:
+            logger.error("Signal build after data update failed: %s", e)
+    return {"status": "ok", "job_id": job.id, "results": results, "signal_set_id": signal_set_id}
@@ -3,13 +3,20 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Request
 
+from src.web.cache import cached_json
+from src.web.jobs import get_job_manager, job_response
+
 router = APIRouter()
 
 
 @router.get("")
-async def get_factors(request: Request):
-    """Return the latest factor matrix as JSON."""
+def get_factors(request: Request):
+    """Return the latest factor matrix as JSON (cached, ETag-aware)."""
     config = request.app.state.config
+    return cached_json(request, "factors", lambda: _factors_payload(config))
+
+
+def _factors_payload(config: dict) -> dict:
     try:
         from src.factors.base import compute_all_factors
 
@@ -35,16 +42,21 @@ async def get_factors(request: Request):
 
 
 @router.post("/compute")
-async def compute_factors(request: Request):
-    """Trigger factor computation and return updated matrix."""
+async def compute_factors(request: Request, background: bool = False):
+    """Trigger factor computation on the job pool and return updated matrix."""
     config = request.app.state.config
-    try:
-        from src.factors.base import compute_all_factors
+    jobs = get_job_manager(request.app)
+    job = jobs.submit("factors", _run_factors_job, config)
+    if background:
+        return {"status": "submitted", "job_id": job.id}
+    return job_response(await jobs.wait(job))
 
-        factor_matrix = compute_all_factors(config)
-        matrix = factor_matrix.reset_index().rename(columns={"index": "symbol"})
-        matrix_records = matrix.fillna("null").to_dict(orient="records")
 
-        return {"status": "ok", "matrix": matrix_records, "shape": list(factor_matrix.shape)}
-    except Exception as e:
-        return {"error": str(e), "detail": type(e).__name__}
+def _run_factors_job(job, config: dict) -> dict:
+    from src.factors.base import compute_all_factors
+
+    factor_matrix = compute_all_factors(config)
+    matrix = factor_matrix.reset_index().rename(columns={"index": "symbol"})
+    matrix_records = matrix.fillna("null").to_dict(orient="records")
+
+    return {"status": "ok", "job_id": job.id, "matrix": matrix_records, "shape": list(factor_matrix.shape)}
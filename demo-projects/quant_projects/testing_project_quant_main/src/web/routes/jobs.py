@@ -0,0 +1,130 @@
+"""Background job API routes."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import APIRouter, Header, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from src.web.jobs import Job, get_job_manager
+from src.web.payload import NumpyJSONResponse
+
+router = APIRouter()
+
+_EVENT_POLL_S = 0.2
+_KEEPALIVE_S = 15.0
+
+
+@router.get("")
+async def list_jobs(request: Request, kind: str | None = Query(None)):
+    """List tracked jobs (newest first), without their result payloads."""
+    jobs = get_job_manager(request.app).list(kind=kind)
+    return {"jobs": [j.to_dict(include_result=False) for j in reversed(jobs)]}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Return job status, progress and — once finished — its result."""
+    job = get_job_manager(request.app).get(job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found", "detail": "Unknown or expired job id"}
+    return NumpyJSONResponse(job.to_dict(include_result=job.finished))
+
+
+async def _iter_events(
+    job: Job, start: int, disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[tuple[str, dict | None]]:
+    """Yield (kind, payload) pairs: "progress" events from ``start`` on, then one "end".
+
+    A ("keepalive", None) pair is yielded when nothing happened for
+    ``_KEEPALIVE_S`` so proxies do not drop idle connections.
+    """
+    seq = start
+    idle = 0.0
+    while True:
+        # Read status before events so the final events are never skipped
+        finished = job.finished
+        events = job.events_since(seq)
+        for event in events:
+            yield "progress", event
+        seq += len(events)
+        if finished:
+            yield "end", job.to_dict(include_result=False)
+            return
+        if await disconnected():
+            return
+        if events:
+            idle = 0.0
+        elif idle >= _KEEPALIVE_S:
+            idle = 0.0
+            yield "keepalive", None
+        await asyncio.sleep(_EVENT_POLL_S)
+        idle += _EVENT_POLL_S
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    last_event_id: str | None = Header(None),
+    since: int = Query(0, ge=0),
+):
+    """Stream job progress as Server-Sent Events.
+
+    Each progress event is sent as ``event: progress`` with its sequence
+    number as the SSE id, so a reconnecting EventSource resumes via
+    ``Last-Event-ID``. The stream closes with an ``event: end`` carrying
+    the final job status (fetch the result from /api/jobs/{job_id}).
+    """
+    job = get_job_manager(request.app).get(job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found", "detail": "Unknown or expired job id"}
+
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else since
+
+    async def body():
+        async for kind, payload in _iter_events(job, start, request.is_disconnected):
+            if kind == "keepalive":
+                yield ": keepalive\n\n"
+            elif kind == "progress":
+                yield f"id: {payload['seq']}\nevent: progress\ndata: {json.dumps(payload, default=str)}\n\n"
+            else:
+                yield f"event: end\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/{job_id}/ws")
+async def job_events_ws(websocket: WebSocket, job_id: str, since: int = 0):
+    """Stream job progress over a WebSocket as JSON messages.
+
+    Messages are ``{"event": "progress", "data": {...}}`` followed by a
+    final ``{"event": "end", "data": {...}}``, after which the server
+    closes the socket.
+    """
+    await websocket.accept()
+    job = get_job_manager(websocket.app).get(job_id)
+    if job is None:
+        await websocket.send_json({
+            "event": "error",
+            "data": {"error": f"Job {job_id} not found", "detail": "Unknown or expired job id"},
+        })
+        await websocket.close()
+        return
+
+    async def disconnected() -> bool:
+        return websocket.client_state.name != "CONNECTED"
+
+    try:
+        async for kind, payload in _iter_events(job, since, disconnected):
+            if kind != "keepalive":
+                await websocket.send_text(json.dumps({"event": kind, "data": payload}, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -1,55 +1,63 @@
 """Report API routes."""
 from __future__ import annotations
 
-import json
-from pathlib import Path
+from fastapi import APIRouter, Request, Query
 
-from fastapi import APIRouter, Request
+from src.backtest.resampling import resample_metrics
+from src.backtest.run_store import RunStore
+from src.web.cache import cached_json
+from src.web.payload import drawdown, load_run_payload, paginate, resolve_run, series_payload
 
 router = APIRouter()
 
 
 @router.get("")
-async def get_report(request: Request):
-    """Return structured report data for frontend rendering."""
-    config = request.app.state.config
-    report_dir = Path(config.get("report", {}).get("output_dir", "reports"))
+def get_report(
+    request: Request,
+    run_id: str | None = Query(None, description="Stored backtest run; latest when omitted"),
+    max_points: int | None = Query(None, ge=3, description="LTTB-downsample NAV and drawdown series"),
+    columnar: bool = Query(False, description="Series as {date: [...], <value>: [...]}"),
+    trades_limit: int | None = Query(None, ge=1, description="First page size of the trade log"),
+):
+    """Return structured report data for frontend rendering (cached, ETag-aware).
 
-    import pandas as pd
-    import numpy as np
+    Besides the data version, the cache key includes the resolved run id,
+    so a new backtest run invalidates the "latest" entry. Further trade
+    pages come from /api/backtest/trades.
+    """
+    config = request.app.state.config
+    store, run_id = resolve_run(config, run_id)
+    return cached_json(
+        request, "report",
+        lambda: _report_payload(config, store, run_id, max_points, columnar, trades_limit),
+        key_extra=(run_id,),
+    )
 
-    # Load metrics
-    metrics = None
-    metrics_path = report_dir / "last_metrics.json"
-    if metrics_path.exists():
-        with open(metrics_path) as f:
-            metrics = json.load(f)
 
-    # Load NAV series
-    nav_series = []
-    drawdown_series = []
-    nav_path = report_dir / "last_nav.csv"
-    if nav_path.exists():
-        df = pd.read_csv(nav_path, index_col=0)
-        series = df.iloc[:, 0]
-        nav_series = [
-            {"date": str(idx), "nav": float(val)}
-            for idx, val in series.items()
-        ]
-        # Compute drawdown series
-        nav_arr = series.values
-        peak = np.maximum.accumulate(nav_arr)
-        dd = (nav_arr - peak) / peak
-        drawdown_series = [
-            {"date": str(idx), "drawdown": float(d)}
-            for idx, d in zip(series.index, dd)
-        ]
+def _report_payload(
+    config: dict,
+    store: RunStore,
+    run_id: str | None,
+    max_points: int | None,
+    columnar: bool,
+    trades_limit: int | None,
+) -> dict:
+    if run_id is None:
+        return {"error": "No report data available", "detail": "Run a backtest first"}
+    try:
+        run = load_run_payload(store, run_id)
+    except KeyError as e:
+        return {"error": str(e), "detail": "Unknown backtest run id"}
+    metrics = run["metrics"]
+    nav = run["nav"]
 
-    # Load trade log
-    trade_log = []
-    trades_path = report_dir / "last_trades.csv"
-    if trades_path.exists():
-        trade_log = pd.read_csv(trades_path).to_dict(orient="records")
+    nav_series = series_payload(nav, "nav", max_points, columnar)
+    # Drawdown is computed at full resolution, then downsampled on its own so troughs survive
+    drawdown_series = series_payload(
+        drawdown(nav) if not nav.empty else nav, "drawdown", max_points, columnar
+    )
+    trades = paginate(run["trades"], run_id, None, trades_limit)
+    resampling = resample_metrics(nav, run["trades"], config)
 
     # Load factor exposures if available
     factor_exposures = []
@@ -61,13 +69,14 @@ async def get_report(request: Request):
     except Exception:
         pass
 
-    if not metrics and not nav_series:
-        return {"error": "No report data available", "detail": "Run a backtest first"}
-
     return {
+        "run_id": run_id,
         "metrics": metrics,
+        "resampling": resampling,
         "nav_series": nav_series,
         "drawdown_series": drawdown_series,
-        "trade_log": trade_log,
+        "trade_log": trades["items"],
+        "trades_next_cursor": trades["next_cursor"],
+        "trades_total": trades["total"],
         "factor_exposures": factor_exposures,
     }
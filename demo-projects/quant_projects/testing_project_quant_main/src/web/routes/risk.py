@@ -7,7 +7,7 @@ router = APIRouter()
 
 
 @router.get("")
-async def get_risk(request: Request):
+def get_risk(request: Request):
     """Return current risk status."""
     config = request.app.state.config
     try:
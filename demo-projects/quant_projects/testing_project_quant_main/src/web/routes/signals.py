@@ -3,38 +3,60 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Request
 
+from src.web.jobs import get_job_manager, job_response
+
 router = APIRouter()
 
 
 @router.get("")
-async def get_signals(request: Request):
-    """Return the latest trading signals as JSON."""
+def get_signals(request: Request):
+    """Return the latest persisted signal set as JSON.
+
+    A set is built in the foreground only when none has been stored yet;
+    otherwise use ``POST /api/signals/refresh`` to rebuild.
+    """
     config = request.app.state.config
     try:
-        from src.strategy.signal import generate_signals, get_sentiment_labels
-
-        signals = generate_signals(config)
-        if not signals:
-            return {"signals": []}
-
-        symbols = [s["symbol"] for s in signals]
-        try:
-            sentiment_labels = get_sentiment_labels(symbols, config)
-        except Exception:
-            sentiment_labels = {}
-
-        result = []
-        for sig in signals:
-            result.append({
-                "symbol": sig["symbol"],
-                "name": sig.get("name", ""),
-                "score": sig.get("score", 0),
-                "signal": sig.get("action", "hold"),
-                "target_weight": sig.get("target_weight", 0),
-                "sentiment_label": sentiment_labels.get(sig["symbol"], ""),
-                "factor_contributions": sig.get("factor_contributions", {}),
-            })
-
-        return {"signals": result}
+        from src.data.storage import DataStore
+        from src.strategy.signal_sets import build_signal_set, load_signal_set
+
+        store = DataStore(config.get("data", {}).get("db_path", "data/quant.db"))
+        signal_set = load_signal_set(store) or build_signal_set(config, store=store)
+        return _signals_payload(signal_set)
     except Exception as e:
         return {"error": str(e), "detail": type(e).__name__}
+
+
+@router.post("/refresh")
+async def refresh_signals(request: Request, date: str | None = None, background: bool = False):
+    """Rebuild the signal set (news → sentiment → factors → scores → allocation) on the job pool."""
+    config = request.app.state.config
+    jobs = get_job_manager(request.app)
+    job = jobs.submit("signals", _run_signals_job, config, date, params={"date": date})
+    if background:
+        return {"status": "submitted", "job_id": job.id}
+    return job_response(await jobs.wait(job))
+
+
+def _run_signals_job(job, config: dict, date: str | None = None) -> dict:
+    from src.strategy.signal_sets import build_signal_set
+
+    return {"status": "ok", "job_id": job.id, **_signals_payload(build_signal_set(config, date=date))}
+
+
+def _signals_payload(signal_set: dict) -> dict:
+    signals = [
+        {
+            "symbol": sig["symbol"],
+            "name": sig.get("name") or "",
+            "score": sig.get("score") or 0,
+            "signal": sig.get("action") or "hold",
+            "current_weight": sig.get("current_weight") or 0,
+            "target_weight": sig.get("target_weight") or 0,
+            "sentiment_label": sig.get("sentiment_label") or "",
+            "factor_contributions": sig.get("factor_contributions") or {},
+        }
+        for sig in signal_set["signals"]
+    ]
+    meta = {k: v for k, v in signal_set.items() if k != "signals"}
+    return {"signals": signals, "signal_set": meta}
@@ -3,13 +3,19 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Request, Query
 
+from src.web.cache import cached_json
+
 router = APIRouter()
 
 
 @router.get("")
-async def get_universe(request: Request, subsector: str | None = Query(None)):
-    """Return the current stock universe as JSON."""
+def get_universe(request: Request, subsector: str | None = Query(None)):
+    """Return the current stock universe as JSON (cached, ETag-aware)."""
     config = request.app.state.config
+    return cached_json(request, "universe", lambda: _universe_payload(config, subsector))
+
+
+def _universe_payload(config: dict, subsector: str | None) -> dict:
     try:
         from src.universe.classifier import get_universe as _get_universe
 
@@ -1,6 +1,7 @@
 """Tests for backtest engine components."""
 import numpy as np
 import pandas as pd
+import pytest
 from src.backtest.portfolio import Portfolio, Holding
 from src.backtest.metrics import compute_metrics
 
@@ -79,3 +80,272 @@ def test_portfolio_insufficient_cash():
     # Should buy what it can afford
     if cost > 0:
         assert p.holdings["A"].shares <= 100  # max affordable at lots of 100
+
+
+def test_engine_emits_daily_progress(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine
+
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 100_000},
+        "strategy": {"rebalance_freq": "monthly"},
+    }
+    engine = BacktestEngine(config)
+    dates = ["2024-01-30", "2024-01-31", "2024-02-01"]
+    engine.store.save_dataframe("stock_daily", pd.DataFrame({
+        "symbol": "SH600000", "date": dates,
+        "open": 10.0, "high": 10.5, "low": 9.5, "close": 10.0, "volume": 1000, "amount": 10000,
+    }))
+
+    events = []
+    with patch("src.backtest.engine.compute_all_factors", return_value=pd.DataFrame()):
+        result = engine.run("2024-01-01", "2024-12-31", progress=events.append)
+
+    assert [e["date"] for e in events] == dates
+    assert [e["day"] for e in events] == [1, 2, 3]
+    assert events[-1]["percent"] == 100.0
+    assert [e["rebalance"] for e in events] == [True, False, True]
+    assert [e["nav"] for e in events] == result.nav_series.tolist()
+
+
+def test_engine_memoizes_by_config_dates_and_data_version(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine, memo_stats
+    from src.backtest.run_store import RunStore
+
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 100_000},
+        "strategy": {"rebalance_freq": "monthly"},
+    }
+    runs = RunStore(tmp_path / "runs")
+    engine = BacktestEngine(config, run_store=runs)
+
+    def save_day(date):
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": ["SH600000"], "date": [date],
+            "open": [10.0], "high": [10.5], "low": [9.5], "close": [10.0], "volume": [1000], "amount": [10000],
+        }))
+
+    save_day("2024-01-30")
+    before = memo_stats()
+    with patch("src.backtest.engine.compute_all_factors", return_value=pd.DataFrame()):
+        first = engine.run("2024-01-01", "2024-12-31")
+        second = engine.run("2024-01-01", "2024-12-31")
+        other_dates = engine.run("2024-01-01", "2024-06-30")
+        forced = engine.run("2024-01-01", "2024-12-31", use_cache=False)
+        save_day("2024-01-31")  # new data bumps the store version
+        refreshed = engine.run("2024-01-01", "2024-12-31")
+        changed = BacktestEngine({**config, "backtest": {"initial_capital": 200_000}}, run_store=runs)
+        changed_cfg = changed.run("2024-01-01", "2024-12-31")
+
+    assert not first.cached and first.run_id is not None
+    assert second.cached and second.run_id == first.run_id
+    assert second.nav_series.tolist() == first.nav_series.tolist()
+    assert not other_dates.cached
+    assert not forced.cached and forced.run_id != first.run_id
+    assert not refreshed.cached and len(refreshed.nav_series) == 2
+    assert not changed_cfg.cached
+    assert runs.count() == 5
+
+    after = memo_stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 4
+    assert after["bypassed"] - before["bypassed"] == 1
+
+
+def _checkpoint_engine(tmp_path, checkpoint_every=5):
+    from src.backtest.engine import BacktestEngine
+    from src.backtest.run_store import RunStore
+
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 100_000},
+        "strategy": {"rebalance_freq": "monthly"},
+        "report": {"checkpoint_every": checkpoint_every},
+    }
+    engine = BacktestEngine(config, run_store=RunStore(tmp_path / "runs"))
+    dates = pd.bdate_range("2024-01-02", "2024-03-29").strftime("%Y-%m-%d").tolist()
+    for sym, base, step in (("SH600000", 10.0, 0.05), ("SH600001", 20.0, -0.03)):
+        closes = [base + step * i for i in range(len(dates))]
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": sym, "date": dates, "open": closes, "high": closes, "low": closes,
+            "close": closes, "volume": 1000, "amount": 10000,
+        }))
+    return engine
+
+
+def _rotate_orders(portfolio, date):
+    """Alternate the whole book between two symbols every month."""
+    buy, sell = ("SH600000", "SH600001") if int(date[5:7]) % 2 else ("SH600001", "SH600000")
+    orders = [{"symbol": sell, "action": "SELL"}] if sell in portfolio.holdings else []
+    return orders + [{"symbol": buy, "action": "BUY", "target_value": 0.9 * portfolio.nav}]
+
+
+def _assert_same_result(a, b):
+    assert a.nav_series.tolist() == b.nav_series.tolist()
+    assert list(a.nav_series.index) == list(b.nav_series.index)
+    pd.testing.assert_frame_equal(a.trade_log, b.trade_log, check_dtype=False)
+    assert a.metrics == b.metrics
+
+
+def test_extend_matches_full_rerun(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine
+
+    engine = _checkpoint_engine(tmp_path)
+    with patch.object(BacktestEngine, "_generate_rebalance_orders", side_effect=_rotate_orders):
+        partial = engine.run("2024-01-01", "2024-02-15")
+        events = []
+        extended = engine.extend(partial.run_id, "2024-03-31", progress=events.append)
+        full = engine.run("2024-01-01", "2024-03-31", use_cache=False)
+
+    assert not extended.cached and extended.run_id not in (partial.run_id, full.run_id)
+    assert events[0]["date"] == "2024-02-16"
+    assert len(full.trade_log) > len(partial.trade_log) > 0
+    _assert_same_result(extended, full)
+
+    with pytest.raises(ValueError):
+        engine.extend(partial.run_id, "2024-02-01")
+    with pytest.raises(KeyError):
+        engine.extend("nope", "2024-04-30")
+
+
+def test_extend_refused_after_earlier_data_changed(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine
+
+    engine = _checkpoint_engine(tmp_path)
+    with patch.object(BacktestEngine, "_generate_rebalance_orders", side_effect=_rotate_orders):
+        partial = engine.run("2024-01-01", "2024-02-15")
+        # New data after the run's end date does not block extending
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": ["SH600000"], "date": ["2024-04-01"], "open": [9.0], "high": [9.0], "low": [9.0],
+            "close": [9.0], "volume": [1000], "amount": [10000],
+        }))
+        extended = engine.extend(partial.run_id, "2024-03-31")
+        assert not extended.cached
+
+        # A correction of an early price does
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": ["SH600000"], "date": ["2024-01-03"], "open": [11.0], "high": [11.0], "low": [11.0],
+            "close": [11.0], "volume": [1000], "amount": [10000],
+        }))
+        with pytest.raises(ValueError, match="changed since run"):
+            engine.extend(partial.run_id, "2024-03-31")
+        # ... and the earlier extension is not served for the corrected data
+        rerun = engine.run("2024-01-01", "2024-03-31")
+    assert not rerun.cached and rerun.run_id != extended.run_id
+
+
+def test_extend_matches_full_rerun_with_risk_model_allocation(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine
+    from src.backtest.run_store import RunStore
+
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 1_000_000},
+        "strategy": {"rebalance_freq": "monthly", "allocation": "risk_parity", "covariance_window": 40,
+                     "max_stocks": 6, "top_ratio": 1.0},
+        "report": {"checkpoint_every": 0},
+    }
+    engine = BacktestEngine(config, run_store=RunStore(tmp_path / "runs"))
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2023-10-02", "2024-03-29").strftime("%Y-%m-%d")
+    symbols = [f"SH60000{k}" for k in range(6)]
+    for k, sym in enumerate(symbols):
+        closes = 10 * np.cumprod(1 + rng.normal(0, 0.01 * (k + 1), len(dates)))
+        # One stock suspended over the base date of the March window
+        keep = ~((dates >= "2023-12-20") & (dates <= "2024-01-10")) if k == 2 else np.ones(len(dates), bool)
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": sym, "date": dates[keep], "open": closes[keep], "high": closes[keep],
+            "low": closes[keep], "close": closes[keep], "volume": 1000, "amount": 10000,
+        }))
+    factors = pd.DataFrame({"momentum": np.linspace(1.0, 0.5, 6)}, index=symbols)
+
+    with patch("src.backtest.engine.compute_all_factors", return_value=factors), \
+         patch("src.backtest.engine.compute_timing_signal", return_value={"position_ratio": 0.9}):
+        partial = engine.run("2024-01-01", "2024-02-15")
+        extended = BacktestEngine(config, run_store=engine.run_store).extend(partial.run_id, "2024-03-31")
+        full = BacktestEngine(config, run_store=engine.run_store).run("2024-01-01", "2024-03-31", use_cache=False)
+
+    march = full.trade_log[full.trade_log["date"] >= "2024-03-01"]
+    assert len(march["symbol"].unique()) > 1  # rebalanced with the covariance
+    assert extended.nav_series.tolist() == pytest.approx(full.nav_series.tolist(), rel=1e-12)
+    pd.testing.assert_frame_equal(extended.trade_log, full.trade_log, check_dtype=False)
+
+
+def test_resume_from_checkpoint_after_crash(tmp_path):
+    from unittest.mock import patch
+    from src.backtest.engine import BacktestEngine
+
+    engine = _checkpoint_engine(tmp_path, checkpoint_every=5)
+
+    def crash_in_march(portfolio, date):
+        if date.startswith("2024-03"):
+            raise RuntimeError("worker died")
+        return _rotate_orders(portfolio, date)
+
+    with patch.object(BacktestEngine, "_generate_rebalance_orders", side_effect=crash_in_march):
+        with pytest.raises(RuntimeError):
+            engine.run("2024-01-01", "2024-03-31")
+    assert engine.run_store.count() == 0
+
+    events = []
+    with patch.object(BacktestEngine, "_generate_rebalance_orders", side_effect=_rotate_orders):
+        resumed = engine.run("2024-01-01", "2024-03-31", progress=events.append)
+        full = engine.run("2024-01-01", "2024-03-31", use_cache=False)
+
+    # Crash on day 43 (2024-03-01): the checkpoint after day 40 is the latest
+    assert events[0]["day"] == 41
+    assert events[-1]["percent"] == 100.0
+    _assert_same_result(resumed, full)
+    assert not list((engine.run_store.root / "checkpoints").glob("*.json"))
+
+
+def _noisy_nav(n=500, drift=0.001, seed=1):
+    rng = np.random.default_rng(seed)
+    nav = 1_000_000 * np.cumprod(1 + rng.normal(drift, 0.01, n))
+    return pd.Series(nav, index=pd.bdate_range("2022-01-03", periods=n).strftime("%Y-%m-%d"))
+
+
+def test_stationary_bootstrap_indices_form_wrapped_blocks():
+    from src.backtest.resampling import stationary_bootstrap_indices
+
+    idx = stationary_bootstrap_indices(100, 50, 10, np.random.default_rng(0))
+    assert idx.shape == (50, 100)
+    assert idx.min() >= 0 and idx.max() < 100
+    steps = (np.diff(idx, axis=1) % 100) == 1
+    # Mean block length ~10: about 90% of steps continue the current block
+    assert 0.85 < steps.mean() < 0.95
+
+
+def test_resample_metrics_intervals():
+    from src.backtest.resampling import resample_metrics
+
+    nav = _noisy_nav()
+    trades = pd.DataFrame({
+        "date": ["2022-01-03"] * 4 + ["2022-06-01"] * 4,
+        "symbol": ["A", "B", "C", "D"] * 2,
+        "action": ["BUY"] * 4 + ["SELL"] * 4,
+        "shares": [100] * 8,
+        "price": [10.0, 10.0, 10.0, 10.0, 12.0, 9.0, 11.0, 13.0],
+        "cost": [5.0] * 8,
+    })
+    config = {"report": {"resampling": {"n_resamples": 1200, "seed": 7}}}
+    res = resample_metrics(nav, trades, config)
+
+    point = compute_metrics(nav, trades, 1_000_000, {})
+    assert res["n_resamples"] == 1200
+    for name in ("sharpe_ratio", "annual_return", "max_drawdown", "win_rate"):
+        ci = res["intervals"][name]
+        assert ci["low"] <= point[name] <= ci["high"]
+    assert 0.5 < res["prob_sharpe_positive"] <= 1.0
+    # Reordering trades cannot change total PnL but the drawdown depends on order
+    assert res["intervals"]["trade_max_drawdown"]["low"] >= 0
+
+    # Deterministic for a seed, whatever the worker count
+    assert resample_metrics(nav, trades, config, n_jobs=2) == res
+    assert resample_metrics(nav, trades, config, n_resamples=0) is None
@@ -0,0 +1,107 @@
+"""Tests for the vectorized rebalance-only (fast) backtest mode."""
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestEngine
+from src.backtest.multi import MultiStrategyRunner
+
+SYMBOLS = {"SH600000": (10.0, 0.004), "SH600001": (20.0, 0.002), "SH600002": (5.0, 0.003)}
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Half a year of steadily rising prices (no stop-loss or drawdown triggers)."""
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 1_000_000},
+        "strategy": {"rebalance_freq": "monthly", "top_ratio": 0.67, "max_single_weight": 0.6},
+        "factors": {"weights": {"other": 1.0}},
+    }
+    engine = BacktestEngine(config)
+    dates = pd.bdate_range("2024-01-02", "2024-06-28").strftime("%Y-%m-%d").tolist()
+    for sym, (base, growth) in SYMBOLS.items():
+        closes = base * (1 + growth) ** np.arange(len(dates))
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": sym, "date": dates, "open": closes, "high": closes, "low": closes,
+            "close": closes, "volume": 1000, "amount": 10000,
+        }))
+    with engine.store._get_conn() as conn:
+        conn.execute("CREATE TABLE universe_cache (symbol TEXT PRIMARY KEY, name TEXT, subsector TEXT)")
+    return config
+
+
+def _factors(config, date, store):
+    """Rotate the favourite each month so rebalances both sell and buy."""
+    month = int(date[5:7])
+    scores = np.roll([3.0, 2.0, 1.0], month)
+    return pd.DataFrame({"f": scores}, index=list(SYMBOLS))
+
+
+def _patched():
+    return (
+        patch("src.backtest.engine.compute_all_factors", side_effect=_factors),
+        patch("src.backtest.engine.compute_timing_signal", return_value={"position_ratio": 0.9}),
+    )
+
+
+def _fast(config):
+    return {**config, "backtest": {**config["backtest"], "mode": "fast"}}
+
+
+def test_fast_mode_matches_event_engine(config):
+    factors_patch, timing_patch = _patched()
+    with factors_patch, timing_patch:
+        event = BacktestEngine(config).simulate("2024-01-01", "2024-06-30")
+        fast = BacktestEngine(_fast(config)).simulate("2024-01-01", "2024-06-30")
+
+    assert list(fast.nav_series.index) == list(event.nav_series.index)
+    rel = (fast.nav_series / event.nav_series - 1).abs()
+    assert rel.max() < 2e-3
+    key = ["date", "symbol", "action", "shares"]
+    pd.testing.assert_frame_equal(fast.trade_log[key], event.trade_log[key], check_dtype=False)
+    assert fast.trade_log["cost"].sum() == pytest.approx(event.trade_log["cost"].sum(), rel=1e-9)
+    assert fast.metrics["annual_return"] == pytest.approx(event.metrics["annual_return"], abs=5e-3)
+    assert fast.metrics["total_trades"] == event.metrics["total_trades"]
+    assert fast.state is None
+
+
+def test_fast_sweep_computes_each_panel_once(config):
+    variants = {f"top{k}": {"strategy": {"max_stocks": k}} for k in (1, 2, 3)}
+    factors_patch, timing_patch = _patched()
+    with factors_patch as factors, timing_patch:
+        results = MultiStrategyRunner(_fast(config), variants).run("2024-01-01", "2024-06-30")
+
+    assert factors.call_count == 6  # one panel per monthly rebalance, shared by all variants
+    held = {name: r.trade_log.loc[r.trade_log["action"] == "BUY"].groupby("date")["symbol"].nunique().max()
+            for name, r in results.items()}
+    assert held == {"top1": 1, "top2": 2, "top3": 2}  # top_ratio caps at 2 of 3
+
+
+def test_fast_run_cannot_be_extended(config, tmp_path):
+    from src.backtest.run_store import RunStore
+
+    factors_patch, timing_patch = _patched()
+    with factors_patch, timing_patch:
+        engine = BacktestEngine(_fast(config), run_store=RunStore(tmp_path / "runs"))
+        result = engine.run("2024-01-01", "2024-03-31")
+        with pytest.raises(ValueError):
+            engine.extend(result.run_id, "2024-06-30")
+
+
+def test_risk_parity_allocation_in_both_modes(config):
+    config["strategy"].update({"allocation": "risk_parity", "covariance_window": 20})
+    factors_patch, timing_patch = _patched()
+    with factors_patch, timing_patch:
+        engine = BacktestEngine(config)
+        weights, _ = engine.target_weights("2024-03-01")
+        event = engine.simulate("2024-01-01", "2024-06-30")
+        fast = BacktestEngine(_fast(config)).simulate("2024-01-01", "2024-06-30")
+
+    # The low-volatility name gets the larger weight
+    assert weights.sum() == pytest.approx(0.9)
+    assert weights.idxmax() == "SH600001"
+    key = ["date", "symbol", "action", "shares"]
+    pd.testing.assert_frame_equal(fast.trade_log[key], event.trade_log[key], check_dtype=False)
@@ -0,0 +1,125 @@
+"""Tests for the multi-strategy single-pass runner."""
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestEngine
+from src.backtest.multi import MultiStrategyRunner, PriceCube, merge_config
+from src.backtest.run_store import RunStore
+
+VARIANTS = {
+    "base": {},
+    "top1": {"strategy": {"top_ratio": 0.5}},
+    "half": {"timing": {"override_ratio": 0.5}},
+}
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = {
+        "data": {"db_path": str(tmp_path / "bt.db")},
+        "backtest": {"initial_capital": 100_000},
+        "strategy": {"rebalance_freq": "monthly", "top_ratio": 1.0, "max_single_weight": 0.6},
+        "factors": {"weights": {"other": 1.0}},
+        "timing": {"enabled": True},
+    }
+    engine = BacktestEngine(config)
+    dates = pd.bdate_range("2024-01-02", "2024-03-29").strftime("%Y-%m-%d").tolist()
+    for sym, base, step in (("SH600000", 10.0, 0.05), ("SH600001", 20.0, -0.03)):
+        closes = [base + step * i for i in range(len(dates))]
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": sym, "date": dates, "open": closes, "high": closes, "low": closes,
+            "close": closes, "volume": 1000, "amount": 10000,
+        }))
+    with engine.store._get_conn() as conn:
+        conn.execute("CREATE TABLE universe_cache (symbol TEXT PRIMARY KEY, name TEXT, subsector TEXT)")
+    return config
+
+
+def _factors(config, date, store):
+    month = int(date[5:7])
+    return pd.DataFrame({"f": [2.0 * month, 1.0 * month]}, index=["SH600000", "SH600001"])
+
+
+def _timing(config, date, store):
+    override = config.get("timing", {}).get("override_ratio")
+    return {"position_ratio": 0.9 if override is None else override}
+
+
+def _patched(factors=_factors):
+    return (
+        patch("src.backtest.engine.compute_all_factors", side_effect=factors),
+        patch("src.backtest.engine.compute_timing_signal", side_effect=_timing),
+    )
+
+
+def test_variants_match_separate_runs_and_share_inputs(config):
+    factors_patch, timing_patch = _patched()
+    with factors_patch as factors, timing_patch as timing:
+        results = MultiStrategyRunner(config, VARIANTS).run("2024-01-01", "2024-03-31")
+        shared_factor_calls, shared_timing_calls = factors.call_count, timing.call_count
+
+        separate = {
+            name: BacktestEngine(merge_config(config, overrides)).simulate("2024-01-01", "2024-03-31")
+            for name, overrides in VARIANTS.items()
+        }
+
+    assert list(results) == list(VARIANTS)
+    for name, result in results.items():
+        assert result.nav_series.tolist() == separate[name].nav_series.tolist()
+        pd.testing.assert_frame_equal(result.trade_log, separate[name].trade_log)
+        assert result.metrics == separate[name].metrics
+    assert results["base"].trade_log["symbol"].nunique() == 2
+    assert results["top1"].trade_log["symbol"].nunique() == 1
+    assert results["half"].nav_series.tolist() != results["base"].nav_series.tolist()
+
+    # 3 rebalance dates: one factor panel per date for all variants,
+    # timing shared by the two variants with identical timing config
+    assert shared_factor_calls == 3
+    assert shared_timing_calls == 6
+
+
+def test_stored_variants_are_reused(config, tmp_path):
+    from src.backtest.engine import memo_stats
+
+    runs = RunStore(tmp_path / "runs")
+    before = memo_stats()
+    factors_patch, timing_patch = _patched()
+    with factors_patch, timing_patch:
+        first = MultiStrategyRunner(config, VARIANTS, run_store=runs).run("2024-01-01", "2024-03-31")
+        second = MultiStrategyRunner(config, VARIANTS, run_store=runs).run("2024-01-01", "2024-03-31")
+    after = memo_stats()
+
+    assert [r["label"] for r in runs.list()] == ["half", "top1", "base"]
+    assert all(not r.cached for r in first.values())
+    assert all(r.cached for r in second.values())
+    assert {n: r.run_id for n, r in second.items()} == {n: r.run_id for n, r in first.items()}
+    assert after["misses"] - before["misses"] == 3
+    assert after["hits"] - before["hits"] == 3
+
+
+def test_variant_runs_can_be_extended_after_new_data(config, tmp_path):
+    runs = RunStore(tmp_path / "runs")
+    factors_patch, timing_patch = _patched()
+    with factors_patch, timing_patch:
+        results = MultiStrategyRunner(config, VARIANTS, run_store=runs).run("2024-01-01", "2024-02-29")
+        engine = BacktestEngine(merge_config(config, VARIANTS["top1"]), run_store=runs)
+        # The next ingest appends a day: extending is still allowed
+        engine.store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": ["SH600000"], "date": ["2024-04-01"], "open": [9.0], "high": [9.0], "low": [9.0],
+            "close": [9.0], "volume": [1000], "amount": [10000],
+        }))
+        extended = engine.extend(results["top1"].run_id, "2024-03-31")
+        full = engine.run("2024-01-01", "2024-03-31", use_cache=False)
+
+    assert runs.get(results["top1"].run_id)["data_digest"] is not None
+    assert extended.nav_series.tolist() == full.nav_series.tolist()
+
+
+def test_price_cube_matches_store_reads(config):
+    engine = BacktestEngine(config)
+    cube = PriceCube(engine.store)
+    for args in [("SH600000",), ("SH600001", "2024-02-01", "2024-02-29"), ("SH600000", None, "2024-01-15"),
+                 ("SH600001", "2024-03-30", None), ("SH999999",)]:
+        pd.testing.assert_frame_equal(cube.read_stock_daily(*args), engine.store.read_stock_daily(*args))
@@ -0,0 +1,104 @@
+"""Tests for FIFO round-trip matching."""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.metrics import compute_metrics
+from src.backtest.round_trips import match_round_trips
+
+
+def _log(rows):
+    return pd.DataFrame(rows, columns=["date", "symbol", "action", "shares", "price", "cost"])
+
+
+def test_partial_fills_match_fifo():
+    log = _log([
+        ("2024-01-02", "A", "BUY", 300, 10.0, 3005.0),   # commission 5
+        ("2024-01-03", "A", "BUY", 200, 12.0, 2405.0),
+        ("2024-01-08", "A", "SELL", 400, 15.0, 8.0),
+        ("2024-01-11", "A", "SELL_STOP", 100, 9.0, 2.0),
+    ])
+    trips = match_round_trips(log)
+
+    assert trips[["entry_date", "exit_date", "shares", "entry_price", "exit_price"]].values.tolist() == [
+        ["2024-01-02", "2024-01-08", 300, 10.0, 15.0],
+        ["2024-01-03", "2024-01-08", 100, 12.0, 15.0],
+        ["2024-01-03", "2024-01-11", 100, 12.0, 9.0],
+    ]
+    assert trips["holding_days"].tolist() == [6, 5, 8]
+    assert trips["costs"].tolist() == pytest.approx([5 + 6, 2.5 + 2, 2.5 + 2])
+    assert trips["pnl"].tolist() == pytest.approx([1500 - 11, 300 - 4.5, -300 - 4.5])
+    assert trips["exit_action"].tolist() == ["SELL", "SELL", "SELL_STOP"]
+
+
+def test_symbols_are_matched_independently():
+    log = _log([
+        ("2024-01-02", "A", "BUY", 100, 10.0, 1000.0),
+        ("2024-01-02", "B", "SELL", 100, 5.0, 0.0),     # no prior buy: ignored
+        ("2024-01-03", "B", "BUY", 200, 5.0, 1000.0),
+        ("2024-01-04", "B", "SELL", 100, 6.0, 0.0),
+        ("2024-01-05", "A", "SELL", 100, 11.0, 0.0),
+        ("2024-01-05", "C", "BUY", 100, 1.0, 100.0),    # still open: ignored
+    ])
+    trips = match_round_trips(log)
+    assert trips[["symbol", "exit_date", "shares", "pnl"]].values.tolist() == [
+        ["B", "2024-01-04", 100, 100.0],
+        ["A", "2024-01-05", 100, 100.0],
+    ]
+
+
+def _reference(log):
+    lots, rows = {}, []
+    for r in log.itertuples():
+        if r.action == "BUY":
+            lots.setdefault(r.symbol, deque()).append([r.shares, r.price, r.date])
+            continue
+        left = r.shares
+        queue = lots.get(r.symbol, deque())
+        while left > 0 and queue:
+            lot = queue[0]
+            qty = min(left, lot[0])
+            rows.append((r.symbol, lot[2], r.date, qty, lot[1], r.price))
+            lot[0] -= qty
+            left -= qty
+            if lot[0] == 0:
+                queue.popleft()
+    return rows
+
+
+def test_matches_loop_reference_on_random_log():
+    rng = np.random.default_rng(3)
+    n = 5000
+    log = _log({
+        "date": pd.bdate_range("2015-01-01", periods=n).strftime("%Y-%m-%d"),
+        "symbol": rng.choice(list("ABCDEFGH"), n),
+        "action": rng.choice(["BUY", "SELL", "SELL_STOP"], n, p=[0.5, 0.4, 0.1]),
+        "shares": rng.integers(1, 20, n) * 100,
+        "price": rng.uniform(5, 50, n).round(2),
+        "cost": 0.0,
+    })
+    log.loc[log["action"] == "BUY", "cost"] = log["shares"] * log["price"]
+
+    trips = match_round_trips(log)
+    got = list(trips[["symbol", "entry_date", "exit_date", "shares", "entry_price", "exit_price"]]
+               .itertuples(index=False, name=None))
+    assert got == _reference(log)
+
+
+def test_metrics_use_round_trips():
+    nav = pd.Series(np.linspace(100_000, 101_000, 10), index=pd.bdate_range("2024-01-02", periods=10))
+    log = _log([
+        ("2024-01-02", "A", "BUY", 100, 10.0, 1000.0),
+        ("2024-01-02", "B", "BUY", 100, 10.0, 1000.0),
+        ("2024-01-05", "A", "SELL", 50, 14.0, 0.0),
+        ("2024-01-09", "A", "SELL", 50, 12.0, 0.0),
+        ("2024-01-12", "B", "SELL", 100, 9.0, 0.0),
+    ])
+    m = compute_metrics(nav, log, 100_000, {})
+    assert m["round_trips"] == 3
+    assert m["win_rate"] == pytest.approx(2 / 3)
+    assert m["profit_factor"] == pytest.approx(300 / 100)
+    assert m["profit_loss_ratio"] == pytest.approx(150 / 100)
+    assert m["avg_holding_days"] == pytest.approx((3 + 7 + 10) / 3)
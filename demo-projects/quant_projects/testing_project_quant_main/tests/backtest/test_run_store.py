@@ -0,0 +1,101 @@
+"""Tests for the versioned backtest run store."""
+import json
+
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestResult
+from src.backtest.run_store import RunStore, config_hash
+
+
+def _result(navs, sharpe=1.0, trades=True):
+    dates = [f"2024-01-{d:02d}" for d in range(2, 2 + len(navs))]
+    trade_log = pd.DataFrame({
+        "date": dates[:2], "symbol": ["SH601899", "SH600362"], "action": ["BUY", "SELL"],
+        "shares": [1000, 500], "price": [10.5, 8.25], "cost": [5.0, 6.1],
+    }) if trades else pd.DataFrame()
+    return BacktestResult(
+        nav_series=pd.Series(navs, index=dates, dtype=float),
+        trade_log=trade_log,
+        metrics={"sharpe_ratio": sharpe, "annual_return": 0.1},
+        daily_snapshots=[{"date": d, "n_holdings": 2} for d in dates],
+    )
+
+
+class TestRunStore:
+    def test_save_load_roundtrip(self, tmp_path):
+        store = RunStore(tmp_path / "runs")
+        original = _result([1e6, 1.01e6, 1.02e6])
+        run_id = store.save(original, {"backtest": {"initial_capital": 1e6}}, "2024-01-02", "2024-01-04",
+                            data_version=7)
+
+        loaded = store.load(run_id)
+        pd.testing.assert_series_equal(loaded.nav_series, original.nav_series, check_index_type=False)
+        pd.testing.assert_frame_equal(loaded.trade_log, original.trade_log, check_dtype=False)
+        assert loaded.trade_log["shares"].dtype.kind == "i"
+        assert loaded.metrics == original.metrics
+        assert loaded.daily_snapshots[0] == {"date": "2024-01-02", "n_holdings": 2}
+
+        meta = store.get(run_id)
+        assert meta["data_version"] == 7
+        assert meta["n_days"] == 3 and meta["n_trades"] == 2
+        assert meta["final_nav"] == 1.02e6
+        assert meta["config_hash"] == config_hash({"backtest": {"initial_capital": 1e6}})
+
+    def test_list_newest_first(self, tmp_path):
+        store = RunStore(tmp_path / "runs")
+        ids = [store.save(_result([1e6, 1e6 + i]), {}, "2024-01-02", "2024-01-03") for i in range(3)]
+        listed = store.list()
+        assert [r["run_id"] for r in listed] == ids[::-1]
+        assert store.latest_id() == ids[-1]
+        assert store.count() == 3
+        assert [r["run_id"] for r in store.list(limit=1, offset=1)] == [ids[1]]
+
+    def test_empty_trades_and_unknown_run(self, tmp_path):
+        store = RunStore(tmp_path / "runs")
+        run_id = store.save(_result([1e6], trades=False), {}, "2024-01-02", "2024-01-02")
+        assert store.load(run_id).trade_log.empty
+        with pytest.raises(KeyError):
+            store.load("nope")
+
+    def test_compare_aligns_normalized_nav(self, tmp_path):
+        store = RunStore(tmp_path / "runs")
+        a = store.save(_result([1e6, 1.1e6, 1.21e6], sharpe=1.0), {}, "2024-01-02", "2024-01-04")
+        b = store.save(_result([2e6, 1.9e6], sharpe=0.5), {}, "2024-01-02", "2024-01-03")
+        comparison = store.compare([a, b])
+        assert [m["metrics"]["sharpe_ratio"] for m in comparison["runs"]] == [1.0, 0.5]
+        nav = comparison["nav"]
+        assert nav[a].tolist() == pytest.approx([1.0, 1.1, 1.21])
+        assert nav[b].iloc[:2].tolist() == pytest.approx([1.0, 0.95])
+        assert pd.isna(nav[b].iloc[2])
+
+    def test_config_hash_ignores_presentation_sections(self):
+        base = {"backtest": {"initial_capital": 1e6}, "strategy": {"top_n": 5}}
+        assert config_hash(base) == config_hash({**base, "web": {"port": 9000}, "report": {"format": "png"}})
+        assert config_hash(base) != config_hash({**base, "strategy": {"top_n": 6}})
+
+    def test_config_hash_ignores_operational_settings(self):
+        base = {"strategy": {"top_n": 5}, "universe": {"industry_code": "801050"}, "factors": {"weights": {}}}
+        operational = {
+            "strategy": {"top_n": 5},
+            "universe": {"industry_code": "801050", "cache_ttl_s": 3600},
+            "factors": {"weights": {}, "cache_size": 8},
+            "daemon": {"universe_ttl_s": 60}, "daily": {"max_workers": 2},
+            "profiling": {"output_dir": "elsewhere"}, "signals": {"build_after_update": False},
+        }
+        assert config_hash(base) == config_hash(operational)
+        assert config_hash(base) != config_hash({**base, "universe": {"industry_code": "801051"}})
+
+    def test_legacy_files_imported_once(self, tmp_path):
+        (tmp_path / "last_metrics.json").write_text(json.dumps({"sharpe_ratio": 1.3}))
+        pd.Series([1e6, 1.1e6], index=["2024-01-02", "2024-01-03"]).to_frame("nav").to_csv(
+            tmp_path / "last_nav.csv"
+        )
+        config = {"report": {"output_dir": str(tmp_path)}}
+        store = RunStore.from_config(config)
+        assert store.count() == 1
+        meta = store.list()[0]
+        assert meta["label"] == "imported"
+        assert meta["start_date"] == "2024-01-02"
+        RunStore.from_config(config)
+        assert store.count() == 1
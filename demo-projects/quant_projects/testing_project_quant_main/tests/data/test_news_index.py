@@ -0,0 +1,121 @@
+"""Tests for news_symbols index, FTS keyword search and batched sentiment labels."""
+import json
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from src.data.storage import DataStore
+from src.strategy.signal import get_sentiment_labels
+
+
+@pytest.fixture
+def temp_store():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = DataStore(db_path=path)
+    yield store
+    try:
+        os.unlink(path)
+    except PermissionError:
+        pass
+
+
+def _insert_news(store, title, published_at, related=(), summary="", classification=None):
+    with store._get_conn() as conn:
+        cursor = conn.execute(
+            "INSERT INTO news (title, summary, published_at, source, related_symbols, scope, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (title, summary, published_at, "test", json.dumps(list(related)),
+             "stock" if related else "sector", "2024-01-01T00:00:00"),
+        )
+        news_id = cursor.lastrowid
+        if classification:
+            conn.execute(
+                "INSERT INTO sentiment_cache (news_id, classification, confidence, sentiment_score, model_name, analyzed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (news_id, classification, 0.8, 0.8, "test", "2024-01-01T00:00:00"),
+            )
+        return news_id
+
+
+class TestNewsSymbolsIndex:
+    def test_insert_populates_news_symbols(self, temp_store):
+        news_id = _insert_news(temp_store, "铜价上涨", "2024-01-02 10:00:00", ["SH601899", "SH600362"])
+        rows = temp_store.read_table("news_symbols", where="news_id = ?", params=(news_id,))
+        assert sorted(rows["symbol"]) == ["SH600362", "SH601899"]
+
+    def test_delete_removes_news_symbols(self, temp_store):
+        _insert_news(temp_store, "铜价上涨", "2024-01-02 10:00:00", ["SH601899"])
+        temp_store.clear_table("news")
+        assert temp_store.read_table("news_symbols").empty
+
+    def test_symbol_filter_is_exact(self, temp_store):
+        _insert_news(temp_store, "A", "2024-01-02 10:00:00", ["SH601899"])
+        _insert_news(temp_store, "B", "2024-01-02 11:00:00", ["SH6018990"])
+        df = temp_store.read_news(symbol="SH601899")
+        assert df["title"].tolist() == ["A"]
+
+    def test_invalid_related_symbols_ignored(self, temp_store):
+        _insert_news(temp_store, "A", "2024-01-02 10:00:00")
+        with temp_store._get_conn() as conn:
+            conn.execute(
+                "INSERT INTO news (title, published_at, related_symbols, fetched_at) VALUES (?, ?, ?, ?)",
+                ("B", "2024-01-02 11:00:00", "not json", "2024-01-01T00:00:00"),
+            )
+        assert len(temp_store.read_news()) == 2
+        assert temp_store.read_table("news_symbols").empty
+
+    def test_backfill_existing_database(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE news (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                "summary TEXT, published_at TEXT NOT NULL, source TEXT, related_symbols TEXT, "
+                "scope TEXT DEFAULT 'sector', fetched_at TEXT NOT NULL, UNIQUE (title, published_at))"
+            )
+            conn.execute(
+                "INSERT INTO news (title, summary, published_at, related_symbols, fetched_at) "
+                "VALUES ('紫金矿业发现大型铜矿', '', '2024-01-02', '[\"SH601899\"]', '2024-01-02')"
+            )
+        store = DataStore(db_path=path)
+        assert len(store.read_news(symbol="SH601899")) == 1
+        assert len(store.read_news(keyword="大型铜矿")) == 1
+
+
+class TestNewsWindowAndKeyword:
+    def test_time_window(self, temp_store):
+        _insert_news(temp_store, "old", "2024-01-01 10:00:00")
+        _insert_news(temp_store, "mid", "2024-01-05 10:00:00")
+        _insert_news(temp_store, "new", "2024-01-09 10:00:00")
+        df = temp_store.read_news(since="2024-01-02", until="2024-01-08")
+        assert df["title"].tolist() == ["mid"]
+
+    def test_keyword_search_fts(self, temp_store):
+        _insert_news(temp_store, "紫金矿业发现大型铜矿", "2024-01-02 10:00:00")
+        _insert_news(temp_store, "铝价下跌", "2024-01-02 11:00:00", summary="电解铝库存累积")
+        assert temp_store.read_news(keyword="大型铜矿")["title"].tolist() == ["紫金矿业发现大型铜矿"]
+        assert temp_store.read_news(keyword="铝库存")["title"].tolist() == ["铝价下跌"]
+
+    def test_short_keyword_falls_back_to_like(self, temp_store):
+        _insert_news(temp_store, "铜价上涨", "2024-01-02 10:00:00")
+        _insert_news(temp_store, "铝价下跌", "2024-01-02 11:00:00")
+        assert temp_store.read_news(keyword="铜")["title"].tolist() == ["铜价上涨"]
+
+    def test_keyword_combined_with_symbol(self, temp_store):
+        _insert_news(temp_store, "紫金矿业铜矿投产", "2024-01-02 10:00:00", ["SH601899"])
+        _insert_news(temp_store, "江西铜业铜矿扩产", "2024-01-02 11:00:00", ["SH600362"])
+        df = temp_store.read_news(symbol="SH600362", keyword="铜矿")
+        assert df["title"].tolist() == ["江西铜业铜矿扩产"]
+
+
+class TestSentimentLabels:
+    def test_latest_news_per_symbol(self, temp_store, config):
+        _insert_news(temp_store, "旧闻利空", "2024-01-01 10:00:00", ["SH601899"], classification="bearish")
+        _insert_news(temp_store, "新闻利多", "2024-01-03 10:00:00", ["SH601899"], classification="bullish")
+        _insert_news(temp_store, "未分析", "2024-01-03 10:00:00", ["SH600362"])
+        labels = get_sentiment_labels(["SH601899", "SH600362", "SZ000630"], config, store=temp_store)
+        assert labels["SH601899"] == "利多: 新闻利多"
+        assert labels["SH600362"] == "中性: 无相关新闻"
+        assert labels["SZ000630"] == "中性: 无相关新闻"
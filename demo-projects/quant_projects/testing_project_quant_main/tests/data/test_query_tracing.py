@@ -0,0 +1,166 @@
+"""Tests for DataStore query tracing and N+1 detection."""
+import contextvars
+import json
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.data.storage import DataStore
+from src.data.tracing import TracingConnection, query_shape, trace_queries, trace_source
+
+
+def _store(tmp_path):
+    store = DataStore(str(tmp_path / "trace.db"))
+    store.save_dataframe("stock_daily", pd.DataFrame({
+        "symbol": ["A", "A", "B"], "date": ["2024-01-02", "2024-01-03", "2024-01-02"], "close": [1.0, 2.0, 3.0],
+    }))
+    return store
+
+
+def test_query_shape_collapses_literals_and_lists():
+    assert query_shape("SELECT *  FROM t\n WHERE a = 'x' AND b > 10 AND c IN (?, ?, ?)") == \
+        "SELECT * FROM t WHERE a = ? AND b > ? AND c IN (...)"
+    assert query_shape("INSERT INTO t (a, b) VALUES (?,?)") == "INSERT INTO t (a, b) VALUES (...)"
+
+
+def test_plain_connections_without_trace(tmp_path):
+    store = _store(tmp_path)
+    assert not isinstance(store._get_conn(), TracingConnection)
+    with trace_queries():
+        assert isinstance(store._get_conn(), TracingConnection)
+        with pytest.raises(RuntimeError):
+            with trace_queries():
+                pass
+
+
+def test_records_rows_sources_and_n_plus_one(tmp_path):
+    store = _store(tmp_path)
+    with trace_queries(n_plus_one_threshold=3) as trace:
+        with trace_source("prices"):
+            for sym in ["A", "B", "C", "A"]:
+                store.read_stock_daily(sym, end_date="2024-01-03")
+        with trace_source("outer"), trace_source("batched"):
+            store.read_table("stock_daily")
+        store.data_version()
+
+    data = trace.to_dict(include_records=True)
+    groups = {(g["source"], g["shape"]): g for g in data["groups"]}
+    loop = groups[("prices", "SELECT * FROM stock_daily WHERE symbol = ? AND date <= ?")]
+    assert loop["count"] == 4
+    assert loop["rows"] == 5  # A twice (2 rows), B (1), C (0)
+    assert loop["max_run"] == 4
+    assert loop["n_plus_one"] is True
+    assert [g["source"] for g in data["n_plus_one"]] == ["prices"]
+
+    batched = groups[("batched", "SELECT * FROM stock_daily")]
+    assert batched["rows"] == 3 and not batched["n_plus_one"]
+    assert any(r["path"] == "outer > batched" for r in data["records"])
+    # Unlabelled queries are attributed to the calling function
+    assert any(g["source"] == f"{__name__}.test_records_rows_sources_and_n_plus_one" for g in data["groups"])
+
+    assert data["n_queries"] == 6
+    summary = trace.summary()
+    assert "[N+1]" in summary and "prices" in summary
+
+
+def test_writes_and_threads_recorded_and_exported(tmp_path):
+    store = _store(tmp_path)
+    with trace_queries() as trace:
+        ctx = contextvars.copy_context()
+        worker = threading.Thread(target=ctx.run, args=(store.set_last_updated, "stock", "2024-01-03"))
+        worker.start()
+        worker.join()
+
+    path = trace.export_json(tmp_path / "out" / "trace.json")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    shapes = [g["shape"] for g in data["groups"]]
+    assert "INSERT OR REPLACE INTO meta (category, last_updated) VALUES (...)" in shapes
+    assert not any(g["source"].startswith("src.data.storage") for g in data["groups"])
+    assert data["total_ms"] > 0
+
+
+def test_traces_are_per_context(tmp_path):
+    store = _store(tmp_path)
+    started, release = threading.Barrier(2), threading.Barrier(2)
+    traces = {}
+
+    def command(name, symbol):
+        with trace_queries() as trace:
+            started.wait()
+            store.read_stock_daily(symbol)
+            release.wait()
+        traces[name] = trace
+
+    workers = [threading.Thread(target=command, args=(n, s)) for n, s in (("a", "A"), ("b", "B"))]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    store.read_table("stock_daily")  # outside both traces
+
+    assert [r.rows for r in traces["a"].records] == [2]
+    assert [r.rows for r in traces["b"].records] == [1]
+
+
+def test_factor_queries_labelled_by_factor(tmp_path):
+    import src.factors.base as base
+
+    store = _store(tmp_path)
+
+    class PriceFactor(base.BaseFactor):
+        name = "price_level"
+
+        def compute(self, universe, date, store, config):
+            return pd.Series({s: float(len(store.read_stock_daily(s, end_date=date))) for s in universe})
+
+    universe = pd.DataFrame({"symbol": ["A", "B"], "name": ["a", "b"], "subsector": ["copper", "gold"]})
+    with patch.dict(base._FACTOR_REGISTRY, {"price_level": PriceFactor}, clear=True), \
+         trace_queries() as trace:
+        base.compute_all_factors({"factors": {"small_universe_warning": 0}}, date="2024-01-03",
+                                 store=store, universe_df=universe)
+
+    sources = {g["source"]: g["count"] for g in trace.groups()}
+    assert sources["factor:price_level"] == 2
+
+
+def test_routes_and_their_jobs_labelled(tmp_path):
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+
+    from src.web.app import _RouteTraceSource
+    from src.web.jobs import get_job_manager
+
+    store = _store(tmp_path)
+    app = FastAPI()
+    app.state.config = {}
+    app.add_middleware(_RouteTraceSource)
+
+    @app.get("/rows")
+    def rows():
+        return {"rows": len(store.read_table("stock_daily"))}
+
+    @app.post("/job")
+    async def job(request: Request):
+        jobs = get_job_manager(request.app)
+        done = await jobs.wait(jobs.submit("versions", lambda job: store.data_version()))
+        return {"status": done.status}
+
+    with trace_queries() as trace:
+        client = TestClient(app)
+        assert client.get("/rows").json() == {"rows": 3}
+        assert client.post("/job").json() == {"status": "done"}
+    get_job_manager(app).shutdown()
+
+    records = trace.to_dict(include_records=True)["records"]
+    paths = {r["path"] for r in records}
+    assert "route:GET /rows" in paths
+    assert "route:POST /job > job:versions" in paths
+
+
+def test_connection_subclass_is_sqlite_connection(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "x.db"), factory=TracingConnection)
+    assert isinstance(conn, sqlite3.Connection)
+    assert conn.execute("SELECT 1").fetchone() == (1,)
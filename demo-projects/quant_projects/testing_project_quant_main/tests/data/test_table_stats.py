@@ -0,0 +1,100 @@
+"""Tests for maintained table statistics and the store data version."""
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.data.storage import DataStore
+
+
+def _rows(n, symbol="SH601899"):
+    return pd.DataFrame({
+        "symbol": symbol,
+        "date": [f"2024-01-{d:02d}" for d in range(1, n + 1)],
+        "close": 10.0,
+    })
+
+
+class TestTableStats:
+    def test_counts_follow_upserts_and_clears(self, tmp_path):
+        store = DataStore(str(tmp_path / "s.db"))
+        assert store.table_row_counts(["stock_daily"]) == {"stock_daily": 0}
+
+        store.save_dataframe("stock_daily", _rows(3))
+        store.save_dataframe("stock_daily", _rows(5))  # 3 overlapping keys replaced
+        assert store.table_row_counts(["stock_daily"]) == {"stock_daily": 5}
+
+        store.clear_table("stock_daily")
+        assert store.table_row_counts(["stock_daily"]) == {"stock_daily": 0}
+
+    def test_data_version_bumps_on_writes(self, tmp_path):
+        store = DataStore(str(tmp_path / "s.db"))
+        v0 = store.data_version()
+        store.save_dataframe("stock_daily", _rows(2))
+        v1 = store.data_version()
+        store.save_dataframe("stock_daily", _rows(3))
+        v2 = store.data_version()
+        assert v0 < v1 < v2
+        # Update timestamps are bookkeeping, not data
+        store.set_last_updated("stock")
+        assert store.data_version() == v2
+        # Reads and empty writes do not change it
+        store.read_table("stock_daily")
+        store.save_dataframe("stock_daily", pd.DataFrame())
+        assert store.data_version() == v2
+
+    def test_derived_tables_do_not_bump_version(self, tmp_path):
+        store = DataStore(str(tmp_path / "s.db"))
+        with store._get_conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS universe_cache (symbol TEXT PRIMARY KEY, name TEXT, subsector TEXT)"
+            )
+        v0 = store.data_version()
+        store.save_dataframe("universe_cache", pd.DataFrame({"symbol": ["SH601899"], "subsector": ["copper"]}))
+        assert store.data_version() == v0
+        assert store.table_row_counts(["universe_cache"]) == {"universe_cache": 1}
+
+    def test_data_digest_covers_rows_up_to_date(self, tmp_path):
+        store = DataStore(str(tmp_path / "s.db"))
+        store.save_dataframe("stock_daily", _rows(5))
+        store.save_dataframe("financials", pd.DataFrame({"symbol": ["SH601899"], "report_date": ["20231231"], "pb": [1.5]}))
+        digest = store.data_digest("2024-01-03")
+        store.save_dataframe("stock_daily", _rows(9))  # rows after the date only
+        assert store.data_digest("2024-01-03") == digest
+        assert store.data_digest("2024-01-09") != digest
+        store.save_dataframe("stock_daily", _rows(1).assign(close=11.0))
+        assert store.data_digest("2024-01-03") != digest
+        digest = store.data_digest("2024-01-03")
+        store.save_dataframe("financials", pd.DataFrame({"symbol": ["SH601899"], "report_date": ["20231231"], "pb": [1.6]}))
+        assert store.data_digest("2024-01-03") != digest
+
+    def test_update_without_new_rows_keeps_version(self, tmp_path):
+        from src.data.pipeline import DataPipeline
+        from src.data.sources.tushare_source import TushareSource
+
+        config = {"data": {"db_path": str(tmp_path / "s.db"), "api_delay_seconds": 0, "max_retries": 0}}
+        store = DataStore(config["data"]["db_path"])
+        store.save_dataframe("stock_daily", _rows(2))
+        v0 = store.data_version()
+        with patch.object(TushareSource, "__init__", lambda self, **kw: None), \
+             patch.object(TushareSource, "fetch_stock_daily", MagicMock(return_value=pd.DataFrame())), \
+             patch.object(TushareSource, "fetch_futures_daily", MagicMock(return_value=pd.DataFrame())), \
+             patch.object(TushareSource, "fetch_macro", MagicMock(return_value=pd.DataFrame())), \
+             patch.object(TushareSource, "fetch_fund_flow", MagicMock(return_value=pd.DataFrame())):
+            DataPipeline(config).run(symbols=["SH601899"])
+        assert store.get_last_updated("macro") is not None
+        assert store.data_version() == v0
+
+    def test_backfill_for_existing_database(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE fund_flow (symbol TEXT NOT NULL, date TEXT NOT NULL, margin_balance REAL, "
+                "northbound_net_buy REAL, northbound_holding REAL, PRIMARY KEY (symbol, date))"
+            )
+            conn.executemany(
+                "INSERT INTO fund_flow (symbol, date) VALUES (?, ?)",
+                [("SH601899", "2024-01-02"), ("SH601899", "2024-01-03")],
+            )
+        store = DataStore(path)
+        assert store.table_row_counts(["fund_flow"]) == {"fund_flow": 2}
@@ -280,3 +280,37 @@ class TestFullPipelineFlow:
         pipeline.run(symbols=["000001"], categories=["stock", "futures", "macro"], force_refresh=False)
         assert mock_futures.called
         assert mock_macro.called
+
+
+# ── Progress events ──────────────────────────────────────────────────────────
+
+
+class TestPipelineProgress:
+    """Pipeline emits one progress event per fetched item."""
+
+    @patch.object(TushareSource, "__init__", _mock_tushare_init)
+    @patch.object(TushareSource, "fetch_stock_daily")
+    @patch.object(TushareSource, "fetch_futures_daily")
+    def test_progress_events(self, mock_futures, mock_stock, pipeline_config):
+        mock_stock.side_effect = [_make_stock_daily_df(5), Exception("API down")]
+        mock_futures.return_value = _make_futures_df(3)
+
+        from src.data.pipeline import DataPipeline
+        events = []
+        pipeline = DataPipeline(pipeline_config)
+        pipeline.run(
+            symbols=["000001", "000002"], categories=["stock", "futures"],
+            progress=events.append,
+        )
+
+        stock = [e for e in events if e["category"] == "stock"]
+        assert [(e["item"], e["done"], e["total"]) for e in stock] == [
+            ("000001", 1, 2), ("000002", 2, 2),
+        ]
+        assert stock[-1]["percent"] == 100.0
+        assert stock[-1]["rows"] == {"stock": 5}
+
+        futures = [e for e in events if e["category"] == "futures"]
+        assert len(futures) == len(pipeline._metals)
+        assert events[-1]["rows"] == {"stock": 5, "futures": 3 * len(pipeline._metals)}
+        assert all(e["type"] == "data" for e in events)
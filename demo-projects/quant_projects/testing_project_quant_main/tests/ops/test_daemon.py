@@ -0,0 +1,160 @@
+"""Tests for the command daemon and its warm caches."""
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.data.storage import DataStore
+from src.ops.daemon import CommandDaemon, run_via_daemon, warm_store
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "settings.yaml"
+    path.write_text(yaml.safe_dump({"data": {"db_path": str(tmp_path / "d.db")}}), encoding="utf-8")
+    return path
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+@pytest.fixture
+def daemon(config_file, tmp_path):
+    seen = []
+
+    def execute(argv, config):
+        seen.append((argv, config))
+        if argv == ["fail"]:
+            raise RuntimeError("boom")
+        store = warm_store(config)
+        print(f"ran {' '.join(argv)} on {type(store).__name__}")
+        return 3 if argv == ["exit3"] else None
+
+    d = CommandDaemon(execute, str(config_file), _load, path=str(tmp_path / "q.sock"))
+    d.seen = seen
+    thread = threading.Thread(target=d.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if (tmp_path / "q.sock").exists():
+            break
+        time.sleep(0.02)
+    yield d
+    d.shutdown()
+    thread.join(timeout=5)
+
+
+class TestDaemon:
+    def test_runs_command_in_daemon(self, daemon, config_file):
+        out = io.StringIO()
+        assert run_via_daemon(["signal"], str(config_file), path=daemon.path, out=out) == 0
+        assert out.getvalue() == "ran signal on PriceCube\n"
+        assert run_via_daemon(["exit3"], str(config_file), path=daemon.path, out=io.StringIO()) == 3
+
+        out = io.StringIO()
+        assert run_via_daemon(["fail"], str(config_file), path=daemon.path, out=out) == 1
+        assert "RuntimeError: boom" in out.getvalue()
+
+    def test_warm_config_and_cache_defaults(self, daemon, config_file):
+        import src.factors.base as base
+        from src.backtest.run_store import config_hash
+        from src.universe import classifier
+
+        run_via_daemon(["a"], str(config_file), path=daemon.path, out=io.StringIO())
+        run_via_daemon(["b"], str(config_file), path=daemon.path, out=io.StringIO())
+        first, second = daemon.seen[0][1], daemon.seen[1][1]
+        assert first is second
+        # Cache settings are daemon state: commands see the config as loaded in-process
+        assert first == _load(config_file)
+        assert config_hash(first) == config_hash(_load(config_file))
+        assert classifier._default_ttl_s == 3600
+        assert base._default_cache_size == 8
+
+    def test_cache_defaults_restored_after_shutdown(self, config_file, tmp_path):
+        import src.factors.base as base
+        from src.universe import classifier
+
+        d = CommandDaemon(lambda argv, config: 0, str(config_file), _load, path=str(tmp_path / "r.sock"))
+        thread = threading.Thread(target=d.serve_forever, daemon=True)
+        thread.start()
+        for _ in range(100):
+            if (tmp_path / "r.sock").exists():
+                break
+            time.sleep(0.02)
+        assert classifier._default_ttl_s == 3600
+        d.shutdown()
+        thread.join(timeout=5)
+        assert classifier._default_ttl_s == 0
+        assert base._default_cache_size == 0
+
+    def test_store_rebuilt_on_data_change(self, daemon, config_file):
+        config = daemon.config(str(config_file))
+        cube = daemon.store(config)
+        assert daemon.store(config) is cube
+        DataStore(config["data"]["db_path"]).save_dataframe("stock_daily", pd.DataFrame({"symbol": ["X"], "date": ["2024-07-01"], "close": [1.0]}))
+        assert daemon.store(config) is not cube
+
+    def test_falls_back_without_daemon(self, daemon, config_file, tmp_path):
+        assert run_via_daemon(["signal"], str(config_file), path=str(tmp_path / "none.sock")) is None
+        daemon.cwd = "/elsewhere"
+        assert run_via_daemon(["signal"], str(config_file), path=daemon.path, out=io.StringIO()) is None
+        assert len(daemon.seen) == 0
+
+    def test_profiled_commands_refused(self, capsys):
+        import main
+
+        assert main._execute(["--profile", "sampling", "signal"], {}) == 2
+        assert "--no-daemon" in capsys.readouterr().out
+
+    def test_refuses_second_daemon(self, daemon, config_file):
+        other = CommandDaemon(lambda argv, config: 0, str(config_file), _load, path=daemon.path)
+        with pytest.raises(RuntimeError, match="already listening"):
+            other.serve_forever()
+
+    def test_no_warm_store_outside_daemon(self):
+        assert warm_store({"data": {"db_path": "unused.db"}}) is None
+
+
+class TestWarmCaches:
+    def test_universe_reused_within_ttl(self):
+        from src.universe import classifier
+
+        universe = pd.DataFrame({"symbol": ["601600.SH"], "name": ["中国铝业"], "subsector": ["aluminum"]})
+        config = {"universe": {"industry_code": "test-ttl", "cache_ttl_s": 60}}
+        with patch.object(classifier, "_fetch_universe", return_value=universe) as fetch:
+            first = classifier.get_universe(config, date="2024-06-28")
+            second = classifier.get_universe(config, date="2024-06-28")
+            classifier.get_universe(config, date="2024-06-27")
+            classifier.get_universe({"universe": {"industry_code": "test-ttl"}}, date="2024-06-28")
+        assert fetch.call_count == 3
+        assert second.equals(first)
+
+    def test_factor_matrix_reused_until_data_changes(self, tmp_path):
+        import src.factors.base as base
+
+        calls = []
+
+        class CountingFactor(base.BaseFactor):
+            name = "counting"
+
+            def compute(self, universe, date, store, config):
+                calls.append(date)
+                return pd.Series(range(len(universe)), index=universe, dtype=float)
+
+        store = DataStore(str(tmp_path / "f.db"))
+        universe = pd.DataFrame({"symbol": ["A", "B", "C"], "name": ["a", "b", "c"], "subsector": ["copper"] * 3})
+        config = {"factors": {"cache_size": 2, "small_universe_warning": 0}}
+        with patch.dict(base._FACTOR_REGISTRY, {"counting": CountingFactor}, clear=True), \
+             patch("src.factors.base.cross_sectional_standardize", side_effect=lambda df, m: df):
+            # Factor modules register on import; import them before the registry is swapped
+            for _ in range(2):
+                first = base.compute_all_factors(config, date="2024-06-28", store=store, universe_df=universe)
+            store.save_dataframe("stock_daily", pd.DataFrame({"symbol": ["X"], "date": ["2024-07-01"], "close": [1.0]}))
+            base.compute_all_factors(config, date="2024-06-28", store=store, universe_df=universe)
+        assert calls == ["2024-06-28", "2024-06-28"]
+        assert first["counting"].tolist() == [0.0, 1.0, 2.0]
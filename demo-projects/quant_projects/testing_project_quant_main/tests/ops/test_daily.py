@@ -0,0 +1,199 @@
+"""Tests for the DAG runner and the daily operations graph."""
+import threading
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.data.storage import DataStore
+from src.ops.dag import DagRunner, Node
+from src.ops.daily import run_daily
+
+
+class TestDagRunner:
+    def test_unchanged_nodes_are_skipped(self, tmp_path):
+        calls = []
+        version = {"a": 1}
+
+        def step(name, value):
+            def fn(deps):
+                calls.append(name)
+                return value(deps)
+            return fn
+
+        nodes = [
+            Node("a", step("a", lambda d: version["a"] % 2), inputs=lambda: dict(version)),
+            Node("b", step("b", lambda d: d["a"] + 10), ("a",)),
+        ]
+        first = DagRunner(nodes, tmp_path).run()
+        assert {r.status for r in first.values()} == {"ran"}
+        assert first["b"].output == 11
+
+        second = DagRunner(nodes, tmp_path).run()
+        assert [r.status for r in second.values()] == ["skipped", "skipped"]
+        assert second["b"].output == 11
+
+        # a reruns but yields the same output: b is reused
+        version["a"] = 3
+        third = DagRunner(nodes, tmp_path).run()
+        assert [r.status for r in third.values()] == ["ran", "skipped"]
+        assert calls == ["a", "b", "a"]
+
+        assert [r.status for r in DagRunner(nodes, tmp_path).run(force=["b"]).values()] == ["skipped", "ran"]
+        assert [r.status for r in DagRunner(nodes, tmp_path).run(force=True).values()] == ["ran", "ran"]
+
+    def test_independent_nodes_run_concurrently(self, tmp_path):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_sibling(deps):
+            barrier.wait()
+            return threading.current_thread().name
+
+        nodes = [
+            Node("x", wait_for_sibling),
+            Node("y", wait_for_sibling),
+            Node("z", lambda deps: sorted(deps), ("x", "y")),
+        ]
+        results = DagRunner(nodes, tmp_path, max_workers=2).run()
+        assert results["x"].output != results["y"].output
+        assert results["z"].output == ["x", "y"]
+
+    def test_nodes_run_in_callers_context(self, tmp_path):
+        from src.data.tracing import active_trace, trace_queries
+
+        nodes = [Node(n, lambda deps: id(active_trace())) for n in ("x", "y")]
+        with trace_queries() as trace:
+            results = DagRunner(nodes, tmp_path, max_workers=2).run()
+        assert results["x"].output == results["y"].output == id(trace)
+
+    def test_failure_blocks_descendants_only(self, tmp_path):
+        def fail(deps):
+            raise RuntimeError("source down")
+
+        nodes = [
+            Node("bad", fail),
+            Node("good", lambda deps: 1),
+            Node("child", lambda deps: 2, ("bad", "good")),
+            Node("grandchild", lambda deps: 3, ("child",)),
+        ]
+        results = DagRunner(nodes, tmp_path).run()
+        assert results["bad"].status == "failed"
+        assert results["bad"].error == "source down"
+        assert results["good"].status == "ran"
+        assert results["child"].status == "blocked"
+        assert results["grandchild"].status == "blocked"
+
+    def test_invalid_graphs_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="unknown"):
+            DagRunner([Node("a", lambda d: 1, ("missing",))], tmp_path)
+        with pytest.raises(ValueError, match="cycle"):
+            DagRunner([Node("a", lambda d: 1, ("b",)), Node("b", lambda d: 1, ("a",))], tmp_path)
+
+
+@pytest.fixture
+def daily_config(config, tmp_path):
+    config["data"]["db_path"] = str(tmp_path / "daily.db")
+    config["daily"] = {"state_dir": str(tmp_path / "state"), "max_workers": 4, "fetch_news": True}
+    config["report"]["output_dir"] = str(tmp_path / "reports")
+    return config
+
+
+def _patches():
+    universe = pd.DataFrame({"symbol": ["601600.SH"], "name": ["中国铝业"], "subsector": ["aluminum"]})
+    return {
+        "pipeline": patch("src.data.pipeline.DataPipeline"),
+        "universe": patch("src.universe.classifier.get_universe", return_value=universe),
+        "news": patch("src.strategy.signal_sets.run_news_pipeline"),
+        "factors": patch("src.factors.base.compute_all_factors",
+                         return_value=pd.DataFrame({"momentum": [0.5]}, index=["601600.SH"])),
+        "timing": patch("src.strategy.timing.compute_timing_signal",
+                        return_value={"position_ratio": 0.6, "gold_hedge": False}),
+        "signals": patch("src.strategy.signal_sets.build_signal_set",
+                         return_value={"set_id": 1, "as_of": "2024-06-28", "n_signals": 0, "signals": []}),
+        "risk": patch("src.risk.alerts.run_daily_risk_check",
+                      return_value={"drawdown": 0.0, "stop_loss_alerts": [], "metal_crash_alerts": []}),
+    }
+
+
+def _run(config, **kwargs):
+    with ExitStack() as stack:
+        mocks = {name: stack.enter_context(p) for name, p in _patches().items()}
+        results = run_daily(config, date="2024-06-28", **kwargs)
+    return results, mocks
+
+
+class TestDailyRun:
+    def test_second_run_skips_everything(self, daily_config):
+        first, mocks = _run(daily_config)
+        assert all(r.status == "ran" for r in first.values())
+        assert mocks["pipeline"].call_count == 4  # one pipeline per ingest category
+        stores = {id(c.kwargs["store"]) for c in mocks["pipeline"].call_args_list}
+        assert len(stores) == 1  # all on the graph's store
+        assert mocks["universe"].call_count == 1
+        assert mocks["factors"].call_args.kwargs["universe_df"]["symbol"].tolist() == ["601600.SH"]
+        signal_kwargs = mocks["signals"].call_args.kwargs
+        assert signal_kwargs["fetch_news"] is False
+        assert signal_kwargs["timing"]["position_ratio"] == 0.6
+        assert first["report"].output is None  # no stored backtest run
+
+        second, mocks = _run(daily_config)
+        assert all(r.status == "skipped" for r in second.values())
+        assert mocks["pipeline"].call_count == 0
+        assert mocks["factors"].call_count == 0
+        assert second["signals"].output["set_id"] == 1
+
+    def test_data_change_reruns_only_affected_nodes(self, daily_config):
+        _run(daily_config)
+        store = DataStore(daily_config["data"]["db_path"])
+        store.save_dataframe("futures_daily", pd.DataFrame({
+            "metal": ["cu"], "date": ["2024-06-28"], "open": [1.0], "high": [1.0],
+            "low": [1.0], "close": [1.0], "volume": [1.0], "open_interest": [1.0],
+        }))
+
+        results, mocks = _run(daily_config)
+        status = {name: r.status for name, r in results.items()}
+        assert status["ingest_futures"] == "skipped"
+        assert status["factors"] == "ran"
+        assert status["timing"] == "ran"
+        # Same factor and timing outputs: the signal set is reused
+        assert status["signals"] == "skipped"
+        assert status["risk"] == "ran"
+        assert mocks["signals"].call_count == 0
+
+    def test_parallel_ingest_on_shared_store(self, daily_config):
+        from src.data.pipeline import DataPipeline
+        from src.data.sources.tushare_source import TushareSource
+
+        def stock_daily(self, symbol, start, end):
+            dates = pd.bdate_range("2024-01-02", periods=60)
+            return pd.DataFrame({"date": dates, "open": 10.0, "high": 10.5, "low": 9.5, "close": 10.0,
+                                 "volume": 1000.0, "amount": 10000.0})
+
+        store = DataStore(daily_config["data"]["db_path"])
+        errors = []
+
+        def ingest(symbols):
+            try:
+                DataPipeline(daily_config, store=store).run(symbols=symbols, categories=["stock"])
+            except Exception as e:  # e.g. sqlite3.OperationalError: database is locked
+                errors.append(e)
+
+        with patch.object(TushareSource, "__init__", lambda self, **kw: None), \
+             patch.object(TushareSource, "fetch_stock_daily", stock_daily):
+            threads = [
+                threading.Thread(target=ingest, args=([f"S{w}{i:02d}" for i in range(15)],)) for w in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert errors == []
+        assert store.table_row_counts(["stock_daily"]) == {"stock_daily": 4 * 15 * 60}
+
+    def test_without_news(self, daily_config):
+        results, mocks = _run(daily_config, fetch_news=False)
+        assert "news" not in results
+        assert mocks["news"].call_count == 0
+        assert results["factors"].status == "ran"
@@ -0,0 +1,134 @@
+"""Tests for run profiling and phase timers."""
+import json
+import pstats
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.ops.profiling import active_profile, phase, profile_run, profile_settings, timed
+from src.strategy.scorer import score_stocks
+
+
+def _busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_phase_is_noop_without_profile():
+    assert active_profile() is None
+    with phase("factors"):
+        pass
+
+    @timed("scoring")
+    def f(x):
+        return x + 1
+
+    assert f(1) == 2
+    assert f.__name__ == "f"
+
+
+def test_phase_timers_aggregate_across_threads(tmp_path):
+    with profile_run("cprofile", "test", output_dir=tmp_path) as session:
+        with phase("outer"):
+            with phase("inner"):
+                time.sleep(0.01)
+            with phase("inner"):
+                pass
+
+        def work():
+            with phase("inner"):
+                pass
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+        with pytest.raises(RuntimeError):
+            with profile_run("sampling", "nested", output_dir=tmp_path):
+                pass
+    assert active_profile() is None
+
+    rows = {r["phase"]: r for r in session.phases()}
+    assert rows["outer"]["count"] == 1
+    assert rows["inner"]["count"] == 3
+    assert rows["outer"]["total_s"] >= rows["inner"]["total_s"] >= 0.01
+    assert "inner" in session.summary()
+
+
+def test_cprofile_writes_pstats_and_phases(tmp_path):
+    with profile_run("cprofile", "backtest", output_dir=tmp_path) as session:
+        score_stocks(pd.DataFrame({"a": [1.0, -1.0], "b": [0.5, 0.0]}, index=["X", "Y"]), {})
+
+    suffixes = sorted(p.name.split("-cprofile")[1] for p in session.artefacts)
+    assert suffixes == [".phases.json", ".pstats"]
+    stats = pstats.Stats(str(session.artefacts[0]))
+    assert any(func[2] == "score_stocks" for func in stats.stats)
+    data = json.loads(session.artefacts[1].read_text(encoding="utf-8"))
+    assert data["label"] == "backtest"
+    assert [r["phase"] for r in data["phases"]] == ["scoring"]
+
+
+def test_sampling_writes_collapsed_stacks_of_worker_threads(tmp_path):
+    def hot_loop():
+        with phase("factors"):
+            _busy(0.2)
+
+    with profile_run("sampling", "daily", output_dir=tmp_path, interval_ms=2) as session:
+        worker = threading.Thread(target=hot_loop, name="worker")
+        worker.start()
+        worker.join()
+
+    collapsed = session.artefacts[0]
+    assert collapsed.suffix == ".collapsed"
+    lines = collapsed.read_text(encoding="utf-8").splitlines()
+    hot = [line for line in lines if line.startswith("thread:worker;") and "hot_loop" in line]
+    assert hot
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in hot) >= 10
+    assert "采样:" in session.summary()
+
+
+def test_memory_reports_allocations_per_phase(tmp_path):
+    with profile_run("memory", "factors", output_dir=tmp_path) as session:
+        with phase("allocation"):
+            blob = [bytearray(1024) for _ in range(2000)]
+        with phase("allocation"):
+            pass
+
+    report = session.artefacts[0].read_text(encoding="utf-8")
+    assert "Top 25 allocation sites" in report
+    assert "Phase allocation (first occurrence):" in report
+    assert "test_profiling.py" in report.split("Phase allocation")[1]
+    row = session.phases()[0]
+    assert row["count"] == 2 and row["net_bytes"] >= 2000 * 1024
+    del blob
+
+
+def test_settings_and_unknown_mode(tmp_path):
+    assert profile_settings({"profiling": {"sample_interval_ms": 1}}) == {
+        "output_dir": "reports/profiles", "interval_ms": 1, "memory_top": 25,
+    }
+    with pytest.raises(ValueError):
+        with profile_run("pyinstrument", output_dir=tmp_path):
+            pass
+    assert active_profile() is None
+
+
+@pytest.mark.parametrize("command", ["serve", "daily"])
+def test_cprofile_refused_for_threaded_commands(command, capsys):
+    import main
+
+    args = main.build_parser().parse_args(["--profile", "cprofile", command])
+    assert main._run_command(args, {}) == 2
+    assert "--profile sampling" in capsys.readouterr().out
+
+
+def test_main_exits_with_command_status(monkeypatch):
+    import main
+
+    monkeypatch.setattr("sys.argv", ["main.py", "--profile", "cprofile", "daily"])
+    monkeypatch.setattr(main, "load_config", lambda path: {})
+    with pytest.raises(SystemExit) as exc:
+        main.main()
+    assert exc.value.code == 2
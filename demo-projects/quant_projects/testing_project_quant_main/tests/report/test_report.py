@@ -63,12 +63,17 @@ def test_export_html(tmp_path):
         "total_costs": 5000,
     }
     config = {"report": {"format": "html", "output_dir": str(tmp_path)}}
-    path = export_report(config, nav_series=nav, metrics=metrics)
+    resampling = {
+        "n_resamples": 1000, "block_size": 20, "confidence": 0.95, "prob_sharpe_positive": 0.91,
+        "intervals": {"sharpe_ratio": {"low": -0.3, "median": 1.1, "high": 2.4}},
+    }
+    path = export_report(config, nav_series=nav, metrics=metrics, resampling=resampling)
     assert path.endswith(".html")
     with open(path, encoding="utf-8") as f:
         content = f.read()
     assert "15.00%" in content
     assert "绩效概览" in content
+    assert "置信区间" in content and "91.0%" in content and "-0.30" in content
 
 
 def test_empty_nav_chart():
@@ -80,3 +80,72 @@ def test_empty_drawdown():
     dd, dur = compute_max_drawdown([])
     assert dd == 0.0
     assert dur == 0
+
+
+def _price_store(tmp_path, n_days=300, symbols=("A", "B", "C", "D"), late=("D", 150), delisted=None):
+    from src.data.storage import DataStore
+
+    store = DataStore(str(tmp_path / "cov.db"))
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range("2023-01-02", periods=n_days).strftime("%Y-%m-%d")
+    common = rng.normal(0, 0.01, n_days)
+    for k, sym in enumerate(symbols):
+        closes = 10 * np.cumprod(1 + common * (k + 1) / 2 + rng.normal(0, 0.01, n_days))
+        start = late[1] if sym == late[0] else 0  # listed later
+        end = delisted[1] if delisted and sym == delisted[0] else n_days
+        store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": sym, "date": dates[start:end], "open": closes[start:end], "high": closes[start:end],
+            "low": closes[start:end], "close": closes[start:end], "volume": 1000, "amount": 1e4,
+        }))
+    return store, list(dates)
+
+
+def test_ledoit_wolf_matches_direct_formula():
+    from src.risk.covariance import ledoit_wolf
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 0.02, (60, 8)) @ rng.normal(0, 1, (8, 8))
+    cov, shrinkage = ledoit_wolf(x.T @ x, float(((x ** 2).sum(axis=1) ** 2).sum()), len(x))
+
+    t, n = x.shape
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    d2 = ((sample - mu * np.eye(n)) ** 2).sum()
+    b2 = min(sum(((np.outer(r, r) - sample) ** 2).sum() for r in x) / t ** 2, d2)
+    assert abs(shrinkage - b2 / d2) < 1e-12
+    assert 0 < shrinkage < 1
+    np.testing.assert_allclose(cov, b2 / d2 * mu * np.eye(n) + (1 - b2 / d2) * sample)
+
+
+def test_rolling_covariance_incremental_matches_fresh(tmp_path):
+    from src.risk.covariance import RollingCovariance
+
+    store, dates = _price_store(tmp_path)
+    rolling = RollingCovariance(window=60)
+    for date in dates[70::21]:
+        rolling.update(store, date)
+        fresh = RollingCovariance(window=60).update(store, date)
+        assert rolling.n_obs == fresh.n_obs == 60
+        pd.testing.assert_frame_equal(
+            rolling.covariance(["A", "B", "C", "D"]), fresh.covariance(["A", "B", "C", "D"]),
+            rtol=1e-9, atol=1e-15,
+        )
+    cov = rolling.covariance(["A", "B", "Z"])
+    assert cov.loc["Z", "Z"] > 0 and cov.loc["A", "Z"] == 0
+    assert np.all(np.linalg.eigvalsh(rolling.covariance().to_numpy()) > 0)
+
+
+def test_rolling_covariance_matches_fresh_after_delisting(tmp_path):
+    from src.risk.covariance import RollingCovariance
+
+    store, dates = _price_store(tmp_path, n_days=200, symbols=("A", "B", "C"), late=(None, 0),
+                                delisted=("C", 80))
+    rolling = RollingCovariance(window=60)
+    for date in dates[70::10]:
+        rolling.update(store, date)
+        fresh = RollingCovariance(window=60).update(store, date)
+        pd.testing.assert_frame_equal(rolling.covariance(), fresh.covariance(), rtol=1e-9, atol=1e-15)
+        pd.testing.assert_frame_equal(
+            rolling.covariance(["A", "B", "C"]), fresh.covariance(["A", "B", "C"]), rtol=1e-9, atol=1e-15,
+        )
+    assert list(rolling.covariance().index) == ["A", "B"]
@@ -1,8 +1,9 @@
 """Tests for multi-factor scoring and allocation."""
 import numpy as np
 import pandas as pd
+import pytest
 from src.strategy.scorer import score_stocks, select_top_stocks, _equal_weighted
-from src.strategy.allocator import allocate_weights
+from src.strategy.allocator import allocate_weights, capped_proportional_weights
 
 
 def _make_config(mode="equal_weight"):
@@ -47,6 +48,41 @@ def test_equal_weight_scoring():
     assert scores["A"] > scores["E"]
 
 
+def test_contributions_sum_to_scores():
+    factor_matrix = pd.DataFrame({
+        "f1": [1.0, np.nan, -0.3],
+        "f2": [0.2, -0.1, 0.5],
+    }, index=["A", "B", "C"])
+    config = {"factors": {"weights": {"other": 1.0}}}
+    scores, contributions = score_stocks(factor_matrix, config, with_contributions=True)
+    # Unregistered factors share the "other" weight equally
+    assert contributions.loc["A"].tolist() == pytest.approx([0.5, 0.1])
+    assert np.isnan(contributions.loc["B", "f1"])
+    pd.testing.assert_series_equal(scores, contributions.sum(axis=1))
+    pd.testing.assert_series_equal(scores, score_stocks(factor_matrix, config))
+
+
+def test_generate_signals_attaches_attribution(tmp_path):
+    from unittest.mock import patch
+    from src.strategy.signal import generate_signals
+
+    factor_matrix = pd.DataFrame({"f1": [1.0, 0.5, -1.0], "f2": [0.4, np.nan, 0.0]}, index=["A", "B", "C"])
+    config = {
+        "data": {"db_path": str(tmp_path / "q.db")},
+        "factors": {"weights": {"other": 1.0}},
+        "strategy": {"max_stocks": 2, "top_ratio": 1.0, "max_single_weight": 0.5},
+    }
+    with patch("src.strategy.signal.compute_all_factors", return_value=factor_matrix):
+        signals = generate_signals(config, current_holdings={"Z": 0.2})
+    by_symbol = {s["symbol"]: s for s in signals}
+    assert by_symbol["A"]["score"] == pytest.approx(0.7)
+    assert by_symbol["A"]["factor_contributions"] == pytest.approx({"f1": 0.5, "f2": 0.2})
+    assert by_symbol["B"]["factor_contributions"] == pytest.approx({"f1": 0.25})
+    # Sold holding outside the factor panel
+    assert by_symbol["Z"]["action"] == "SELL"
+    assert by_symbol["Z"]["score"] is None and by_symbol["Z"]["factor_contributions"] == {}
+
+
 def test_select_top_stocks():
     scores = pd.Series({"A": 2.0, "B": 1.5, "C": 0.5, "D": -0.1, "E": -1.0})
     config = _make_config()
@@ -75,6 +111,103 @@ def test_allocate_subsector_cap():
     assert copper_weight <= 0.61  # sub-sector cap 60% + margin
 
 
+def test_allocate_caps_hold_exactly():
+    # Clipping singles first and then sub-sectors pushed D to 30% here
+    scores = pd.Series({"A": 1.0, "B": 1.0, "C": 1.0, "D": 3.0, "E": 0.5, "F": 0.5})
+    config = {"strategy": {"max_single_weight": 0.25, "max_subsector_weight": 0.3}}
+    subsector_map = {"A": "copper", "B": "copper", "C": "copper", "D": "gold", "E": "zinc", "F": "lead"}
+    weights = allocate_weights(list(scores.index), scores, config, subsector_map=subsector_map)
+
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights.max() <= 0.25 + 1e-12
+    assert weights[["A", "B", "C"]].sum() <= 0.3 + 1e-12
+    assert weights.to_dict() == pytest.approx(
+        {"A": 0.1, "B": 0.1, "C": 0.1, "D": 0.25, "E": 0.225, "F": 0.225}
+    )
+
+
+def test_capped_weights_match_bisection_at_scale():
+    rng = np.random.default_rng(0)
+    n, n_groups = 3000, 40
+    base = rng.lognormal(size=n)
+    groups = rng.integers(0, n_groups, n)
+    group_cap = rng.uniform(0.03, 0.08, n_groups)
+    cap = 0.002
+
+    w = capped_proportional_weights(base, cap, groups, group_cap)
+    assert w.sum() == pytest.approx(1.0)
+    assert w.max() <= cap + 1e-12
+    assert (np.bincount(groups, weights=w, minlength=n_groups) <= group_cap + 1e-12).all()
+
+    # Reference: bisection on each group's level, then on the global level
+    p = base / base.sum()
+
+    def level(pp, cc, target):
+        lo, hi = 0.0, 1e9
+        for _ in range(200):
+            mid = (lo + hi) / 2
+            lo, hi = (mid, hi) if (pp * np.minimum(mid, cc)).sum() < target else (lo, mid)
+        return hi
+
+    c = cap / p
+    for g in range(n_groups):
+        m = groups == g
+        if (p[m] * c[m]).sum() > group_cap[g]:
+            c[m] = np.minimum(c[m], level(p[m], c[m], group_cap[g]))
+    expected = p * np.minimum(level(p, c, 1.0), c)
+    np.testing.assert_allclose(w, expected, rtol=1e-7, atol=1e-12)
+
+
+def test_capped_weights_relax_infeasible_caps():
+    w = capped_proportional_weights(np.array([3.0, 1.0]), 0.4)
+    assert w.tolist() == pytest.approx([0.5, 0.5])
+
+
+def _cov():
+    vol = np.array([0.01, 0.02, 0.03, 0.015])
+    corr = np.full((4, 4), 0.3) + 0.7 * np.eye(4)
+    return pd.DataFrame(np.outer(vol, vol) * corr, index=list("ABCD"), columns=list("ABCD"))
+
+
+def test_risk_parity_equalizes_risk_contributions():
+    from src.strategy.allocator import risk_parity_weights
+
+    cov = _cov().to_numpy()
+    w = risk_parity_weights(cov)
+    contributions = w * (cov @ w)
+    assert w.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-8)
+
+
+def test_risk_model_modes_respect_caps():
+    scores = pd.Series({"A": 0.1, "B": 2.0, "C": 1.0, "D": 0.5})
+    subsector_map = {"A": "copper", "B": "copper", "C": "gold", "D": "zinc"}
+    for mode in ("risk_parity", "min_variance_tilt"):
+        config = {"strategy": {"allocation": mode, "max_single_weight": 0.35, "max_subsector_weight": 0.5}}
+        w = allocate_weights(list("ABCD"), scores, config, subsector_map, position_ratio=0.8, covariance=_cov())
+        assert w.sum() == pytest.approx(0.8)
+        assert w.max() <= 0.35 * 0.8 + 1e-9
+        assert w["A"] + w["B"] <= 0.5 * 0.8 + 1e-9
+
+
+def test_min_variance_tilt_moves_weight_to_high_scores():
+    scores = pd.Series({"A": 0.1, "B": 2.0, "C": 1.0, "D": 0.5})
+    weights = {}
+    for tilt in (0.0, 2.0):
+        config = {"strategy": {"allocation": "min_variance_tilt", "score_tilt": tilt, "max_single_weight": 1.0}}
+        weights[tilt] = allocate_weights(list("ABCD"), scores, config, covariance=_cov())
+    # Pure minimum variance favours the least volatile name
+    assert weights[0.0].idxmax() == "A"
+    assert weights[2.0]["B"] > weights[0.0]["B"]
+
+
+def test_risk_model_mode_without_covariance_uses_scores():
+    scores = pd.Series({"A": 1.0, "B": 3.0})
+    config = {"strategy": {"allocation": "risk_parity", "max_single_weight": 1.0}}
+    w = allocate_weights(["A", "B"], scores, config)
+    assert w.tolist() == pytest.approx([0.25, 0.75])
+
+
 def test_allocate_with_position_ratio():
     scores = pd.Series({"A": 1.0, "B": 1.0})
     config = _make_config()
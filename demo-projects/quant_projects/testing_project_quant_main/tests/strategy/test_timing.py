@@ -35,3 +35,98 @@ def test_timing_disabled():
     config = {"timing": {"enabled": False}}
     result = compute_timing_signal(config)
     assert result["position_ratio"] == 1.0
+
+
+def _futures_store(tmp_path, n_days=120):
+    import pandas as pd
+    from src.data.storage import DataStore
+
+    store = DataStore(str(tmp_path / "timing.db"))
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    frames = []
+    for metal, drift in (("cu", 0.002), ("al", -0.001), ("au", 0.003), ("zn", 0.0)):
+        close = 100 * np.cumprod(1 + drift + rng.normal(0, 0.01, n_days))
+        frame = pd.DataFrame({"metal": metal, "date": dates, "close": close})
+        if metal == "al":
+            frame = frame.iloc[10:].drop(index=[40, 41, 77])  # Late start and missing days
+        frames.append(frame)
+    return store, pd.concat(frames, ignore_index=True)
+
+
+def _reference_signal(futures, date, threshold=0.05):
+    """Per-date timing computed from the raw rows at or before ``date``."""
+    def mom(metal, days):
+        close = futures[(futures["metal"] == metal) & (futures["date"] <= date)]["close"].values
+        return close[-1] / close[-(days + 1)] - 1 if len(close) >= days + 1 else np.nan
+
+    m20 = np.nanmean([m for m in (mom("cu", 20), mom("al", 20)) if not np.isnan(m)] or [np.nan])
+    m60 = np.nanmean([m for m in (mom("cu", 60), mom("al", 60)) if not np.isnan(m)] or [np.nan])
+    au = mom("au", 20)
+    hedge = not np.isnan(m20) and m20 < 0 and not np.isnan(au) and au > threshold
+    return _determine_position_ratio(m20, m60), hedge, m20, m60
+
+
+def test_stored_series_matches_per_date_computation(tmp_path):
+    import warnings
+
+    store, futures = _futures_store(tmp_path)
+    store.save_dataframe("futures_daily", futures)
+    config = {"timing": {"gold_hedge_threshold": 0.0}}
+
+    dates = sorted(futures["date"].unique())
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for date in dates[::3] + [dates[-1]]:
+            result = compute_timing_signal(config, date=str(date.date()) + " 23:59", store=store)
+            ratio, hedge, m20, m60 = _reference_signal(futures, date, threshold=0.0)
+            assert result["position_ratio"] == ratio
+            assert result["gold_hedge"] == hedge
+            np.testing.assert_allclose(
+                [result["details"]["avg_mom_20d"], result["details"]["avg_mom_60d"]], [m20, m60]
+            )
+
+    # Before any futures data: cautious default
+    result = compute_timing_signal(config, date="2023-06-01", store=store)
+    assert result["position_ratio"] == 0.6
+    assert result["gold_hedge"] is False
+
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    import pandas as pd
+    from src.strategy.timing import update_timing_series
+
+    store, futures = _futures_store(tmp_path)
+    cutoff = futures["date"].sort_values().unique()[90]
+    store.save_dataframe("futures_daily", futures[futures["date"] < cutoff])
+    update_timing_series(store)
+    store.save_dataframe("futures_daily", futures[futures["date"] >= cutoff])
+    written = update_timing_series(store, since=str(cutoff.date()))
+    assert written == (futures["date"] >= cutoff).groupby(futures["date"]).any().sum()
+    incremental = store.read_table("timing_series").set_index("date")
+
+    update_timing_series(store)
+    rebuilt = store.read_table("timing_series").set_index("date")
+    pd.testing.assert_frame_equal(incremental.sort_index(), rebuilt.sort_index())
+    assert len(rebuilt) == futures[futures["metal"].isin(["cu", "al", "au"])]["date"].nunique()
+
+
+def test_correction_of_past_rows_refreshes_series(tmp_path):
+    store, futures = _futures_store(tmp_path)
+    store.save_dataframe("futures_daily", futures)
+    last = futures["date"].max()
+    date = str(last.date()) + " 23:59"
+    before = compute_timing_signal({}, date=date, store=store)
+
+    # Same latest date, but the close 20 rows back (the 20d momentum base) is corrected
+    cu = futures[futures["metal"] == "cu"].sort_values("date")
+    fixed = cu.iloc[[-21]].assign(close=cu["close"].iloc[-21] * 1.5)
+    store.save_dataframe("futures_daily", fixed)
+    futures = futures.set_index(["metal", "date"])
+    futures.loc[("cu", fixed["date"].iloc[0]), "close"] = fixed["close"].iloc[0]
+    futures = futures.reset_index()
+
+    after = compute_timing_signal({}, date=date, store=store)
+    _, _, m20, m60 = _reference_signal(futures, last)
+    assert after["details"]["avg_mom_20d"] != before["details"]["avg_mom_20d"]
+    np.testing.assert_allclose([after["details"]["avg_mom_20d"], after["details"]["avg_mom_60d"]], [m20, m60])
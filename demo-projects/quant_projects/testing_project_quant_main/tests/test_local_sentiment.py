@@ -0,0 +1,134 @@
+"""Tests for the local sentiment tier and LLM escalation."""
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from src.data.storage import DataStore
+from src.sentiment.analyzer import SentimentAnalyzer
+from src.sentiment.local_model import LexiconModel, LocalSentimentModel, NgramNBModel
+
+
+@pytest.fixture
+def temp_store():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = DataStore(db_path=path)
+    yield store
+    try:
+        os.unlink(path)
+    except PermissionError:
+        pass
+
+
+@pytest.fixture
+def local_config():
+    return {
+        "data": {"db_path": "data/test.db"},
+        "llm": {
+            "provider": "openai",
+            "model": "gpt-4o-mini",
+            "api_key_env": "TEST_LLM_KEY",
+            "batch_size": 5,
+            "max_retries": 0,
+            "local_model": {"enabled": True, "escalate_below": 0.6, "min_train_samples": 4},
+        },
+    }
+
+
+def _insert_news(store, title, published_at="2024-01-01 10:00:00", label=None, model="openai/gpt-4o-mini",
+                 confidence=0.9):
+    with store._get_conn() as conn:
+        cursor = conn.execute(
+            "INSERT INTO news (title, summary, published_at, source, related_symbols, scope, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (title, "", published_at, "test", "[]", "sector", "2024-01-01T11:00:00"),
+        )
+        news_id = cursor.lastrowid
+        if label:
+            conn.execute(
+                "INSERT INTO sentiment_cache (news_id, classification, confidence, sentiment_score, model_name, analyzed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (news_id, label, confidence, 0.0, model, "2024-01-01T12:00:00"),
+            )
+        return news_id
+
+
+class TestLocalModels:
+    def test_lexicon_bullish_and_bearish(self):
+        model = LexiconModel()
+        cls, conf = model.predict("铜价大涨创新高，矿企利好")
+        assert cls == "bullish" and conf >= 0.6
+        cls, conf = model.predict("铝价暴跌，公司预亏")
+        assert cls == "bearish" and conf >= 0.6
+
+    def test_lexicon_no_signal_is_low_confidence(self):
+        cls, conf = LexiconModel().predict("公司召开股东大会")
+        assert cls == "neutral" and conf < 0.6
+
+    def test_ngram_nb_learns_labels(self):
+        texts = ["铜价上涨", "铜价大涨", "铝价上涨", "铜价下跌", "铝价下跌", "锌价下跌"]
+        labels = ["bullish", "bullish", "bullish", "bearish", "bearish", "bearish"]
+        model = NgramNBModel().fit(texts, labels)
+        assert model.predict("锌价上涨")[0] == "bullish"
+        assert model.predict("铜价下跌")[0] == "bearish"
+
+    def test_trains_only_from_llm_labels(self, local_config, temp_store):
+        for i, (title, label) in enumerate([("铜价上涨", "bullish"), ("铝价上涨", "bullish"),
+                                            ("铜价下跌", "bearish"), ("铝价下跌", "bearish")]):
+            _insert_news(temp_store, title, f"2024-01-01 10:0{i}:00", label=label)
+        local = LocalSentimentModel(local_config)
+        assert local.train_from_store(temp_store) is True
+        assert local.model.name == "local/char-ngram-nb"
+
+        # Same rows labeled by the local tier itself are not training data
+        temp_store.clear_table("sentiment_cache")
+        with temp_store._get_conn() as conn:
+            conn.execute("INSERT INTO sentiment_cache SELECT id, 'bullish', 0.9, 0.9, 'local/lexicon', '' FROM news")
+        assert local.train_from_store(temp_store) is False
+        assert local.model.name == "local/lexicon"
+
+
+class TestEscalation:
+    def test_no_api_key_uses_local_tier(self, local_config, temp_store):
+        _insert_news(temp_store, "铜价大涨创新高")
+        with patch.dict(os.environ, {}, clear=True):
+            analyzer = SentimentAnalyzer(local_config, store=temp_store)
+            assert analyzer.analyze_pending() == 1
+        cache = temp_store.read_sentiment_cache()
+        assert cache.iloc[0]["model_name"] == "local/lexicon"
+        assert cache.iloc[0]["sentiment_score"] > 0
+
+    def test_only_low_confidence_escalated(self, local_config, temp_store):
+        confident_id = _insert_news(temp_store, "铜价大涨创新高，矿企利好")
+        unclear_id = _insert_news(temp_store, "公司召开股东大会", "2024-01-01 11:00:00")
+        analyzer = SentimentAnalyzer(local_config, store=temp_store)
+        analyzer._api_key = "test-key"
+
+        raw = json.dumps([{"index": 0, "classification": "bearish", "confidence": 0.7}])
+        with patch.object(analyzer, "_call_llm", return_value=raw) as mock_call:
+            assert analyzer.analyze_pending() == 2
+
+        assert mock_call.call_count == 1
+        assert "股东大会" in mock_call.call_args[0][0]
+        cache = temp_store.read_sentiment_cache().set_index("news_id")
+        assert cache.loc[confident_id, "model_name"] == "local/lexicon"
+        assert cache.loc[unclear_id, "model_name"] == "openai/gpt-4o-mini"
+
+    def test_llm_failure_keeps_local_result_then_escalates_later(self, local_config, temp_store):
+        news_id = _insert_news(temp_store, "公司召开股东大会")
+        analyzer = SentimentAnalyzer(local_config, store=temp_store)
+        analyzer._api_key = "test-key"
+
+        with patch.object(analyzer, "_call_llm", return_value=None):
+            assert analyzer.analyze_pending() == 1
+        assert temp_store.read_sentiment_cache().iloc[0]["model_name"] == "local/lexicon"
+
+        raw = json.dumps([{"index": 0, "classification": "bullish", "confidence": 0.8}])
+        with patch.object(analyzer, "_call_llm", return_value=raw):
+            assert analyzer.analyze_pending() == 1
+        row = temp_store.read_sentiment_cache(news_ids=[news_id]).iloc[0]
+        assert row["model_name"] == "openai/gpt-4o-mini"
+        assert row["classification"] == "bullish"
@@ -130,7 +130,7 @@ class TestResponseParsing:
         raw = json.dumps({"results": [
             {"index": 0, "classification": "bullish", "confidence": 0.85}
         ]})
-        results = analyzer._parse_response(raw, batch)
+        results = analyzer._try_parse(raw, batch)
         assert len(results) == 1
         assert results[0]["classification"] == "bullish"
         assert results[0]["sentiment_score"] == pytest.approx(0.85)
@@ -141,7 +141,7 @@ class TestResponseParsing:
         batch = temp_store.read_unanalyzed_news()
 
         raw = json.dumps([{"index": 0, "classification": "bearish", "confidence": 0.9}])
-        results = analyzer._parse_response(raw, batch)
+        results = analyzer._try_parse(raw, batch)
         assert results[0]["sentiment_score"] == pytest.approx(-0.9)
 
     def test_parse_invalid_json(self, analyzer_config, temp_store):
@@ -149,7 +149,10 @@ class TestResponseParsing:
         _insert_news(temp_store)
         batch = temp_store.read_unanalyzed_news()
 
-        results = analyzer._parse_response("not json at all", batch)
+        assert analyzer._try_parse("not json at all", batch) is None
+
+        with patch.object(analyzer, "_call_llm", return_value="not json at all"):
+            results = analyzer._analyze_batch(batch)
         assert len(results) == 1
         assert results[0]["sentiment_score"] == 0.0
         assert results[0]["classification"] == "neutral"
@@ -160,7 +163,7 @@ class TestResponseParsing:
         batch = temp_store.read_unanalyzed_news()
 
         raw = json.dumps([{"index": 0}])
-        results = analyzer._parse_response(raw, batch)
+        results = analyzer._try_parse(raw, batch)
         assert results[0]["classification"] == "neutral"
         assert results[0]["sentiment_score"] == 0.0
 
@@ -242,3 +245,58 @@ class TestGracefulDegradation:
             _insert_news(temp_store)
             result = analyzer.analyze_pending()
             assert result == 0
+
+
+class TestTokenBudgetBatching:
+    def test_estimate_tokens(self):
+        from src.sentiment.analyzer import estimate_tokens
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("铜价上涨") == 4
+        assert estimate_tokens("copper up") == 3
+
+    def test_batches_respect_token_budget(self, analyzer_config, temp_store):
+        analyzer_config["llm"]["batch_size"] = 100
+        analyzer_config["llm"]["max_prompt_tokens"] = 400
+        for i in range(12):
+            _insert_news(temp_store, title="铜" * 60 + str(i), published_at=f"2024-01-01 10:{i:02d}:00")
+        analyzer = SentimentAnalyzer(analyzer_config, store=temp_store)
+        batches = analyzer.plan_batches(temp_store.read_unanalyzed_news())
+        assert sum(len(b) for b in batches) == 12
+        assert len(batches) > 1
+        from src.sentiment.analyzer import estimate_tokens, _SYSTEM_PROMPT
+        for b in batches:
+            tokens = estimate_tokens(_SYSTEM_PROMPT) + estimate_tokens(analyzer._build_prompt(b))
+            assert tokens <= 400 or len(b) == 1
+
+    def test_batch_size_caps_items(self, analyzer_config, temp_store):
+        for i in range(12):
+            _insert_news(temp_store, title=f"短讯{i}", published_at=f"2024-01-01 10:{i:02d}:00")
+        analyzer = SentimentAnalyzer(analyzer_config, store=temp_store)
+        batches = analyzer.plan_batches(temp_store.read_unanalyzed_news())
+        assert [len(b) for b in batches] == [5, 5, 2]
+
+    def test_parse_failure_splits_batch(self, analyzer_config, temp_store):
+        for i in range(4):
+            _insert_news(temp_store, title=f"新闻{i}", published_at=f"2024-01-01 10:{i:02d}:00")
+        analyzer = SentimentAnalyzer(analyzer_config, store=temp_store)
+        batch = temp_store.read_unanalyzed_news()
+        bad_title = batch.iloc[3]["title"]
+
+        def fake_llm(prompt):
+            if bad_title in prompt:
+                return "not json"
+            n = prompt.count("标题:")
+            return json.dumps([{"index": i, "classification": "bullish", "confidence": 0.8}
+                               for i in range(n)])
+
+        with patch.object(analyzer, "_call_llm", side_effect=fake_llm) as mock_call:
+            results = analyzer._analyze_batch(batch)
+
+        # 4 → fail, [2 ok] + [2 fail → 1 ok + 1 fail]
+        assert mock_call.call_count == 5
+        by_id = {r["news_id"]: r for r in results}
+        assert len(by_id) == 4
+        assert by_id[int(batch.iloc[3]["id"])]["classification"] == "neutral"
+        assert sum(r["classification"] == "bullish" for r in results) == 3
+        assert [s["ok"] for s in analyzer.batch_stats] == [False, True, False, True, False]
+        assert all(s["prompt_tokens"] > 0 for s in analyzer.batch_stats)
@@ -0,0 +1,134 @@
+"""Tests for the local stub LLM server and the analyzer running against it."""
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.data.storage import DataStore
+from src.sentiment.analyzer import SentimentAnalyzer
+from src.sentiment.stub_server import StubConfig, StubLLMServer, deterministic_sentiment
+
+
+@pytest.fixture
+def temp_store():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = DataStore(db_path=path)
+    yield store
+    try:
+        os.unlink(path)
+    except PermissionError:
+        pass
+
+
+def _post(url, payload):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def _insert_news(store, title, published_at):
+    with store._get_conn() as conn:
+        conn.execute(
+            "INSERT INTO news (title, summary, published_at, source, related_symbols, scope, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (title, "摘要", published_at, "test", "[]", "sector", "2024-01-01T11:00:00"),
+        )
+
+
+class TestWireFormats:
+    def test_openai_chat_completions(self):
+        with StubLLMServer() as server:
+            data = _post(f"{server.url}/v1/chat/completions", {
+                "model": "gpt-4o-mini",
+                "messages": [{"role": "system", "content": "sys"},
+                             {"role": "user", "content": "[0] 标题: 铜价上涨\n[1] 标题: 铝价下跌"}],
+            })
+        items = json.loads(data["choices"][0]["message"]["content"])
+        assert [i["index"] for i in items] == [0, 1]
+        assert (items[0]["classification"], items[0]["confidence"]) == deterministic_sentiment("铜价上涨")
+
+    def test_anthropic_messages(self):
+        with StubLLMServer() as server:
+            data = _post(f"{server.url}/v1/messages", {
+                "model": "claude", "max_tokens": 100,
+                "messages": [{"role": "user", "content": [{"type": "text", "text": "[0] 标题: 铜价上涨"}]}],
+            })
+        assert data["type"] == "message"
+        items = json.loads(data["content"][0]["text"])
+        assert len(items) == 1
+
+    def test_error_and_rate_limit_responses(self):
+        with StubLLMServer(StubConfig(error_rate=1.0)) as server:
+            with pytest.raises(urllib.error.HTTPError) as exc:
+                _post(f"{server.url}/v1/chat/completions", {"messages": []})
+            assert exc.value.code == 500
+        with StubLLMServer(StubConfig(rate_limit_rate=1.0, retry_after_s=2)) as server:
+            with pytest.raises(urllib.error.HTTPError) as exc:
+                _post(f"{server.url}/v1/chat/completions", {"messages": []})
+            assert exc.value.code == 429
+            assert exc.value.headers["Retry-After"] == "2"
+            assert server.stats["rate_limited"] == 1
+
+    def test_concurrency_cap(self):
+        config = StubConfig(latency_ms=200, max_concurrency=2)
+        codes = []
+        with StubLLMServer(config) as server:
+            def call():
+                try:
+                    _post(f"{server.url}/v1/chat/completions", {"messages": []})
+                    codes.append(200)
+                except urllib.error.HTTPError as e:
+                    codes.append(e.code)
+            threads = [threading.Thread(target=call) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert server.stats["max_in_flight"] <= 2
+        assert codes.count(429) >= 1
+        assert codes.count(200) >= 2
+
+
+class TestAnalyzerAgainstStub:
+    def test_analyze_pending_end_to_end(self, temp_store):
+        pytest.importorskip("openai")
+        for i in range(7):
+            _insert_news(temp_store, f"铜价新闻{i}", f"2024-01-01 10:0{i}:00")
+        with StubLLMServer() as server:
+            config = {"llm": {
+                "provider": "openai", "model": "stub", "api_key_env": "STUB_KEY",
+                "batch_size": 3, "max_retries": 0, "client_max_retries": 0,
+                "base_url": server.url + "/v1",
+            }}
+            analyzer = SentimentAnalyzer(config, store=temp_store)
+            analyzer._api_key = "stub-key"
+            assert analyzer.analyze_pending() == 7
+            assert server.stats["ok"] == 3
+        cache = temp_store.read_labeled_news().set_index("title")
+        cls, conf = deterministic_sentiment("铜价新闻4")
+        assert cache.loc["铜价新闻4", "classification"] == cls
+        assert cache.loc["铜价新闻4", "confidence"] == pytest.approx(conf)
+
+    def test_malformed_responses_split_batch(self, temp_store):
+        pytest.importorskip("openai")
+        for i in range(4):
+            _insert_news(temp_store, f"铝价新闻{i}", f"2024-01-01 10:0{i}:00")
+        with StubLLMServer(StubConfig(malformed_rate=1.0)) as server:
+            config = {"llm": {
+                "provider": "openai", "model": "stub", "api_key_env": "STUB_KEY",
+                "batch_size": 4, "max_retries": 0, "client_max_retries": 0,
+                "base_url": server.url + "/v1",
+            }}
+            analyzer = SentimentAnalyzer(config, store=temp_store)
+            analyzer._api_key = "stub-key"
+            assert analyzer.analyze_pending() == 4
+            # 4 → 2 + 2 → 1 + 1 + 1 + 1
+            assert server.stats["malformed"] == 7
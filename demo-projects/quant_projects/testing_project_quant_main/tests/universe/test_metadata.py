@@ -0,0 +1,69 @@
+"""Tests for the batched symbol metadata service."""
+import json
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.data.storage import DataStore
+from src.strategy.signal import _get_subsector_map, get_sentiment_labels
+from src.universe.metadata import symbol_metadata
+
+
+def _store(tmp_path):
+    store = DataStore(str(tmp_path / "meta.db"))
+    with store._get_conn() as conn:
+        conn.execute("CREATE TABLE universe_cache (symbol TEXT PRIMARY KEY, name TEXT, subsector TEXT)")
+    store.save_dataframe("universe_cache", pd.DataFrame({
+        "symbol": ["SH601899", "SH600362", "SH600111"],
+        "name": ["紫金矿业", "江西铜业", "北方稀土"],
+        "subsector": ["gold", "copper", "rare_earth"],
+    }))
+    store.save_dataframe("news", pd.DataFrame({
+        "title": ["金价创新高", "铜价回落"],
+        "published_at": ["2024-01-02 10:00:00", "2024-01-03 10:00:00"],
+        "related_symbols": [json.dumps(["SH601899"]), json.dumps(["SH600362"])],
+        "fetched_at": "2024-01-03T00:00:00",
+    }))
+    ids = store.read_table("news").set_index("title")["id"]
+    store.save_dataframe("sentiment_cache", pd.DataFrame({
+        "news_id": [ids["金价创新高"], ids["铜价回落"]],
+        "classification": ["bullish", "bearish"],
+        "confidence": 0.9, "sentiment_score": [0.9, -0.9], "analyzed_at": "2024-01-03T00:00:00",
+    }))
+    return store
+
+
+def test_metadata_for_universe_and_unknown_symbols(tmp_path):
+    store = _store(tmp_path)
+    meta = symbol_metadata(store, ["SH600362", "SH601899", "SH600111", "SZ000001"])
+    assert meta.index.tolist() == ["SH600362", "SH601899", "SH600111", "SZ000001"]
+    assert meta["name"].tolist() == ["江西铜业", "紫金矿业", "北方稀土", "SZ000001"]
+    assert meta["subsector"].tolist() == ["copper", "gold", "rare_earth", "other"]
+    assert meta["metal"].tolist() == ["cu", "au", None, "cu"]
+    assert meta["sentiment_label"].tolist() == [
+        "利空: 铜价回落", "利多: 金价创新高", "中性: 无相关新闻", "中性: 无相关新闻",
+    ]
+
+
+def test_callers_use_constant_queries(tmp_path):
+    store = _store(tmp_path)
+    symbols = ["SH601899", "SH600362", "SH600111"]
+    with patch.object(DataStore, "read_latest_symbol_news", wraps=store.read_latest_symbol_news) as news, \
+            patch.object(DataStore, "read_table", wraps=store.read_table) as read_table:
+        assert _get_subsector_map(symbols, {}, store) == {
+            "SH601899": "gold", "SH600362": "copper", "SH600111": "rare_earth",
+        }
+        labels = get_sentiment_labels(symbols, {}, store=store)
+    assert labels["SH601899"] == "利多: 金价创新高"
+    # One news query for the whole universe, served from cache for the second caller
+    assert news.call_count == 1
+    assert read_table.call_count == 0
+
+
+def test_cache_follows_universe_writes(tmp_path):
+    store = _store(tmp_path)
+    assert symbol_metadata(store, ["SH600111"])["subsector"].iloc[0] == "rare_earth"
+    store.save_dataframe("universe_cache", pd.DataFrame({
+        "symbol": ["SH600111"], "name": ["北方稀土"], "subsector": ["copper"],
+    }))
+    assert symbol_metadata(store, ["SH600111"])["metal"].iloc[0] == "cu"
@@ -18,7 +18,7 @@ def config():
 def app(config):
     """Create a fresh FastAPI app for testing (no static file mount)."""
     from fastapi import FastAPI
-    from src.web.routes import data, universe, factors, signals, risk, backtest, report
+    from src.web.routes import data, universe, factors, signals, risk, backtest, report, jobs
 
     test_app = FastAPI()
     test_app.state.config = config
@@ -29,6 +29,7 @@ def app(config):
     test_app.include_router(risk.router, prefix="/api/risk")
     test_app.include_router(backtest.router, prefix="/api/backtest")
     test_app.include_router(report.router, prefix="/api/report")
+    test_app.include_router(jobs.router, prefix="/api/jobs")
     return test_app
 
 
@@ -14,6 +14,7 @@ class TestRunBacktest:
             "date": ["2024-01-02"], "symbol": ["601600.SH"], "action": ["buy"],
             "price": [15.0], "quantity": [1000],
         })
+        mock_result.run_id, mock_result.cached = "run-1", False
 
         config["report"] = {"output_dir": str(tmp_path)}
 
@@ -29,6 +30,27 @@ class TestRunBacktest:
         assert data["metrics"]["annual_return"] == 0.12
         assert len(data["nav_series"]) == 3
         assert len(data["trade_log"]) == 1
+        assert data["trades_next_cursor"] is None and data["trades_total"] == 1
+
+    def test_run_returns_first_trade_page(self, client, config, tmp_path):
+        mock_result = MagicMock()
+        mock_result.metrics = {}
+        mock_result.nav_series = pd.Series([1e6], index=["2024-01-02"])
+        mock_result.trade_log = pd.DataFrame({
+            "date": ["2024-01-02"] * 25, "symbol": [f"S{i}" for i in range(25)], "action": ["BUY"] * 25,
+            "price": [15.0] * 25, "shares": [100] * 25,
+        })
+        mock_result.run_id, mock_result.cached = "run-2", False
+        config["report"] = {"output_dir": str(tmp_path)}
+
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.return_value = mock_result
+            data = client.post("/api/backtest/run", json={
+                "start_date": "2024-01-01", "end_date": "2024-12-31", "trades_limit": 10,
+            }).json()
+
+        assert [t["symbol"] for t in data["trade_log"]] == [f"S{i}" for i in range(10)]
+        assert data["trades_next_cursor"] == "run-2.10" and data["trades_total"] == 25
 
     def test_run_error(self, client):
         with patch("src.backtest.engine.BacktestEngine") as MockEngine:
@@ -64,3 +86,80 @@ class TestGetLatestBacktest:
 
         assert resp.status_code == 200
         assert "error" in resp.json()
+
+
+class TestRunRoutes:
+    @staticmethod
+    def _result(sharpe, **kwargs):
+        from src.backtest.engine import BacktestResult
+
+        return BacktestResult(
+            nav_series=pd.Series([1e6, 1.05e6], index=["2024-01-02", "2024-01-03"]),
+            trade_log=pd.DataFrame(),
+            metrics={"sharpe_ratio": sharpe},
+            **kwargs,
+        )
+
+    def _run(self, client, sharpe, no_cache=True):
+        result = self._result(sharpe)
+        with patch("src.backtest.engine.BacktestEngine.simulate", return_value=result) as simulate:
+            data = client.post("/api/backtest/run", json={
+                "start_date": "2024-01-01", "end_date": "2024-01-31", "label": f"s{sharpe}",
+                "no_cache": no_cache,
+            }).json()
+        data["simulated"] = simulate.called
+        return data
+
+    def test_each_run_is_kept(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        first = self._run(client, 1.0)
+        second = self._run(client, 2.0)
+        assert first["run_id"] != second["run_id"]
+
+        runs = client.get("/api/backtest/runs").json()
+        assert runs["total"] == 2
+        assert [r["label"] for r in runs["runs"]] == ["s2.0", "s1.0"]
+
+        assert client.get("/api/backtest/latest").json()["metrics"]["sharpe_ratio"] == 2.0
+        older = client.get(f"/api/backtest/runs/{first['run_id']}").json()
+        assert older["metrics"]["sharpe_ratio"] == 1.0
+
+    def test_compare(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        ids = [self._run(client, s)["run_id"] for s in (1.0, 2.0)]
+        data = client.get("/api/backtest/runs/compare", params=[("ids", i) for i in ids]).json()
+        assert [r["run_id"] for r in data["runs"]] == ids
+        assert data["nav_series"][ids[0]][0]["nav"] == 1.0
+
+    def test_identical_run_is_reused(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        before = client.get("/api/backtest/cache").json()
+        first = self._run(client, 1.0, no_cache=False)
+        second = self._run(client, 2.0, no_cache=False)
+
+        assert first["simulated"] and not first["cached"]
+        assert not second["simulated"] and second["cached"]
+        assert second["run_id"] == first["run_id"]
+        assert second["metrics"]["sharpe_ratio"] == 1.0
+        assert client.get("/api/backtest/runs").json()["total"] == 1
+
+        after = client.get("/api/backtest/cache").json()
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 1
+
+    def test_extend_endpoint(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        run_id = self._run(client, 1.0)["run_id"]
+        with patch("src.backtest.engine.BacktestEngine.extend") as extend:
+            extend.return_value = self._result(1.5, run_id="ext-1")
+            data = client.post(f"/api/backtest/runs/{run_id}/extend", json={"end_date": "2024-02-29"}).json()
+        assert extend.call_args.args[:2] == (run_id, "2024-02-29")
+        assert data["run_id"] == "ext-1" and data["extended_from"] == run_id
+
+        # Runs recorded without engine state cannot be extended
+        data = client.post(f"/api/backtest/runs/{run_id}/extend", json={"end_date": "2024-02-29"}).json()
+        assert data["detail"] == "ValueError"
+
+    def test_unknown_run(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        assert "error" in client.get("/api/backtest/runs/nope").json()
@@ -7,7 +7,7 @@ class TestDataStatus:
     def test_returns_all_categories(self, client):
         mock_store = MagicMock()
         mock_store.get_last_updated.return_value = "2024-06-01"
-        mock_store.read_table.return_value = pd.DataFrame({"a": [1, 2, 3]})
+        mock_store.table_row_counts.return_value = {"stock_daily": 3}
 
         with patch("src.data.storage.DataStore", return_value=mock_store):
             resp = client.get("/api/data/status")
@@ -18,11 +18,13 @@ class TestDataStatus:
             assert cat in data
             assert "last_updated" in data[cat]
             assert "rows" in data[cat]
+        assert data["stock"]["rows"] == 3
+        mock_store.read_table.assert_not_called()
 
     def test_handles_missing_table(self, client):
         mock_store = MagicMock()
         mock_store.get_last_updated.return_value = None
-        mock_store.read_table.side_effect = Exception("table not found")
+        mock_store.table_row_counts.return_value = {}
 
         with patch("src.data.storage.DataStore", return_value=mock_store):
             resp = client.get("/api/data/status")
@@ -52,7 +54,8 @@ class TestDataUpdate:
 
         with patch("src.data.pipeline.DataPipeline", return_value=mock_pipeline), \
              patch("src.data.storage.DataStore", return_value=mock_store), \
-             patch("src.universe.classifier.get_universe", return_value=pd.DataFrame({"symbol": ["601600.SH"]})):
+             patch("src.universe.classifier.get_universe", return_value=pd.DataFrame({"symbol": ["601600.SH"]})), \
+             patch("src.strategy.signal_sets.build_signal_set", return_value={"set_id": 7}) as build:
             resp = client.post("/api/data/update", json={"categories": ["all"]})
 
         assert resp.status_code == 200
@@ -60,6 +63,8 @@ class TestDataUpdate:
         assert data["status"] == "ok"
         assert "results" in data
         mock_pipeline.run.assert_called_once()
+        build.assert_called_once()
+        assert data["signal_set_id"] == 7
 
     def test_update_specific_category(self, client):
         mock_pipeline = MagicMock()
@@ -68,7 +73,8 @@ class TestDataUpdate:
         mock_store.read_table.return_value = pd.DataFrame({"a": range(5)})
 
         with patch("src.data.pipeline.DataPipeline", return_value=mock_pipeline), \
-             patch("src.data.storage.DataStore", return_value=mock_store):
+             patch("src.data.storage.DataStore", return_value=mock_store), \
+             patch("src.strategy.signal_sets.build_signal_set", return_value={"set_id": 1}):
             resp = client.post("/api/data/update", json={"categories": ["macro"]})
 
         assert resp.status_code == 200
@@ -84,7 +90,8 @@ class TestDataUpdate:
         mock_store.read_table.return_value = pd.DataFrame({"a": range(5)})
 
         with patch("src.data.pipeline.DataPipeline", return_value=mock_pipeline), \
-             patch("src.data.storage.DataStore", return_value=mock_store):
+             patch("src.data.storage.DataStore", return_value=mock_store), \
+             patch("src.strategy.signal_sets.build_signal_set", return_value={"set_id": 1}):
             resp = client.post("/api/data/update", json={"categories": ["macro"], "force": True})
 
         assert resp.status_code == 200
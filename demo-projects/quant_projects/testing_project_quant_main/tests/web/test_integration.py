@@ -2,6 +2,13 @@
 import pytest
 
 
+@pytest.fixture
+def config(config, tmp_path):
+    """Settings with backtest runs and reports written under tmp_path, not reports/."""
+    config["report"] = {**config.get("report", {}), "output_dir": str(tmp_path), "runs_dir": str(tmp_path / "runs")}
+    return config
+
+
 class TestAllEndpoints:
     """Verify every API endpoint returns valid JSON with expected structure."""
 
@@ -0,0 +1,214 @@
+"""Unit tests for background jobs and job API routes."""
+import json
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from src.web.jobs import Job, JobManager
+
+
+def _parse_sse(text):
+    """Split an SSE body into (event, id, data) tuples, skipping comments."""
+    messages = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if fields:
+            messages.append((fields.get("event"), fields.get("id"), json.loads(fields["data"])))
+    return messages
+
+
+def _fake_engine_run(start_date, end_date, progress=None, **kwargs):
+    dates = ["2024-01-02", "2024-01-03", "2024-01-04"]
+    for day, (date, nav) in enumerate(zip(dates, [1e6, 1.01e6, 1.02e6]), start=1):
+        progress({"type": "backtest", "date": date, "day": day, "total_days": 3,
+                  "percent": round(100 * day / 3, 2), "nav": nav})
+    result = MagicMock()
+    result.metrics = {"sharpe_ratio": 1.1}
+    result.nav_series = pd.Series([1e6, 1.01e6, 1.02e6], index=dates)
+    result.trade_log = pd.DataFrame()
+    result.run_id, result.cached = "run-1", False
+    return result
+
+
+def _wait_finished(client, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = client.get(f"/api/jobs/{job_id}").json()
+        if data["status"] in ("done", "failed"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobManager:
+    def test_job_runs_and_reports_progress(self):
+        jobs = JobManager(max_workers=1)
+
+        def work(job, n):
+            job.update(step=n)
+            return n * 2
+
+        job = jobs.submit("test", work, 21)
+        jobs._futures[job.id].result(timeout=5)
+        assert job.status == "done"
+        assert job.result == 42
+        assert job.progress == {"step": 21}
+        jobs.shutdown()
+
+    def test_failed_job_records_error(self):
+        jobs = JobManager(max_workers=1)
+
+        def boom(job):
+            raise ValueError("bad input")
+
+        job = jobs.submit("test", boom)
+        jobs._futures[job.id].result(timeout=5)
+        assert job.status == "failed"
+        assert job.error == "bad input"
+        assert job.error_type == "ValueError"
+        jobs.shutdown()
+
+    def test_history_evicts_finished_jobs(self):
+        jobs = JobManager(max_workers=1, max_history=2)
+        for i in range(4):
+            job = jobs.submit("test", lambda job: None)
+            jobs._futures[job.id].result(timeout=5)
+        assert len(jobs.list()) <= 3
+        jobs.shutdown()
+
+    def test_concurrent_submits_keep_futures_with_jobs(self):
+        jobs = JobManager(max_workers=4, max_history=2)
+
+        def submit_many():
+            for _ in range(50):
+                jobs.submit("test", lambda job: None)
+
+        threads = [threading.Thread(target=submit_many) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        jobs.shutdown(wait=True)
+        assert set(jobs._futures) <= set(jobs._jobs)
+
+    def test_emit_sequences_events(self):
+        job = Job(id="j1", kind="test")
+        job.emit({"date": "2024-01-02", "nav": 1.0})
+        job.emit({"date": "2024-01-03", "nav": 1.1})
+        assert [e["seq"] for e in job.events] == [0, 1]
+        assert job.events_since(1) == [{"seq": 1, "date": "2024-01-03", "nav": 1.1}]
+        assert job.progress == {"date": "2024-01-03", "nav": 1.1}
+
+
+class TestBackgroundRoutes:
+    def test_backtest_background_returns_job_id(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        mock_result = MagicMock()
+        mock_result.metrics = {"sharpe_ratio": 1.1}
+        mock_result.nav_series = pd.Series([1e6, 1.01e6], index=["2024-01-02", "2024-01-03"])
+        mock_result.trade_log = pd.DataFrame()
+        mock_result.run_id, mock_result.cached = "run-1", False
+
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.return_value = mock_result
+            resp = client.post("/api/backtest/run", json={
+                "start_date": "2024-01-01", "end_date": "2024-01-31", "background": True,
+            })
+            assert resp.json()["status"] == "submitted"
+            job = _wait_finished(client, resp.json()["job_id"])
+
+        assert job["status"] == "done"
+        assert job["kind"] == "backtest"
+        assert job["result"]["metrics"]["sharpe_ratio"] == 1.1
+
+    def test_failed_background_job(self, client):
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.side_effect = Exception("insufficient data")
+            resp = client.post("/api/backtest/run", json={
+                "start_date": "2024-01-01", "end_date": "2024-01-31", "background": True,
+            })
+            job = _wait_finished(client, resp.json()["job_id"])
+        assert job["status"] == "failed"
+        assert job["error"] == "insufficient data"
+
+    def test_event_loop_free_while_job_runs(self, client):
+        release = threading.Event()
+
+        def slow_factors(config):
+            release.wait(5)
+            return pd.DataFrame({"f": [1.0]}, index=["601600.SH"])
+
+        with patch("src.factors.base.compute_all_factors", side_effect=slow_factors):
+            resp = client.post("/api/factors/compute?background=true")
+            job_id = resp.json()["job_id"]
+            # Other endpoints still answer while the job is running
+            running = client.get(f"/api/jobs/{job_id}").json()
+            assert running["status"] in ("pending", "running")
+            assert "result" not in running
+            assert any(j["job_id"] == job_id for j in client.get("/api/jobs").json()["jobs"])
+            release.set()
+            job = _wait_finished(client, job_id)
+        assert job["result"]["shape"] == [1, 1]
+
+    def test_unknown_job(self, client):
+        resp = client.get("/api/jobs/doesnotexist")
+        assert resp.status_code == 200
+        assert "error" in resp.json()
+
+
+class TestProgressStreaming:
+    def _submit(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        resp = client.post("/api/backtest/run", json={
+            "start_date": "2024-01-01", "end_date": "2024-01-31", "background": True,
+        })
+        return resp.json()["job_id"]
+
+    def test_sse_streams_nav_then_end(self, client, config, tmp_path):
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.side_effect = _fake_engine_run
+            job_id = self._submit(client, config, tmp_path)
+            resp = client.get(f"/api/jobs/{job_id}/events")
+
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        messages = _parse_sse(resp.text)
+        progress = [m for m in messages if m[0] == "progress"]
+        assert [m[1] for m in progress] == ["0", "1", "2"]
+        assert [m[2]["nav"] for m in progress] == [1e6, 1.01e6, 1.02e6]
+        assert messages[-1][0] == "end"
+        assert messages[-1][2]["status"] == "done"
+        assert messages[-1][2]["progress"]["percent"] == 100.0
+
+    def test_sse_resumes_after_last_event_id(self, client, config, tmp_path):
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.side_effect = _fake_engine_run
+            job_id = self._submit(client, config, tmp_path)
+            _wait_finished(client, job_id)
+            resp = client.get(f"/api/jobs/{job_id}/events", headers={"Last-Event-ID": "1"})
+
+        progress = [m for m in _parse_sse(resp.text) if m[0] == "progress"]
+        assert [m[2]["date"] for m in progress] == ["2024-01-04"]
+
+    def test_websocket_streams_events(self, client, config, tmp_path):
+        with patch("src.backtest.engine.BacktestEngine") as MockEngine:
+            MockEngine.return_value.run.side_effect = _fake_engine_run
+            job_id = self._submit(client, config, tmp_path)
+            messages = []
+            with client.websocket_connect(f"/api/jobs/{job_id}/ws") as ws:
+                while True:
+                    msg = ws.receive_json()
+                    messages.append(msg)
+                    if msg["event"] == "end":
+                        break
+
+        assert [m["data"]["day"] for m in messages if m["event"] == "progress"] == [1, 2, 3]
+        assert messages[-1]["data"]["status"] == "done"
+
+    def test_unknown_job_stream(self, client):
+        assert "error" in client.get("/api/jobs/doesnotexist/events").json()
+        with client.websocket_connect("/api/jobs/doesnotexist/ws") as ws:
+            assert ws.receive_json()["event"] == "error"
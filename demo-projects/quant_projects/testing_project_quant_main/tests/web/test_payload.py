@@ -0,0 +1,158 @@
+"""Unit tests for downsampled, paginated and streamed backtest payloads."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestResult
+from src.backtest.run_store import RunStore
+from src.web.payload import CursorError, dumps, lttb_indices, paginate, series_payload
+
+
+def _write_results(report_dir, n_days=500, n_trades=25):
+    dates = pd.bdate_range("2022-01-03", periods=n_days).strftime("%Y-%m-%d")
+    nav = 1e6 * (1 + np.sin(np.linspace(0, 12, n_days)) * 0.1)
+    nav[200] = 0.5e6  # a sharp trough that downsampling must keep
+    result = BacktestResult(
+        nav_series=pd.Series(nav, index=dates),
+        trade_log=pd.DataFrame({
+            "date": dates[:n_trades], "symbol": "601600.SH", "action": "BUY",
+            "shares": range(n_trades), "price": 10.0, "cost": 5.0,
+        }),
+        metrics={"sharpe_ratio": 1.2},
+    )
+    RunStore(report_dir / "runs").save(result, {}, dates[0], dates[-1])
+    return nav
+
+
+class TestLTTB:
+    def test_keeps_endpoints_and_extremes(self):
+        y = np.zeros(1000)
+        y[333], y[666] = 10.0, -10.0
+        idx = lttb_indices(np.arange(1000), y, 50)
+        assert len(idx) == 50
+        assert idx[0] == 0 and idx[-1] == 999
+        assert 333 in idx and 666 in idx
+        assert np.all(np.diff(idx) > 0)
+
+    def test_no_op_when_short(self):
+        assert lttb_indices(np.arange(5), np.ones(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+    def test_series_payload_columnar(self):
+        s = pd.Series([1.0, 2.0, 3.0], index=["2024-01-02", "2024-01-03", "2024-01-04"])
+        payload = series_payload(s, "nav", columnar=True)
+        assert json.loads(dumps(payload)) == {
+            "date": ["2024-01-02", "2024-01-03", "2024-01-04"], "nav": [1.0, 2.0, 3.0],
+        }
+
+    def test_series_payload_records(self):
+        s = pd.Series([1.0, np.nan], index=["2024-01-02", "2024-01-03"])
+        assert json.loads(dumps({"nav": series_payload(s, "nav")})) == {
+            "nav": [{"date": "2024-01-02", "nav": 1.0}, {"date": "2024-01-03", "nav": None}],
+        }
+
+    def test_records_match_row_dicts(self, monkeypatch):
+        import src.web.payload as payload
+
+        df = pd.DataFrame({
+            "date": ["2024-01-02", "2024-01-03"], "symbol": ["601600.SH", "中国/铝业"],
+            "shares": np.array([100, 200], dtype=np.int64), "price": [0.1 + 0.2, np.nan], "flag": [True, False],
+        })
+        expected = json.loads(df.to_json(orient="records"))
+        expected[0]["price"] = 0.1 + 0.2  # exact, not to_json's 10 digits
+        for module_orjson in (payload.orjson, None):
+            monkeypatch.setattr(payload, "orjson", module_orjson)
+            page = paginate(df, "v1", None, None)
+            assert json.loads(dumps({"items": page["items"], "n": page["total"]})) == {"items": expected, "n": 2}
+
+    def test_dumps_handles_numpy_and_nan(self):
+        assert json.loads(dumps({"a": np.array([1.5, np.nan]), "b": np.int64(2)})) == {
+            "a": [1.5, None], "b": 2,
+        }
+
+
+class TestPaginate:
+    def test_cursor_walks_all_rows(self):
+        df = pd.DataFrame({"i": range(7)})
+        seen, cursor = [], None
+        while True:
+            page = paginate(df, "v1", cursor, 3)
+            seen += [r["i"] for r in json.loads(dumps(page["items"]))]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == list(range(7))
+
+    def test_stale_cursor_rejected(self):
+        df = pd.DataFrame({"i": range(7)})
+        cursor = paginate(df, "v1", None, 3)["next_cursor"]
+        with pytest.raises(CursorError):
+            paginate(df, "v2", cursor, 3)
+
+
+class TestRoutes:
+    def test_latest_downsampled(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        nav = _write_results(tmp_path)
+        data = client.get("/api/backtest/latest", params={"max_points": 100}).json()
+        assert len(data["nav_series"]) == 100
+        assert min(p["nav"] for p in data["nav_series"]) == nav.min()
+        assert data["trades_total"] == 25
+        assert len(data["trade_log"]) == 25
+
+    def test_report_downsampled_and_paged(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        _write_results(tmp_path)
+        data = client.get("/api/report", params={
+            "max_points": 50, "trades_limit": 10, "columnar": True,
+        }).json()
+        assert len(data["nav_series"]["nav"]) == 50
+        assert min(data["drawdown_series"]["drawdown"]) == pytest.approx(-0.5, abs=0.1)
+        assert len(data["trade_log"]) == 10
+
+        rest = client.get("/api/backtest/trades", params={
+            "cursor": data["trades_next_cursor"], "limit": 100,
+        }).json()
+        assert [t["shares"] for t in rest["trades"]] == list(range(10, 25))
+        assert rest["next_cursor"] is None
+
+    def test_cursor_pins_its_run(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        _write_results(tmp_path)
+        first = client.get("/api/backtest/trades", params={"limit": 20}).json()
+        _write_results(tmp_path, n_trades=30)
+        rest = client.get("/api/backtest/trades", params={"cursor": first["next_cursor"]}).json()
+        assert rest["run_id"] == first["run_id"]
+        assert rest["total"] == 25
+        assert len(rest["trades"]) == 5
+
+    def test_cursor_for_other_run_rejected(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        _write_results(tmp_path)
+        cursor = client.get("/api/backtest/trades", params={"limit": 5}).json()["next_cursor"]
+        _write_results(tmp_path)
+        latest = client.get("/api/backtest/latest").json()["run_id"]
+        resp = client.get("/api/backtest/trades", params={"run_id": latest, "cursor": cursor})
+        assert "error" in resp.json()
+
+    def test_ndjson_stream(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        _write_results(tmp_path)
+        resp = client.get("/api/backtest/latest/stream", params={"table": "nav"})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(rows) == 500
+        assert set(rows[0]) == {"date", "nav"}
+
+    def test_arrow_stream(self, client, config, tmp_path):
+        config["report"] = {"output_dir": str(tmp_path)}
+        _write_results(tmp_path)
+        resp = client.get("/api/backtest/latest/stream", params={"format": "arrow"})
+        try:
+            import pyarrow as pa
+        except ImportError:
+            assert "error" in resp.json()
+            return
+        table = pa.ipc.open_stream(resp.content).read_all()
+        assert table.num_rows == 25
@@ -30,6 +30,9 @@ class TestGetReport:
         assert data["drawdown_series"][0]["drawdown"] == 0.0
         assert len(data["trade_log"]) == 1
         assert len(data["factor_exposures"]) == 2
+        ci = data["resampling"]["intervals"]["sharpe_ratio"]
+        assert ci["low"] <= ci["median"] <= ci["high"]
+        assert 0 <= data["resampling"]["prob_sharpe_positive"] <= 1
 
     def test_no_data_returns_error(self, client, config, tmp_path):
         config["report"] = {"output_dir": str(tmp_path)}
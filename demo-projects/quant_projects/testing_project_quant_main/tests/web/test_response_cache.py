@@ -0,0 +1,84 @@
+"""Unit tests for the ETag response cache on dashboard endpoints."""
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestResult
+from src.backtest.run_store import RunStore
+from src.data.storage import DataStore
+
+
+@pytest.fixture
+def store(config, tmp_path):
+    config["data"]["db_path"] = str(tmp_path / "cache.db")
+    config["report"] = {"output_dir": str(tmp_path / "reports")}
+    return DataStore(config["data"]["db_path"])
+
+
+def _universe():
+    return pd.DataFrame({"symbol": ["601600.SH"], "name": ["中国铝业"], "subsector": ["aluminum"]})
+
+
+class TestResponseCache:
+    def test_etag_and_304(self, client, store):
+        with patch("src.universe.classifier.get_universe", return_value=_universe()) as mock_get:
+            first = client.get("/api/universe")
+            etag = first.headers["etag"]
+            second = client.get("/api/universe", headers={"If-None-Match": etag})
+            third = client.get("/api/universe")
+
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.content == b""
+        assert third.json() == first.json()
+        assert mock_get.call_count == 1
+
+    def test_query_params_are_part_of_key(self, client, store):
+        with patch("src.universe.classifier.get_universe", return_value=_universe()) as mock_get:
+            client.get("/api/universe")
+            client.get("/api/universe", params={"subsector": "copper"})
+        assert mock_get.call_count == 2
+
+    def test_store_write_invalidates(self, client, store):
+        with patch("src.universe.classifier.get_universe", return_value=_universe()) as mock_get:
+            etag = client.get("/api/universe").headers["etag"]
+            store.save_dataframe("stock_daily", pd.DataFrame({"symbol": ["X"], "date": ["2024-07-01"], "close": [1.0]}))
+            resp = client.get("/api/universe", headers={"If-None-Match": etag})
+        # Recomputed after the write; same content, so the client copy is still valid
+        assert mock_get.call_count == 2
+        assert resp.status_code == 304
+
+    def test_errors_not_cached(self, client, store):
+        with patch("src.universe.classifier.get_universe", side_effect=Exception("network down")) as mock_get:
+            assert "error" in client.get("/api/universe").json()
+            assert "error" in client.get("/api/universe").json()
+        assert mock_get.call_count == 2
+
+    def test_report_invalidated_by_new_backtest_run(self, client, store, config, tmp_path):
+        runs = RunStore(tmp_path / "reports" / "runs")
+        nav = pd.Series([1e6], index=["2024-01-02"])
+        runs.save(BacktestResult(nav, pd.DataFrame(), {"sharpe_ratio": 1.0}), {}, "2024-01-02", "2024-01-02")
+        with patch("src.factors.base.compute_all_factors", return_value=pd.DataFrame()):
+            assert client.get("/api/report").json()["metrics"]["sharpe_ratio"] == 1.0
+            runs.save(BacktestResult(nav, pd.DataFrame(), {"sharpe_ratio": 2.0}), {}, "2024-01-02", "2024-01-02")
+            assert client.get("/api/report").json()["metrics"]["sharpe_ratio"] == 2.0
+
+    def test_data_status_uses_table_stats(self, client, store):
+        store.save_dataframe("stock_daily", pd.DataFrame({
+            "symbol": "SH601899", "date": ["2024-01-02", "2024-01-03"], "close": 10.0,
+        }))
+        assert client.get("/api/data/status").json()["stock"]["rows"] == 2
+
+    def test_data_status_sees_new_update_timestamp(self, client, store):
+        assert client.get("/api/data/status").json()["stock"]["last_updated"] is None
+        store.set_last_updated("stock", "2024-07-01T18:00:00")
+        assert client.get("/api/data/status").json()["stock"]["last_updated"] == "2024-07-01T18:00:00"
+
+    def test_disabled(self, client, store, config):
+        config["web"]["response_cache"] = {"enabled": False}
+        with patch("src.universe.classifier.get_universe", return_value=_universe()) as mock_get:
+            resp = client.get("/api/universe")
+            client.get("/api/universe")
+        assert "etag" not in resp.headers
+        assert mock_get.call_count == 2
@@ -53,3 +53,14 @@ class TestServeCommand:
         """R1-UC9-S1: main.py has serve command."""
         import main
         assert hasattr(main, "cmd_serve")
+
+    def test_cprofile_not_used_for_web_app(self, monkeypatch, caplog):
+        """cProfile would only see the event-loop thread, not the route handlers."""
+        from fastapi.testclient import TestClient
+        from src.web.app import app
+
+        monkeypatch.setenv("QUANT_PROFILE", "cprofile")
+        with patch("src.web.app.start_profile") as start, TestClient(app):
+            pass
+        start.assert_not_called()
+        assert "QUANT_PROFILE=sampling" in caplog.text
@@ -1,51 +1,119 @@
 """Unit tests for signals API routes."""
+import time
 from unittest.mock import patch
 
+import pandas as pd
+import pytest
+
+from src.data.storage import DataStore
+from src.strategy.signal_sets import save_signal_set
+
+_SIGNALS = [
+    {"symbol": "601600.SH", "name": "中国铝业", "score": 0.85, "action": "BUY",
+     "target_weight": 0.15, "factor_contributions": {"momentum": 0.3, "value": 0.2}},
+    {"symbol": "601899.SH", "name": "紫金矿业", "score": 0.4, "action": "ADD",
+     "target_weight": 0.05, "factor_contributions": {}},
+]
+
+
+@pytest.fixture
+def db_config(config, tmp_path):
+    config["data"]["db_path"] = str(tmp_path / "signals.db")
+    return config
+
+
+def _build_patches(signals=_SIGNALS, labels=None):
+    return (
+        patch("src.strategy.signal_sets.run_news_pipeline"),
+        patch("src.strategy.signal_sets.compute_timing_signal",
+              return_value={"position_ratio": 0.6, "gold_hedge": False}),
+        patch("src.strategy.signal_sets.generate_signals", return_value=[dict(s) for s in signals]),
+        patch("src.strategy.signal_sets.get_sentiment_labels", return_value=labels or {}),
+    )
+
 
 class TestGetSignals:
-    def test_returns_signals_with_sentiment(self, client):
-        mock_signals = [
-            {"symbol": "601600.SH", "name": "中国铝业", "score": 0.85, "action": "buy",
-             "target_weight": 0.15, "factor_contributions": {"momentum": 0.3, "value": 0.2}},
-            {"symbol": "601899.SH", "name": "紫金矿业", "score": 0.4, "action": "hold",
-             "target_weight": 0.05, "factor_contributions": {}},
-        ]
-        mock_sentiment = {"601600.SH": "positive", "601899.SH": "neutral"}
-
-        with patch("src.strategy.signal.generate_signals", return_value=mock_signals), \
-             patch("src.strategy.signal.get_sentiment_labels", return_value=mock_sentiment):
+    def test_serves_persisted_set_without_rebuilding(self, client, db_config):
+        store = DataStore(db_config["data"]["db_path"])
+        save_signal_set(store, "2024-06-28", [{**s, "sentiment_label": "利多: 新闻"} for s in _SIGNALS],
+                        {"position_ratio": 1.0, "gold_hedge": False})
+
+        with patch("src.strategy.signal_sets.generate_signals", side_effect=AssertionError("rebuilt")):
             resp = client.get("/api/signals")
 
         assert resp.status_code == 200
         data = resp.json()
-        assert len(data["signals"]) == 2
-        assert data["signals"][0]["signal"] == "buy"
-        assert data["signals"][0]["sentiment_label"] == "positive"
-        assert "momentum" in data["signals"][0]["factor_contributions"]
+        assert data["signal_set"]["as_of"] == "2024-06-28"
+        assert data["signal_set"]["stale"] is False
+        assert [s["symbol"] for s in data["signals"]] == ["601600.SH", "601899.SH"]
+        assert data["signals"][0]["signal"] == "BUY"
+        assert data["signals"][0]["sentiment_label"] == "利多: 新闻"
+        assert data["signals"][0]["factor_contributions"] == {"momentum": 0.3, "value": 0.2}
 
-    def test_empty_signals(self, client):
-        with patch("src.strategy.signal.generate_signals", return_value=[]):
-            resp = client.get("/api/signals")
+    def test_builds_once_when_nothing_stored(self, client, db_config):
+        news, timing, generate, labels = _build_patches(labels={"601600.SH": "利多: 新闻"})
+        with news as fetch, timing, generate as gen, labels:
+            first = client.get("/api/signals").json()
+            second = client.get("/api/signals").json()
 
-        assert resp.status_code == 200
-        assert resp.json()["signals"] == []
-
-    def test_sentiment_failure_still_returns_signals(self, client):
-        mock_signals = [
-            {"symbol": "601600.SH", "score": 0.5, "action": "hold", "target_weight": 0.1},
-        ]
-        with patch("src.strategy.signal.generate_signals", return_value=mock_signals), \
-             patch("src.strategy.signal.get_sentiment_labels", side_effect=Exception("API error")):
-            resp = client.get("/api/signals")
+        assert gen.call_count == 1
+        fetch.assert_called_once()
+        assert gen.call_args.kwargs["position_ratio"] == 0.6
+        assert first == second
+        assert first["signals"][0]["sentiment_label"] == "利多: 新闻"
+        assert first["signals"][1]["sentiment_label"] == ""
 
-        assert resp.status_code == 200
-        data = resp.json()
-        assert len(data["signals"]) == 1
-        assert data["signals"][0]["sentiment_label"] == ""
+    def test_stale_after_data_change(self, client, db_config):
+        store = DataStore(db_config["data"]["db_path"])
+        save_signal_set(store, "2024-06-28", _SIGNALS)
+        store.save_dataframe("stock_daily", pd.DataFrame({"symbol": ["X"], "date": ["2024-07-01"], "close": [1.0]}))
+        assert client.get("/api/signals").json()["signal_set"]["stale"] is True
 
-    def test_error_returns_error(self, client):
-        with patch("src.strategy.signal.generate_signals", side_effect=Exception("fail")):
+    def test_error_returns_error(self, client, db_config):
+        with patch("src.strategy.signal_sets.run_news_pipeline"), \
+             patch("src.strategy.signal_sets.compute_timing_signal", side_effect=Exception("fail")):
             resp = client.get("/api/signals")
 
         assert resp.status_code == 200
         assert "error" in resp.json()
+
+
+class TestRefreshSignals:
+    def test_refresh_persists_new_set(self, client, db_config):
+        store = DataStore(db_config["data"]["db_path"])
+        old_id = save_signal_set(store, "2024-06-27", _SIGNALS[1:])
+
+        news, timing, generate, labels = _build_patches()
+        with news, timing, generate, labels:
+            resp = client.post("/api/signals/refresh?date=2024-06-28")
+
+        data = resp.json()
+        assert data["status"] == "ok"
+        assert data["signal_set"]["set_id"] > old_id
+        assert data["signal_set"]["position_ratio"] == 0.6
+        latest = client.get("/api/signals").json()
+        assert latest["signal_set"]["as_of"] == "2024-06-28"
+        assert len(latest["signals"]) == 2
+
+    def test_sentiment_failure_still_builds(self, client, db_config):
+        news, timing, generate, _ = _build_patches()
+        with news, timing, generate, \
+             patch("src.strategy.signal_sets.get_sentiment_labels", side_effect=Exception("API error")):
+            data = client.post("/api/signals/refresh").json()
+
+        assert len(data["signals"]) == 2
+        assert data["signals"][0]["sentiment_label"] == ""
+
+    def test_background_refresh_returns_job_id(self, client, db_config):
+        news, timing, generate, labels = _build_patches()
+        with news, timing, generate, labels:
+            resp = client.post("/api/signals/refresh?background=true")
+            assert resp.json()["status"] == "submitted"
+            for _ in range(100):
+                job = client.get(f"/api/jobs/{resp.json()['job_id']}").json()
+                if job["status"] in ("done", "failed"):
+                    break
+                time.sleep(0.05)
+        assert job["kind"] == "signals"
+        assert job["status"] == "done"
+        assert job["result"]["signal_set"]["n_signals"] == 2